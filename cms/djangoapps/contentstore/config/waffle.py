@@ -0,0 +1,18 @@
+"""
+This module contains various configuration settings via
+waffle switches for the Contentstore app.
+"""
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+# Namespace
+WAFFLE_NAMESPACE = u'contentstore'
+
+# Switches
+INCREMENTAL_SEARCH_INDEX = u'incremental_search_index'
+
+
+def waffle():
+    """
+    Returns the namespaced, cached, audited Waffle class for Contentstore.
+    """
+    return WaffleSwitchNamespace(name=WAFFLE_NAMESPACE, log_prefix=u'Contentstore: ')
@@ -7,6 +7,7 @@ from abc import ABCMeta, abstractmethod
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import resolve
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy
@@ -14,12 +15,14 @@ from search.search_engine_base import SearchEngine
 from six import add_metaclass
 
 from cms.djangoapps.contentstore.course_group_config import GroupConfiguration
+from contentstore.config.waffle import INCREMENTAL_SEARCH_INDEX, waffle
 from course_modes.models import CourseMode
 from eventtracking import tracker
 from openedx.core.lib.courses import course_image_url
 from xmodule.annotator_mixin import html_to_text
 from xmodule.library_tools import normalize_key_for_search
 from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.split_mongo import BlockKey
 
 # REINDEX_AGE is the default amount of time that we look back for changes
 # that might have happened. If we are provided with a time at which the
@@ -58,6 +61,71 @@ class SearchIndexingError(Exception):
         self.error_list = error_list
 
 
+def get_structure_changes(previous_structure, structure):
+    """
+    Compares two versions of a split modulestore structure.
+
+    Returns the set of the keys of the blocks of the later version whose
+    index documents may differ from those of the earlier version, and the
+    set of the keys of the blocks that were removed from it.
+
+    A block is changed when its update_version differs between the versions.
+    The documents of its descendants are affected as well, since they include
+    values inherited from it, such as the start date and the location path.
+    The documents of the ancestors of changed, added and removed blocks are
+    affected too, since their content groups depend on those of their children.
+    """
+    previous_blocks = previous_structure['blocks']
+    blocks = structure['blocks']
+
+    def get_children(block_data, block_map):
+        """ Returns the keys of the children of the block that are present in block_map """
+        children = (BlockKey(*child) for child in block_data.fields.get('children', []))
+        return [child for child in children if child in block_map]
+
+    changed_blocks = [
+        block_key
+        for block_key, block_data in blocks.iteritems()
+        if block_key not in previous_blocks or
+        previous_blocks[block_key].edit_info.update_version != block_data.edit_info.update_version
+    ]
+    removed_blocks = set(previous_blocks) - set(blocks)
+
+    affected_blocks = set()
+    blocks_to_visit = list(changed_blocks)
+    while blocks_to_visit:
+        block_key = blocks_to_visit.pop()
+        if block_key not in affected_blocks:
+            affected_blocks.add(block_key)
+            blocks_to_visit.extend(get_children(blocks[block_key], blocks))
+
+    def get_parents(block_map):
+        """ Returns the keys of the parents of each block in block_map """
+        block_parents = {}
+        for parent_key, block_data in block_map.iteritems():
+            for child in get_children(block_data, block_map):
+                block_parents.setdefault(child, []).append(parent_key)
+        return block_parents
+
+    parents = get_parents(blocks)
+    ancestors_to_visit = [parent for block_key in changed_blocks for parent in parents.get(block_key, [])]
+    if removed_blocks:
+        previous_parents = get_parents(previous_blocks)
+        ancestors_to_visit.extend(
+            parent
+            for block_key in removed_blocks
+            for parent in previous_parents.get(block_key, [])
+            if parent in blocks
+        )
+    while ancestors_to_visit:
+        block_key = ancestors_to_visit.pop()
+        if block_key not in affected_blocks:
+            affected_blocks.add(block_key)
+            ancestors_to_visit.extend(parents.get(block_key, []))
+
+    return affected_blocks, removed_blocks
+
+
 @add_metaclass(ABCMeta)
 class SearchIndexerBase(object):
     """
@@ -132,6 +200,11 @@ class SearchIndexerBase(object):
             which items may need to be removed from the index
             If None, then a full reindex takes place
 
+            When the contentstore.incremental_search_index waffle switch is
+            enabled, only the items affected by the changes made since the last
+            indexed version of the structure are indexed or removed instead, if
+            those changes are available (see get_structure_changes)
+
         Returns:
         Number of items that have been added to the index
         """
@@ -159,12 +232,64 @@ class SearchIndexerBase(object):
         # instead of per item index API call.
         items_index = []
 
+        # blocks_to_index is the set of the keys of the items that are affected by
+        # the changes since the last indexed version, in incremental mode, or None
+        blocks_to_index = None
+
         def get_item_location(item):
             """
             Gets the version agnostic item location
             """
             return item.location.version_agnostic().replace(branch=None)
 
+        def is_affected(item):
+            """
+            Returns whether the item is affected by the changes since the last
+            indexed version, or True if all items are indexed
+            """
+            return blocks_to_index is None or BlockKey.from_usage_key(item.location) in blocks_to_index
+
+        def add_split_test_groups_usage(item, groups_usage_info):
+            """
+            Adds the groups of the children of the split_test item, and of their
+            children, to groups_usage_info
+            """
+            if item.category == "split_test":
+                split_partition = item.get_selected_partition()
+                for split_test_child in item.get_children():
+                    if split_partition:
+                        for group in split_partition.groups:
+                            group_id = unicode(group.id)
+                            child_location = item.group_id_to_child.get(group_id, None)
+                            if child_location == split_test_child.location:
+                                groups_usage_info.update({
+                                    unicode(get_item_location(split_test_child)): [group_id],
+                                })
+                                for component in split_test_child.get_children():
+                                    groups_usage_info.update({
+                                        unicode(get_item_location(component)): [group_id]
+                                    })
+
+        def get_unaffected_content_groups(item, groups_usage_info):
+            """
+            Returns the content groups that prepare_item_index would return for the
+            unaffected item, without building the index dictionaries of the item and
+            its descendants, which are not indexed again
+
+            The descendants are only walked while the course has content groups,
+            since their content groups can only change the result then
+            """
+            if not groups_usage_info or not hasattr(item, "index_dictionary"):
+                return None
+            add_split_test_groups_usage(item, groups_usage_info)
+            item_content_groups = groups_usage_info.get(unicode(get_item_location(item)), None)
+            if item_content_groups is not None and item.has_children:
+                for child_item in item.get_children():
+                    if modulestore.has_published_version(child_item):
+                        if get_unaffected_content_groups(child_item, groups_usage_info) is None:
+                            return None
+            return item_content_groups
+
         def prepare_item_index(item, skip_index=False, groups_usage_info=None):
             """
             Add this item to the items_index and indexed_items list
@@ -177,6 +302,9 @@ class SearchIndexerBase(object):
                 This should really only be passed from the recursive child calls when
                 this method has determined that it is safe to do so
 
+            In incremental mode, only the items affected by the changes are passed,
+            and only the content groups of their unaffected children are collected
+
             Returns:
             item_content_groups - content groups assigned to indexed item
             """
@@ -188,21 +316,7 @@ class SearchIndexerBase(object):
 
             item_content_groups = None
 
-            if item.category == "split_test":
-                split_partition = item.get_selected_partition()
-                for split_test_child in item.get_children():
-                    if split_partition:
-                        for group in split_partition.groups:
-                            group_id = unicode(group.id)
-                            child_location = item.group_id_to_child.get(group_id, None)
-                            if child_location == split_test_child.location:
-                                groups_usage_info.update({
-                                    unicode(get_item_location(split_test_child)): [group_id],
-                                })
-                                for component in split_test_child.get_children():
-                                    groups_usage_info.update({
-                                        unicode(get_item_location(component)): [group_id]
-                                    })
+            add_split_test_groups_usage(item, groups_usage_info)
 
             if groups_usage_info:
                 item_location = get_item_location(item)
@@ -212,24 +326,34 @@ class SearchIndexerBase(object):
             indexed_items.add(item_id)
             if item.has_children:
                 # determine if it's okay to skip adding the children herein based upon how recently any may have changed
-                skip_child_index = skip_index or \
-                    (triggered_at is not None and (triggered_at - item.subtree_edited_on) > reindex_age)
+                # (in incremental mode, the affected children are indexed however old their changes are)
+                skip_child_index = skip_index or (
+                    blocks_to_index is None and
+                    triggered_at is not None and (triggered_at - item.subtree_edited_on) > reindex_age
+                )
                 children_groups_usage = []
                 for child_item in item.get_children():
-                    if modulestore.has_published_version(child_item):
+                    if not modulestore.has_published_version(child_item):
+                        continue
+                    if is_affected(child_item):
                         children_groups_usage.append(
                             prepare_item_index(
                                 child_item,
                                 skip_index=skip_child_index,
-                                groups_usage_info=groups_usage_info
+                                groups_usage_info=groups_usage_info,
                             )
                         )
+                    else:
+                        children_groups_usage.append(get_unaffected_content_groups(child_item, groups_usage_info))
                 if None in children_groups_usage:
                     item_content_groups = None
 
-            if skip_index or not item_index_dictionary:
+            if not item_index_dictionary:
                 return
 
+            if skip_index:
+                return item_content_groups
+
             item_index = {}
             # if it has something to add to the index, then add it
             try:
@@ -256,11 +380,24 @@ class SearchIndexerBase(object):
                 # First perform any additional indexing from the structure object
                 cls.supplemental_index_information(modulestore, structure)
 
+                structure_changes = None
+                if triggered_at is not None and waffle().is_enabled(INCREMENTAL_SEARCH_INDEX):
+                    structure_changes = cls._get_structure_changes(modulestore, structure_key, structure)
+                if structure_changes is not None:
+                    blocks_to_index, removed_blocks = structure_changes
+
                 # Now index the content
                 for item in structure.get_children():
-                    prepare_item_index(item, groups_usage_info=groups_usage_info)
+                    if is_affected(item):
+                        prepare_item_index(item, groups_usage_info=groups_usage_info)
                 searcher.index(cls.DOCUMENT_TYPE, items_index)
-                cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                if structure_changes is None:
+                    cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                elif removed_blocks:
+                    searcher.remove(cls.DOCUMENT_TYPE, [
+                        unicode(cls._id_modifier(structure_key.make_usage_key(block_key.type, block_key.id)))
+                        for block_key in removed_blocks
+                    ])
         except Exception as err:  # pylint: disable=broad-except
             # broad exception so that index operation does not prevent the rest of the application from working
             log.exception(
@@ -273,8 +410,47 @@ class SearchIndexerBase(object):
         if error_list:
             raise SearchIndexingError('Error(s) present during indexing', error_list)
 
+        cls._set_indexed_version(structure_key, getattr(structure, 'course_version', None))
         return indexed_count["count"]
 
+    @classmethod
+    def _get_structure_changes(cls, modulestore, structure_key, structure):
+        """
+        Returns the changes to the given published structure since its last
+        indexed version (see get_structure_changes), or None if they are not
+        available, in which case the whole structure must be indexed.
+        """
+        indexed_version = cache.get(cls._indexed_version_cache_key(structure_key))
+        version = getattr(structure, 'course_version', None)
+        if indexed_version is None or version is None:
+            return None
+
+        store = modulestore._get_modulestore_for_courselike(structure_key)  # pylint: disable=protected-access
+        if store.get_modulestore_type() != ModuleStoreEnum.Type.split:
+            return None
+
+        # Older structures may have been removed from the modulestore.
+        indexed_structure = store.get_structure(structure_key, indexed_version)
+        current_structure = store.get_structure(structure_key, version)
+        if indexed_structure is None or current_structure is None:
+            return None
+        return get_structure_changes(indexed_structure, current_structure)
+
+    @classmethod
+    def _set_indexed_version(cls, structure_key, version):
+        """
+        Records the version of the structure whose content has been indexed.
+        """
+        if version is not None:
+            cache.set(cls._indexed_version_cache_key(structure_key), unicode(version), None)
+
+    @classmethod
+    def _indexed_version_cache_key(cls, structure_key):
+        """
+        Returns the cache key of the last indexed version of the structure.
+        """
+        return u'{}.indexed_version.{}'.format(cls.INDEX_NAME, structure_key)
+
     @classmethod
     def _do_reindex(cls, modulestore, structure_key):
         """
@@ -15,6 +15,7 @@ from mock import patch
 from pytz import UTC
 from search.search_engine_base import SearchEngine
 
+from contentstore.config.waffle import INCREMENTAL_SEARCH_INDEX, waffle
 from contentstore.courseware_index import (
     CourseAboutSearchIndexer,
     CoursewareSearchIndexer,
@@ -26,6 +27,7 @@ from contentstore.tests.utils import CourseTestCase
 from contentstore.utils import reverse_course_url, reverse_usage_url
 from course_modes.models import CourseMode
 from openedx.core.djangoapps.models.course_details import CourseDetails
+from xmodule.html_module import HtmlDescriptor
 from xmodule.library_tools import normalize_key_for_search
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import SignalHandler, modulestore
@@ -440,6 +442,74 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
         indexed_count = self.reindex_course(store)
         self.assertEqual(indexed_count, 7)
 
+    def _test_incremental_index(self, store, expected_counts):
+        """ Make sure that an incremental index only indexes the items affected by the changes """
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.reindex_course(store), 4)
+
+        html_unit2 = ItemFactory.create(
+            parent_location=self.vertical.location,
+            category="html",
+            display_name="Some other content",
+            publish_item=False,
+            modulestore=store,
+        )
+        before_time = datetime.now(UTC)
+        self.publish_item(store, self.vertical.location)
+        with waffle().override(INCREMENTAL_SEARCH_INDEX):
+            self.assertEqual(self.index_recent_changes(store, before_time), expected_counts[0])
+        self.assertEqual(self.search()["total"], 5)
+
+        self.delete_item(store, html_unit2.location)
+        before_time = datetime.now(UTC)
+        self.publish_item(store, self.vertical.location)
+        with waffle().override(INCREMENTAL_SEARCH_INDEX):
+            self.assertEqual(self.index_recent_changes(store, before_time), expected_counts[1])
+        response = self.search()
+        self.assertEqual(response["total"], 4)
+        self.assertNotIn(
+            unicode(html_unit2.location),
+            [result["data"]["id"] for result in response["results"]],
+        )
+
+    def _test_incremental_index_skips_unaffected(self, store):
+        """ Make sure that an incremental index doesn't build the documents of unaffected items """
+        other_vertical = ItemFactory.create(
+            parent_location=self.sequential.location,
+            category='vertical',
+            display_name='Subsection 2',
+            modulestore=store,
+            publish_item=True,
+        )
+        other_html_unit = ItemFactory.create(
+            parent_location=other_vertical.location,
+            category="html",
+            display_name="Other content",
+            modulestore=store,
+            publish_item=True,
+        )
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.reindex_course(store), 6)
+
+        ItemFactory.create(
+            parent_location=self.vertical.location,
+            category="html",
+            display_name="Some other content",
+            publish_item=False,
+            modulestore=store,
+        )
+        before_time = datetime.now(UTC)
+        self.publish_item(store, self.vertical.location)
+        with waffle().override(INCREMENTAL_SEARCH_INDEX):
+            with patch.object(
+                HtmlDescriptor, 'index_dictionary', autospec=True, side_effect=HtmlDescriptor.index_dictionary
+            ) as mock_index_dictionary:
+                self.index_recent_changes(store, before_time)
+        indexed_block_ids = [args[0].location.block_id for args, __ in mock_index_dictionary.call_args_list]
+        self.assertIn(self.html_unit.location.block_id, indexed_block_ids)
+        self.assertNotIn(other_html_unit.location.block_id, indexed_block_ids)
+        self.assertEqual(self.search()["total"], 7)
+
     def _test_course_about_property_index(self, store):
         """ Test that informational properties in the course object end up in the course_info index """
         display_name = "Help, I need somebody!"
@@ -575,6 +645,22 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
     def test_exception(self, store_type):
         self._perform_test_using_store(store_type, self._test_exception)
 
+    @ddt.data(
+        # the ancestors of the changed items and the added item
+        (ModuleStoreEnum.Type.split, (4, 3)),
+        # falls back to indexing the recently changed subtrees
+        (ModuleStoreEnum.Type.mongo, (5, 4)),
+    )
+    @ddt.unpack
+    def test_incremental_index(self, store_type, expected_counts):
+        self._perform_test_using_store(
+            store_type,
+            lambda store: self._test_incremental_index(store, expected_counts)
+        )
+
+    def test_incremental_index_skips_unaffected(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_incremental_index_skips_unaffected)
+
     @ddt.data(*WORKS_WITH_STORES)
     def test_course_about_property_index(self, store_type):
         self._perform_test_using_store(store_type, self._test_course_about_property_index)
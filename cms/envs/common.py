@@ -513,6 +513,17 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Optional pool of persistent sandboxed Python interpreters, with the
+    # standard sandbox packages already imported.
+    'pool': {
+        # How many interpreters to keep running in each process?  0 disables the pool.
+        'size': 0,
+        # After how many executions is an interpreter replaced?
+        'max_runs': 100,
+        # Above how many bytes of resident memory is an interpreter replaced?
+        'max_memory': 512 * 1024 * 1024,
+    },
 }
 
 ############################ DJANGO_BUILTINS ################################
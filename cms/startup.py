@@ -7,6 +7,7 @@ from django.conf import settings
 
 import cms.lib.xblock.runtime
 import xmodule.x_module
+from capa.safe_exec import configure_sandbox_pool
 from openedx.core.djangoapps.monkey_patch import django_db_models_options
 from openedx.core.djangoapps.theming.core import enable_theming
 from openedx.core.djangoapps.theming.helpers import is_comprehensive_theming_enabled
@@ -51,6 +52,9 @@ def run():
     # validate configurations on startup
     validate_cms_config(settings)
 
+    # Configure the optional pool of sandboxed interpreters used by capa.
+    configure_sandbox_pool(**settings.CODE_JAIL.get('pool', {}))
+
 
 def add_mimetypes():
     """
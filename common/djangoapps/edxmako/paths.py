@@ -25,6 +25,8 @@ class DynamicTemplateLookup(TemplateLookup):
     def __init__(self, *args, **kwargs):
         super(DynamicTemplateLookup, self).__init__(*args, **kwargs)
         self.__original_module_directory = self.template_args['module_directory']
+        # The themed template paths that are not found in this lookup's directories.
+        self._missing_themed_uris = set()
 
     def __repr__(self):
         return "<{0.__class__.__name__} {0.directories}>".format(self)
@@ -49,6 +51,7 @@ class DynamicTemplateLookup(TemplateLookup):
         # Also clear the internal caches. Ick.
         self._collection.clear()
         self._uri_cache.clear()
+        self._missing_themed_uris.clear()
 
     def get_template(self, uri):
         """
@@ -59,7 +62,8 @@ class DynamicTemplateLookup(TemplateLookup):
         e.g if uri is `main.html` then new uri would be something like this `/red-theme/lms/static/main.html`
 
         If still unable to find a template, it will fallback to the default template directories after stripping off
-        the prefix path to theme.
+        the prefix path to theme.  Themed paths that are not found are remembered (unless DEBUG is set), so that later
+        lookups of them go straight to the default template directories.
         """
         # try to get template for the given file from microsite
         template = themed_template(uri)
@@ -67,12 +71,17 @@ class DynamicTemplateLookup(TemplateLookup):
         # if microsite template is not present or request is not in microsite then
         # let mako find and serve a template
         if not template:
-            try:
-                # Try to find themed template, i.e. see if current theme overrides the template
-                template = super(DynamicTemplateLookup, self).get_template(get_template_path_with_theme(uri))
-            except TopLevelLookupException:
-                # strip off the prefix path to theme and look in default template dirs
-                template = super(DynamicTemplateLookup, self).get_template(strip_site_theme_templates_path(uri))
+            # Try to find themed template, i.e. see if current theme overrides the template
+            themed_uri = get_template_path_with_theme(uri)
+            if themed_uri not in self._missing_themed_uris:
+                try:
+                    return super(DynamicTemplateLookup, self).get_template(themed_uri)
+                except TopLevelLookupException:
+                    if not settings.DEBUG:
+                        self._missing_themed_uris.add(themed_uri)
+
+            # strip off the prefix path to theme and look in default template dirs
+            template = super(DynamicTemplateLookup, self).get_template(strip_site_theme_templates_path(uri))
 
         return template
 
@@ -1,3 +1,4 @@
+import os
 import unittest
 
 import ddt
@@ -7,11 +8,14 @@ from django.http import HttpResponse
 from django.test import TestCase
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
+from mako.lookup import TemplateLookup
 from mock import Mock, patch
 
 from edxmako import LOOKUP, add_lookup
+from edxmako.paths import DynamicTemplateLookup
 from edxmako.request_context import get_template_request_context
 from edxmako.shortcuts import is_any_marketing_link_set, is_marketing_link_set, marketing_link, render_to_string
+from openedx.core.lib.tempdir import mkdtemp_clean
 from request_cache.middleware import RequestCache
 from student.tests.factories import UserFactory
 from util.testing import UrlResetMixin
@@ -76,6 +80,31 @@ class AddLookupTests(TestCase):
         self.assertTrue(dirs[0].endswith('management'))
 
 
+class DynamicTemplateLookupTests(TestCase):
+    """
+    Test the `DynamicTemplateLookup` class.
+    """
+    def setUp(self):
+        super(DynamicTemplateLookupTests, self).setUp()
+        self.lookup = DynamicTemplateLookup(module_directory=mkdtemp_clean())
+        template_dir = mkdtemp_clean()
+        with open(os.path.join(template_dir, 'default.html'), 'w') as template_file:
+            template_file.write('default')
+        self.lookup.add_directory(template_dir)
+
+    @patch('edxmako.paths.get_template_path_with_theme', Mock(return_value='red-theme/lms/templates/default.html'))
+    def test_missing_themed_template_remembered(self):
+        original_get_template = TemplateLookup.get_template
+        with patch.object(TemplateLookup, 'get_template', autospec=True) as mock_get_template:
+            mock_get_template.side_effect = original_get_template
+            for _ in range(2):
+                self.assertEqual(self.lookup.get_template('default.html').render(), 'default')
+        self.assertEqual(
+            [uri for (__, uri), __ in mock_get_template.call_args_list],
+            ['red-theme/lms/templates/default.html', 'default.html', 'default.html'],
+        )
+
+
 class MakoRequestContextTest(TestCase):
     """
     Test MakoMiddleware.
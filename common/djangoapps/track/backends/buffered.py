@@ -0,0 +1,233 @@
+"""
+Event tracker backend that buffers events in memory, and sends them to
+another backend in batches from a background thread, so that requests do
+not wait for the events to be stored.
+
+The backend is configured with the engine and options of the backend that
+stores the events, for example::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.buffered.BufferedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...},
+              },
+              'max_queue_size': 10000,
+              'batch_size': 100,
+              'flush_interval': 1,
+              'overflow_policy': 'drop',
+          }
+      }
+  }
+
+Events are sent in batches of up to batch_size events, or whatever was
+queued within flush_interval seconds of the first event of a batch, using
+the send_batch method of the backend if it has one.  The queue holds up to
+max_queue_size events: when it is full, events are dropped, or with the
+'block' overflow_policy, sending an event waits up to block_timeout seconds
+for the queue to make room before dropping it.  The queued events are sent
+when the process exits.
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+from importlib import import_module
+from Queue import Empty, Full, Queue
+
+from track.backends import BaseBackend
+
+log = logging.getLogger(__name__)
+
+OVERFLOW_DROP = 'drop'
+OVERFLOW_BLOCK = 'block'
+
+# How long to wait for the queued events to be sent when the process exits, in seconds.
+CLOSE_TIMEOUT = 5
+
+# Put on the queue to stop the background thread.
+_STOP = object()
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend that sends events to another backend in batches,
+    from a background thread.
+
+    The number of events that were queued, sent (flushed) and dropped are
+    counted in queued_count, flushed_count and dropped_count.
+    """
+    def __init__(
+            self,
+            backend,
+            max_queue_size=10000,
+            batch_size=100,
+            flush_interval=1,
+            overflow_policy=OVERFLOW_DROP,
+            block_timeout=0.1,
+            **kwargs
+    ):
+        """
+        :Parameters:
+
+          - `backend`: dict with the 'ENGINE' and 'OPTIONS' of the backend
+            that the events are sent to
+          - `max_queue_size`: the number of events that can be queued
+          - `batch_size`: the largest number of events to send at once
+          - `flush_interval`: how long to wait for a batch to fill, in seconds
+          - `overflow_policy`: 'drop' or 'block', see the module docstring
+          - `block_timeout`: how long to wait for room in the queue with the
+            'block' overflow_policy, in seconds
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+
+        if overflow_policy not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError('Invalid overflow policy {}'.format(overflow_policy))
+
+        self.backend = _instantiate_backend(backend['ENGINE'], backend.get('OPTIONS', {}))
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+
+        self.queued_count = 0
+        self.flushed_count = 0
+        self.dropped_count = 0
+
+        self._lock = threading.Lock()
+        self._is_close_registered = False
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def send(self, event):
+        """Queue the event to be sent by the background thread."""
+        event_queue = self._get_queue()
+        try:
+            if self.overflow_policy == OVERFLOW_BLOCK:
+                event_queue.put(event, timeout=self.block_timeout)
+            else:
+                event_queue.put_nowait(event)
+        except Full:
+            self._count('dropped_count', 1)
+            log.warning('Tracking event queue is full, dropping event')
+        else:
+            self._count('queued_count', 1)
+
+    def flush(self):
+        """Send the queued events from the current thread."""
+        batch = []
+        while self._queue is not None:
+            try:
+                event = self._queue.get_nowait()
+            except Empty:
+                break
+            if event is _STOP:
+                # Leave it for the background thread.
+                self._queue.put(_STOP)
+                break
+            batch.append(event)
+            if len(batch) >= self.batch_size:
+                self._send_batch(batch)
+                batch = []
+        if batch:
+            self._send_batch(batch)
+
+    def close(self):
+        """Stop the background thread, after it sends the queued events."""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            event_queue, thread = self._queue, self._thread
+            self._pid = None
+        try:
+            event_queue.put(_STOP, timeout=CLOSE_TIMEOUT)
+        except Full:
+            log.warning('Timed out stopping the tracking event thread')
+            return
+        thread.join(CLOSE_TIMEOUT)
+
+    def _get_queue(self):
+        """
+        Return the queue of the current process, starting its background
+        thread if needed.
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # The queue and thread of a parent process are not usable
+                    # after a fork.
+                    self._queue = Queue(self.max_queue_size)
+                    self._thread = threading.Thread(
+                        target=self._run, args=(self._queue,), name='BufferedBackend'
+                    )
+                    self._thread.daemon = True
+                    self._thread.start()
+                    if not self._is_close_registered:
+                        atexit.register(self.close)
+                        self._is_close_registered = True
+                    self._pid = os.getpid()
+        return self._queue
+
+    def _run(self, event_queue):
+        """Send the queued events in batches until stopped."""
+        is_stopped = False
+        while not is_stopped:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                try:
+                    if deadline is None:
+                        event = event_queue.get()
+                        deadline = time.time() + self.flush_interval
+                    else:
+                        event = event_queue.get(timeout=max(deadline - time.time(), 0))
+                except Empty:
+                    break
+                if event is _STOP:
+                    is_stopped = True
+                    break
+                batch.append(event)
+            if batch:
+                self._send_batch(batch)
+
+    def _send_batch(self, batch):
+        """Send the batch of events to the backend."""
+        try:
+            send_batch = getattr(self.backend, 'send_batch', None)
+            if send_batch is not None:
+                send_batch(batch)
+            else:
+                for event in batch:
+                    self.backend.send(event)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error sending a batch of %d tracking events', len(batch))
+            self._count('dropped_count', len(batch))
+        else:
+            self._count('flushed_count', len(batch))
+
+    def _count(self, counter, count):
+        """Add the count to the given counter."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + count)
+
+
+def _instantiate_backend(engine, options):
+    """
+    Instantiate the backend with the given full class path and options,
+    which may be a track backend or an eventtracking backend.
+    """
+    module_name, _, class_name = engine.rpartition('.')
+    try:
+        backend_class = getattr(import_module(module_name), class_name)
+    except (ValueError, AttributeError, ImportError):
+        raise ValueError('Cannot find event track backend %s' % engine)
+    return backend_class(**options)
@@ -0,0 +1,75 @@
+from __future__ import absolute_import
+
+from django.test import TestCase
+from mock import patch
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
+
+
+class InMemoryBackend(BaseBackend):
+    """Backend that keeps the batches of events that it is sent."""
+    def __init__(self, **kwargs):
+        super(InMemoryBackend, self).__init__(**kwargs)
+        self.batches = []
+
+    def send(self, event):
+        self.batches.append([event])
+
+    def send_batch(self, events):
+        self.batches.append(list(events))
+
+
+class TestBufferedBackend(TestCase):
+    def create_backend(self, **options):
+        """Return a BufferedBackend that sends events to an InMemoryBackend."""
+        backend = BufferedBackend(
+            backend={'ENGINE': 'track.backends.tests.test_buffered.InMemoryBackend'},
+            **options
+        )
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_close_sends_queued_events(self):
+        backend = self.create_backend(batch_size=2, flush_interval=60)
+        events = [{'test': index} for index in range(3)]
+        for event in events:
+            backend.send(event)
+        backend.close()
+
+        self.assertEqual(backend.backend.batches, [events[:2], events[2:]])
+        self.assertEqual((backend.queued_count, backend.flushed_count, backend.dropped_count), (3, 3, 0))
+
+    @patch('track.backends.buffered.threading.Thread')
+    def test_drop_when_full(self, _mock_thread):
+        backend = self.create_backend(max_queue_size=2, batch_size=10)
+        events = [{'test': index} for index in range(3)]
+        for event in events:
+            backend.send(event)
+        backend.flush()
+
+        self.assertEqual(backend.backend.batches, [events[:2]])
+        self.assertEqual((backend.queued_count, backend.flushed_count, backend.dropped_count), (2, 2, 1))
+
+    @patch('track.backends.buffered.threading.Thread')
+    def test_block_when_full(self, _mock_thread):
+        backend = self.create_backend(max_queue_size=1, overflow_policy='block', block_timeout=0.01)
+        backend.send({'test': 1})
+        with patch('track.backends.buffered.Queue.put', wraps=backend._queue.put) as mock_put:  # pylint: disable=protected-access
+            backend.send({'test': 2})
+        mock_put.assert_called_once_with({'test': 2}, timeout=0.01)
+        backend.flush()
+
+        self.assertEqual(backend.backend.batches, [[{'test': 1}]])
+        self.assertEqual((backend.queued_count, backend.flushed_count, backend.dropped_count), (1, 1, 1))
+
+    def test_send_errors_are_counted(self):
+        backend = self.create_backend()
+        with patch.object(InMemoryBackend, 'send_batch', side_effect=Exception):
+            backend.send({'test': 1})
+            backend.close()
+        self.assertEqual((backend.queued_count, backend.flushed_count, backend.dropped_count), (1, 0, 1))
+
+    def test_invalid_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            self.create_backend(overflow_policy='ignore')
@@ -28,6 +28,8 @@ from pyparsing import (
     stringEnd
 )
 
+from openedx.core.lib.cache_utils import LRUCache
+
 import functions
 
 DEFAULT_FUNCTIONS = {
@@ -238,89 +240,226 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
      python numbers.
     -Unary functions are passed as a dictionary from string to function.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
-
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+# Parsing dominates the cost of evaluating an expression, and the same
+# expressions (e.g. a problem's correct answer) are evaluated over and over.
+# Keep the compiled forms of recently seen expressions around.
+COMPILED_EXPRESSION_CACHE_SIZE = 1000
+_compiled_expression_cache = LRUCache()  # pylint: disable=invalid-name
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
 
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return a `CompiledExpression` for `math_expr`, reusing a cached one if
+    the same expression was compiled recently.
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+    Raises the same parse errors as `evaluator`.
+    """
+    key = (math_expr, case_sensitive)
+    compiled = _compiled_expression_cache.get(key)
+    if compiled is None:
+        compiled = CompiledExpression(math_expr, case_sensitive)
+        _compiled_expression_cache.set(key, compiled, COMPILED_EXPRESSION_CACHE_SIZE)
+    return compiled
 
 
-class ParseAugmenter(object):
+class CompiledExpression(object):
     """
-    Holds the data for a particular parse.
+    An expression which has been parsed once into a tree of closures, and
+    can then be evaluated any number of times without re-parsing.
 
-    Retains the `math_expr` and `case_sensitive` so they needn't be passed
-    around method to method.
-    Eventually holds the parse tree and sets of variables as well.
+    Each node of the tree is a function of `(variables, functions)`, the
+    dictionaries returned by `add_defaults`.
     """
     def __init__(self, math_expr, case_sensitive=False):
         """
-        Create the ParseAugmenter for a given math expression string.
-
-        Do the parsing later, when called like `OBJ.parse_algebra()`.
+        Parse and compile `math_expr`.
         """
-        self.case_sensitive = case_sensitive
         self.math_expr = math_expr
-        self.tree = None
+        self.case_sensitive = case_sensitive
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
+        if case_sensitive:
+            self.casify = lambda x: x
+        else:
+            self.casify = lambda x: x.lower()  # Lowercase for case insens.
 
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
+        # No need to go further.
+        if math_expr.strip() == "":
+            self.root = None
+            return
 
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
+        parser = ParseAugmenter(math_expr, case_sensitive)
+        parser.parse_algebra()
+        self.variables_used = parser.variables_used
+        self.functions_used = parser.functions_used
+        self._parser = parser
+        self.root = self._compile_node(parser.tree)
 
-    def parse_algebra(self):
+    def check_variables(self, valid_variables, valid_functions):
         """
-        Parse an algebraic expression into a tree.
+        Confirm that all the variables used in the expression are defined.
 
-        Store a `pyparsing.ParseResult` in `self.tree` with proper groupings to
-        reflect parenthesis and order of operations. Leave all operators in the
-        tree and do not parse any strings of numbers into their float versions.
+        Otherwise, raise an UndefinedVariable containing all bad variables.
+        """
+        if self.root is not None:
+            self._parser.check_variables(valid_variables, valid_functions)
 
-        Adding the groups and result names makes the `repr()` of the result
-        really gross. For debugging, use something like
-          print OBJ.tree.asXML()
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression for one set of variables, like `evaluator`.
+        """
+        if self.root is None:
+            return float('nan')
+
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+        self.check_variables(all_variables, all_functions)
+        return self.root(all_variables, all_functions)
+
+    def evaluate_batch(self, variables_list, functions):
+        """
+        Evaluate the expression for each dictionary of variables in
+        `variables_list` and return the list of results.
+
+        All samples are first evaluated together in a single pass over the
+        tree, with each variable bound to a numpy array of its sampled values.
+        If that pass hits anything that does not vectorize exactly (a
+        floating point error, a function that does not accept arrays, ...),
+        the samples are evaluated one by one with `evaluate` instead, so the
+        results and errors are always the same as for separate evaluations.
+        """
+        if self.root is None or not variables_list:
+            return [self.evaluate(variables, functions) for variables in variables_list]
+
+        all_variables, all_functions = add_defaults(variables_list[0], functions, self.case_sensitive)
+        self.check_variables(all_variables, all_functions)
+
+        try:
+            results = self._evaluate_vectorized(variables_list, functions)
+        except Exception:  # pylint: disable=broad-except
+            results = None
+        if results is None:
+            results = [self.evaluate(variables, functions) for variables in variables_list]
+        return results
+
+    def _evaluate_vectorized(self, variables_list, functions):
         """
+        Evaluate all samples at once with numpy arrays as variables.
+
+        Return None if the samples cannot be evaluated this way.
+        """
+        names = set(variables_list[0])
+        if any(set(variables) != names for variables in variables_list):
+            return None
+        sampled_variables = {
+            name: numpy.array([variables[name] for variables in variables_list])
+            for name in names
+        }
+        all_variables, all_functions = add_defaults(sampled_variables, functions, self.case_sensitive)
+
+        with numpy.errstate(all='raise'):
+            result = numpy.asarray(self.root(all_variables, all_functions))
+
+        num_samples = len(variables_list)
+        if result.shape == ():
+            return [result.item()] * num_samples
+        if result.shape != (num_samples,):
+            return None
+        return result.tolist()
+
+    def _compile_node(self, node):
+        """
+        Return a function of `(variables, functions)` computing the value of
+        the parse tree `node`.
+
+        The arithmetic is performed in the same order as the `eval_*`
+        actions, which remain the reference semantics.
+        """
+        node_name = node.getName()
+        kids = [kid for kid in node if isinstance(kid, ParseResults)]
+        casify = self.casify
+
+        if node_name == 'number':
+            value = eval_number(list(node))
+            return lambda variables, functions: value
+
+        elif node_name == 'variable':
+            name = casify(node[0])
+            return lambda variables, functions: variables[name]
+
+        elif node_name == 'function':
+            name = casify(node[0])
+            argument = self._compile_node(kids[0])
+            return lambda variables, functions: functions[name](argument(variables, functions))
+
+        elif node_name == 'atom':
+            # Parentheses are dropped here.
+            return self._compile_node(kids[0])
+
+        elif node_name == 'power':
+            if len(kids) == 1:
+                return self._compile_node(kids[0])
+            operands = [self._compile_node(kid) for kid in reversed(kids)]
+
+            def evaluate_power(variables, functions):
+                """Exponentiate right to left, like `eval_power`."""
+                return reduce(lambda a, b: b ** a, (operand(variables, functions) for operand in operands))
+            return evaluate_power
+
+        elif node_name == 'parallel':
+            if len(kids) == 1:
+                return self._compile_node(kids[0])
+            operands = [self._compile_node(kid) for kid in kids]
+
+            def evaluate_parallel(variables, functions):
+                """Combine like `eval_parallel`, elementwise for arrays."""
+                values = [operand(variables, functions) for operand in operands]
+                if not any(isinstance(value, numpy.ndarray) for value in values):
+                    return eval_parallel(values)
+                has_zero = reduce(numpy.logical_or, [numpy.equal(value, 0) for value in values])
+                reciprocals = [1. / numpy.where(has_zero, 1., value) for value in values]
+                return numpy.where(has_zero, float('nan'), 1. / sum(reciprocals))
+            return evaluate_parallel
+
+        elif node_name in ('sum', 'product'):
+            if node_name == 'sum':
+                initial, operators = 0.0, {'+': operator.add, '-': operator.sub}
+            else:
+                initial, operators = 1.0, {'*': operator.mul, '/': operator.truediv}
+            steps = []
+            current_op = operators['+'] if node_name == 'sum' else operators['*']
+            for token in node:
+                if isinstance(token, ParseResults):
+                    steps.append((current_op, self._compile_node(token)))
+                else:
+                    current_op = operators[token]
+
+            def evaluate_steps(variables, functions):
+                """Fold the operands left to right, like `eval_sum` and `eval_product`."""
+                total = initial
+                for step_op, operand in steps:
+                    total = step_op(total, operand(variables, functions))
+                return total
+            return evaluate_steps
+
+        else:  # pragma: no cover
+            raise Exception(u"Unknown branch name '{}'".format(node_name))
+
+
+_GRAMMAR = []
+
+
+def _get_grammar():
+    """
+    Return the pyparsing grammar for algebraic expressions.
+
+    Building the grammar is costly compared to parsing short expressions, so
+    it is built on first use and shared by all later parses.
+    """
+    if not _GRAMMAR:
         # 0.33 or 7 or .34 or 16.
         number_part = Word(nums)
         inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
@@ -347,11 +486,9 @@ class ParseAugmenter(object):
         # and may contain numbers afterward.
         inner_varname = Word(alphas + "_", alphanums + "_")
         varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
 
         # Same thing for functions.
         function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
 
         atom = number | function | varname | "(" + expr + ")"
         atom = Group(atom)("atom")
@@ -371,7 +508,59 @@ class ParseAugmenter(object):
 
         # Finish the recursion.
         expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        _GRAMMAR.append(expr + stringEnd)
+    return _GRAMMAR[0]
+
+
+class ParseAugmenter(object):
+    """
+    Holds the data for a particular parse.
+
+    Retains the `math_expr` and `case_sensitive` so they needn't be passed
+    around method to method.
+    Eventually holds the parse tree and sets of variables as well.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        """
+        Create the ParseAugmenter for a given math expression string.
+
+        Do the parsing later, when called like `OBJ.parse_algebra()`.
+        """
+        self.case_sensitive = case_sensitive
+        self.math_expr = math_expr
+        self.tree = None
+        self.variables_used = set()
+        self.functions_used = set()
+
+    def parse_algebra(self):
+        """
+        Parse an algebraic expression into a tree.
+
+        Store a `pyparsing.ParseResult` in `self.tree` with proper groupings to
+        reflect parenthesis and order of operations. Leave all operators in the
+        tree and do not parse any strings of numbers into their float versions.
+        Record the names of the variables and functions used along the way.
+
+        Adding the groups and result names makes the `repr()` of the result
+        really gross. For debugging, use something like
+          print OBJ.tree.asXML()
+        """
+        self.tree = _get_grammar().parseString(self.math_expr)[0]
+
+        def find_names(node):
+            """
+            Store the names of variables and functions found below `node`.
+            """
+            node_name = node.getName()
+            if node_name == 'variable':
+                self.variables_used.add(node[0])
+            elif node_name == 'function':
+                self.functions_used.add(node[0])
+            for kid in node:
+                if isinstance(kid, ParseResults):
+                    find_names(kid)
+
+        find_names(self.tree)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
@@ -3,6 +3,7 @@ Unit tests for calc.py
 """
 
 import unittest
+import mock
 import numpy
 import calc
 from pyparsing import ParseException
@@ -559,3 +560,79 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Run tests for calc.compile_expression and CompiledExpression
+    """
+
+    def test_compile_once(self):
+        """
+        Compiled expressions should be cached and reusable
+        """
+        compiled = calc.compile_expression('x^2 + y')
+        self.assertIs(compiled, calc.compile_expression('x^2 + y'))
+        self.assertIsNot(compiled, calc.compile_expression('x^2 + y', case_sensitive=True))
+        self.assertEqual(compiled.variables_used, {'x', 'y'})
+        self.assertEqual(compiled.evaluate({'x': 3.0, 'y': 1.0}, {}), 10.0)
+        self.assertEqual(compiled.evaluate({'x': 2.0, 'y': 1.0}, {}), 5.0)
+
+    def test_cache_size(self):
+        """
+        The least recently used compiled expressions should be evicted
+        """
+        calc_module = calc.calc
+        calc_module._compiled_expression_cache.clear()  # pylint: disable=protected-access
+        with mock.patch.object(calc_module, 'COMPILED_EXPRESSION_CACHE_SIZE', 2):
+            first = calc.compile_expression('x + 1')
+            second = calc.compile_expression('x + 2')
+            self.assertIs(first, calc.compile_expression('x + 1'))
+            calc.compile_expression('x + 3')
+            self.assertIs(first, calc.compile_expression('x + 1'))
+            self.assertIsNot(second, calc.compile_expression('x + 2'))
+
+    def test_batch_matches_evaluator(self):
+        """
+        Evaluating samples in a batch gives the same results as one by one
+        """
+        expressions = [
+            'x^2 + sin(y)/3 - 2*x',
+            'x || y || 3',
+            '-x^y^2 * (x - y) / 7',
+            '5k + x*i',
+            'sqrt(y) - 1',
+        ]
+        samples = [{'x': 0.1 * index + 1, 'y': 0.3 * index + 1} for index in range(10)]
+        for expression in expressions:
+            expected = [calc.evaluator(sample, {}, expression) for sample in samples]
+            actual = calc.compile_expression(expression).evaluate_batch(samples, {})
+            self.assertEqual(len(actual), len(samples))
+            for actual_value, expected_value in zip(actual, expected):
+                self.assertAlmostEqual(actual_value, expected_value, delta=1e-12)
+
+    def test_batch_constant(self):
+        """
+        Expressions without variables give one result per sample
+        """
+        samples = [{'x': 1.0}, {'x': 2.0}, {'x': 3.0}]
+        self.assertEqual(calc.compile_expression('5').evaluate_batch(samples, {}), [5.0, 5.0, 5.0])
+
+    def test_batch_fallback(self):
+        """
+        Samples which cannot be evaluated together behave as with evaluator
+        """
+        samples = [{'x': 3.0}, {'x': 4.0}]
+        self.assertEqual(calc.compile_expression('fact(x)').evaluate_batch(samples, {}), [6, 24])
+        self.assertTrue(numpy.isnan(calc.compile_expression('x || 0').evaluate_batch(samples, {})[1]))
+
+        with self.assertRaises(ZeroDivisionError):
+            calc.compile_expression('1/(x - 4)').evaluate_batch(samples, {})
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.compile_expression('x + z').evaluate_batch(samples, {})
+
+    def test_empty_expression(self):
+        """
+        An empty expression evaluates to NaN
+        """
+        self.assertTrue(numpy.isnan(calc.compile_expression('  ').evaluate({}, {})))
@@ -13,6 +13,7 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+import hashlib
 import logging
 import os.path
 import re
@@ -32,6 +33,7 @@ from capa.correctmap import CorrectMap
 from capa.safe_exec import safe_exec
 from capa.util import contextualize_text, convert_files_to_filenames
 from openedx.core.djangolib.markup import HTML
+from openedx.core.lib.cache_utils import LRUCache
 from xmodule.stringify import stringify_children
 
 # extra things displayed after "show answers" is pressed
@@ -71,6 +73,15 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# Parsing the problem XML and making it compatible does not depend on the
+# seed or the learner's state, and the same problems are loaded over and over.
+# Keep the trees of recently seen problems around, so that each LoncapaProblem
+# only has to copy one.  Bump the version when the processing of the tree
+# before it is cached changes.
+PROBLEM_TEMPLATE_VERSION = 1
+PROBLEM_TEMPLATE_CACHE_SIZE = 500
+_problem_template_cache = LRUCache()  # pylint: disable=invalid-name
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -176,13 +187,9 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        self.make_xml_compatible(self.tree)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # parse problem XML file into an element tree, with any <include file="foo">
+        # tags resolved
+        self.tree = self._get_problem_tree(problem_text)
 
         # construct script processor context (eg for customresponse problems)
         if minimal_init:
@@ -604,6 +611,31 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _get_problem_tree(self, problem_text):
+        """
+        Returns a copy of the parsed problem tree, made compatible and with its
+        includes resolved, reusing the tree of the same problem text if it was
+        parsed recently.
+
+        Problems with includes are not reused, since the included files may
+        change without the problem text changing.
+        """
+        text_hash = hashlib.sha1(
+            problem_text.encode('utf-8') if isinstance(problem_text, unicode) else problem_text
+        ).hexdigest()
+        key = (PROBLEM_TEMPLATE_VERSION, text_hash)
+        template = _problem_template_cache.get(key)
+        if template is not None:
+            return deepcopy(template)
+
+        self.tree = etree.XML(problem_text)
+        self.make_xml_compatible(self.tree)
+        if self.tree.find('.//include') is None:
+            _problem_template_cache.set(key, deepcopy(self.tree), PROBLEM_TEMPLATE_CACHE_SIZE)
+        else:
+            self._process_includes()
+        return self.tree
+
     def _process_includes(self):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
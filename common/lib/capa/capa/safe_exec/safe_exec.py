@@ -3,7 +3,9 @@
 from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
+from codejail import jail_code
 from . import lazymod
+from .sandbox_pool import SandboxPool
 from dogapi import dog_stats_api
 
 import hashlib
@@ -49,6 +51,31 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# The optional pool of persistent sandboxed interpreters, see configure_sandbox_pool.
+SANDBOX_POOL = None
+
+
+def configure_sandbox_pool(size=0, max_runs=100, max_memory=None):
+    """
+    Configures safe_exec to run sandboxed code in a pool of `size` persistent
+    sandboxed interpreters, which have the ASSUMED_IMPORTS already imported.
+    A `size` of 0 disables the pool.
+
+    Each interpreter is replaced after `max_runs` executions, or when the
+    peak resident memory of an execution exceeds `max_memory` bytes.  See
+    sandbox_pool.py.
+
+    """
+    global SANDBOX_POOL  # pylint: disable=global-statement
+    if SANDBOX_POOL is not None:
+        SANDBOX_POOL.close()
+    if size:
+        SANDBOX_POOL = SandboxPool(
+            size, max_runs, max_memory, preload_modules=[modname for _, modname in ASSUMED_IMPORTS],
+        )
+    else:
+        SANDBOX_POOL = None
+
 
 def update_hash(hasher, obj):
     """
@@ -133,6 +160,8 @@ def safe_exec(
     # Decide which code executor to use.
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif SANDBOX_POOL is not None and jail_code.is_configured("python"):
+        exec_fn = SANDBOX_POOL.safe_exec
     else:
         exec_fn = codejail_safe_exec
 
@@ -0,0 +1,383 @@
+"""
+An optional pool of persistent sandboxed Python interpreters for safe_exec.
+
+Running code with codejail starts a new sandboxed Python process for every
+execution, which then has to import the standard sandbox packages, such as
+numpy and scipy, before the code can run.  A SandboxPool instead keeps a few
+sandboxed interpreters running, with those packages already imported (see
+sandbox_worker.py).  The interpreters are started with the same command,
+user and limits that codejail uses, and each execution is run in a child
+process forked from an interpreter, which is discarded afterwards.
+
+Interpreters are started on the first use of the pool in each process, and
+are replaced after they have served a configured number of executions, if
+an execution uses more than a configured amount of memory, or if they stop
+responding.  An interpreter that cannot isolate itself from the others does
+not serve any executions.  When all interpreters are busy, or an interpreter
+fails, code is executed by codejail as usual.
+"""
+import atexit
+import json
+import logging
+import os
+import os.path
+import resource
+import select
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException, json_safe
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+
+from . import sandbox_worker
+
+log = logging.getLogger(__name__)
+
+# We'll need the code from sandbox_worker.py to run in the sandbox, so read it now.
+sandbox_worker_py_file = sandbox_worker.__file__
+if sandbox_worker_py_file.endswith("c"):
+    sandbox_worker_py_file = sandbox_worker_py_file[:-1]
+
+SANDBOX_WORKER_PY = open(sandbox_worker_py_file).read()
+
+# How long to wait for a new interpreter to import its modules, in seconds.
+STARTUP_TIMEOUT = 30
+
+# How much longer than the REALTIME limit to wait for an interpreter to
+# respond, in seconds, before it is considered hung.
+RESPONSE_GRACE_PERIOD = 5
+
+
+class SandboxPoolError(Exception):
+    """
+    An interpreter in the pool failed, and has been stopped.
+    """
+    pass
+
+
+class SandboxPool(object):
+    """
+    A pool of persistent sandboxed Python interpreters.
+    """
+    def __init__(self, size, max_runs, max_memory, preload_modules=()):
+        """
+        Arguments:
+            size (int) - The number of interpreters in the pool.
+
+            max_runs (int) - The number of executions after which an
+                interpreter is replaced.
+
+            max_memory (int) - The size in bytes of the peak resident
+                memory of an execution, including the memory it shares
+                with its interpreter, above which the interpreter is
+                replaced.
+
+            preload_modules (list of str) - The names of the modules that
+                the interpreters import when they are started.
+        """
+        self.size = size
+        self.max_runs = max_runs
+        self.max_memory = max_memory
+        self.preload_modules = list(preload_modules)
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._idle_workers = []
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Executes the code like codejail.safe_exec.safe_exec, using an idle
+        interpreter from the pool if one is available.
+        """
+        worker = self._acquire()
+        if worker is None:
+            return codejail_safe_exec(
+                code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug,
+            )
+
+        try:
+            error, result = worker.execute(code, json_safe(globals_dict), python_path, extra_files)
+        except SandboxPoolError:
+            log.exception("Sandbox worker failed, executing %s with codejail", slug)
+            return codejail_safe_exec(
+                code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug,
+            )
+        finally:
+            self._release(worker)
+
+        if error is not None:
+            raise SafeExecException("Couldn't execute jailed code: %s" % error)
+        globals_dict.update(result)
+
+    def close(self):
+        """
+        Stops the idle interpreters of the pool in the current process.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                for worker in self._idle_workers:
+                    worker.stop()
+            self._pid = None
+            self._idle_workers = []
+
+    def _acquire(self):
+        """
+        Returns an idle interpreter, or None if all are busy.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # The pool was created or forked in another process, whose
+                # interpreters cannot be shared.
+                self._pid = os.getpid()
+                self._idle_workers = [_SandboxWorker(self.preload_modules) for _ in xrange(self.size)]
+                for worker in self._idle_workers:
+                    worker.start()
+                atexit.register(self.close)
+            if self._idle_workers:
+                return self._idle_workers.pop()
+        return None
+
+    def _release(self, worker):
+        """
+        Returns the given interpreter to the pool, replacing it if needed.
+        """
+        if (
+                not worker.is_running() or
+                (self.max_runs and worker.runs >= self.max_runs) or
+                (self.max_memory and worker.memory > self.max_memory)
+        ):
+            worker.stop()
+            worker = _SandboxWorker(self.preload_modules)
+            worker.start()
+        with self._lock:
+            self._idle_workers.append(worker)
+
+
+class _SandboxWorker(object):
+    """
+    A persistent sandboxed Python interpreter, running sandbox_worker.py.
+    """
+    def __init__(self, preload_modules):
+        self.preload_modules = preload_modules
+        self.runs = 0
+        self.memory = 0
+
+        self._process = None
+        self._home_dir = None
+        self._is_ready = False
+        self._buffer = ""
+
+    def start(self):
+        """
+        Starts the interpreter, without waiting for it to import its
+        modules.
+        """
+        command = jail_code.COMMANDS["python"]
+        self._home_dir = _create_sandbox_dir()
+        with open(os.path.join(self._home_dir, "jailed_code"), "wb") as worker_code:
+            worker_code.write(SANDBOX_WORKER_PY)
+
+        cmd = []
+        if command["user"]:
+            cmd.extend(["sudo", "-u", command["user"], "TMPDIR=tmp"])
+        cmd.extend(command["cmdline_start"])
+        cmd.extend(["jailed_code", json.dumps(self.preload_modules)])
+
+        with open(os.devnull, "w") as devnull:
+            self._process = subprocess.Popen(
+                cmd,
+                cwd=self._home_dir,
+                env={"TMPDIR": "tmp"},
+                preexec_fn=_set_worker_process_limits,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=devnull,
+            )
+
+    def is_running(self):
+        """
+        Returns whether the interpreter is running.
+        """
+        return self._process is not None and self._process.poll() is None
+
+    def execute(self, code, globals_dict, python_path, extra_files):
+        """
+        Executes the code with the given JSON-safe globals in a new child
+        of the interpreter.  Returns the error message if the execution
+        failed, and the resulting globals otherwise.
+
+        Raises SandboxPoolError if the interpreter itself failed.
+        """
+        python_path = python_path or ()
+        extra_files = extra_files or ()
+        exec_dir = _create_sandbox_dir()
+        try:
+            extra_names = set(name for name, _ in extra_files)
+            for path in python_path:
+                if os.path.basename(path) not in extra_names:
+                    _copy_into(path, exec_dir)
+            for name, contents in extra_files:
+                with open(os.path.join(exec_dir, name), "wb") as extra_file:
+                    extra_file.write(contents)
+
+            request = {
+                "code": code,
+                "globals": globals_dict,
+                "python_path": [os.path.basename(path) for path in python_path],
+                "rlimits": _create_execution_rlimits(),
+                "realtime": jail_code.LIMITS.get("REALTIME"),
+                "cwd": exec_dir,
+            }
+            try:
+                if not self._is_ready:
+                    startup = json.loads(self._read_frame(time.time() + STARTUP_TIMEOUT))
+                    if not startup.get("ready"):
+                        raise SandboxPoolError(
+                            "The sandbox worker failed to start: {}".format(startup.get("error"))
+                        )
+                    self._is_ready = True
+
+                self._write_frame(json.dumps(request))
+                deadline = time.time() + (request["realtime"] or STARTUP_TIMEOUT) + RESPONSE_GRACE_PERIOD
+                header = json.loads(self._read_frame(deadline))
+                result = None if header["error"] is not None else self._read_frame(deadline)
+            except (EnvironmentError, ValueError, SandboxPoolError) as error:
+                self.stop()
+                raise SandboxPoolError(error)
+        finally:
+            shutil.rmtree(exec_dir, ignore_errors=True)
+
+        self.runs += 1
+        self.memory = header["maxrss"] * 1024
+        if result is None:
+            return header["error"], None
+        try:
+            return None, json.loads(result)
+        except ValueError:
+            return "Invalid result from jailed code", None
+
+    def stop(self):
+        """
+        Stops the interpreter and removes its files.
+        """
+        if self.is_running():
+            try:
+                self._process.stdin.close()
+            except EnvironmentError:
+                pass
+            deadline = time.time() + RESPONSE_GRACE_PERIOD
+            while self._process.poll() is None and time.time() < deadline:
+                time.sleep(0.01)
+            if self._process.poll() is None:
+                self._kill()
+        if self._home_dir:
+            shutil.rmtree(self._home_dir, ignore_errors=True)
+            self._home_dir = None
+
+    def _kill(self):
+        """
+        Kills the interpreter and all of its children.
+        """
+        pgid = self._process.pid
+        log.warning("Killing sandbox worker process group %r", pgid)
+        if jail_code.COMMANDS["python"]["user"]:
+            # Can't use os.killpg because the process was launched with sudo.
+            subprocess.call(["sudo", "pkill", "-9", "-g", str(pgid)])
+        else:
+            try:
+                os.killpg(pgid, signal.SIGKILL)
+            except OSError:
+                pass
+        self._process.wait()
+
+    def _write_frame(self, payload):
+        """
+        Writes the payload to the interpreter as a frame.
+        """
+        self._process.stdin.write("%d\n" % len(payload))
+        self._process.stdin.write(payload)
+        self._process.stdin.flush()
+
+    def _read_frame(self, deadline):
+        """
+        Returns the payload of the next frame from the interpreter.
+        """
+        while "\n" not in self._buffer:
+            self._read_more(deadline)
+        length, self._buffer = self._buffer.split("\n", 1)
+        length = int(length)
+        while len(self._buffer) < length:
+            self._read_more(deadline)
+        payload, self._buffer = self._buffer[:length], self._buffer[length:]
+        return payload
+
+    def _read_more(self, deadline):
+        """
+        Reads available output from the interpreter into the buffer.
+        """
+        stdout_fd = self._process.stdout.fileno()
+        readable, _, _ = select.select([stdout_fd], [], [], max(deadline - time.time(), 0))
+        if not readable:
+            raise SandboxPoolError("Timed out waiting for the sandbox worker")
+        chunk = os.read(stdout_fd, 65536)
+        if not chunk:
+            raise SandboxPoolError("The sandbox worker exited unexpectedly")
+        self._buffer += chunk
+
+
+def _create_sandbox_dir():
+    """
+    Returns a new directory that the sandboxed interpreters can read, with
+    a tmp directory that they can write, as codejail creates for each
+    execution.
+    """
+    sandbox_dir = tempfile.mkdtemp(prefix="codejail-")
+    os.chmod(sandbox_dir, 0775)
+    tmp_dir = os.path.join(sandbox_dir, "tmp")
+    os.mkdir(tmp_dir)
+    os.chmod(tmp_dir, 0777)
+    return sandbox_dir
+
+
+def _copy_into(path, directory):
+    """
+    Copies the file or directory at path into the given directory.
+    """
+    destination = os.path.join(directory, os.path.basename(path))
+    if os.path.isdir(path):
+        shutil.copytree(path, destination)
+    else:
+        shutil.copyfile(path, destination)
+
+
+def _set_worker_process_limits():
+    """
+    Sets the limits of an interpreter process, which are inherited by the
+    children that execute code.  The limits on CPU time and processes are
+    only set in those children (see _create_execution_rlimits).
+    """
+    os.setsid()
+    vmem = jail_code.LIMITS.get("VMEM")
+    if vmem:
+        resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+    fsize = jail_code.LIMITS.get("FSIZE")
+    if fsize is not None:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+
+
+def _create_execution_rlimits():
+    """
+    Returns the names and values of the limits to set for each execution,
+    matching those that codejail sets.
+    """
+    rlimits = [("RLIMIT_NPROC", (0, 0))]
+    cpu = jail_code.LIMITS.get("CPU")
+    if cpu:
+        # As in codejail, the soft limit sends SIGXCPU to stop the process.
+        rlimits.append(("RLIMIT_CPU", (cpu, cpu + 1)))
+    return rlimits
@@ -0,0 +1,239 @@
+"""
+A persistent sandboxed Python interpreter that executes code for
+capa.safe_exec.sandbox_pool.
+
+This file is not imported by the platform: its source is copied into the
+sandbox and run there by the sandboxed Python executable, so it must only
+depend on the standard library.
+
+The worker imports the modules named in its first argument once, and then
+reads requests from stdin.  Each request is executed in a child process
+forked from the worker, so every execution starts from the same clean,
+pre-imported state, and nothing the executed code does can affect the
+worker or later executions.  The child's stdin and stdout are /dev/null, so
+the code cannot read the requests or write responses.  Limits are applied to each child before the
+code is executed.
+
+Requests and responses are frames: the length of the payload in bytes on
+a line of its own, followed by the payload.  Once its modules are imported,
+the worker writes a JSON frame saying whether it is ready.  For each
+request, it writes a JSON header frame, with the error if the execution
+failed and the peak resident memory of the child that ran it, followed by a
+frame with the resulting globals as JSON if the execution succeeded.
+"""
+import ctypes
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import sys
+import time
+import traceback
+
+PR_SET_DUMPABLE = 4
+
+OK_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+BAD_KEYS = ("__builtins__",)
+
+
+class DevNull(object):
+    """
+    Swallows anything the executed code prints, so that it cannot
+    interfere with the responses.
+    """
+    def write(self, *args, **kwargs):
+        pass
+
+
+def jsonable(value):
+    """
+    Returns whether the value can be sent back as JSON.
+    """
+    if not isinstance(value, OK_TYPES):
+        return False
+    try:
+        json.dumps(value)
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def read_frame(stream):
+    """
+    Returns the payload of the next frame in the stream, or None at the
+    end of the stream.
+    """
+    length = stream.readline()
+    if not length:
+        return None
+    return stream.read(int(length))
+
+
+def write_frame(stream, payload):
+    """
+    Writes the payload to the stream as a frame.
+    """
+    stream.write("%d\n" % len(payload))
+    stream.write(payload)
+    stream.flush()
+
+
+def set_not_dumpable():
+    """
+    Prevents other processes of the sandbox user, such as the code executed
+    by other workers, from attaching to this process and its children.
+
+    Raises OSError if it cannot be done, as the worker must not run code
+    without this isolation.
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.prctl(PR_SET_DUMPABLE, 0, 0, 0, 0) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, "prctl(PR_SET_DUMPABLE) failed: %s" % os.strerror(errno))
+
+
+def execute(request, result_fd):
+    """
+    Executes the requested code in the current (child) process, and writes
+    its resulting globals, or the traceback if it fails, to result_fd.
+    Never returns.
+    """
+    result_file = os.fdopen(result_fd, "w")
+    try:
+        os.chdir(request["cwd"])
+        os.environ["TMPDIR"] = "tmp"
+        # As for codejail, the directory of the code comes first on the path.
+        sys.path[0] = request["cwd"]
+        sys.path.extend(request["python_path"])
+        for limit_name, limits in request["rlimits"]:
+            resource.setrlimit(getattr(resource, limit_name), tuple(limits))
+        sys.stdout = DevNull()
+
+        g_dict = request["globals"]
+        exec request["code"] in g_dict  # pylint: disable=exec-used
+
+        g_dict = {
+            key: value
+            for key, value in g_dict.iteritems()
+            if jsonable(value) and key not in BAD_KEYS
+        }
+        json.dump(g_dict, result_file)
+        status = 0
+    except BaseException:  # pylint: disable=broad-except
+        result_file.write(traceback.format_exc())
+        status = 1
+    result_file.close()
+    os._exit(status)  # pylint: disable=protected-access
+
+
+def read_result(result_fd, child_pid, realtime):
+    """
+    Returns the output of the child process, or the error message if it
+    failed, killing it if it runs for longer than realtime seconds, and the
+    peak resident memory of the child in kilobytes.
+    """
+    chunks = []
+    deadline = time.time() + realtime if realtime else None
+    while True:
+        timeout = max(deadline - time.time(), 0) if deadline else None
+        readable, _, _ = select.select([result_fd], [], [], timeout)
+        if not readable:
+            os.kill(child_pid, signal.SIGKILL)
+            _, _, rusage = os.wait4(child_pid, 0)
+            return None, "Timed out after %s seconds" % realtime, rusage.ru_maxrss
+        chunk = os.read(result_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+
+    output = "".join(chunks)
+    _, status, rusage = os.wait4(child_pid, 0)
+    if os.WIFSIGNALED(status):
+        return None, "Killed by signal %d" % os.WTERMSIG(status), rusage.ru_maxrss
+    if os.WEXITSTATUS(status) != 0:
+        return None, output or "Exited with status %d" % os.WEXITSTATUS(status), rusage.ru_maxrss
+    return output, None, rusage.ru_maxrss
+
+
+def clean_tmp(cwd):
+    """
+    Removes the files that the executed code created in its tmp directory.
+    """
+    tmp_dir = os.path.join(cwd, "tmp")
+    for name in os.listdir(tmp_dir):
+        path = os.path.join(tmp_dir, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def main():
+    """
+    Imports the preloaded modules and serves requests until stdin is
+    closed.
+    """
+    requests = sys.stdin
+    responses = sys.stdout
+    sys.stdout = DevNull()
+    devnull_fd = os.open(os.devnull, os.O_RDWR)
+
+    try:
+        set_not_dumpable()
+    except Exception as error:  # pylint: disable=broad-except
+        # Without it, the code executed by this worker could attach to the
+        # other workers of the sandbox user, so refuse to serve requests.
+        write_frame(responses, json.dumps({"ready": False, "error": str(error)}))
+        sys.exit(1)
+
+    for modname in json.loads(sys.argv[1]):
+        try:
+            __import__(modname)
+        except Exception:  # pylint: disable=broad-except
+            pass
+    write_frame(responses, json.dumps({"ready": True}))
+
+    while True:
+        payload = read_frame(requests)
+        if payload is None:
+            break
+        request = json.loads(payload)
+
+        result_fd, child_result_fd = os.pipe()
+        child_pid = os.fork()
+        if child_pid == 0:
+            os.close(result_fd)
+            requests.close()
+            responses.close()
+            # Closing the files leaves their descriptors open, and the code
+            # could write frames of its own to the worker's responses.
+            os.dup2(devnull_fd, 0)
+            os.dup2(devnull_fd, 1)
+            os.close(devnull_fd)
+            execute(request, child_result_fd)
+        os.close(child_result_fd)
+
+        try:
+            output, error, child_maxrss = read_result(result_fd, child_pid, request["realtime"])
+        finally:
+            os.close(result_fd)
+        clean_tmp(request["cwd"])
+
+        # The memory that the code used is that of the child that executed
+        # it, which includes the pages it shares with the worker.
+        header = {
+            "error": error,
+            "maxrss": max(child_maxrss, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss),
+        }
+        write_frame(responses, json.dumps(header))
+        if error is None:
+            write_frame(responses, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,18 @@
 """Test safe_exec.py"""
 
 import hashlib
+import importlib
+import json
 import os
 import os.path
 import random
 import textwrap
 import unittest
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import configure_sandbox_pool, safe_exec, update_hash
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -90,6 +93,92 @@ class TestSafeOrNot(unittest.TestCase):
         self.assertEqual(g['files'], os.listdir('/'))
 
 
+class TestSandboxPool(unittest.TestCase):
+    """Test running code in the pool of sandboxed interpreters."""
+
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        # The pool uses CodeJail's sandbox, so it must be configured for python.
+        if not is_configured("python"):
+            raise SkipTest
+        configure_sandbox_pool(size=1, max_runs=2)
+        self.addCleanup(configure_sandbox_pool)
+
+    def test_set_values(self):
+        g = {'b': 3}
+        safe_exec("a = b * int(math.pi)", g)
+        self.assertEqual(g['a'], 9)
+
+    def test_random_seeding(self):
+        g = {}
+        r = random.Random(17)
+        rnums = [r.randint(0, 999) for _ in xrange(100)]
+        safe_exec("rnums = [random.randint(0, 999) for _ in xrange(100)]", g, random_seed=17)
+        self.assertEqual(g['rnums'], rnums)
+
+    def test_executions_are_isolated(self):
+        safe_exec("import math; math.leaked = 1", {})
+        g = {}
+        safe_exec("leaked = hasattr(math, 'leaked')", g)
+        self.assertFalse(g['leaked'])
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_cant_do_something_forbidden(self):
+        with self.assertRaises(SafeExecException) as cm:
+            safe_exec("import os; files = os.listdir('/')", {})
+        self.assertIn("Permission denied", cm.exception.message)
+
+    def test_executed_code_cannot_write_responses(self):
+        header = json.dumps({"error": None, "maxrss": 0})
+        forged_globals = json.dumps({"a": "forged"})
+        frames = "".join("%d\n%s" % (len(payload), payload) for payload in (header, forged_globals))
+        g = {}
+        safe_exec("import os; os.write(1, %r); a = 'own'" % frames, g)
+        self.assertEqual(g['a'], 'own')
+        g = {}
+        safe_exec("a = 'next'", g)
+        self.assertEqual(g['a'], 'next')
+
+    def test_workers_are_recycled(self):
+        # The safe_exec module is shadowed by the function of the same name.
+        pool = importlib.import_module('capa.safe_exec.safe_exec').SANDBOX_POOL
+        safe_exec("a = 1", {})
+        worker = pool._idle_workers[0]  # pylint: disable=protected-access
+        safe_exec("a = 1", {})
+        self.assertIsNot(pool._idle_workers[0], worker)  # pylint: disable=protected-access
+        self.assertFalse(worker.is_running())
+
+    def test_workers_are_recycled_after_using_memory(self):
+        configure_sandbox_pool(size=1, max_runs=100)
+        pool = importlib.import_module('capa.safe_exec.safe_exec').SANDBOX_POOL
+        safe_exec("a = 1", {})
+        worker = pool._idle_workers[0]  # pylint: disable=protected-access
+        pool.max_memory = worker.memory + 32 * 1024 * 1024
+
+        safe_exec("a = 1", {})
+        self.assertIs(pool._idle_workers[0], worker)  # pylint: disable=protected-access
+
+        safe_exec("a = len(' ' * (64 * 1024 * 1024))", {})
+        self.assertIsNot(pool._idle_workers[0], worker)  # pylint: disable=protected-access
+        self.assertFalse(worker.is_running())
+
+    def test_workers_that_cannot_be_isolated(self):
+        sandbox_pool = importlib.import_module('capa.safe_exec.sandbox_pool')
+        worker_py = sandbox_pool.SANDBOX_WORKER_PY.replace("PR_SET_DUMPABLE = 4", "PR_SET_DUMPABLE = -1")
+        with patch.object(sandbox_pool, 'SANDBOX_WORKER_PY', worker_py):
+            configure_sandbox_pool(size=1, max_runs=100)
+            pool = importlib.import_module('capa.safe_exec.safe_exec').SANDBOX_POOL
+            with patch.object(sandbox_pool, 'codejail_safe_exec') as mock_codejail_safe_exec:
+                safe_exec("a = 1", {})
+        # The worker refused to execute the code, so codejail did.
+        self.assertTrue(mock_codejail_safe_exec.called)
+        self.assertEqual(len(pool._idle_workers), 1)  # pylint: disable=protected-access
+
+
 class DictCache(object):
     """A cache implementation over a simple dict, for testing."""
 
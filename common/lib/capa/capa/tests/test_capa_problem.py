@@ -2,11 +2,14 @@
 Test capa problem.
 """
 import ddt
+import mock
+import os
 import textwrap
 from lxml import etree
 import unittest
 
-from capa.tests.helpers import new_loncapa_problem
+from capa import capa_problem
+from capa.tests.helpers import new_loncapa_problem, test_capa_system
 
 
 @ddt.ddt
@@ -590,3 +593,68 @@ class CAPAMultiInputProblemTest(unittest.TestCase):
             description_element = multi_inputs_group.xpath('//p[@id="{}"]'.format(description_id))
             self.assertEqual(len(description_element), 1)
             self.assertEqual(description_element[0].text, descriptions[index])
+
+
+class ProblemTemplateCacheTest(unittest.TestCase):
+    """ Tests the reuse of parsed problem trees between LoncapaProblems """
+
+    XML = textwrap.dedent("""
+        <problem>
+            <optionresponse>
+                <label>What color is the sky?</label>
+                <optioninput>
+                    <option correct="False">yellow</option>
+                    <option correct="True">blue</option>
+                </optioninput>
+            </optionresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ProblemTemplateCacheTest, self).setUp()
+        capa_problem._problem_template_cache.clear()  # pylint: disable=protected-access
+        self.addCleanup(capa_problem._problem_template_cache.clear)  # pylint: disable=protected-access
+
+    def test_tree_reused(self):
+        problem = new_loncapa_problem(self.XML, problem_id='1')
+        with mock.patch.object(capa_problem.LoncapaProblem, 'make_xml_compatible') as make_xml_compatible:
+            other_problem = new_loncapa_problem(self.XML, problem_id='2', seed=1)
+        self.assertFalse(make_xml_compatible.called)
+
+        # The problems are processed from separate copies of the tree.
+        self.assertIsNot(problem.tree, other_problem.tree)
+        self.assertEqual(problem.tree.xpath('//optioninput/@id'), ['1_2_1'])
+        self.assertEqual(other_problem.tree.xpath('//optioninput/@id'), ['2_2_1'])
+        self.assertEqual(other_problem.tree.xpath('//optioninput/@options'), ["('yellow','blue')"])
+        self.assertEqual(problem.get_html(), new_loncapa_problem(self.XML, problem_id='1').get_html())
+
+    def test_cache_size(self):
+        with mock.patch.object(capa_problem, 'PROBLEM_TEMPLATE_CACHE_SIZE', 2):
+            for index in range(3):
+                new_loncapa_problem(self.XML.replace('sky', 'sky {}'.format(index)))
+        self.assertEqual(len(capa_problem._problem_template_cache._entries), 2)  # pylint: disable=protected-access
+
+        # The least recently used tree was evicted.
+        with mock.patch.object(capa_problem.LoncapaProblem, 'make_xml_compatible') as make_xml_compatible:
+            new_loncapa_problem(self.XML.replace('sky', 'sky 2'))
+            self.assertFalse(make_xml_compatible.called)
+            new_loncapa_problem(self.XML.replace('sky', 'sky 0'))
+            self.assertTrue(make_xml_compatible.called)
+
+    def test_included_file_changed(self):
+        capa_system = test_capa_system()
+        include_path = os.path.join(capa_system.filestore.root_path, 'test_template_include.xml')
+        with open(include_path, 'w') as include_file:
+            include_file.write('<p>Included text</p>')
+        self.addCleanup(os.remove, include_path)
+        xml = '<problem><include file="test_template_include.xml"/></problem>'
+
+        problem = new_loncapa_problem(xml, capa_system=capa_system)
+        self.assertEqual(problem.tree.xpath('//p/text()'), ['Included text'])
+
+        # Edits to the included file are picked up, since its tree isn't reused.
+        with open(include_path, 'w') as include_file:
+            include_file.write('<p>Edited text</p>')
+        problem = new_loncapa_problem(xml, capa_system=capa_system)
+        self.assertEqual(problem.tree.xpath('//p/text()'), ['Edited text'])
+        self.assertEqual(len(capa_problem._problem_template_cache._entries), 0)  # pylint: disable=protected-access
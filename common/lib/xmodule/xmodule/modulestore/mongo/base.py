@@ -13,14 +13,18 @@ structure:
 """
 
 import copy
+import cPickle as pickle
 from datetime import datetime
 from importlib import import_module
 import logging
 import pymongo
 import re
 import sys
+import zlib
 from uuid import uuid4
 
+from bson.binary import Binary
+from bson.objectid import ObjectId
 from bson.son import SON
 from contracts import contract, new_contract
 from fs.osfs import OSFS
@@ -71,6 +75,10 @@ BLOCK_TYPES_WITH_CHILDREN = list(set(
     name for name, class_ in XBlock.load_classes() if getattr(class_, 'has_children', False)
 ))
 
+# The largest number of containers whose subtrees are recomputed in a stored metadata
+# inheritance tree, above which the whole tree is recomputed instead.
+MAX_INHERITANCE_SUBTREE_UPDATES = 20
+
 # Allow us to call _from_deprecated_(son|string) throughout the file
 # pylint: disable=protected-access
 
@@ -426,6 +434,33 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 new_contract('CachingDescriptorSystem', CachingDescriptorSystem)
 
 
+def _compute_inherited_metadata(results_by_url, url, metadata_to_inherit, branch):
+    """
+    Helper method for computing the inherited metadata of the descendants of a specific location url, given
+    the records of the containers by url, into metadata_to_inherit
+    """
+    my_metadata = results_by_url[url].get('metadata', {})
+
+    # go through all the children and recurse, but only if we have
+    # in the result set. Remember results will not contain leaf nodes
+    for child in results_by_url[url].get('definition', {}).get('children', []):
+        if child in results_by_url:
+            new_child_metadata = copy.deepcopy(my_metadata)
+            new_child_metadata.update(results_by_url[child].get('metadata', {}))
+            results_by_url[child]['metadata'] = new_child_metadata
+            metadata_to_inherit[child] = new_child_metadata
+            _compute_inherited_metadata(results_by_url, child, metadata_to_inherit, branch)
+        else:
+            # this is likely a leaf node, so let's record what metadata we need to inherit
+            metadata_to_inherit[child] = my_metadata.copy()
+        # WARNING: 'parent' is not part of inherited metadata, but
+        # we're piggybacking on this recursive traversal to grab
+        # and cache the child's parent, as a performance optimization.
+        # The 'parent' key will be popped out of the dictionary during
+        # CachingDescriptorSystem.load_item
+        metadata_to_inherit[child].setdefault('parent', {})[branch] = url
+
+
 # The only thing using this w/ wildcards is contentstore.mongo for asset retrieval
 def location_to_query(location, wildcard=True, tag='i4x'):
     """
@@ -472,6 +507,17 @@ class MongoBulkOpsRecord(BulkOpsRecord):
     def __init__(self):
         super(MongoBulkOpsRecord, self).__init__()
         self.dirty = False
+        # The locations whose subtrees were written to
+        self.dirty_locations = set()
+
+    def mark_dirty(self, location):
+        """
+        Records a write to the subtree of the given location.
+        """
+        self.dirty = True
+        # The locations are only needed, and cleared, by an active bulk operation.
+        if self.active:
+            self.dirty_locations.add(location)
 
 
 class MongoBulkOpsMixin(BulkOperationsMixin):
@@ -486,6 +532,7 @@ class MongoBulkOpsMixin(BulkOperationsMixin):
         """
         # ensure it starts clean
         bulk_ops_record.dirty = False
+        bulk_ops_record.dirty_locations = set()
 
     def _end_outermost_bulk_operation(self, bulk_ops_record, structure_key):
         """
@@ -494,9 +541,10 @@ class MongoBulkOpsMixin(BulkOperationsMixin):
         """
         dirty = False
         if bulk_ops_record.dirty:
-            self.refresh_cached_metadata_inheritance_tree(structure_key)
+            self.refresh_cached_metadata_inheritance_tree(structure_key, locations=bulk_ops_record.dirty_locations)
             dirty = True
             bulk_ops_record.dirty = False  # brand spanking clean now
+            bulk_ops_record.dirty_locations = set()
         return dirty
 
     def _is_in_bulk_operation(self, course_id, ignore_case=False):
@@ -550,13 +598,15 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                  retry_wait_time=0.1,
                  **kwargs):
         """
-        :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware,
+            asset_collection and inheritance_collection (see _get_stored_metadata_inheritance_tree).
         """
 
         super(MongoModuleStore, self).__init__(contentstore=contentstore, **kwargs)
 
         def do_connection(
-            db, collection, host, port=27017, tz_aware=True, user=None, password=None, asset_collection=None, **kwargs
+            db, collection, host, port=27017, tz_aware=True, user=None, password=None, asset_collection=None,
+            inheritance_collection=None, **kwargs
         ):
             """
             Create & open the connection, authenticate, and provide pointers to the collection
@@ -578,6 +628,12 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 asset_collection = self.DEFAULT_ASSET_COLLECTION_NAME
             self.asset_collection = self.database[asset_collection]
 
+            # Collection which stores the metadata inheritance trees of courses, if any.
+            if inheritance_collection is None:
+                self.inheritance_collection = None
+            else:
+                self.inheritance_collection = self.database[inheritance_collection]
+
         do_connection(**doc_store_config)
 
         if default_class is not None:
@@ -630,8 +686,12 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             connection.drop_database(self.collection.database.proxied_object)
         elif collections:
             self.collection.drop()
+            if self.inheritance_collection is not None:
+                self.inheritance_collection.drop()
         else:
             self.collection.remove({})
+            if self.inheritance_collection is not None:
+                self.inheritance_collection.remove({})
 
         if connections:
             connection.close()
@@ -682,20 +742,25 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         else:
             return ParentLocationCache()
 
-    def _compute_metadata_inheritance_tree(self, course_id):
+    def _find_inheritance_records(self, course_id, branch, urls=None, block_types=BLOCK_TYPES_WITH_CHILDREN):
         '''
-        Find all inheritable fields from all xblocks in the course which may define inheritable data
+        Find the inheritable fields and children of the xblocks in the course which may define inheritable
+        data, or only of those with the given location urls.  Returns the records by location url, with the
+        children of the draft and published versions of an xblock merged, and the url of the course.
         '''
         # get all collections in the course, this query should not return any leaf nodes
-        course_id = self.fill_in_run(course_id)
         query = SON([
             ('_id.tag', 'i4x'),
             ('_id.org', course_id.org),
             ('_id.course', course_id.course),
-            ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
+            ('_id.category', {'$in': block_types})
         ])
+        if urls is not None:
+            query['_id.name'] = {'$in': list(set(
+                course_id.make_usage_key_from_deprecated_string(url).name for url in urls
+            ))}
         # if we're only dealing in the published branch, then only get published containers
-        if self.get_branch_setting() == ModuleStoreEnum.Branch.published_only:
+        if branch == ModuleStoreEnum.Branch.published_only:
             query['_id.revision'] = None
         # we just want the Location, children, and inheritable metadata
         record_filter = {'_id': 1, 'definition.children': 1}
@@ -719,6 +784,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             location = as_published(Location._from_deprecated_son(result['_id'], course_id.run))
 
             location_url = unicode(location)
+            if urls is not None and location_url not in urls:
+                # another xblock with the same name
+                continue
             if location_url in results_by_url:
                 # found either draft or live to complement the other revision
                 # FIXME this is wrong. If the child was moved in draft from one parent to the other, it will
@@ -733,40 +801,179 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if location.category == 'course':
                 root = location_url
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+        return results_by_url, root
 
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
-                # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+    def _compute_metadata_inheritance_tree(self, course_id):
+        '''
+        Find all inheritable fields from all xblocks in the course which may define inheritable data
+        '''
+        course_id = self.fill_in_run(course_id)
+        branch = self.get_branch_setting()
+        results_by_url, root = self._find_inheritance_records(course_id, branch)
 
+        # now traverse the tree and compute down the inherited metadata
+        metadata_to_inherit = {}
         if root is not None:
-            _compute_inherited_metadata(root)
+            _compute_inherited_metadata(results_by_url, root, metadata_to_inherit, branch)
 
         return metadata_to_inherit
 
-    def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
+    def _update_metadata_inheritance_tree(self, course_id, tree, branch, locations):
+        '''
+        Update the given metadata inheritance tree, computed for the given branch, after writes to the
+        subtrees of the given locations, by recomputing only the subtrees of the containers among them.
+        Returns False if the whole tree must be recomputed instead.
+        '''
+        course_id = self.fill_in_run(course_id)
+        urls = set()
+        leaf_urls = set()
+        leaf_types = set()
+        for location in locations:
+            url = unicode(as_published(location))
+            if location.category == 'course':
+                return False
+            elif location.category in BLOCK_TYPES_WITH_CHILDREN:
+                urls.add(url)
+            elif url in tree:
+                leaf_urls.add(url)
+                leaf_types.add(location.category)
+
+        # The inherited metadata of leaves is only changed by writes to their parents, but deleted
+        # leaves are removed from the tree.
+        if leaf_urls:
+            found, _ = self._find_inheritance_records(course_id, branch, leaf_urls, block_types=list(leaf_types))
+            for url in leaf_urls.difference(found):
+                del tree[url]
+
+        # don't recompute a subtree within another recomputed subtree
+        subtree_urls = []
+        for url in urls:
+            ancestor_url = tree.get(url, {}).get('parent', {}).get(branch)
+            while ancestor_url is not None and ancestor_url not in urls:
+                ancestor_url = tree.get(ancestor_url, {}).get('parent', {}).get(branch)
+            if ancestor_url is None:
+                subtree_urls.append(url)
+        if len(subtree_urls) > MAX_INHERITANCE_SUBTREE_UPDATES:
+            return False
+
+        for url in subtree_urls:
+            if url not in tree:
+                # a new container, which is in the recomputed subtree of its parent once it has one,
+                # or a container that is not in the course
+                continue
+            parent_url = tree[url].get('parent', {}).get(branch)
+            if parent_url is None:
+                return False
+
+            if parent_url in tree:
+                parent_metadata = tree[parent_url]
+            else:
+                # the parent is the course, which is not in the tree
+                parent_results, _ = self._find_inheritance_records(course_id, branch, set([parent_url]))
+                if parent_url not in parent_results:
+                    return False
+                parent_metadata = parent_results[parent_url].get('metadata', {})
+
+            # find the containers of the subtree, one level at a time
+            results_by_url = {}
+            to_find = set([url])
+            while to_find:
+                found, _ = self._find_inheritance_records(course_id, branch, to_find)
+                results_by_url.update(found)
+                to_find = set(
+                    child
+                    for result in found.itervalues()
+                    for child in result.get('definition', {}).get('children', [])
+                    if child not in results_by_url and
+                    course_id.make_usage_key_from_deprecated_string(child).category in BLOCK_TYPES_WITH_CHILDREN
+                )
+
+            # remove the old entries of the subtree, which may no longer be in it
+            children_by_parent = {}
+            for child_url, metadata in tree.iteritems():
+                children_by_parent.setdefault(metadata.get('parent', {}).get(branch), []).append(child_url)
+            to_remove = [url]
+            while to_remove:
+                removed_url = to_remove.pop()
+                tree.pop(removed_url, None)
+                to_remove.extend(children_by_parent.get(removed_url, []))
+
+            if url not in results_by_url:
+                # the container was deleted
+                continue
+            metadata = copy.deepcopy(parent_metadata)
+            metadata.pop('parent', None)
+            metadata.update(results_by_url[url].get('metadata', {}))
+            results_by_url[url]['metadata'] = metadata
+            tree[url] = metadata
+            _compute_inherited_metadata(results_by_url, url, tree, branch)
+            # as when the whole tree is computed, the parent is only added after the descendants copied the metadata
+            metadata['parent'] = {branch: parent_url}
+
+        return True
+
+    def _get_stored_metadata_inheritance_tree(self, course_id, force_refresh=False, locations=None):
+        '''
+        Get the metadata inheritance tree of the course from the inheritance collection, computing and
+        storing it if it is not stored or force_refresh is set.  When force_refresh is set and the locations
+        that were written to are given, only their subtrees are recomputed.
+
+        The stored trees have a version, which changes whenever they are updated, so that a tree is not
+        updated from an outdated version.  Without an inheritance collection, the tree is always computed.
+        '''
+        if self.inheritance_collection is None:
+            return self._compute_metadata_inheritance_tree(course_id)
+
+        stored_tree = self.inheritance_collection.find_one({'_id': unicode(course_id)})
+        if stored_tree is not None:
+            tree = pickle.loads(zlib.decompress(stored_tree['tree']))
+            if not force_refresh:
+                return tree
+            if locations is not None and self._update_metadata_inheritance_tree(
+                    course_id, tree, stored_tree['branch'], locations
+            ):
+                stored = self._store_metadata_inheritance_tree(
+                    course_id, tree, stored_tree['branch'], stored_tree['version']
+                )
+                if stored:
+                    return tree
+                log.info('The metadata inheritance tree of %s was updated concurrently, recomputing it', course_id)
+
+        tree = self._compute_metadata_inheritance_tree(course_id)
+        self._store_metadata_inheritance_tree(course_id, tree, self.get_branch_setting())
+        return tree
+
+    def _store_metadata_inheritance_tree(self, course_id, tree, branch, version=None):
+        '''
+        Store the metadata inheritance tree of the course with a new version, replacing the stored tree if it
+        has the given version, or unconditionally if no version is given.  Returns whether it was stored.
+        '''
+        document = {
+            'branch': branch,
+            'version': ObjectId(),
+            'tree': Binary(zlib.compress(pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))),
+        }
+        try:
+            if version is None:
+                self.inheritance_collection.update({'_id': unicode(course_id)}, {'$set': document}, upsert=True)
+                return True
+            result = self.inheritance_collection.update(
+                {'_id': unicode(course_id), 'version': version}, {'$set': document}
+            )
+        except pymongo.errors.DocumentTooLarge:
+            log.warning('The metadata inheritance tree of %s is too large to store', course_id)
+            self._delete_stored_metadata_inheritance_tree(course_id)
+            return False
+        return result['n'] == 1
+
+    def _delete_stored_metadata_inheritance_tree(self, course_id):
+        '''
+        Delete the stored metadata inheritance tree of the course, if any.
+        '''
+        if self.inheritance_collection is not None:
+            self.inheritance_collection.remove({'_id': unicode(course_id)})
+
+    def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False, locations=None):
         '''
         Compute the metadata inheritance for the course.
         '''
@@ -788,8 +995,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 )
 
         if not tree:
-            # if not in subsystem, or we are on force refresh, then we have to compute
-            tree = self._compute_metadata_inheritance_tree(course_id)
+            # if not in subsystem, or we are on force refresh, then we have to get it from the
+            # inheritance collection, or compute it
+            tree = self._get_stored_metadata_inheritance_tree(course_id, force_refresh, locations)
 
             # now write out computed tree to caching subsystem (e.g. memcached), if available
             if self.metadata_inheritance_cache_subsystem is not None:
@@ -807,18 +1015,22 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         return tree
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, locations=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
+
+        If given the locations whose subtrees were written to, only those subtrees may be recomputed.
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
             # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            cached_metadata = self._get_cached_metadata_inheritance_tree(
+                course_id, force_refresh=True, locations=locations
+            )
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -1457,13 +1669,18 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         '''
         return self.get_course(location.course_key, depth)
 
-    def _update_single_item(self, location, update, allow_not_found=False):
+    def _update_single_item(self, location, update, allow_not_found=False, is_inherited=True):
         """
         Set update on the specified item, and raises ItemNotFoundError
         if the location doesn't exist
+
+        is_inherited: whether the update may change the metadata inherited by the subtree of the item
         """
         bulk_record = self._get_bulk_ops_record(location.course_key)
-        bulk_record.dirty = True
+        if is_inherited:
+            bulk_record.mark_dirty(location)
+        else:
+            bulk_record.dirty = True
         # See http://www.mongodb.org/display/DOCS/Updating for
         # atomic update syntax
         result = self.collection.update(
@@ -1482,7 +1699,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         """
         parent = self._get_raw_parent_location(as_published(location), ModuleStoreEnum.RevisionOption.draft_preferred)
         if parent:
-            self._update_single_item(parent, update)
+            self._update_single_item(parent, update, is_inherited=False)
             self._update_ancestors(parent, update)
 
     def update_item(self, xblock, user_id, allow_not_found=False, force=False, isPublish=False,
@@ -1547,7 +1764,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, locations=[xblock.scope_ids.usage_id]
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
@@ -1600,7 +1819,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 current_loc = ancestor_loc
                 ancestor_loc = self._get_raw_parent_location(as_published(current_loc), revision)
                 if ancestor_loc is None:
-                    bulk_record.dirty = True
+                    bulk_record.mark_dirty(parent_loc)
                     # The parent is an orphan, so remove all the children including
                     # the location whose parent we are looking for from orphan parent
                     self.collection.update(
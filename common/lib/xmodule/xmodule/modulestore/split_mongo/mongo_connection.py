@@ -34,6 +34,9 @@ from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 new_contract('BlockData', BlockData)
 log = logging.getLogger(__name__)
 
+# The fields of the asset metadata documents that are not part of the stored AssetMetadata.
+ASSET_METADATA_PROJECTION = {'_id': False, 'assets_version': False}
+
 
 def get_cache(alias):
     """
@@ -303,6 +306,7 @@ class MongoConnection(object):
         self.course_index = self.database[collection + '.active_versions']
         self.structures = self.database[collection + '.structures']
         self.definitions = self.database[collection + '.definitions']
+        self.asset_metadata = self.database[collection + '.asset_metadata']
 
     def heartbeat(self):
         """
@@ -546,6 +550,81 @@ class MongoConnection(object):
             tagger.tag(block_type=definition['block_type'])
             self.definitions.insert(definition)
 
+    def get_asset_metadata(self, assets_version, asset_type, filename, course_context=None):
+        """
+        Get the metadata of the asset with the given type and filename that is stored under
+        assets_version, or None if there is no such asset.
+        """
+        with TIMER.timer("get_asset_metadata", course_context):
+            return self.asset_metadata.find_one(
+                {'assets_version': assets_version, 'asset_type': asset_type, 'filename': filename},
+                ASSET_METADATA_PROJECTION,
+            )
+
+    def find_asset_metadata(
+            self, assets_version, asset_type=None, sort_by_upload_date=False, descending=False,
+            skip=0, limit=0, course_context=None
+    ):
+        """
+        Find the metadata of the assets stored under assets_version, sorted by filename (and
+        asset type), or by upload (last edit) date. Each of these sorts, with or without
+        asset_type, is served by one of the indexes created in `ensure_indexes`.
+
+        Arguments:
+            asset_type: If specified, only return the assets of this type
+            skip: The number of assets to skip in the sort order
+            limit: The largest number of assets to return, or 0 for no limit
+        """
+        with TIMER.timer("find_asset_metadata", course_context):
+            query = {'assets_version': assets_version}
+            sort_fields = ['filename']
+            if asset_type is None:
+                sort_fields.append('asset_type')
+            else:
+                query['asset_type'] = asset_type
+            direction = pymongo.DESCENDING if descending else pymongo.ASCENDING
+            if sort_by_upload_date:
+                sort_fields.insert(0, 'edit_info.edited_on')
+            return list(
+                self.asset_metadata.find(query, ASSET_METADATA_PROJECTION)
+                .sort([(field, direction) for field in sort_fields])
+                .skip(skip)
+                .limit(limit)
+            )
+
+    def upsert_asset_metadata(self, assets_version, asset_docs, course_context=None):
+        """
+        Insert or replace the metadata of the given assets under assets_version, in a single
+        bulk write. The assets are identified by their asset type and filename.
+        """
+        if not asset_docs:
+            return
+        with TIMER.timer("upsert_asset_metadata", course_context) as tagger:
+            tagger.measure("assets", len(asset_docs))
+            bulk = self.asset_metadata.initialize_unordered_bulk_op()
+            for asset_doc in asset_docs:
+                asset_doc = dict(asset_doc, assets_version=assets_version)
+                asset_doc.pop('_id', None)
+                bulk.find({
+                    'assets_version': assets_version,
+                    'asset_type': asset_doc['asset_type'],
+                    'filename': asset_doc['filename'],
+                }).upsert().replace_one(asset_doc)
+            bulk.execute()
+
+    def delete_asset_metadata(self, assets_version, asset_type=None, filename=None, course_context=None):
+        """
+        Delete the metadata of the asset with the given type and filename that is stored under
+        assets_version, or of all of its assets if they are not specified.
+        """
+        with TIMER.timer("delete_asset_metadata", course_context):
+            query = {'assets_version': assets_version}
+            if asset_type is not None:
+                query['asset_type'] = asset_type
+            if filename is not None:
+                query['filename'] = filename
+            return self.asset_metadata.remove(query)
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
@@ -564,6 +643,45 @@ class MongoConnection(object):
             unique=True,
             background=True
         )
+        create_collection_index(
+            self.asset_metadata,
+            [
+                ('assets_version', pymongo.ASCENDING),
+                ('asset_type', pymongo.ASCENDING),
+                ('filename', pymongo.ASCENDING)
+            ],
+            unique=True,
+            background=True
+        )
+        create_collection_index(
+            self.asset_metadata,
+            [
+                ('assets_version', pymongo.ASCENDING),
+                ('asset_type', pymongo.ASCENDING),
+                ('edit_info.edited_on', pymongo.ASCENDING),
+                ('filename', pymongo.ASCENDING)
+            ],
+            background=True
+        )
+        create_collection_index(
+            self.asset_metadata,
+            [
+                ('assets_version', pymongo.ASCENDING),
+                ('filename', pymongo.ASCENDING),
+                ('asset_type', pymongo.ASCENDING)
+            ],
+            background=True
+        )
+        create_collection_index(
+            self.asset_metadata,
+            [
+                ('assets_version', pymongo.ASCENDING),
+                ('edit_info.edited_on', pymongo.ASCENDING),
+                ('filename', pymongo.ASCENDING),
+                ('asset_type', pymongo.ASCENDING)
+            ],
+            background=True
+        )
 
     def close_connections(self):
         """
@@ -597,10 +715,12 @@ class MongoConnection(object):
             self.course_index.drop()
             self.structures.drop()
             self.definitions.drop()
+            self.asset_metadata.drop()
         else:
             self.course_index.remove({})
             self.structures.remove({})
             self.definitions.remove({})
+            self.asset_metadata.remove({})
 
         if connections:
             connection.close()
@@ -86,6 +86,7 @@ from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, get_index_values
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -131,6 +132,8 @@ class SplitBulkWriteRecord(BulkOpsRecord):
         self.structures_in_db = set()
         # dict(version_guid, dict(BlockKey, module))
         self.modules = defaultdict(dict)
+        # dict(version_guid, StructureIndex)
+        self.structure_indexes = {}
         self.definitions = {}
         self.definitions_in_db = set()
         self.course_key = None
@@ -347,6 +350,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         bulk_write_record = self._get_bulk_ops_record(course_key)
         if bulk_write_record.active:
             bulk_write_record.structures[structure['_id']] = structure
+            bulk_write_record.structure_indexes.pop(structure['_id'], None)
         else:
             self.db_connection.insert_structure(structure, course_key)
 
@@ -823,8 +827,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 del self.request_cache.data.setdefault('course_cache', {})[course_version_guid]
             except KeyError:
                 pass
+            self.request_cache.data.setdefault('structure_indexes', {}).pop(course_version_guid, None)
         else:
             self.request_cache.data['course_cache'] = {}
+            self.request_cache.data['structure_indexes'] = {}
 
     def _lookup_course(self, course_key, head_validation=True):
         """
@@ -1199,11 +1205,19 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         if settings is None:
             settings = {}
+        structure_index = self._get_structure_index(course_locator, course.structure)
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
             block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
+            if isinstance(block_name, six.string_types):
+                candidate_block_keys = structure_index.blocks_by_id([block_name])
+            elif isinstance(block_name, (list, tuple, set, frozenset)):
+                candidate_block_keys = structure_index.blocks_by_id(block_name)
+            else:
+                candidate_block_keys = course.structure['blocks']
+            for block_id in candidate_block_keys:
+                block = course.structure['blocks'][block_id]
                 # Don't do an in comparison blindly; first check to make sure
                 # that the name qualifier we're looking at isn't a plain string;
                 # if it is a string, then it should match exactly. If it's other
@@ -1231,10 +1245,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         parents_cache = None
 
         if not include_orphans:
-            path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
+            path_cache = structure_index.path_cache
+            parents_cache = structure_index.parents
 
-        for block_id, value in course.structure['blocks'].iteritems():
+        for block_id in self._get_candidate_block_keys(structure_index, qualifiers, settings):
+            value = course.structure['blocks'][block_id]
             if _block_matches_all(value):
                 if not include_orphans:
                     if (  # pylint: disable=bad-continuation
@@ -1250,6 +1265,44 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         else:
             return []
 
+    def _get_candidate_block_keys(self, structure_index, qualifiers, settings):
+        """
+        Returns the keys of the blocks of the indexed structure that may match
+        the given get_items qualifiers and settings, using the most selective
+        of the indexes that apply to them.
+        """
+        candidate_lists = []
+        block_types = get_index_values(qualifiers['block_type']) if 'block_type' in qualifiers else None
+        if block_types is not None:
+            candidate_lists.append(structure_index.blocks_by_type(block_types))
+        for field_name, criteria in settings.iteritems():
+            values = get_index_values(criteria)
+            if values is not None:
+                candidate_lists.append(structure_index.blocks_by_field_value(field_name, values))
+
+        if not candidate_lists:
+            return structure_index.structure['blocks'].keys()
+        return min(candidate_lists, key=len)
+
+    def _get_structure_index(self, course_key, structure):
+        """
+        Returns the StructureIndex of the given structure, which is cached
+        alongside the structure in the active bulk operation, or otherwise in
+        the request cache, until the structure is updated.
+        """
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active:
+            structure_indexes = bulk_write_record.structure_indexes
+        elif self.request_cache is not None:
+            structure_indexes = self.request_cache.data.setdefault('structure_indexes', {})
+        else:
+            return StructureIndex(structure)
+
+        structure_index = structure_indexes.get(structure['_id'])
+        if structure_index is None:
+            structure_index = structure_indexes[structure['_id']] = StructureIndex(structure)
+        return structure_index
+
     def build_block_key_to_parents_mapping(self, structure):
         """
         Given a structure, builds block_key to parents mapping for all block keys in structure
@@ -2748,10 +2801,120 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         """
         return ModuleStoreEnum.Type.split
 
+    def _get_assets_version(self, course_key):
+        """
+        Returns the id under which the asset metadata of the course's branch is stored in the
+        asset metadata collection, or None if it is still stored in the course's structure (or
+        course_key does not identify a course index).
+
+        Asset metadata is moved out of the structure on its first change (see
+        _get_assets_version_for_update), so that changing it neither rewrites every asset of the
+        course nor versions the structure. It is not versioned itself: the index entry points each
+        branch of the course to its current asset metadata.
+        """
+        if course_key.org is None or course_key.course is None or course_key.run is None or course_key.branch is None:
+            return None
+        index_entry = self.get_course_index(course_key)
+        if index_entry is None:
+            return None
+        return index_entry.get('asset_versions', {}).get(course_key.branch)
+
+    def _get_assets_version_for_update(self, course_key, user_id):
+        """
+        Returns the id under which the asset metadata of the course's branch is stored, first moving
+        it from the course's structure into the asset metadata collection if needed, or None if
+        course_key does not identify a course index, in which case the asset metadata is updated in
+        the structure.
+
+        Must be called within a bulk operation on the course.
+        """
+        index_entry = self._get_index_if_valid(course_key)
+        if index_entry is None:
+            return None
+        asset_versions = index_entry.setdefault('asset_versions', {})
+        if asset_versions.get(course_key.branch) is None:
+            original_structure = self._lookup_course(course_key).structure
+            assets_version = ObjectId()
+            asset_docs = [
+                asset_doc
+                for asset_docs_of_type in original_structure.get('assets', {}).itervalues()
+                for asset_doc in asset_docs_of_type
+            ]
+            self.db_connection.upsert_asset_metadata(assets_version, asset_docs, course_context=course_key)
+            if 'assets' in original_structure:
+                new_structure = self.version_structure(course_key, original_structure, user_id)
+                del new_structure['assets']
+                self.update_structure(course_key, new_structure)
+                index_entry['versions'][course_key.branch] = new_structure['_id']
+            asset_versions[course_key.branch] = assets_version
+            self.update_course_index(course_key, index_entry)
+        return asset_versions[course_key.branch]
+
+    @contract(asset_key='AssetKey')
+    def find_asset_metadata(self, asset_key, **kwargs):
+        """
+        See :meth: `.ModuleStoreAssetBase.find_asset_metadata`; looks up the asset by its key in
+        the asset metadata collection.
+        """
+        assets_version = self._get_assets_version(asset_key.course_key)
+        if assets_version is None:
+            return super(SplitMongoModuleStore, self).find_asset_metadata(asset_key, **kwargs)
+
+        asset_doc = self.db_connection.get_asset_metadata(
+            assets_version, asset_key.asset_type, asset_key.path, course_context=asset_key.course_key
+        )
+        if asset_doc is None:
+            return None
+        mdata = AssetMetadata(asset_key, asset_key.path, **kwargs)
+        mdata.from_storable(asset_doc)
+        return mdata
+
+    @contract(
+        course_key='CourseKey', asset_type='None | basestring',
+        start='int | None', maxresults='int | None', sort='tuple(str,(int,>=1,<=2))|None'
+    )
+    def get_all_asset_metadata(self, course_key, asset_type, start=0, maxresults=-1, sort=None, **kwargs):
+        """
+        See :meth: `.ModuleStoreAssetBase.get_all_asset_metadata`; sorts and pages the assets in the
+        asset metadata collection.
+        """
+        assets_version = self._get_assets_version(course_key)
+        if assets_version is None:
+            return super(SplitMongoModuleStore, self).get_all_asset_metadata(
+                course_key, asset_type, start, maxresults, sort, **kwargs
+            )
+        if maxresults == 0:
+            return []
+
+        sort_by_upload_date = bool(sort) and sort[0] == 'uploadDate'
+        descending = bool(sort) and sort[1] == ModuleStoreEnum.SortOrder.descending
+        asset_docs = self.db_connection.find_asset_metadata(
+            assets_version, asset_type,
+            sort_by_upload_date=sort_by_upload_date,
+            descending=descending,
+            skip=start or 0,
+            limit=maxresults if maxresults > 0 else 0,
+            course_context=course_key
+        )
+        ret_assets = []
+        for asset_doc in asset_docs:
+            asset_key = course_key.make_asset_key(asset_doc['asset_type'], asset_doc['filename'])
+            new_asset = AssetMetadata(asset_key)
+            new_asset.from_storable(asset_doc)
+            ret_assets.append(new_asset)
+        return ret_assets
+
     def _find_course_assets(self, course_key):
         """
         Split specific lookup
         """
+        assets_version = self._get_assets_version(course_key)
+        if assets_version is not None:
+            course_assets = {}
+            for asset_doc in self.db_connection.find_asset_metadata(assets_version, course_context=course_key):
+                course_assets.setdefault(asset_doc['asset_type'], []).append(asset_doc)
+            return course_assets
+
         try:
             course_assets = self._lookup_course(course_key).structure.get('assets', {})
         except (InsufficientSpecificationError, VersionConflictError) as err:
@@ -2764,7 +2927,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
     def _update_course_assets(self, user_id, asset_key, update_function):
         """
-        A wrapper for functions wanting to manipulate assets. Gets and versions the structure,
+        A wrapper for functions wanting to manipulate assets. Gets the asset's metadata (or, if the
+        course's asset metadata is still stored in its structure, gets and versions the structure),
         passes the mutable array for either 'assets' or 'thumbnails' as well as the idx to the function for it to
         update, then persists the changed data back into the course.
 
@@ -2772,6 +2936,25 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         surrounding method probably should catch that exception.
         """
         with self.bulk_operations(asset_key.course_key):
+            assets_version = self._get_assets_version_for_update(asset_key.course_key, user_id)
+            if assets_version is not None:
+                # Only the given asset is read and updated.
+                asset_doc = self.db_connection.get_asset_metadata(
+                    assets_version, asset_key.asset_type, asset_key.path, course_context=asset_key.course_key
+                )
+                all_assets = SortedAssetList(iterable=[asset_doc] if asset_doc is not None else [])
+                asset_idx = all_assets.find(asset_key)
+
+                updated_assets = update_function(all_assets, asset_idx)
+                self.db_connection.upsert_asset_metadata(
+                    assets_version, updated_assets.as_list(), course_context=asset_key.course_key
+                )
+                if asset_doc is not None and updated_assets.find(asset_key) is None:
+                    self.db_connection.delete_asset_metadata(
+                        assets_version, asset_key.asset_type, asset_key.path, course_context=asset_key.course_key
+                    )
+                return
+
             original_structure = self._lookup_course(asset_key.course_key).structure
             index_entry = self._get_index_if_valid(asset_key.course_key)
             new_structure = self.version_structure(asset_key.course_key, original_structure, user_id)
@@ -2797,8 +2980,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
     def save_asset_metadata_list(self, asset_metadata_list, user_id, import_only=False):
         """
         Saves a list of AssetMetadata to the modulestore. The list can be composed of multiple
-        asset types. This method is optimized for multiple inserts at once - it only re-saves the structure
-        at the end of all saves/updates.
+        asset types. This method is optimized for multiple inserts at once - it saves all of the assets
+        in a single bulk write.
         """
         # Determine course key to use in bulk operation. Use the first asset assuming that
         # all assets will be for the same course.
@@ -2806,6 +2989,16 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         course_key = asset_key.course_key
 
         with self.bulk_operations(course_key):
+            assets_version = self._get_assets_version_for_update(course_key, user_id)
+            if assets_version is not None:
+                assets_by_type = self._save_assets_by_type(course_key, asset_metadata_list, {}, user_id, import_only)
+                self.db_connection.upsert_asset_metadata(
+                    assets_version,
+                    [asset_doc for assets in assets_by_type.itervalues() for asset_doc in assets],
+                    course_context=course_key
+                )
+                return
+
             original_structure = self._lookup_course(course_key).structure
             index_entry = self._get_index_if_valid(course_key)
             new_structure = self.version_structure(course_key, original_structure, user_id)
@@ -2899,12 +3092,27 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             dest_course_key (CourseKey): identifier of course to copy to
         """
         source_structure = self._lookup_course(source_course_key).structure
+        source_assets = self._find_course_assets(source_course_key)
         with self.bulk_operations(dest_course_key):
             original_structure = self._lookup_course(dest_course_key).structure
             index_entry = self._get_index_if_valid(dest_course_key)
             new_structure = self.version_structure(dest_course_key, original_structure, user_id)
 
-            new_structure['assets'] = source_structure.get('assets', {})
+            if index_entry is None:
+                new_structure['assets'] = source_assets
+            else:
+                # The copies replace the destination's assets, and the structure no longer stores any.
+                old_assets_version = index_entry.get('asset_versions', {}).get(dest_course_key.branch)
+                assets_version = ObjectId()
+                self.db_connection.upsert_asset_metadata(
+                    assets_version,
+                    [asset_doc for asset_docs in source_assets.itervalues() for asset_doc in asset_docs],
+                    course_context=dest_course_key
+                )
+                new_structure.pop('assets', None)
+                index_entry.setdefault('asset_versions', {})[dest_course_key.branch] = assets_version
+                if old_assets_version is not None:
+                    self.db_connection.delete_asset_metadata(old_assets_version, course_context=dest_course_key)
             new_structure['thumbnails'] = source_structure.get('thumbnails', [])
 
             # update index if appropriate and structures
@@ -0,0 +1,141 @@
+"""
+Indexes of the blocks of a split modulestore structure, which are used to
+find the blocks that may match a get_items query without testing every
+block of the structure.
+
+The indexes are built lazily, the first time they are needed, so a
+StructureIndex must only be reused for as long as its structure is not
+modified (see SplitMongoModuleStore._get_structure_index).
+"""
+import re
+from collections import defaultdict
+
+
+class StructureIndex(object):
+    """
+    Lazily built indexes of the blocks of a structure, by block type, by
+    block_id and by the values of their settings fields, and the parents of
+    the blocks.
+
+    The lookup methods return candidates: every block that matches the
+    given value is returned, in the order of the structure's blocks, but
+    some of the returned blocks may not match it.
+    """
+    def __init__(self, structure):
+        self.structure = structure
+        # Which blocks have a path to the root, see SplitMongoModuleStore.has_path_to_root.
+        self.path_cache = {}
+
+        self._block_order = None
+        self._blocks_by_type = None
+        self._blocks_by_id = None
+        self._blocks_by_field_value = {}
+        self._parents = None
+
+    @property
+    def parents(self):
+        """
+        The mapping of the keys of the blocks to the keys of their parents.
+        """
+        if self._parents is None:
+            self._parents = defaultdict(list)
+            for parent_key, block_data in self.structure['blocks'].iteritems():
+                for child_key in block_data.fields.get('children', []):
+                    self._parents[child_key].append(parent_key)
+        return self._parents
+
+    def blocks_by_type(self, block_types):
+        """
+        Returns the keys of the blocks of any of the given types.
+        """
+        if self._blocks_by_type is None:
+            self._blocks_by_type = defaultdict(list)
+            for block_key in self.structure['blocks']:
+                self._blocks_by_type[block_key.type].append(block_key)
+        return self._merge(self._blocks_by_type.get(block_type, []) for block_type in block_types)
+
+    def blocks_by_id(self, block_ids):
+        """
+        Returns the keys of the blocks with any of the given block_ids.
+        """
+        if self._blocks_by_id is None:
+            self._blocks_by_id = defaultdict(list)
+            for block_key in self.structure['blocks']:
+                self._blocks_by_id[block_key.id].append(block_key)
+        return self._merge(self._blocks_by_id.get(block_id, []) for block_id in block_ids)
+
+    def blocks_by_field_value(self, field_name, values):
+        """
+        Returns the keys of the blocks whose settings field of the given name
+        is, or is a list that contains, any of the given values.
+        """
+        if field_name not in self._blocks_by_field_value:
+            blocks_by_value = defaultdict(list)
+            # The blocks with values that cannot be indexed, which may match any value.
+            unindexed_blocks = []
+            for block_key, block_data in self.structure['blocks'].iteritems():
+                if field_name in block_data.fields:
+                    try:
+                        field_values = set(_get_field_values(block_data.fields[field_name]))
+                    except TypeError:
+                        unindexed_blocks.append(block_key)
+                        continue
+                    for value in field_values:
+                        blocks_by_value[value].append(block_key)
+            self._blocks_by_field_value[field_name] = (blocks_by_value, unindexed_blocks)
+
+        blocks_by_value, unindexed_blocks = self._blocks_by_field_value[field_name]
+        return self._merge([blocks_by_value.get(value, []) for value in values] + [unindexed_blocks])
+
+    def _merge(self, block_key_lists):
+        """
+        Returns the distinct keys in the given lists, in the order of the
+        structure's blocks.
+        """
+        block_key_lists = [block_keys for block_keys in block_key_lists if block_keys]
+        if len(block_key_lists) == 1:
+            return list(block_key_lists[0])
+        if self._block_order is None:
+            self._block_order = {block_key: order for order, block_key in enumerate(self.structure['blocks'])}
+        return sorted(
+            set(block_key for block_keys in block_key_lists for block_key in block_keys),
+            key=self._block_order.get,
+        )
+
+
+def get_index_values(criteria):
+    """
+    Returns the values that a field must have to match the given get_items
+    criteria, or None if the criteria cannot be looked up in an index (such
+    as regexes, functions and $nin or $exists queries).
+    """
+    if isinstance(criteria, dict):
+        if criteria.keys() != ['$in']:
+            return None
+        values = criteria['$in']
+    else:
+        values = [criteria]
+
+    for value in values:
+        if isinstance(value, (dict, re._pattern_type)) or callable(value):  # pylint: disable=protected-access
+            return None
+        try:
+            hash(value)
+        except TypeError:
+            return None
+    return values
+
+
+def _get_field_values(value):
+    """
+    Yields the values that the given field value matches in get_items, that
+    is the value itself, or the elements of a list. Raises TypeError if any
+    of them cannot be indexed.
+    """
+    if isinstance(value, list):
+        for element in value:
+            for element_value in _get_field_values(element):
+                yield element_value
+    else:
+        hash(value)
+        yield value
@@ -15,7 +15,7 @@ from xmodule.modulestore import ModuleStoreEnum, SortedAssetList, IncorrectlySor
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.utils import (
-    MIXED_MODULESTORE_BOTH_SETUP, MODULESTORE_SETUPS,
+    MIXED_MODULESTORE_BOTH_SETUP, MODULESTORE_SETUPS, SPLIT_MODULESTORE_SETUP,
     XmlModulestoreBuilder, MixedModulestoreBuilder
 )
 
@@ -707,3 +707,84 @@ class TestMongoAssetMetadataStorage(unittest.TestCase):
             self.assertEquals(len(all_assets), 2)
             self.assertEquals(all_assets[0].asset_id.path, 'pic1.jpg')
             self.assertEquals(all_assets[1].asset_id.path, 'shout.ogg')
+
+
+@attr('mongo')
+class TestSplitAssetMetadataStorage(unittest.TestCase):
+    """
+    Tests for storing split's course asset metadata outside of the course structure.
+    """
+    def _make_asset_metadata(self, course_key, filename):
+        """
+        Make a test asset metadata with the given filename.
+        """
+        now = datetime.now(pytz.utc)
+        return AssetMetadata(
+            course_key.make_asset_key('asset', filename), internal_name=filename,
+            pathname='pictures', contenttype='image/jpeg', locked=False,
+            edited_by=ModuleStoreEnum.UserID.test, edited_on=now,
+            created_by=ModuleStoreEnum.UserID.test, created_on=now,
+        )
+
+    def test_assets_stored_outside_structure(self):
+        """
+        Save, update and delete asset metadata without versioning the course structure.
+        """
+        with SPLIT_MODULESTORE_SETUP.build() as (__, store):
+            course = CourseFactory.create(modulestore=store)
+            split_store = store.modulestores[0]
+            draft_key = course.id.for_branch(ModuleStoreEnum.BranchName.draft)
+
+            store.save_asset_metadata(self._make_asset_metadata(course.id, 'pic1.jpg'), ModuleStoreEnum.UserID.test)
+            index_entry = split_store.get_course_index(draft_key)
+            self.assertIn(ModuleStoreEnum.BranchName.draft, index_entry['asset_versions'])
+            self.assertIn(ModuleStoreEnum.BranchName.published, index_entry['asset_versions'])
+            structure = split_store._lookup_course(draft_key).structure  # pylint: disable=protected-access
+            self.assertNotIn('assets', structure)
+
+            # Changing the assets doesn't version the structure.
+            head_version = index_entry['versions'][ModuleStoreEnum.BranchName.draft]
+            asset_key = course.id.make_asset_key('asset', 'pic1.jpg')
+            store.set_asset_metadata_attr(asset_key, 'locked', True, ModuleStoreEnum.UserID.test)
+            store.save_asset_metadata(self._make_asset_metadata(course.id, 'pic2.jpg'), ModuleStoreEnum.UserID.test)
+            index_entry = split_store.get_course_index(draft_key)
+            self.assertEqual(index_entry['versions'][ModuleStoreEnum.BranchName.draft], head_version)
+
+            self.assertTrue(store.find_asset_metadata(asset_key).locked)
+            self.assertEqual(
+                [asset_md.asset_id.path for asset_md in store.get_all_asset_metadata(course.id, 'asset')],
+                ['pic1.jpg', 'pic2.jpg']
+            )
+            self.assertEqual(store.delete_asset_metadata(asset_key, ModuleStoreEnum.UserID.test), 1)
+            self.assertIsNone(store.find_asset_metadata(asset_key))
+
+    def test_structure_assets_moved_on_first_change(self):
+        """
+        Asset metadata stored in the course structure is read from it until the first change moves it out.
+        """
+        with SPLIT_MODULESTORE_SETUP.build() as (__, store):
+            course = CourseFactory.create(modulestore=store)
+            split_store = store.modulestores[0]
+            draft_key = course.id.for_branch(ModuleStoreEnum.BranchName.draft)
+
+            # Store an asset in the structure, as split used to.
+            with split_store.bulk_operations(draft_key):
+                index_entry = split_store._get_index_if_valid(draft_key)  # pylint: disable=protected-access
+                structure = split_store._lookup_course(draft_key).structure  # pylint: disable=protected-access
+                new_structure = split_store.version_structure(draft_key, structure, ModuleStoreEnum.UserID.test)
+                new_structure['assets'] = {'asset': [self._make_asset_metadata(draft_key, 'pic1.jpg').to_storable()]}
+                split_store.update_structure(draft_key, new_structure)
+                split_store._update_head(  # pylint: disable=protected-access
+                    draft_key, index_entry, ModuleStoreEnum.BranchName.draft, new_structure['_id']
+                )
+            self.assertIsNotNone(split_store.find_asset_metadata(draft_key.make_asset_key('asset', 'pic1.jpg')))
+
+            split_store.save_asset_metadata(
+                self._make_asset_metadata(draft_key, 'pic2.jpg'), ModuleStoreEnum.UserID.test
+            )
+            structure = split_store._lookup_course(draft_key).structure  # pylint: disable=protected-access
+            self.assertNotIn('assets', structure)
+            self.assertEqual(
+                [asset_md.asset_id.path for asset_md in split_store.get_all_asset_metadata(draft_key, 'asset')],
+                ['pic1.jpg', 'pic2.jpg']
+            )
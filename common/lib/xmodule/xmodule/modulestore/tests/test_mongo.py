@@ -13,6 +13,7 @@ import logging
 import shutil
 from tempfile import mkdtemp
 from uuid import uuid4
+from bson.objectid import ObjectId
 from datetime import datetime
 from pytz import UTC
 import unittest
@@ -747,6 +748,109 @@ class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
         self.assertRaises(ItemNotFoundError, lambda: self.draft_store.get_all_asset_metadata(course_key, 'asset')[:1])
 
 
+class TestMongoModuleStoreWithInheritanceCollection(unittest.TestCase):
+    """
+    Tests the metadata inheritance trees stored in an inheritance collection.
+    """
+    def setUp(self):
+        super(TestMongoModuleStoreWithInheritanceCollection, self).setUp()
+        self.db_name = 'test_mongo_inheritance_%s' % uuid4().hex[:5]
+        self.connection = pymongo.MongoClient(host=HOST, port=PORT)
+        self.addCleanup(self.connection.close)
+        self.addCleanup(self.connection.drop_database, self.db_name)
+
+        self.store = DraftModuleStore(
+            MongoContentStore(HOST, self.db_name, port=PORT),
+            {
+                'host': HOST,
+                'port': PORT,
+                'db': self.db_name,
+                'collection': COLLECTION,
+                'inheritance_collection': 'inheritance',
+            },
+            FS_ROOT,
+            RENDER_TEMPLATE,
+            default_class=DEFAULT_CLASS,
+            branch_setting_func=lambda: ModuleStoreEnum.Branch.draft_preferred,
+            xblock_mixins=(EditInfoMixin, InheritanceMixin, LocationMixin, XModuleMixin),
+        )
+        self.user_id = ModuleStoreEnum.UserID.test
+        self.course = self.store.create_course('TestX', 'Inheritance', 'Run', self.user_id)
+        self.chapter = self.store.create_child(self.user_id, self.course.location, 'chapter', 'chapter')
+        self.sequential = self.store.create_child(self.user_id, self.chapter.location, 'sequential', 'sequential')
+        self.vertical = self.store.create_child(self.user_id, self.sequential.location, 'vertical', 'vertical')
+        self.problem = self.store.create_child(self.user_id, self.vertical.location, 'problem', 'problem')
+
+    def get_stored_tree(self):
+        """
+        Returns the stored metadata inheritance tree of the course.
+        """
+        with patch.object(self.store, '_compute_metadata_inheritance_tree') as mock_compute:
+            tree = self.store._get_stored_metadata_inheritance_tree(self.course.id)
+        self.assertFalse(mock_compute.called)
+        return tree
+
+    def assert_stored_tree_is_current(self):
+        """
+        Asserts that the stored metadata inheritance tree is the one computed from the course.
+        """
+        self.assertEqual(self.get_stored_tree(), self.store._compute_metadata_inheritance_tree(self.course.id))
+
+    def test_created_items(self):
+        self.assert_stored_tree_is_current()
+        self.assertIn(unicode(self.problem.location), self.get_stored_tree())
+
+    def test_updated_metadata(self):
+        self.sequential.graded = True
+        self.sequential.format = 'Homework'
+        self.store.update_item(self.sequential, self.user_id)
+        self.assert_stored_tree_is_current()
+        self.assertEqual(self.get_stored_tree()[unicode(self.problem.location)]['format'], 'Homework')
+
+    def test_updated_subtree_only(self):
+        with patch.object(self.store, '_compute_metadata_inheritance_tree') as mock_compute:
+            self.chapter.visible_to_staff_only = True
+            self.store.update_item(self.chapter, self.user_id)
+        self.assertFalse(mock_compute.called)
+        self.assert_stored_tree_is_current()
+
+    def test_bulk_operation(self):
+        with self.store.bulk_operations(self.course.id):
+            self.chapter.days_early_for_beta = 2.0
+            self.store.update_item(self.chapter, self.user_id)
+            vertical = self.store.create_child(self.user_id, self.sequential.location, 'vertical', 'vertical2')
+            self.store.create_child(self.user_id, vertical.location, 'html', 'html')
+        self.assert_stored_tree_is_current()
+
+    def test_deleted_items(self):
+        self.store.delete_item(self.problem.location, self.user_id)
+        self.assert_stored_tree_is_current()
+        self.store.delete_item(self.sequential.location, self.user_id)
+        self.assert_stored_tree_is_current()
+        self.assertNotIn(unicode(self.vertical.location), self.get_stored_tree())
+
+    def test_course_metadata(self):
+        course = self.store.get_course(self.course.id)
+        course.show_calculator = True
+        self.store.update_item(course, self.user_id)
+        self.assert_stored_tree_is_current()
+
+    def test_outdated_version(self):
+        stored_tree = self.store.inheritance_collection.find_one({'_id': unicode(self.course.id)})
+        self.assertFalse(self.store._store_metadata_inheritance_tree(
+            self.course.id, {}, ModuleStoreEnum.Branch.draft_preferred, ObjectId()
+        ))
+        self.assertEqual(
+            self.store.inheritance_collection.find_one({'_id': unicode(self.course.id)})['version'],
+            stored_tree['version'],
+        )
+        self.assert_stored_tree_is_current()
+
+    def test_delete_course(self):
+        self.store.delete_course(self.course.id, self.user_id)
+        self.assertIsNone(self.store.inheritance_collection.find_one({'_id': unicode(self.course.id)}))
+
+
 class TestMongoKeyValueStore(unittest.TestCase):
     """
     Tests for MongoKeyValueStore.
@@ -30,6 +30,7 @@ from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.x_module import XModuleMixin
 from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
 from xmodule.modulestore.tests.factories import check_mongo_calls
@@ -1221,6 +1222,45 @@ class SplitModuleItemTests(SplitModuleTest):
         matches = modulestore().get_items(locator, settings={'group_access': {'$exists': False}})
         self.assertEqual(len(matches), 7)
 
+    def test_get_items_indexed(self):
+        """
+        get_items queries that are looked up in the indexes of the structure
+        """
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        matches = modulestore().get_items(locator, qualifiers={'category': {'$in': ['chapter', 'problem']}})
+        self.assertEqual(len(matches), 7)
+        matches = modulestore().get_items(locator, settings={'display_name': 'Hercules'})
+        self.assertEqual([match.location.block_id for match in matches], ['chapter1'])
+        matches = modulestore().get_items(locator, settings={'display_name': {'$in': ['Hercules', 'Problem 3.1']}})
+        self.assertEqual(len(matches), 2)
+        matches = modulestore().get_items(locator, qualifiers={'children': BlockKey('chapter', 'chapter3')})
+        self.assertEqual([match.location.block_id for match in matches], ['head12345'])
+        matches = modulestore().get_items(
+            locator,
+            qualifiers={'category': 'problem', 'name': ['problem1', 'chapter1']},
+        )
+        self.assertEqual([match.location.block_id for match in matches], ['problem1'])
+
+    def test_get_items_index_reused(self):
+        """
+        The indexes of a structure are reused until the structure is updated
+        """
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        with modulestore().bulk_operations(locator):
+            with patch(
+                'xmodule.modulestore.split_mongo.split.StructureIndex', wraps=StructureIndex
+            ) as mock_structure_index:
+                self.assertEqual(len(modulestore().get_items(locator, qualifiers={'category': 'chapter'})), 4)
+                self.assertEqual(len(modulestore().get_items(locator, include_orphans=False)), 8)
+                self.assertEqual(mock_structure_index.call_count, 1)
+
+                problem = modulestore().get_item(locator.make_usage_key('problem', 'problem1'))
+                problem.display_name = 'Hercules'
+                modulestore().update_item(problem, self.user_id)
+                matches = modulestore().get_items(locator, settings={'display_name': 'Hercules'})
+                self.assertEqual(len(matches), 2)
+                self.assertEqual(mock_structure_index.call_count, 2)
+
     def test_get_parents(self):
         '''
         get_parent_location(locator): BlockUsageLocator
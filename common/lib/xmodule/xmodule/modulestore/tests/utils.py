@@ -451,8 +451,8 @@ class MixedModulestoreBuilder(StoreBuilderBase):
             return store.asset_collection
         else:
             # Split modulestore beneath mixed.
-            # Split stores all asset metadata in the structure collection.
-            return store.db_connection.structures
+            # Split stores all asset metadata in the asset metadata collection.
+            return store.db_connection.asset_metadata
 
 
 COMMON_DOCSTORE_CONFIG = {
@@ -2,6 +2,9 @@
 Models for bulk email
 """
 import logging
+import re
+from collections import namedtuple
+from string import Formatter
 
 import markupsafe
 from config_models.models import ConfigurationModel
@@ -17,7 +20,7 @@ from openedx.core.djangoapps.xmodule_django.models import CourseKeyField
 from openedx.core.lib.html_to_text import html_to_text
 from openedx.core.lib.mail_utils import wrap_message
 from student.roles import CourseInstructorRole, CourseStaffRole
-from util.keyword_substitution import substitute_keywords_with_data
+from util.keyword_substitution import substitute_keywords, substitute_keywords_with_data
 from util.query import use_read_replica_if_available
 
 from django.conf import settings
@@ -322,6 +325,151 @@ class Optout(models.Model):
 # the location where the email message body is to be inserted.
 COURSE_EMAIL_MESSAGE_BODY_TAG = '{{message_body}}'
 
+# The context values of an email that differ between its recipients, and the
+# keywords in the message body that are substituted with them.
+RECIPIENT_CONTEXT_KEYS = ('name', 'email', 'user_id')
+RECIPIENT_KEYWORDS_RE = re.compile(r'(%%USER_ID%%|%%USER_FULLNAME%%)')
+
+# A part of a compiled email message that is rendered for each recipient: a
+# replacement field of the template, or a keyword of the message body.
+Placeholder = namedtuple('Placeholder', ['is_keyword', 'source'])
+
+
+class CompiledEmailMessage(object):
+    """
+    An email message rendered from a template and a message body with the
+    context values that all of the recipients of an email share, leaving
+    placeholders for the values that differ between them, so that rendering
+    the message for each recipient only has to fill in the placeholders.
+
+    Rendering it with the values of a recipient gives the same message as
+    CourseEmailTemplate._render with the full context of the recipient.
+    """
+    def __init__(self, format_string, message_body, context, escape=False):
+        """
+        Arguments:
+            format_string (unicode): the template of the message.
+            message_body (unicode): the body of the message.
+            context (dict): the context values shared by all of the recipients.
+            escape (bool): whether the values of the recipients are HTML-escaped.
+        """
+        self._format_string = format_string
+        self._message_body = message_body
+        self._context = context
+        self._escape = escape
+        parts = self._compile_body_into_template(
+            self._compile_template(format_string, context),
+            self._compile_body(message_body, context),
+        )
+
+        # The lines of the message, wrapped when they have no placeholders.
+        # The lines are wrapped separately, like wrap_message does.
+        lines = [[]]
+        for part in parts:
+            if isinstance(part, Placeholder):
+                lines[-1].append(part)
+            else:
+                text_lines = part.split('\n')
+                lines[-1].append(text_lines[0])
+                lines.extend([text_line] for text_line in text_lines[1:])
+        self._lines = [
+            line if any(isinstance(part, Placeholder) for part in line) else wrap_message(u''.join(line))
+            for line in lines
+        ]
+
+    def render(self, recipient_context):
+        """
+        Returns the message for the recipient with the given context values,
+        which has the RECIPIENT_CONTEXT_KEYS.
+        """
+        context = dict(self._context)
+        for key in RECIPIENT_CONTEXT_KEYS:
+            value = recipient_context[key]
+            if self._escape and isinstance(value, basestring):
+                value = markupsafe.escape(value)
+            context[key] = value
+        if context['user_id'] is None:
+            # No keywords are substituted without a user.
+            return CourseEmailTemplate._render(self._format_string, self._message_body, context)
+
+        rendered_lines = []
+        for line in self._lines:
+            if isinstance(line, basestring):
+                rendered_lines.append(line)
+            else:
+                rendered_lines.append(wrap_message(u''.join(self._render_part(part, context) for part in line)))
+        return u'\n'.join(rendered_lines)
+
+    @staticmethod
+    def _render_part(part, context):
+        """
+        Returns the text of a part of a line for the given context.
+        """
+        if not isinstance(part, Placeholder):
+            return part
+        if not part.is_keyword:
+            return part.source.format(**context)
+        return substitute_keywords(part.source, context['user_id'], context)
+
+    @staticmethod
+    def _compile_template(format_string, context):
+        """
+        Returns the parts of the formatted template, formatting the replacement
+        fields that do not depend on the recipient.
+        """
+        parts = []
+        for literal_text, field_name, format_spec, conversion in Formatter().parse(format_string):
+            if literal_text:
+                parts.append(literal_text)
+            if field_name is None:
+                continue
+            source = u'{{{}{}{}}}'.format(
+                field_name,
+                u'!' + conversion if conversion else u'',
+                u':' + format_spec if format_spec else u'',
+            )
+            if re.match(r'[^.[]*', field_name).group() in RECIPIENT_CONTEXT_KEYS or '{' in format_spec:
+                parts.append(Placeholder(False, source))
+            else:
+                parts.append(source.format(**context))
+        return parts
+
+    @staticmethod
+    def _compile_body(message_body, context):
+        """
+        Returns the parts of the message body, substituting the keywords that
+        do not depend on the recipient.
+        """
+        if 'course_id' not in context or context.get('course_title') is None:
+            return [message_body]
+        parts = []
+        for index, text in enumerate(RECIPIENT_KEYWORDS_RE.split(message_body)):
+            if index % 2:
+                parts.append(Placeholder(True, text))
+            elif text:
+                parts.append(substitute_keywords(text, None, context))
+        return parts
+
+    @staticmethod
+    def _compile_body_into_template(template_parts, body_parts):
+        """
+        Returns the parts of the template, with the body in place of the first
+        message body tag, merging adjacent text.
+        """
+        merged_parts = []
+        for part in template_parts:
+            if merged_parts and not isinstance(part, Placeholder) and not isinstance(merged_parts[-1], Placeholder):
+                merged_parts[-1] += part
+            else:
+                merged_parts.append(part)
+
+        message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
+        for index, part in enumerate(merged_parts):
+            if not isinstance(part, Placeholder) and message_body_tag in part:
+                before, after = part.split(message_body_tag, 1)
+                return merged_parts[:index] + [before] + body_parts + [after] + merged_parts[index + 1:]
+        return merged_parts
+
 
 class CourseEmailTemplate(models.Model):
     """
@@ -400,6 +548,27 @@ class CourseEmailTemplate(models.Model):
                 context[key] = markupsafe.escape(value)
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile_plaintext(self, plaintext, context):
+        """
+        Create plain text message for all of the recipients of an email.
+        Like render_plaintext, but with the context values that all of the recipients
+        share, returning a CompiledEmailMessage to render for each of them.
+        """
+        return CompiledEmailMessage(self.plain_template, plaintext, context)
+
+    def compile_htmltext(self, htmltext, context):
+        """
+        Create HTML text message for all of the recipients of an email.
+        Like render_htmltext, but with the context values that all of the recipients
+        share, returning a CompiledEmailMessage to render for each of them.
+        """
+        # HTML-escape string values in the context (used for keyword substitution).
+        context = {
+            key: markupsafe.escape(value) if isinstance(value, basestring) else value
+            for key, value in context.iteritems()
+        }
+        return CompiledEmailMessage(self.html_template, htmltext, context, escape=True)
+
 
 class CourseAuthorization(models.Model):
     """
@@ -7,9 +7,10 @@ import json
 import logging
 import random
 import re
+import threading
 from collections import Counter
 from smtplib import SMTPConnectError, SMTPDataError, SMTPException, SMTPServerDisconnected
-from time import sleep
+from time import sleep, time
 
 from boto.exception import AWSConnectionError
 from boto.ses.exceptions import (
@@ -92,6 +93,11 @@ BULK_EMAIL_FAILURE_ERRORS = (
     SMTPException,
 )
 
+# Open connections to the email backend that subtasks left for later subtasks
+# of the same worker process to reuse, with the time they were left at.
+_connection_pool = []
+_connection_pool_lock = threading.Lock()
+
 
 def _get_course_email_context(course):
     """
@@ -494,13 +500,22 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
 
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
+    connection = None
+    is_connection_reusable = False
     try:
-        connection = get_connection()
-        connection.open()
+        connection = _get_connection()
 
         # Define context values to use in all course emails:
-        email_context = {'name': '', 'email': ''}
+        email_context = {'name': '', 'email': '', 'user_id': None}
         email_context.update(global_email_context)
+        email_context['course_id'] = course_email.course_id
+
+        # Render the parts of the messages that are the same for all recipients once:
+        if to_list:
+            render_start = time()
+            plaintext_template = course_email_template.compile_plaintext(course_email.text_message, email_context)
+            html_template = course_email_template.compile_htmltext(course_email.html_message, email_context)
+            subtask_status.add_metrics(render_seconds=time() - render_start)
 
         while to_list:
             # Update context with user-specific values from the user at the end of the list.
@@ -511,14 +526,17 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             recipient_num += 1
             current_recipient = to_list[-1]
             email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
+            recipient_context = {
+                'email': email,
+                'name': current_recipient['profile__name'],
+                'user_id': current_recipient['pk'],
+            }
 
             # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
+            render_start = time()
+            plaintext_msg = plaintext_template.render(recipient_context)
+            html_msg = html_template.render(recipient_context)
+            subtask_status.add_metrics(render_seconds=time() - render_start)
 
             # Create email:
             email_msg = EmailMultiAlternatives(
@@ -550,8 +568,10 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     current_recipient['profile__name'],
                     email
                 )
+                send_start = time()
                 with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
                     connection.send_messages([email_msg])
+                subtask_status.add_metrics(send_seconds=time() - send_start, sends=1)
 
             except SMTPDataError as exc:
                 # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
@@ -638,6 +658,19 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             total_recipients_failed,
             total_recipients
         )
+        metrics = subtask_status.metrics
+        if metrics.get('send_seconds'):
+            metrics['sends_per_second'] = metrics['sends'] / metrics['send_seconds']
+        log.info(
+            "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Render Time: %.3fs, Send Time: %.3fs, \
+            Sends Per Second: %.1f",
+            parent_task_id,
+            task_id,
+            email_id,
+            metrics.get('render_seconds', 0),
+            metrics.get('send_seconds', 0),
+            metrics.get('sends_per_second', 0)
+        )
         duplicate_recipients = ["{0} ({1})".format(email, repetition)
                                 for email, repetition in recipients_info.most_common() if repetition > 1]
         if duplicate_recipients:
@@ -701,12 +734,72 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     else:
         # All went well.  Update counters with progress to date,
         # and set the state to SUCCESS:
+        is_connection_reusable = True
         subtask_status.increment(state=SUCCESS)
         # Successful completion is marked by an exception value of None.
         return subtask_status, None
     finally:
         # Clean up at the end.
+        if connection is not None:
+            _release_connection(connection, is_connection_reusable)
+
+
+def _get_connection():
+    """
+    Returns an open connection to the email backend, reusing one that an
+    earlier subtask of this process left in the pool, if it has not been idle
+    for longer than BULK_EMAIL_CONNECTION_MAX_IDLE seconds and still responds.
+    """
+    while True:
+        with _connection_pool_lock:
+            if not _connection_pool:
+                break
+            connection, released = _connection_pool.pop()
+        if time() - released <= settings.BULK_EMAIL_CONNECTION_MAX_IDLE and _is_connection_alive(connection):
+            return connection
+        _close_connection(connection)
+
+    connection = get_connection()
+    connection.open()
+    return connection
+
+
+def _release_connection(connection, is_reusable):
+    """
+    Leaves the connection in the pool for a later subtask to reuse, if it is
+    reusable and the pool is not full, and closes it otherwise.
+    """
+    if is_reusable:
+        with _connection_pool_lock:
+            if len(_connection_pool) < settings.BULK_EMAIL_CONNECTION_POOL_SIZE:
+                _connection_pool.append((connection, time()))
+                return
+    _close_connection(connection)
+
+
+def _is_connection_alive(connection):
+    """
+    Returns whether the SMTP server of the connection still responds.  Other
+    email backends are assumed to be alive.
+    """
+    smtp_connection = getattr(connection, 'connection', None)
+    if smtp_connection is None or not hasattr(smtp_connection, 'noop'):
+        return True
+    try:
+        return smtp_connection.noop()[0] == 250
+    except Exception:  # pylint: disable=broad-except
+        return False
+
+
+def _close_connection(connection):
+    """
+    Closes the connection, ignoring errors from connections that were
+    already closed by the server.
+    """
+    try:
         connection.close()
+    except Exception:  # pylint: disable=broad-except
+        log.warning('BulkEmail ==> Error closing email connection', exc_info=True)
 
 
 def _get_current_task():
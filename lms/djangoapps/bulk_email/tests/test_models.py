@@ -223,6 +223,51 @@ class CourseEmailTemplateTest(TestCase):
         self.assertIn(context['course_title'], message)
         self.assertIn(context['name'], message)
 
+    def _assert_compiled_message(self, render, compile_message, message_body, context):
+        """
+        Assert that the compiled message renders the same messages as `render`
+        for a couple of recipients.
+        """
+        shared_context = dict(context, name='', email='', user_id=None)
+        compiled_message = compile_message(message_body, dict(shared_context))
+        recipients = [(1, "<b>Robot</b> {name}", 'robot@test.com'), (2, u"Röbot " * 300, 'two@test.com')]
+        for user_id, name, email in recipients:
+            recipient_context = {'name': name, 'email': email, 'user_id': user_id}
+            self.assertEqual(
+                compiled_message.render(recipient_context),
+                render(message_body, dict(shared_context, **recipient_context)),
+            )
+
+    def test_compile_plaintext(self):
+        template = CourseEmailTemplate.get_template()
+        template.plain_template = u"{name:>10} ({email}):\n{{message_body}}\n{course_title} " + u"x" * 1000
+        context = self._add_xss_fields(self._get_sample_plain_context())
+        self._assert_compiled_message(
+            template.render_plaintext,
+            template.compile_plaintext,
+            "Dear %%USER_FULLNAME%%, thanks for enrolling in %%COURSE_DISPLAY_NAME%%. %%USER_FULLNAME%%",
+            context,
+        )
+
+    @patch('util.keyword_substitution.anonymous_id_from_user_id', Mock(side_effect=u'anon{}'.format))
+    def test_compile_htmltext(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._add_xss_fields(self._get_sample_html_context())
+        self._assert_compiled_message(
+            template.render_htmltext,
+            template.compile_htmltext,
+            "Dear %%USER_FULLNAME%% (%%USER_ID%%), thanks for enrolling in %%COURSE_DISPLAY_NAME%%.",
+            context,
+        )
+
+    def test_compile_without_user(self):
+        template = CourseEmailTemplate.get_template()
+        context = dict(self._get_sample_plain_context(), course_id="course-v1:edx+100+1")
+        message = template.compile_plaintext("Dear %%USER_FULLNAME%%.", context).render(
+            {'name': 'Robot', 'email': 'robot@test.com', 'user_id': None}
+        )
+        self.assertIn("Dear %%USER_FULLNAME%%.", message)
+
 
 @attr(shard=1)
 class CourseAuthorizationTest(TestCase):
@@ -26,6 +26,7 @@ from boto.ses.exceptions import (
 from celery.states import FAILURE, SUCCESS  # pylint: disable=no-name-in-module, import-error
 from django.conf import settings
 from django.core.management import call_command
+from django.test.utils import override_settings
 from mock import Mock, patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
@@ -197,6 +198,29 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
             get_conn.return_value.send_messages.side_effect = cycle([None])
             self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
 
+    def test_metrics(self):
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle([None])
+            entry = self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+        subtask_status = json.loads(entry.subtasks)['status'].values()[0]
+        self.assertEquals(subtask_status['metrics']['sends'], num_emails)
+        self.assertGreater(subtask_status['metrics']['render_seconds'], 0)
+        self.assertIn('send_seconds', subtask_status['metrics'])
+
+    @override_settings(BULK_EMAIL_CONNECTION_POOL_SIZE=1)
+    @patch('bulk_email.tasks._connection_pool', [])
+    def test_connection_reused(self):
+        self._create_students(1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle([None])
+            get_conn.return_value.connection.noop.return_value = (250, 'OK')
+            self._test_run_with_task(send_bulk_course_email, 'emailed', 2, 2)
+            self._test_run_with_task(send_bulk_course_email, 'emailed', 2, 2)
+        self.assertEquals(get_conn.call_count, 1)
+        self.assertFalse(get_conn.return_value.close.called)
+
     def test_successful_twice(self):
         # Select number of emails to fit into a single subtask.
         num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
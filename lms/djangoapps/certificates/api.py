@@ -174,6 +174,55 @@ def generate_user_certificates(student, course_key, course=None, insecure=False,
     return cert.status
 
 
+def bulk_generate_user_certificates(students, course_key, course=None, insecure=False, generation_mode='batch',
+                                    forced_grade=None):
+    """
+    Adds the add-cert requests of many students of a course into the
+    xqueue, as generate_user_certificates does for one student, fetching
+    the data they need and writing their certificates in bulk.
+
+    Args:
+        students (list of User): a batch of a few hundred students at most
+        course_key (CourseKey)
+
+    Keyword Arguments are the same as those of generate_user_certificates.
+
+    Returns a dict mapping the ids of the students to the statuses of their
+    certificates, or to None if no certificate was requested for them.
+    """
+    if course is None:
+        course = modulestore().get_course(course_key, depth=0)
+    xqueue = XQueueCertInterface()
+    if insecure:
+        xqueue.use_https = False
+    generate_pdf = not has_html_certificates_enabled(course_key, course)
+    certs = xqueue.add_certs(
+        students,
+        course_key,
+        course=course,
+        generate_pdf=generate_pdf,
+        forced_grade=forced_grade
+    )
+
+    statuses = {}
+    for student in students:
+        cert = certs.get(student.id)
+        if cert is None:
+            statuses[student.id] = None
+            continue
+
+        if CertificateStatuses.is_passing_status(cert.status):
+            emit_certificate_event('created', student, course_key, course, {
+                'user_id': student.id,
+                'course_id': unicode(course_key),
+                'certificate_id': cert.verify_uuid,
+                'enrollment_mode': cert.mode,
+                'generation_mode': generation_mode
+            })
+        statuses[student.id] = cert.status
+    return statuses
+
+
 def regenerate_user_certificates(student, course_key, course=None,
                                  forced_grade=None, template_file=None, insecure=False):
     """
@@ -2,13 +2,16 @@
 import json
 import logging
 import random
+from multiprocessing.pool import ThreadPool
 from uuid import uuid4
 
 import lxml.html
 from django.conf import settings
 from django.core.urlresolvers import reverse
+from django.db import IntegrityError, transaction
 from django.test.client import RequestFactory
 from lxml.etree import ParserError, XMLSyntaxError
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
 from capa.xqueue_interface import XQueueInterface, make_hashkey, make_xheader
@@ -18,9 +21,11 @@ from certificates.models import (
     CertificateWhitelist,
     ExampleCertificate,
     GeneratedCertificate,
+    certificate_status,
     certificate_status_for_student
 )
 from course_modes.models import CourseMode
+from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.new.course_grade_factory import CourseGradeFactory
 from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
 from student.models import CourseEnrollment, UserProfile
@@ -66,6 +71,9 @@ class XQueueCertInterface(object):
                    view which will save the certificate
                    download URL.
 
+       add_certs:  Add new certificates for many students
+                   of a course at once.
+
        regen_cert: Regenerate an existing certificate.
                    For a user that already has a certificate
                    this will delete the existing one and
@@ -180,7 +188,6 @@ class XQueueCertInterface(object):
 
         raise NotImplementedError
 
-    # pylint: disable=too-many-statements
     def add_cert(self, student, course_id, course=None, forced_grade=None, template_file=None, generate_pdf=True):
         """
         Request a new certificate for a student.
@@ -225,6 +232,177 @@ class XQueueCertInterface(object):
             )
             return None
 
+        cert_status = certificate_status_for_student(student, course_id)['status']
+        if not self._is_valid_status_for_add(student, course_id, cert_status):
+            return None
+
+        # The caller can optionally pass a course in to avoid
+        # re-fetching it from Mongo. If they have not provided one,
+        # get it from the modulestore.
+        if course is None:
+            course = modulestore().get_course(course_id, depth=0)
+
+        profile = UserProfile.objects.get(user=student)
+        profile_name = profile.name
+
+        # Needed for access control in grading.
+        self.request.user = student
+        self.request.session = {}
+
+        is_whitelisted = self.whitelist.filter(user=student, course_id=course_id, whitelist=True).exists()
+        course_grade = CourseGradeFactory().create(student, course)
+        enrollment_mode, __ = CourseEnrollment.enrollment_mode_for_user(student, course_id)
+        user_is_verified = SoftwareSecurePhotoVerification.user_is_verified(student)
+
+        cert, created = GeneratedCertificate.objects.get_or_create(user=student, course_id=course_id)  # pylint: disable=no-member
+
+        generation_args = self._prepare_cert(
+            cert,
+            student,
+            course_grade,
+            profile_name,
+            enrollment_mode,
+            is_whitelisted,
+            user_is_verified,
+            forced_grade=forced_grade,
+            template_file=template_file,
+        )
+        if generation_args is None:
+            cert.save()
+            return cert
+
+        # Finally, generate the certificate and send it off.
+        grade_contents, template_pdf = generation_args
+        return self._generate_cert(cert, course, student, grade_contents, template_pdf, generate_pdf)
+
+    def add_certs(self, students, course_id, course=None, forced_grade=None, template_file=None, generate_pdf=True):
+        """
+        Request new certificates for many students in a course at once.
+
+        The certificates are generated as add_cert would generate them for
+        each of the students, but the enrollments, ID verifications,
+        whitelist entries, profiles, certificates and persisted grades of
+        the students are fetched up front with a query each, the missing
+        certificates are created with a single insert, and the XQueue tasks
+        are sent over the session of the xqueue_interface,
+        CERTIFICATE_GENERATION_XQUEUE_CONCURRENCY at a time.
+
+        As the students are fetched with `IN` queries, they should be given
+        in batches of a few hundred at most.
+
+        Arguments:
+          students  - iterable of User.objects
+          course_id - courseenrollment.course_id (CourseKey)
+
+        Keyword Arguments are the same as those of add_cert.
+
+        Returns a dict mapping the ids of the students to their certificates,
+        or to None for the students whose certificates could not be requested.
+        """
+        students = list(students)
+        certs = {student.id: None for student in students}
+
+        if hasattr(course_id, 'ccx'):
+            LOGGER.warning(
+                (
+                    u"Cannot create certificate generation tasks for %d users "
+                    u"in the course '%s'; "
+                    u"certificates are not allowed for CCX courses."
+                ),
+                len(students),
+                unicode(course_id)
+            )
+            return certs
+
+        existing_certs = {
+            cert.user_id: cert
+            for cert in GeneratedCertificate.objects.filter(user__in=students, course_id=course_id)  # pylint: disable=no-member
+        }
+        students = [
+            student for student in students
+            if self._is_valid_status_for_add(
+                student, course_id, certificate_status(existing_certs.get(student.id))['status']
+            )
+        ]
+        if not students:
+            return certs
+
+        if course is None:
+            course = modulestore().get_course(course_id, depth=0)
+
+        whitelisted_ids = set(
+            self.whitelist.filter(
+                user__in=students, course_id=course_id, whitelist=True
+            ).values_list('user_id', flat=True)
+        )
+        restricted_ids = set(self.restricted.filter(user__in=students).values_list('user_id', flat=True))
+        profile_names = dict(UserProfile.objects.filter(user__in=students).values_list('user_id', 'name'))
+        verified_ids = set(
+            SoftwareSecurePhotoVerification.verified_query().filter(
+                user__in=students
+            ).values_list('user_id', flat=True)
+        )
+        CourseEnrollment.bulk_fetch_enrollment_states(students, course_id)
+
+        PersistentCourseGrade.prefetch(course_id, students)
+        try:
+            course_grades = {
+                result.student.id: result.course_grade
+                for result in CourseGradeFactory().iter(students, course=course)
+                if result.course_grade is not None
+            }
+        finally:
+            PersistentCourseGrade.clear_cache(course_id)
+
+        students = [student for student in students if student.id in course_grades]
+        self._create_missing_certs(students, course_id, existing_certs)
+
+        # Each certificate is saved on its own, as add_cert saves it, so
+        # that the receivers of the signals sent by save() only see
+        # committed certificates, and only of learners whose certificates
+        # stay saved.
+        to_generate = []
+        try:
+            for student in students:
+                cert = existing_certs[student.id]
+                enrollment_mode, __ = CourseEnrollment.enrollment_mode_for_user(student, course_id)
+                generation_args = self._prepare_cert(
+                    cert,
+                    student,
+                    course_grades[student.id],
+                    profile_names.get(student.id, u''),
+                    enrollment_mode,
+                    student.id in whitelisted_ids,
+                    student.id in verified_ids,
+                    forced_grade=forced_grade,
+                    template_file=template_file,
+                    is_restricted=student.id in restricted_ids,
+                )
+                if generation_args is None:
+                    cert.save()
+                else:
+                    grade_contents, template_pdf = generation_args
+                    contents = self._prepare_generation(
+                        cert, course, student, grade_contents, template_pdf, generate_pdf
+                    )
+                    cert.save()
+                    if generate_pdf:
+                        to_generate.append((cert, contents))
+                certs[student.id] = cert
+        finally:
+            # The tasks are sent once the certificates are committed, so that
+            # the XQueue callbacks find them, including when a later student
+            # failed, so that no saved certificate is left generating.
+            for (cert, __), error in zip(to_generate, self._send_certs_to_xqueue(to_generate)):
+                self._record_xqueue_result(cert, error)
+
+        return certs
+
+    def _is_valid_status_for_add(self, student, course_id, cert_status):
+        """
+        Returns whether a certificate with the given status can be
+        (re-)generated, logging a warning if it cannot.
+        """
         valid_statuses = [
             status.generating,
             status.unavailable,
@@ -237,9 +415,6 @@ class XQueueCertInterface(object):
             status.audit_notpassing,
         ]
 
-        cert_status = certificate_status_for_student(student, course_id)['status']
-        cert = None
-
         if cert_status not in valid_statuses:
             LOGGER.warning(
                 (
@@ -252,26 +427,67 @@ class XQueueCertInterface(object):
                 cert_status,
                 unicode(valid_statuses)
             )
-            return None
+            return False
+        return True
 
-        # The caller can optionally pass a course in to avoid
-        # re-fetching it from Mongo. If they have not provided one,
-        # get it from the modulestore.
-        if course is None:
-            course = modulestore().get_course(course_id, depth=0)
+    def _create_missing_certs(self, students, course_id, certs):
+        """
+        Creates the certificates of the students that do not have one yet
+        with a single insert, and adds them to the given dict of
+        certificates by user id.
+        """
+        new_certs = [
+            GeneratedCertificate(user=student, course_id=course_id)
+            for student in students
+            if student.id not in certs
+        ]
+        if not new_certs:
+            return
 
-        profile = UserProfile.objects.get(user=student)
-        profile_name = profile.name
+        new_user_ids = [cert.user_id for cert in new_certs]
+        try:
+            with transaction.atomic():
+                GeneratedCertificate.objects.bulk_create(new_certs)  # pylint: disable=no-member
+        except IntegrityError:
+            # Some of the certificates were created in the meantime.
+            for user_id in new_user_ids:
+                GeneratedCertificate.objects.get_or_create(user_id=user_id, course_id=course_id)  # pylint: disable=no-member
+
+        # The certificates are fetched again for their ids.
+        certs.update({
+            cert.user_id: cert
+            for cert in GeneratedCertificate.objects.filter(  # pylint: disable=no-member
+                user_id__in=new_user_ids, course_id=course_id
+            )
+        })
 
-        # Needed for access control in grading.
-        self.request.user = student
-        self.request.session = {}
+    # pylint: disable=too-many-statements, too-many-arguments
+    def _prepare_cert(
+            self,
+            cert,
+            student,
+            course_grade,
+            profile_name,
+            enrollment_mode,
+            is_whitelisted,
+            user_is_verified,
+            forced_grade=None,
+            template_file=None,
+            is_restricted=None,
+    ):
+        """
+        Updates the certificate of the student from their grade, enrollment
+        and verification, without saving it.
 
-        is_whitelisted = self.whitelist.filter(user=student, course_id=course_id, whitelist=True).exists()
-        course_grade = CourseGradeFactory().create(student, course)
-        enrollment_mode, __ = CourseEnrollment.enrollment_mode_for_user(student, course_id)
+        If `is_restricted` is None, whether the student is on the restricted
+        list is looked up if needed.
+
+        Returns the (grade_contents, template_pdf) to generate the certificate
+        with, or None if it is not to be generated, in which case its status
+        says why.
+        """
+        course_id = cert.course_id
         mode_is_verified = enrollment_mode in GeneratedCertificate.VERIFIED_CERTS_MODES
-        user_is_verified = SoftwareSecurePhotoVerification.user_is_verified(student)
         cert_mode = enrollment_mode
         is_eligible_for_certificate = is_whitelisted or CourseMode.is_eligible_for_certificate(enrollment_mode)
         unverified = False
@@ -308,12 +524,9 @@ class XQueueCertInterface(object):
             mode_is_verified
         )
 
-        cert, created = GeneratedCertificate.objects.get_or_create(user=student, course_id=course_id)  # pylint: disable=no-member
-
         cert.mode = cert_mode
         cert.user = student
         cert.grade = course_grade.percent
-        cert.course_id = course_id
         cert.name = profile_name
         cert.download_url = ''
 
@@ -356,17 +569,15 @@ class XQueueCertInterface(object):
         cutoff = settings.AUDIT_CERT_CUTOFF_DATE
         if (cutoff and cert.created_date >= cutoff) and not is_eligible_for_certificate:
             cert.status = CertificateStatuses.audit_passing if passing else CertificateStatuses.audit_notpassing
-            cert.save()
             LOGGER.info(
                 u"Student %s with enrollment mode %s is not eligible for a certificate.",
                 student.id,
                 enrollment_mode
             )
-            return cert
+            return None
         # If they are not passing, short-circuit and don't generate cert
         elif not passing:
             cert.status = status.notpassing
-            cert.save()
 
             LOGGER.info(
                 (
@@ -378,14 +589,15 @@ class XQueueCertInterface(object):
                 unicode(course_id),
                 cert.status
             )
-            return cert
+            return None
 
         # Check to see whether the student is on the the embargoed
         # country restricted list. If so, they should not receive a
         # certificate -- set their status to restricted and log it.
-        if self.restricted.filter(user=student).exists():
+        if is_restricted is None:
+            is_restricted = self.restricted.filter(user=student).exists()
+        if is_restricted:
             cert.status = status.restricted
-            cert.save()
 
             LOGGER.info(
                 (
@@ -398,11 +610,10 @@ class XQueueCertInterface(object):
                 cert.status,
                 unicode(course_id)
             )
-            return cert
+            return None
 
         if unverified:
             cert.status = status.unverified
-            cert.save()
             LOGGER.info(
                 (
                     u"User %s has a verified enrollment in course %s "
@@ -412,16 +623,32 @@ class XQueueCertInterface(object):
                 student.id,
                 unicode(course_id),
             )
-            return cert
+            return None
 
-        # Finally, generate the certificate and send it off.
-        return self._generate_cert(cert, course, student, grade_contents, template_pdf, generate_pdf)
+        return grade_contents, template_pdf
 
     def _generate_cert(self, cert, course, student, grade_contents, template_pdf, generate_pdf):
         """
         Generate a certificate for the student. If `generate_pdf` is True,
         sends a request to XQueue.
         """
+        contents = self._prepare_generation(cert, course, student, grade_contents, template_pdf, generate_pdf)
+        cert.save()
+
+        if generate_pdf:
+            try:
+                self._send_to_xqueue(contents, cert.key)
+            except XQueueAddToQueueError as exc:
+                self._record_xqueue_result(cert, exc)
+            else:
+                self._record_xqueue_result(cert, None)
+        return cert
+
+    def _prepare_generation(self, cert, course, student, grade_contents, template_pdf, generate_pdf):
+        """
+        Sets the key and status of a certificate that is generated, without
+        saving it, and returns the contents of its XQueue task.
+        """
         course_id = unicode(course.id)
 
         key = make_hashkey(random.random())
@@ -440,35 +667,73 @@ class XQueueCertInterface(object):
         else:
             cert.status = status.downloadable
             cert.verify_uuid = uuid4().hex
+        return contents
 
-        cert.save()
+    def _send_certs_to_xqueue(self, certs_and_contents):
+        """
+        Sends the XQueue tasks of the given (certificate, contents) pairs,
+        CERTIFICATE_GENERATION_XQUEUE_CONCURRENCY at a time, and returns the
+        XQueueAddToQueueError of each task, or None if it was sent.
+        """
+        concurrency = min(settings.CERTIFICATE_GENERATION_XQUEUE_CONCURRENCY, len(certs_and_contents))
+        if concurrency <= 1:
+            return [self._send_cert_to_xqueue(cert_and_contents) for cert_and_contents in certs_and_contents]
+
+        if concurrency > DEFAULT_POOLSIZE:
+            # Keep a connection open for each of the threads.
+            self.xqueue_interface.session.mount(
+                self.xqueue_interface.url,
+                HTTPAdapter(pool_connections=1, pool_maxsize=concurrency),
+            )
+        pool = ThreadPool(concurrency)
+        try:
+            return pool.map(self._send_cert_to_xqueue, certs_and_contents)
+        finally:
+            pool.close()
+            pool.join()
 
-        if generate_pdf:
-            try:
-                self._send_to_xqueue(contents, key)
-            except XQueueAddToQueueError as exc:
-                cert.status = ExampleCertificate.STATUS_ERROR
-                cert.error_reason = unicode(exc)
-                cert.save()
-                LOGGER.critical(
-                    (
-                        u"Could not add certificate task to XQueue.  "
-                        u"The course was '%s' and the student was '%s'."
-                        u"The certificate task status has been marked as 'error' "
-                        u"and can be re-submitted with a management command."
-                    ), course_id, student.id
-                )
-            else:
-                LOGGER.info(
-                    (
-                        u"The certificate status has been set to '%s'.  "
-                        u"Sent a certificate grading task to the XQueue "
-                        u"with the key '%s'. "
-                    ),
-                    cert.status,
-                    key
-                )
-        return cert
+    def _send_cert_to_xqueue(self, cert_and_contents):
+        """
+        Sends the XQueue task of a (certificate, contents) pair, and returns
+        the XQueueAddToQueueError if it could not be sent.
+
+        This does not touch the database, so that it can be called from
+        other threads.
+        """
+        cert, contents = cert_and_contents
+        try:
+            self._send_to_xqueue(contents, cert.key)
+        except XQueueAddToQueueError as exc:
+            return exc
+        return None
+
+    def _record_xqueue_result(self, cert, error):
+        """
+        Marks the certificate as 'error' if its XQueue task could not be
+        sent, and logs the outcome.
+        """
+        if error is not None:
+            cert.status = ExampleCertificate.STATUS_ERROR
+            cert.error_reason = unicode(error)
+            cert.save()
+            LOGGER.critical(
+                (
+                    u"Could not add certificate task to XQueue.  "
+                    u"The course was '%s' and the student was '%s'."
+                    u"The certificate task status has been marked as 'error' "
+                    u"and can be re-submitted with a management command."
+                ), unicode(cert.course_id), cert.user_id
+            )
+        else:
+            LOGGER.info(
+                (
+                    u"The certificate status has been set to '%s'.  "
+                    u"Sent a certificate grading task to the XQueue "
+                    u"with the key '%s'. "
+                ),
+                cert.status,
+                cert.key
+            )
 
     def add_example_cert(self, example_cert):
         """Add a task to create an example certificate.
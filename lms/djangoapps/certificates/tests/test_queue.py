@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 import ddt
 import freezegun
 import pytz
+from ccx_keys.locator import CCXLocator
 from django.test import TestCase
 from django.test.utils import override_settings
 from mock import Mock, patch
@@ -275,6 +276,147 @@ class XQueueCertInterfaceAddCertificateTest(ModuleStoreTestCase):
         )
 
 
+@ddt.ddt
+@attr(shard=1)
+@override_settings(CERT_QUEUE='certificates')
+class XQueueCertInterfaceAddCertificatesTest(ModuleStoreTestCase):
+    """Test adding the certificates of many students to the queue at once. """
+
+    def setUp(self):
+        super(XQueueCertInterfaceAddCertificatesTest, self).setUp()
+        self.course = CourseFactory.create()
+        self.xqueue = XQueueCertInterface()
+
+    def _create_student(self, mode='honor'):
+        """
+        Creates a student enrolled in the course with the given mode.
+        """
+        student = UserFactory.create()
+        CourseEnrollmentFactory(user=student, course_id=self.course.id, is_active=True, mode=mode)
+        return student
+
+    def _add_certs(self, students, send_result=(0, None)):
+        """
+        Adds the certificates of the students to the queue, and returns
+        them with the mock of `XQueueInterface.send_to_queue`.
+        """
+        with mock_passing_grade():
+            with patch.object(XQueueInterface, 'send_to_queue') as mock_send:
+                mock_send.return_value = send_result
+                certs = self.xqueue.add_certs(students, self.course.id)
+        return certs, mock_send
+
+    def test_add_certs(self):
+        honor_student = self._create_student()
+        verified_student = self._create_student(CourseMode.VERIFIED)
+        SoftwareSecurePhotoVerificationFactory.create(user=verified_student, status='approved')
+        unverified_student = self._create_student(CourseMode.VERIFIED)
+        restricted_student = self._create_student()
+        restricted_student.profile.allow_certificate = False
+        restricted_student.profile.save()
+        deleting_student = self._create_student()
+        GeneratedCertificateFactory(
+            user=deleting_student,
+            course_id=self.course.id,
+            status=CertificateStatuses.deleting,
+        )
+        regenerated_student = self._create_student()
+        GeneratedCertificateFactory(
+            user=regenerated_student,
+            course_id=self.course.id,
+            status=CertificateStatuses.error,
+        )
+
+        certs, mock_send = self._add_certs([
+            honor_student,
+            verified_student,
+            unverified_student,
+            restricted_student,
+            deleting_student,
+            regenerated_student,
+        ])
+
+        self.assertIsNone(certs[deleting_student.id])
+        self.assertEqual(
+            {
+                student_id: (cert.status, cert.mode)
+                for student_id, cert in certs.iteritems()
+                if cert is not None
+            },
+            {
+                honor_student.id: (CertificateStatuses.generating, CourseMode.HONOR),
+                verified_student.id: (CertificateStatuses.generating, CourseMode.VERIFIED),
+                unverified_student.id: (CertificateStatuses.unverified, CourseMode.VERIFIED),
+                restricted_student.id: (CertificateStatuses.restricted, CourseMode.HONOR),
+                regenerated_student.id: (CertificateStatuses.generating, CourseMode.HONOR),
+            }
+        )
+        for student_id, cert in certs.iteritems():
+            if cert is not None:
+                self.assertEqual(
+                    GeneratedCertificate.objects.get(user_id=student_id, course_id=self.course.id).status,  # pylint: disable=no-member
+                    cert.status
+                )
+
+        self.assertEqual(mock_send.call_count, 3)
+        templates = sorted(json.loads(kwargs['body'])['template_pdf'] for __, kwargs in mock_send.call_args_list)
+        self.assertEqual(
+            templates,
+            sorted(
+                ['certificate-template-{id.org}-{id.course}.pdf'.format(id=self.course.id)] * 2 +
+                ['certificate-template-{id.org}-{id.course}-verified.pdf'.format(id=self.course.id)]
+            )
+        )
+
+    @ddt.data(1, 3)
+    def test_concurrency(self, concurrency):
+        students = [self._create_student() for __ in xrange(5)]
+        with override_settings(CERTIFICATE_GENERATION_XQUEUE_CONCURRENCY=concurrency):
+            certs, mock_send = self._add_certs(students)
+
+        self.assertEqual(mock_send.call_count, 5)
+        keys = {json.loads(kwargs['header'])['lms_key'] for __, kwargs in mock_send.call_args_list}
+        self.assertEqual(keys, {cert.key for cert in certs.itervalues()})
+
+    def test_send_error(self):
+        students = [self._create_student() for __ in xrange(2)]
+        certs, __ = self._add_certs(students, send_result=(1, 'error'))
+
+        for student in students:
+            certificate = GeneratedCertificate.objects.get(user=student, course_id=self.course.id)  # pylint: disable=no-member
+            self.assertEqual(certificate.status, CertificateStatuses.error)
+            self.assertEqual(certs[student.id].status, CertificateStatuses.error)
+            self.assertIn('error', certificate.error_reason)
+
+    def test_later_student_fails(self):
+        students = [self._create_student() for __ in xrange(2)]
+        prepare_cert = XQueueCertInterface._prepare_cert  # pylint: disable=protected-access
+
+        def _fail_second_student(xqueue, cert, student, *args, **kwargs):
+            """
+            Fails to prepare the certificate of the second student.
+            """
+            if student.id == students[1].id:
+                raise ValueError
+            return prepare_cert(xqueue, cert, student, *args, **kwargs)
+
+        with patch.object(XQueueCertInterface, '_prepare_cert', autospec=True, side_effect=_fail_second_student):
+            with patch.object(XQueueInterface, 'send_to_queue', return_value=(0, None)) as mock_send:
+                with mock_passing_grade(), self.assertRaises(ValueError):
+                    self.xqueue.add_certs(students, self.course.id)
+
+        # The certificate of the first student stays saved, and was sent.
+        certificates = GeneratedCertificate.objects.filter(course_id=self.course.id)  # pylint: disable=no-member
+        self.assertEqual(certificates.get(user=students[0]).status, CertificateStatuses.generating)
+        self.assertEqual(mock_send.call_count, 1)
+        self.assertEqual(certificates.get(user=students[1]).status, CertificateStatuses.unavailable)
+
+    def test_ccx_course(self):
+        student = self._create_student()
+        certs = self.xqueue.add_certs([student], CCXLocator.from_course_locator(self.course.id, 1))
+        self.assertEqual(certs, {student.id: None})
+
+
 @attr(shard=1)
 @override_settings(CERT_QUEUE='certificates')
 class XQueueCertInterfaceExampleCertificateTest(TestCase):
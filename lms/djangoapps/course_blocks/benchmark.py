@@ -0,0 +1,318 @@
+"""
+Benchmarks of the collect and transform phases of course block structures.
+
+A synthetic course of a configurable shape is created in the split
+modulestore, and the following are timed on it:
+
+  * the collection of the block structure from the modulestore, when it
+    is not in the cache ('collect'), and BlockStructureManager.get_collected
+    when it is ('get_collected_cached'),
+  * the transform of each of the COURSE_BLOCK_ACCESS_TRANSFORMERS, on its
+    own and all together, for an enrolled learner,
+  * the serialization and deserialization of the collected block
+    structure by BlockStructureStore.
+
+How much the resident memory of the process grows over each phase, and
+the size of the serialized block structure, are recorded with the timings.  The results
+are a JSON-serializable dict, so that results taken before and after a
+change can be saved and compared with compare_results.
+
+The course is generated deterministically from its shape and the seed, so
+the results of runs with the same arguments are comparable.
+"""
+import random
+import time
+from collections import namedtuple
+
+import psutil
+from django.contrib.auth.models import User
+
+from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager
+from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
+from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort, set_course_cohorted
+from openedx.core.djangoapps.course_groups.models import CourseCohort, CourseUserGroup
+from openedx.core.djangoapps.course_groups.views import link_cohort_to_partition_group
+from student.models import CourseEnrollment
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule.partitions.partitions import Group, UserPartition
+
+from .api import COURSE_BLOCK_ACCESS_TRANSFORMERS
+from .usage_info import CourseUsageInfo
+
+BENCHMARK_ORG = u'BlockStructureBenchmark'
+BENCHMARK_USERNAME = u'block_structure_benchmark'
+
+SPLIT_TEST_PARTITION_ID = 50
+COHORT_PARTITION_ID = 51
+
+# The proportion of components that are restricted to a content group.
+RESTRICTED_COMPONENT_RATIO = 0.5
+
+
+# The shape of a synthetic course: the number of chapters in the course, of
+# sequentials in each chapter, of verticals in each sequential and of
+# components in each vertical, the number of split_test and library_content
+# blocks in each sequential, the number of groups of each split_test, the
+# number of children of each library_content, and the number of cohort
+# content groups that components are restricted to.
+CourseShape = namedtuple('CourseShape', [
+    'chapters',
+    'sequentials',
+    'verticals',
+    'components',
+    'split_tests',
+    'split_test_groups',
+    'library_contents',
+    'library_children',
+    'content_groups',
+])
+
+DEFAULT_SHAPE = CourseShape(
+    chapters=10,
+    sequentials=5,
+    verticals=4,
+    components=5,
+    split_tests=1,
+    split_test_groups=2,
+    library_contents=1,
+    library_children=5,
+    content_groups=2,
+)
+
+
+def run_benchmark(shape=DEFAULT_SHAPE, repeat=5, seed=0, keep_course=False):
+    """
+    Creates a synthetic course of the given shape, benchmarks its block
+    structure and returns the results.
+
+    Arguments:
+        shape (CourseShape) - The shape of the course.
+        repeat (int) - How many times each phase is timed.
+        seed (int) - The seed of the generated course.
+        keep_course (bool) - Whether the course is kept in the modulestore
+            after the benchmark, rather than deleted.
+    """
+    results = {
+        'shape': shape._asdict(),
+        'repeat': repeat,
+        'seed': seed,
+        'timings': {},
+        'memory_growth_kb': {},
+    }
+    store = modulestore()
+    with store.default_store(ModuleStoreEnum.Type.split):
+        course_key = generate_course(store, shape, seed)
+    user = _create_learner(course_key, shape)
+    try:
+        manager = get_block_structure_manager(course_key)
+
+        def _time_collect():
+            manager.clear()
+            return _timed(manager.update_collected_if_needed)
+
+        _record(results, 'collect', _time_collect)
+        _record(results, 'get_collected_cached', lambda: _timed(manager.get_collected))
+        collected = manager.get_collected()
+        results['blocks'] = len(collected)
+
+        _record(results, 'copy', lambda: _timed(collected.copy))
+        transformer_sets = [
+            (u'transform.{}'.format(transformer.name()), [transformer])
+            for transformer in COURSE_BLOCK_ACCESS_TRANSFORMERS
+        ]
+        transformer_sets.append((u'transform.all', COURSE_BLOCK_ACCESS_TRANSFORMERS))
+        for phase, transformers in transformer_sets:
+            _record(results, phase, lambda transformers=transformers: _timed(
+                manager.get_transformed,
+                BlockStructureTransformers(transformers, CourseUsageInfo(course_key, user)),
+                collected_block_structure=collected,
+            ))
+
+        serialize = manager.store._serialize  # pylint: disable=protected-access
+        deserialize = manager.store._deserialize  # pylint: disable=protected-access
+        serialized_data = serialize(collected)
+        results['serialized_bytes'] = len(serialized_data)
+        _record(results, 'serialize', lambda: _timed(serialize, collected))
+        _record(results, 'deserialize', lambda: _timed(deserialize, serialized_data, collected.root_block_usage_key))
+    finally:
+        if not keep_course:
+            delete_course(store, course_key)
+    return results
+
+
+def generate_course(store, shape, seed):
+    """
+    Creates the synthetic course of the given shape, replacing the course
+    of a previous run with the same shape and seed, and returns its key.
+    """
+    rand = random.Random(seed)
+    run = u'{}_{}'.format(u'x'.join(unicode(count) for count in shape), seed)
+    course_key = store.make_course_key(BENCHMARK_ORG, u'Course', run)
+    if store.has_course(course_key):
+        delete_course(store, course_key)
+
+    user_id = ModuleStoreEnum.UserID.mgmt_command
+    user_partitions = [_create_partition(SPLIT_TEST_PARTITION_ID, u'random', shape.split_test_groups)]
+    if shape.content_groups:
+        user_partitions.append(_create_partition(COHORT_PARTITION_ID, u'cohort', shape.content_groups))
+
+    with store.bulk_operations(course_key):
+        course = store.create_course(
+            course_key.org,
+            course_key.course,
+            course_key.run,
+            user_id,
+            fields={'user_partitions': user_partitions},
+        )
+        for _ in xrange(shape.chapters):
+            chapter = store.create_child(user_id, course.location, 'chapter')
+            for _ in xrange(shape.sequentials):
+                sequential = store.create_child(user_id, chapter.location, 'sequential')
+                verticals = [
+                    store.create_child(user_id, sequential.location, 'vertical')
+                    for _ in xrange(shape.verticals)
+                ]
+                for vertical in verticals:
+                    for _ in xrange(shape.components):
+                        _create_component(store, user_id, vertical.location, shape, rand)
+                if not verticals:
+                    continue
+                for _ in xrange(shape.split_tests):
+                    _create_split_test(store, user_id, rand.choice(verticals).location, shape, rand)
+                for _ in xrange(shape.library_contents):
+                    _create_library_content(store, user_id, rand.choice(verticals).location, shape)
+    return course.id
+
+
+def delete_course(store, course_key):
+    """
+    Deletes the synthetic course, and its cohorts.
+    """
+    CourseUserGroup.objects.filter(course_id=course_key).delete()
+    store.delete_course(course_key, ModuleStoreEnum.UserID.mgmt_command)
+
+
+def compare_results(baseline, results):
+    """
+    Returns a list of (phase, baseline median, median, relative change)
+    tuples comparing the median timings of the given results to those of
+    the baseline results, for the phases that both include.
+    """
+    comparison = []
+    for phase in sorted(set(baseline['timings']) & set(results['timings'])):
+        baseline_median = baseline['timings'][phase]['median']
+        median = results['timings'][phase]['median']
+        change = (median - baseline_median) / baseline_median if baseline_median else None
+        comparison.append((phase, baseline_median, median, change))
+    return comparison
+
+
+def _create_partition(partition_id, scheme, num_groups):
+    """
+    Returns a user partition with the given number of groups.
+    """
+    return UserPartition(
+        id=partition_id,
+        name=u'Benchmark {} partition'.format(scheme),
+        description=u'Benchmark {} partition'.format(scheme),
+        groups=[Group(group_id, u'Group {}'.format(group_id)) for group_id in xrange(num_groups)],
+        scheme_id=scheme,
+    )
+
+
+def _create_component(store, user_id, parent_location, shape, rand):
+    """
+    Creates a problem or html component, restricted to a random content
+    group if the course has content groups.
+    """
+    fields = {}
+    if shape.content_groups and rand.random() < RESTRICTED_COMPONENT_RATIO:
+        fields['group_access'] = {COHORT_PARTITION_ID: [rand.randrange(shape.content_groups)]}
+    return store.create_child(user_id, parent_location, rand.choice(['problem', 'html']), fields=fields)
+
+
+def _create_split_test(store, user_id, parent_location, shape, rand):
+    """
+    Creates a split_test with a vertical with a component for each group.
+    """
+    split_test = store.create_child(
+        user_id, parent_location, 'split_test', fields={'user_partition_id': SPLIT_TEST_PARTITION_ID},
+    )
+    group_id_to_child = {}
+    for group_id in xrange(shape.split_test_groups):
+        group_vertical = store.create_child(user_id, split_test.location, 'vertical')
+        _create_component(store, user_id, group_vertical.location, shape, rand)
+        group_id_to_child[unicode(group_id)] = unicode(group_vertical.location)
+    split_test = store.get_item(split_test.location)
+    split_test.group_id_to_child = group_id_to_child
+    store.update_item(split_test, user_id)
+
+
+def _create_library_content(store, user_id, parent_location, shape):
+    """
+    Creates a library_content block that selects one of its problems.
+
+    The problems are created as its children, as if they had been copied
+    from a library, so that no library has to be created.
+    """
+    library_content = store.create_child(user_id, parent_location, 'library_content', fields={'max_count': 1})
+    for _ in xrange(shape.library_children):
+        store.create_child(user_id, library_content.location, 'problem')
+
+
+def _create_learner(course_key, shape):
+    """
+    Returns the learner that blocks are transformed for, enrolled in the
+    course and in the cohort of its first content group.
+    """
+    user, _ = User.objects.get_or_create(
+        username=BENCHMARK_USERNAME,
+        defaults={'email': u'{}@example.com'.format(BENCHMARK_USERNAME)},
+    )
+    CourseEnrollment.enroll(user, course_key)
+    if shape.content_groups:
+        set_course_cohorted(course_key, True)
+        for group_id in xrange(shape.content_groups):
+            cohort = CourseCohort.create(
+                cohort_name=u'Benchmark cohort {}'.format(group_id), course_id=course_key,
+            ).course_user_group
+            link_cohort_to_partition_group(cohort, COHORT_PARTITION_ID, group_id)
+            if group_id == 0:
+                add_user_to_cohort(cohort, user.username)
+    return user
+
+
+def _timed(func, *args, **kwargs):
+    """
+    Returns how long the call of func takes, in seconds.
+    """
+    start = time.time()
+    func(*args, **kwargs)
+    return time.time() - start
+
+
+def _record(results, phase, run):
+    """
+    Runs the phase as many times as the results ask for, with run returning
+    how long each run takes, and adds the statistics of the timings, and how
+    much the resident memory of the process grew over the runs, to the
+    results.
+    """
+    process = psutil.Process()
+    rss_before = process.get_memory_info().rss
+    timings = sorted(run() for _ in xrange(results['repeat']))
+    rss_after = process.get_memory_info().rss
+    middle = len(timings) // 2
+    if len(timings) % 2:
+        median = timings[middle]
+    else:
+        median = (timings[middle - 1] + timings[middle]) / 2.0
+    results['timings'][phase] = {
+        'min': timings[0],
+        'max': timings[-1],
+        'mean': sum(timings) / len(timings),
+        'median': median,
+        'runs': timings,
+    }
+    results['memory_growth_kb'][phase] = (rss_after - rss_before) // 1024
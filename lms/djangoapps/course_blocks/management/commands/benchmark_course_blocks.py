@@ -0,0 +1,83 @@
+"""
+Command to benchmark the course blocks of a synthetic course.
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from lms.djangoapps.course_blocks import benchmark
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_course_blocks --settings=devstack
+        $ ./manage.py lms benchmark_course_blocks --chapters 20 --repeat 10 --output after.json --settings=devstack
+        $ ./manage.py lms benchmark_course_blocks --compare before.json --settings=devstack
+    """
+    help = u'Benchmarks collecting, transforming and serializing the course blocks of a synthetic course.'
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        for field in benchmark.CourseShape._fields:
+            parser.add_argument(
+                '--{}'.format(field),
+                dest=field,
+                type=int,
+                default=getattr(benchmark.DEFAULT_SHAPE, field),
+                help=u'The number of {} of the synthetic course.'.format(field.replace('_', ' ')),
+            )
+        parser.add_argument(
+            '--repeat',
+            help=u'How many times each phase is timed.',
+            type=int,
+            default=5,
+        )
+        parser.add_argument(
+            '--seed',
+            help=u'The seed of the synthetic course.',
+            type=int,
+            default=0,
+        )
+        parser.add_argument(
+            '--output',
+            help=u'The file to write the results to, as JSON, instead of the standard output.',
+        )
+        parser.add_argument(
+            '--compare',
+            help=u'A file of earlier results, to print the changes in the median timings against.',
+        )
+        parser.add_argument(
+            '--keep_course',
+            help=u'Keep the synthetic course in the modulestore after the benchmark.',
+            action='store_true',
+            default=False,
+        )
+
+    def handle(self, *args, **options):
+        shape = benchmark.CourseShape(**{field: options[field] for field in benchmark.CourseShape._fields})
+        results = benchmark.run_benchmark(
+            shape,
+            repeat=options['repeat'],
+            seed=options['seed'],
+            keep_course=options['keep_course'],
+        )
+
+        if options.get('output'):
+            with open(options['output'], 'w') as output_file:
+                json.dump(results, output_file, indent=2, sort_keys=True)
+        elif not options.get('compare'):
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+
+        if options.get('compare'):
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            for phase, baseline_median, median, change in benchmark.compare_results(baseline, results):
+                self.stdout.write(u'{:<40} {:>10.4f}s {:>10.4f}s {:>8}'.format(
+                    phase,
+                    baseline_median,
+                    median,
+                    u'{:+.1%}'.format(change) if change is not None else u'n/a',
+                ))
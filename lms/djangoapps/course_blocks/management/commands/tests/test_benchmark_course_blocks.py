@@ -0,0 +1,86 @@
+"""
+Tests for the benchmark_course_blocks management command.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+
+from ..benchmark_course_blocks import Command
+from .... import benchmark
+
+
+class TestBenchmarkCourseBlocks(ModuleStoreTestCase):
+    """
+    Tests the benchmark_course_blocks management command.
+    """
+    SHAPE_OPTIONS = {
+        'chapters': 2,
+        'sequentials': 1,
+        'verticals': 2,
+        'components': 2,
+        'split_tests': 1,
+        'split_test_groups': 2,
+        'library_contents': 1,
+        'library_children': 2,
+        'content_groups': 2,
+    }
+
+    def setUp(self):
+        super(TestBenchmarkCourseBlocks, self).setUp()
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+        self.output_path = os.path.join(self.output_dir, 'results.json')
+
+    def _run(self, **options):
+        """
+        Runs the command with a small course, and returns its results.
+        """
+        options.update(self.SHAPE_OPTIONS)
+        call_command(Command(), repeat=2, output=self.output_path, **options)
+        with open(self.output_path) as output_file:
+            return json.load(output_file)
+
+    def test_results(self):
+        results = self._run()
+        self.assertEqual(results['shape'], self.SHAPE_OPTIONS)
+        self.assertEqual(
+            set(results['timings']),
+            {
+                'collect',
+                'get_collected_cached',
+                'copy',
+                'transform.library_content',
+                'transform.start_date',
+                'transform.user_partitions',
+                'transform.visibility',
+                'transform.all',
+                'serialize',
+                'deserialize',
+            },
+        )
+        self.assertEqual(len(results['timings']['collect']['runs']), 2)
+        self.assertEqual(set(results['memory_growth_kb']), set(results['timings']))
+        self.assertGreater(results['serialized_bytes'], 0)
+        # The course, 2 chapters, 2 sequentials, 4 verticals and 8 components,
+        # 2 split_tests with 2 verticals with 1 component each, and 2
+        # library_contents with 2 problems each.
+        self.assertEqual(results['blocks'], 1 + 2 + 2 + 4 + 8 + 2 * (1 + 2 * 2) + 2 * (1 + 2))
+
+    def test_course_deleted(self):
+        self._run()
+        self.assertEqual(
+            [course for course in self.store.get_courses() if course.id.org == benchmark.BENCHMARK_ORG],
+            [],
+        )
+
+    def test_compare(self):
+        results = self._run()
+        self.assertEqual(
+            [phase for phase, _, _, _ in benchmark.compare_results(results, results)],
+            sorted(results['timings']),
+        )
@@ -0,0 +1,58 @@
+"""
+Signal handlers for invalidating cached transformed block structures.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
+
+from openedx.core.djangoapps.course_groups.models import (
+    CohortMembership,
+    CourseCohortsSettings,
+    CourseUserGroupPartitionGroup,
+)
+from student.models import CourseEnrollment
+from xmodule.modulestore.django import SignalHandler
+
+from . import transformed_cache
+
+
+@receiver(SignalHandler.course_published)
+def _invalidate_transformed_on_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Catches the signal that a course has been published in the module
+    store and invalidates the course's transformed block structures.
+
+    Entries of older versions of the course are not reused anyway, so this
+    only frees them earlier.
+    """
+    transformed_cache.invalidate_course(course_key)
+
+
+@receiver(post_save, sender=CourseCohortsSettings)
+def _invalidate_transformed_on_cohort_settings_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the course's transformed block structures when its cohort
+    settings change.
+    """
+    transformed_cache.invalidate_course(instance.course_id)
+
+
+@receiver(post_save, sender=CourseUserGroupPartitionGroup)
+@receiver(post_delete, sender=CourseUserGroupPartitionGroup)
+def _invalidate_transformed_on_cohort_partition_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the course's transformed block structures when a cohort is
+    linked to or unlinked from a partition group.
+    """
+    transformed_cache.invalidate_course(instance.course_user_group.course_id)
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+@receiver(post_save, sender=CohortMembership)
+@receiver(post_delete, sender=CohortMembership)
+def _invalidate_transformed_on_user_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the user's transformed block structures for the course when
+    the user's enrollment or cohort membership changes.
+    """
+    transformed_cache.invalidate_user(instance.user_id, instance.course_id)
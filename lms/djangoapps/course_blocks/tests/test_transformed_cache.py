@@ -0,0 +1,92 @@
+"""
+Tests for course_blocks/transformed_cache.py
+"""
+# pylint: disable=protected-access
+from mock import patch
+from nose.plugins.attrib import attr
+
+from openedx.core.djangoapps.content.block_structure.api import update_course_in_cache
+from student.tests.factories import CourseEnrollmentFactory, UserFactory
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+from .. import transformed_cache
+from ..api import get_course_blocks
+from ..config.waffle import CACHE_TRANSFORMED_STRUCTURES, waffle
+
+
+@attr(shard=3)
+class TransformedCacheTestCase(SharedModuleStoreTestCase):
+    """
+    Tests for caching transformed block structures.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TransformedCacheTestCase, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        with cls.store.bulk_operations(cls.course.id):
+            cls.chapter = ItemFactory.create(parent=cls.course, category='chapter')
+            cls.visible = ItemFactory.create(parent=cls.chapter, category='sequential')
+            cls.hidden = ItemFactory.create(parent=cls.chapter, category='sequential', visible_to_staff_only=True)
+
+    def setUp(self):
+        super(TransformedCacheTestCase, self).setUp()
+        self.user = UserFactory.create()
+        CourseEnrollmentFactory.create(user=self.user, course_id=self.course.id)
+        transformed_cache._transformed_structures.clear()
+
+    def get_block_keys(self, user):
+        """
+        Returns the keys of the blocks that are accessible to the given user.
+        """
+        return set(get_course_blocks(user, self.course.location).get_block_keys())
+
+    def test_disabled(self):
+        self.assertFalse(transformed_cache.is_enabled())
+        with patch.object(transformed_cache, 'get_transformed') as mock_get_transformed:
+            self.get_block_keys(self.user)
+        self.assertFalse(mock_get_transformed.called)
+
+    def test_cache_hit(self):
+        with waffle().override(CACHE_TRANSFORMED_STRUCTURES):
+            block_keys = self.get_block_keys(self.user)
+            self.assertIn(self.visible.location, block_keys)
+            self.assertNotIn(self.hidden.location, block_keys)
+
+            with patch.object(transformed_cache.serialization, 'serialize') as mock_serialize:
+                self.assertEquals(self.get_block_keys(self.user), block_keys)
+            self.assertFalse(mock_serialize.called)
+
+    def test_users_not_shared(self):
+        staff = UserFactory.create(is_staff=True)
+        with waffle().override(CACHE_TRANSFORMED_STRUCTURES):
+            self.assertNotIn(self.hidden.location, self.get_block_keys(self.user))
+            self.assertIn(self.hidden.location, self.get_block_keys(staff))
+
+    def test_invalidate(self):
+        with waffle().override(CACHE_TRANSFORMED_STRUCTURES):
+            for invalidate in (
+                    lambda: transformed_cache.invalidate_course(self.course.id),
+                    lambda: transformed_cache.invalidate_user(self.user.id, self.course.id),
+            ):
+                self.get_block_keys(self.user)
+                invalidate()
+                with patch.object(
+                    transformed_cache.serialization,
+                    'serialize',
+                    wraps=transformed_cache.serialization.serialize,
+                ) as mock_serialize:
+                    self.get_block_keys(self.user)
+                self.assertTrue(mock_serialize.called)
+
+    def test_course_changed(self):
+        with waffle().override(CACHE_TRANSFORMED_STRUCTURES):
+            self.get_block_keys(self.user)
+
+            # Changes to the course don't invalidate the cache by themselves
+            # in Studio, but the new collected block structure isn't served
+            # from entries of the old one.
+            new_block = ItemFactory.create(parent=self.chapter, category='sequential')
+            self.addCleanup(self.store.delete_item, new_block.location, self.user.id)
+            update_course_in_cache(self.course.id)
+            self.assertIn(new_block.location, self.get_block_keys(self.user))
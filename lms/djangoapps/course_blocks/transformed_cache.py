@@ -0,0 +1,223 @@
+"""
+An opt-in cache of course block structures that have been transformed by
+the user-specific access transformers of this app.
+
+Transforming the collected block structure for a user repeats identical
+work on every request as long as the user's access-relevant state does not
+change.  When the course_blocks.cache_transformed_structures waffle switch
+is enabled, the result of the access transformers is kept in a bounded,
+per-process LRU cache, keyed by:
+
+    * the user and the starting block,
+    * the version of the course that the collected block structure was
+      collected from,
+    * the course's cache generation, which changes whenever the course's
+      cohort settings change, and when the course is published in the LMS,
+    * the user's cache generation for the course, which changes whenever
+      the user's enrollment or cohort membership in the course changes,
+    * a fingerprint of the user's other access-relevant inputs: enrollment
+      mode, cohort, staff and beta tester roles, and the current time
+      bucket (see COURSE_BLOCKS_TRANSFORMED_CACHE), so that start and due
+      dates are reevaluated at least that often.
+
+The cache generations are kept in the shared django cache, so that changes
+made in one process invalidate the entries of all processes.  Courses are
+published in Studio, where the LMS's signal receivers do not run, so
+entries are only reused for the same version of the collected block
+structure.  Any transformers that are not access transformers are still
+run on each request, on a fresh copy of the cached structure.
+"""
+from time import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from courseware.masquerade import get_course_masquerade
+from openedx.core.djangoapps.content.block_structure import config as block_structure_config
+from openedx.core.djangoapps.content.block_structure import serialization
+from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
+from openedx.core.lib.cache_utils import LRUCache
+from student.models import CourseEnrollment
+from student.roles import CourseBetaTesterRole
+
+from .config.waffle import CACHE_TRANSFORMED_STRUCTURES, waffle
+from .transformers import hidden_content, library_content, split_test, start_date, user_partitions, visibility
+
+
+# Transformers whose results depend only on the collected block structure
+# and the inputs that are part of the cache key.
+CACHEABLE_TRANSFORMERS = (
+    hidden_content.HiddenContentTransformer,
+    library_content.ContentLibraryTransformer,
+    split_test.SplitTestTransformer,
+    start_date.StartDateTransformer,
+    user_partitions.UserPartitionTransformer,
+    visibility.VisibilityTransformer,
+)
+
+
+_transformed_structures = LRUCache()  # pylint: disable=invalid-name
+
+
+def is_enabled():
+    """
+    Returns whether caching of transformed block structures is enabled.
+    """
+    return waffle().is_enabled(CACHE_TRANSFORMED_STRUCTURES)
+
+
+def get_transformed(manager, transformers, starting_block_usage_key, collected_block_structure=None):
+    """
+    Returns the block structure transformed by the given transformers,
+    using the cached result of its access transformers when possible.
+
+    Arguments:
+        manager (BlockStructureManager) - The manager of the course's
+            block structures.
+
+        transformers (BlockStructureTransformers) - The transformers to
+            apply, with their usage_info set to a CourseUsageInfo.
+
+        starting_block_usage_key (UsageKey) - The starting block of the
+            block structure that is to be transformed.
+
+        collected_block_structure (BlockStructureBlockData) - See
+            BlockStructureManager.get_transformed.
+    """
+    usage_info = transformers.usage_info
+    access_transformers = transformers.filtering_transformers()
+    if not _is_cacheable(usage_info, access_transformers):
+        return manager.get_transformed(transformers, starting_block_usage_key, collected_block_structure)
+
+    if collected_block_structure is None:
+        collected_block_structure = manager.get_collected()
+    cache_key = _get_cache_key(
+        usage_info,
+        starting_block_usage_key,
+        access_transformers,
+        visibility.VisibilityTransformer.get_course_version(collected_block_structure),
+    )
+    serialized_data = _transformed_structures.get(cache_key)
+    if serialized_data is None:
+        block_structure = manager.get_transformed(
+            BlockStructureTransformers(access_transformers, usage_info),
+            starting_block_usage_key,
+            collected_block_structure,
+        )
+        _transformed_structures.set(
+            cache_key,
+            serialization.serialize(block_structure),
+            settings.COURSE_BLOCKS_TRANSFORMED_CACHE['MAX_SIZE'],
+        )
+    else:
+        block_structure = serialization.deserialize(
+            serialized_data,
+            starting_block_usage_key,
+            compact=block_structure_config.waffle().is_enabled(block_structure_config.COMPACT_REPRESENTATION),
+        )
+
+    remaining_transformers = transformers.non_filtering_transformers()
+    if remaining_transformers:
+        BlockStructureTransformers(remaining_transformers, usage_info).transform(block_structure)
+    return block_structure
+
+
+def invalidate_course(course_key):
+    """
+    Invalidates the cached transformed block structures of all users for
+    the given course.
+    """
+    cache.set(_course_generation_key(course_key), uuid4().hex, None)
+
+
+def invalidate_user(user_id, course_key):
+    """
+    Invalidates the cached transformed block structures of the given user
+    for the given course.
+    """
+    cache.set(_user_generation_key(user_id, course_key), uuid4().hex, None)
+
+
+def _is_cacheable(usage_info, access_transformers):
+    """
+    Returns whether the result of the given access transformers can be
+    cached for the given usage_info.
+    """
+    user = usage_info.user
+    return (
+        is_enabled() and
+        getattr(user, 'id', None) is not None and
+        get_course_masquerade(user, usage_info.course_key) is None and
+        all(isinstance(transformer, CACHEABLE_TRANSFORMERS) for transformer in access_transformers)
+    )
+
+
+def _get_cache_key(usage_info, starting_block_usage_key, access_transformers, course_version):
+    """
+    Returns the key of the transformed block structure for the given
+    arguments.
+    """
+    user, course_key = usage_info.user, usage_info.course_key
+
+    # Imported here to avoid a circular import with courseware.
+    from openedx.core.djangoapps.course_groups.cohorts import get_cohort_id
+
+    # Get the cohort first, since assigning the user to a cohort changes
+    # the user's cache generation.
+    cohort_id = get_cohort_id(user, course_key, use_cached=True)
+    course_generation, user_generation = _get_generations(
+        _course_generation_key(course_key),
+        _user_generation_key(user.id, course_key),
+    )
+    enrollment_mode, is_active = CourseEnrollment.enrollment_mode_for_user(user, course_key)
+
+    # Offset each user's time buckets, so that entries of different users
+    # do not all expire at once.
+    time_bucket_seconds = settings.COURSE_BLOCKS_TRANSFORMED_CACHE['TIME_BUCKET_SECONDS']
+    time_bucket = (int(time()) + user.id % time_bucket_seconds) // time_bucket_seconds
+
+    return (
+        user.id,
+        unicode(starting_block_usage_key),
+        tuple(transformer.name() for transformer in access_transformers),
+        course_version,
+        course_generation,
+        user_generation,
+        enrollment_mode,
+        is_active,
+        cohort_id,
+        usage_info.has_staff_access,
+        CourseBetaTesterRole(course_key).has_user(user),
+        time_bucket,
+    )
+
+
+def _get_generations(*generation_keys):
+    """
+    Returns the current values of the given cache generation keys,
+    creating any that do not exist.
+    """
+    generations = cache.get_many(generation_keys)
+    for generation_key in generation_keys:
+        if generation_key not in generations:
+            # A new value ensures that entries created before the key was
+            # evicted from the cache are not reused.
+            cache.add(generation_key, uuid4().hex, None)
+            generations[generation_key] = cache.get(generation_key)
+    return tuple(generations[generation_key] for generation_key in generation_keys)
+
+
+def _course_generation_key(course_key):
+    """
+    Returns the cache key of the given course's cache generation.
+    """
+    return u'course_blocks.transformed.generation.{}'.format(course_key)
+
+
+def _user_generation_key(user_id, course_key):
+    """
+    Returns the cache key of the given user's cache generation for the
+    given course.
+    """
+    return u'course_blocks.transformed.generation.{}.{}'.format(course_key, user_id)
@@ -22,10 +22,11 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
 
     Staff users are exempted from visibility rules.
     """
-    WRITE_VERSION = 1
-    READ_VERSION = 1
+    WRITE_VERSION = 2
+    READ_VERSION = 2
 
     MERGED_VISIBLE_TO_STAFF_ONLY = 'merged_visible_to_staff_only'
+    COURSE_VERSION = 'course_version'
 
     @classmethod
     def name(cls):
@@ -59,6 +60,22 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
             merged_field_name=cls.MERGED_VISIBLE_TO_STAFF_ONLY,
         )
 
+        # The version of the course that the block structure is collected
+        # from, so that results transformed from it can be cached.
+        root_block = block_structure.get_xblock(block_structure.root_block_usage_key)
+        block_structure.set_transformer_data(cls, cls.COURSE_VERSION, (
+            unicode(getattr(root_block, 'course_version', None)),
+            getattr(root_block, 'subtree_edited_on', None),
+        ))
+
+    @classmethod
+    def get_course_version(cls, block_structure):
+        """
+        Returns the version of the course that the given block structure
+        was collected from.
+        """
+        return block_structure.get_transformer_data(cls, cls.COURSE_VERSION)
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Visibility check.
         if usage_info.has_staff_access:
@@ -0,0 +1,20 @@
+"""
+This module contains various configuration settings via
+waffle switches for the Courseware app.
+"""
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+# Namespace
+WAFFLE_NAMESPACE = u'courseware'
+
+# Switches
+WRITE_BEHIND_USER_STATE = u'write_behind_user_state'
+CACHE_PREFETCH_PLANS = u'cache_prefetch_plans'
+INDEX_FIELD_OVERRIDES = u'index_field_overrides'
+
+
+def waffle():
+    """
+    Returns the namespaced, cached, audited Waffle class for Courseware.
+    """
+    return WaffleSwitchNamespace(name=WAFFLE_NAMESPACE, log_prefix=u'Courseware: ')
@@ -13,6 +13,13 @@ Currently, this module is used in the `module_render` module in this same
 package and is used to wrap the `authored_data` when constructing an
 `LmsFieldData`.  This means overrides will be in effect for all scopes covered
 by `authored_data`, e.g. course content and settings stored in Mongo.
+
+When the `courseware.index_field_overrides` waffle switch is enabled, the
+overrides that are looked up during a request, and the overrides that blocks
+inherit from their ancestors, are kept in a per-request index for each user
+and course, so that providers are asked for the override of a field of a
+block at most once per request.  Code that changes overrides must call
+`clear_override_index` so that the new values are looked up.
 """
 import threading
 from abc import ABCMeta, abstractmethod
@@ -21,12 +28,15 @@ from contextlib import contextmanager
 from django.conf import settings
 from xblock.field_data import FieldData
 
+import request_cache
+from courseware.config.waffle import INDEX_FIELD_OVERRIDES, waffle
 from request_cache.middleware import RequestCache
 from xmodule.modulestore.inheritance import InheritanceMixin
 
 NOTSET = object()
 ENABLED_OVERRIDE_PROVIDERS_KEY = u'courseware.field_overrides.enabled_providers.{course_id}'
 ENABLED_MODULESTORE_OVERRIDE_PROVIDERS_KEY = u'courseware.modulestore_field_overrides.enabled_providers.{course_id}'
+OVERRIDE_INDEX_CACHE_NAME = u'courseware.field_overrides.index'
 
 
 def resolve_dotted(name):
@@ -89,6 +99,26 @@ def overrides_disabled():
     return bool(_OVERRIDES_DISABLED.disabled)
 
 
+def clear_override_index():
+    """
+    Clears the field overrides that have been indexed during the current
+    request.  Must be called whenever field overrides are changed.
+    """
+    request_cache.clear_cache(OVERRIDE_INDEX_CACHE_NAME)
+
+
+class _OverrideIndex(object):
+    """
+    The field overrides of the blocks of a course that have been looked up
+    during a request, for a user and set of providers, and the overrides that
+    the blocks inherit from their ancestors, keyed by block location and
+    field name.
+    """
+    def __init__(self):
+        self.overrides = {}
+        self.inherited_overrides = {}
+
+
 class FieldOverrideProvider(object):
     """
     Abstract class which defines the interface that a `FieldOverrideProvider`
@@ -129,6 +159,17 @@ class FieldOverrideProvider(object):
         """
         return False
 
+    def prefetch(self, course_key):
+        """
+        Called before the overrides of the blocks of the course identified by
+        `course_key` are first looked up in a request, when overrides are
+        indexed, so that providers can load all of the overrides of the course
+        for the user at once instead of block by block.
+
+        Does nothing by default.
+        """
+        pass
+
 
 class OverrideFieldData(FieldData):
     """
@@ -197,18 +238,82 @@ class OverrideFieldData(FieldData):
     def __init__(self, user, fallback, providers):
         self.fallback = fallback
         self.providers = tuple(provider(user) for provider in providers)
+        if self.providers and waffle().is_enabled(INDEX_FIELD_OVERRIDES):
+            self._index_key = (getattr(user, 'id', None), tuple(providers))
+        else:
+            self._index_key = None
 
     def get_override(self, block, name):
         """
         Checks for an override for the field identified by `name` in `block`.
         Returns the overridden value or `NOTSET` if no override is found.
         """
-        if not overrides_disabled():
-            for provider in self.providers:
-                value = provider.get(block, name, NOTSET)
+        if overrides_disabled():
+            return NOTSET
+
+        index = self._get_override_index(block)
+        if index is None:
+            return self._get_provider_override(block, name)
+
+        key = (block.location, name)
+        if key not in index.overrides:
+            index.overrides[key] = self._get_provider_override(block, name)
+        return index.overrides[key]
+
+    def _get_provider_override(self, block, name):
+        """
+        Returns the override of the first provider that overrides the field
+        identified by `name` in `block`, or `NOTSET`.
+        """
+        for provider in self.providers:
+            value = provider.get(block, name, NOTSET)
+            if value is not NOTSET:
+                return value
+        return NOTSET
+
+    def _get_inherited_override(self, block, name):
+        """
+        Returns the override of the field identified by `name` on the closest
+        ancestor of `block` that overrides it, or `NOTSET`.  Must not be
+        called when overrides are disabled.
+        """
+        index = self._get_override_index(block)
+        if index is None:
+            for ancestor in _lineage(block):
+                value = self.get_override(ancestor, name)
                 if value is not NOTSET:
                     return value
-        return NOTSET
+            return NOTSET
+
+        key = (block.location, name)
+        if key not in index.inherited_overrides:
+            parent = block.get_parent()
+            if parent is None:
+                value = NOTSET
+            else:
+                value = self.get_override(parent, name)
+                if value is NOTSET:
+                    value = self._get_inherited_override(parent, name)
+            index.inherited_overrides[key] = value
+        return index.inherited_overrides[key]
+
+    def _get_override_index(self, block):
+        """
+        Returns the `_OverrideIndex` of the course of `block` for the current
+        request, or None if overrides are not indexed.
+        """
+        if self._index_key is None:
+            return None
+
+        course_key = block.location.course_key
+        indexes = request_cache.get_cache(OVERRIDE_INDEX_CACHE_NAME)
+        index_key = self._index_key + (course_key,)
+        index = indexes.get(index_key)
+        if index is None:
+            for provider in self.providers:
+                provider.prefetch(course_key)
+            index = indexes[index_key] = _OverrideIndex()
+        return index
 
     def get(self, block, name):
         value = self.get_override(block, name)
@@ -227,15 +332,13 @@ class OverrideFieldData(FieldData):
             return self.fallback.has(block, name)
 
         has = self.get_override(block, name)
-        if has is NOTSET:
+        if has is NOTSET and not overrides_disabled():
             # If this is an inheritable field and an override is set above,
             # then we want to return False here, so the field_data uses the
             # override and not the original value for this block.
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    if self.get_override(ancestor, name) is not NOTSET:
-                        return False
+            if name in InheritanceMixin.fields:
+                if self._get_inherited_override(block, name) is not NOTSET:
+                    return False
 
         return has is not NOTSET or self.fallback.has(block, name)
 
@@ -246,12 +349,10 @@ class OverrideFieldData(FieldData):
         # The `default` method is overloaded by the field storage system to
         # also handle inheritance.
         if self.providers and not overrides_disabled():
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    value = self.get_override(ancestor, name)
-                    if value is not NOTSET:
-                        return value
+            if name in InheritanceMixin.fields:
+                value = self._get_inherited_override(block, name)
+                if value is not NOTSET:
+                    return value
         return self.fallback.default(block, name)
 
 
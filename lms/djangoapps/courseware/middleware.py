@@ -1,11 +1,17 @@
 """
 Middleware for the courseware app
 """
+import logging
 
+from django.db import DatabaseError
 from django.shortcuts import redirect
 
+from courseware import user_state_buffer
+from courseware.config.waffle import WRITE_BEHIND_USER_STATE, waffle
 from lms.djangoapps.courseware.exceptions import Redirect
 
+log = logging.getLogger(__name__)
+
 
 class RedirectMiddleware(object):
     """
@@ -17,3 +23,41 @@ class RedirectMiddleware(object):
         """
         if isinstance(exception, Redirect):
             return redirect(exception.url)
+
+
+class UserStateWriteBehindMiddleware(object):
+    """
+    Buffer the XBlock user state that is written during each request, and
+    write it when the request ends, if the write_behind_user_state switch
+    is enabled.
+    """
+    def process_request(self, _request):
+        """
+        Start buffering the user state writes of the request.
+        """
+        if waffle().is_enabled(WRITE_BEHIND_USER_STATE):
+            user_state_buffer.start_buffering()
+
+    def process_response(self, _request, response):
+        """
+        Write the buffered user state.
+        """
+        self._flush()
+        return response
+
+    def process_exception(self, _request, _exception):
+        """
+        Write the buffered user state, as it would have been written without
+        buffering.
+        """
+        self._flush()
+
+    def _flush(self):
+        """
+        Write the buffered user state, logging any failure, as the response
+        has already been produced.
+        """
+        try:
+            user_state_buffer.stop_buffering()
+        except DatabaseError:
+            log.exception(u"Writing the buffered user state failed")
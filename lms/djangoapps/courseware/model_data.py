@@ -27,6 +27,7 @@ from abc import ABCMeta, abstractmethod
 from collections import defaultdict, namedtuple
 
 from contracts import contract, new_contract
+from django.conf import settings
 from django.db import DatabaseError
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from opaque_keys.edx.block_types import BlockTypeKeyV1
@@ -36,7 +37,9 @@ from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
 from xblock.fields import Scope, UserScope
 from xblock.runtime import KeyValueStore
 
+from courseware.config.waffle import CACHE_PREFETCH_PLANS, waffle
 from courseware.user_state_client import DjangoXBlockUserStateClient
+from openedx.core.lib.cache_utils import LRUCache
 from xmodule.modulestore.django import modulestore
 
 from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
@@ -162,17 +165,17 @@ class DjangoOrmFieldCache(object):
     def __init__(self):
         self._cache = {}
 
-    def cache_fields(self, fields, xblocks, aside_types):
+    def cache_fields(self, field_names, usage_keys, block_types):
         """
-        Load all fields specified by ``fields`` for the supplied ``xblocks``
-        and ``aside_types`` into this cache.
+        Load all fields named in ``field_names`` for the supplied ``usage_keys``
+        and ``block_types`` into this cache.
 
         Arguments:
-            fields (list of str): Field names to cache.
-            xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
-            aside_types (list of str): Aside types to cache fields for.
+            field_names (set of str): Names of the fields to cache.
+            usage_keys (set of :class:`UsageKey`): Usages of the XBlocks and asides to cache fields for.
+            block_types (set of :class:`BlockTypeKeyV1`): Types of the XBlocks and asides to cache fields for.
         """
-        for field_object in self._read_objects(fields, xblocks, aside_types):
+        for field_object in self._read_objects(field_names, usage_keys, block_types):
             self._cache[self._cache_key_for_field_object(field_object)] = field_object
 
     @contract(kvs_key=DjangoKeyValueStore.Key)
@@ -306,17 +309,16 @@ class DjangoOrmFieldCache(object):
         raise NotImplementedError()
 
     @abstractmethod
-    def _read_objects(self, fields, xblocks, aside_types):
+    def _read_objects(self, field_names, usage_keys, block_types):
         """
         Return an iterator for all objects stored in the underlying datastore
-        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
-        with them.
+        for the fields named in ``field_names`` on the ``usage_keys`` and
+        ``block_types``.
 
         Arguments:
-            fields (list of str): Field names to return values for
-            xblocks (list of :class:`~XBlock`): XBlocks to load fields for
-            aside_types (list of str): Asides to load field for (which annotate the supplied
-                xblocks).
+            field_names (set of str): Names of the fields to return values for
+            usage_keys (set of :class:`UsageKey`): Usages of the XBlocks and asides to load fields for
+            block_types (set of :class:`BlockTypeKeyV1`): Types of the XBlocks and asides to load fields for
         """
         raise NotImplementedError()
 
@@ -351,19 +353,19 @@ class UserStateCache(object):
         self.user = user
         self._client = DjangoXBlockUserStateClient(self.user)
 
-    def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
+    def cache_fields(self, field_names, usage_keys, block_types):  # pylint: disable=unused-argument
         """
-        Load all fields specified by ``fields`` for the supplied ``xblocks``
-        and ``aside_types`` into this cache.
+        Load all fields named in ``field_names`` for the supplied ``usage_keys``
+        and ``block_types`` into this cache.
 
         Arguments:
-            fields (list of str): Field names to cache.
-            xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
-            aside_types (list of str): Aside types to cache fields for.
+            field_names (set of str): Names of the fields to cache.
+            usage_keys (set of :class:`UsageKey`): Usages of the XBlocks and asides to cache fields for.
+            block_types (set of :class:`BlockTypeKeyV1`): Types of the XBlocks and asides to cache fields for.
         """
         block_field_state = self._client.get_many(
             self.user.username,
-            _all_usage_keys(xblocks, aside_types),
+            usage_keys,
         )
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
@@ -517,22 +519,21 @@ class UserStateSummaryCache(DjangoOrmFieldCache):
             value=value,
         )
 
-    def _read_objects(self, fields, xblocks, aside_types):
+    def _read_objects(self, field_names, usage_keys, block_types):
         """
         Return an iterator for all objects stored in the underlying datastore
-        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
-        with them.
+        for the fields named in ``field_names`` on the ``usage_keys`` and
+        ``block_types``.
 
         Arguments:
-            fields (list of :class:`~Field`): Fields to return values for
-            xblocks (list of :class:`~XBlock`): XBlocks to load fields for
-            aside_types (list of str): Asides to load field for (which annotate the supplied
-                xblocks).
+            field_names (set of str): Names of the fields to return values for
+            usage_keys (set of :class:`UsageKey`): Usages of the XBlocks and asides to load fields for
+            block_types (set of :class:`BlockTypeKeyV1`): Types of the XBlocks and asides to load fields for
         """
         return XModuleUserStateSummaryField.objects.chunked_filter(
             'usage_id__in',
-            _all_usage_keys(xblocks, aside_types),
-            field_name__in=set(field.name for field in fields),
+            usage_keys,
+            field_name__in=field_names,
         )
 
     def _cache_key_for_field_object(self, field_object):
@@ -579,23 +580,22 @@ class PreferencesCache(DjangoOrmFieldCache):
             value=value,
         )
 
-    def _read_objects(self, fields, xblocks, aside_types):
+    def _read_objects(self, field_names, usage_keys, block_types):
         """
         Return an iterator for all objects stored in the underlying datastore
-        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
-        with them.
+        for the fields named in ``field_names`` on the ``usage_keys`` and
+        ``block_types``.
 
         Arguments:
-            fields (list of str): Field names to return values for
-            xblocks (list of :class:`~XBlock`): XBlocks to load fields for
-            aside_types (list of str): Asides to load field for (which annotate the supplied
-                xblocks).
+            field_names (set of str): Names of the fields to return values for
+            usage_keys (set of :class:`UsageKey`): Usages of the XBlocks and asides to load fields for
+            block_types (set of :class:`BlockTypeKeyV1`): Types of the XBlocks and asides to load fields for
         """
         return XModuleStudentPrefsField.objects.chunked_filter(
             'module_type__in',
-            _all_block_types(xblocks, aside_types),
+            block_types,
             student=self.user.pk,
-            field_name__in=set(field.name for field in fields),
+            field_name__in=field_names,
         )
 
     def _cache_key_for_field_object(self, field_object):
@@ -641,21 +641,20 @@ class UserInfoCache(DjangoOrmFieldCache):
             value=value,
         )
 
-    def _read_objects(self, fields, xblocks, aside_types):
+    def _read_objects(self, field_names, usage_keys, block_types):
         """
         Return an iterator for all objects stored in the underlying datastore
-        for the ``fields`` on the ``xblocks`` and the ``aside_types`` associated
-        with them.
+        for the fields named in ``field_names`` on the ``usage_keys`` and
+        ``block_types``.
 
         Arguments:
-            fields (list of str): Field names to return values for
-            xblocks (list of :class:`~XBlock`): XBlocks to load fields for
-            aside_types (list of str): Asides to load field for (which annotate the supplied
-                xblocks).
+            field_names (set of str): Names of the fields to return values for
+            usage_keys (set of :class:`UsageKey`): Usages of the XBlocks and asides to load fields for
+            block_types (set of :class:`BlockTypeKeyV1`): Types of the XBlocks and asides to load fields for
         """
         return XModuleStudentInfoField.objects.filter(
             student=self.user.pk,
-            field_name__in=set(field.name for field in fields),
+            field_name__in=field_names,
         )
 
     def _cache_key_for_field_object(self, field_object):
@@ -677,6 +676,21 @@ class UserInfoCache(DjangoOrmFieldCache):
         return key.field_name
 
 
+def _no_descriptor_filter(descriptor):  # pylint: disable=unused-argument
+    """
+    The default descriptor_filter of FieldDataCache, which caches the fields of all descriptors.
+    """
+    return True
+
+
+# What a FieldDataCache loads for a set of blocks: the names of their fields by scope,
+# the usage keys and block types of the blocks and their asides, and their scorable locations.
+PrefetchPlan = namedtuple('PrefetchPlan', ['field_names', 'usage_keys', 'block_types', 'scorable_locations'])
+
+# The PrefetchPlans of the descendants of descriptors, by course version, descriptor, depth and asides.
+_prefetch_plans = LRUCache()  # pylint: disable=invalid-name
+
+
 class FieldDataCache(object):
     """
     A cache of django model objects needed to supply the data
@@ -729,14 +743,34 @@ class FieldDataCache(object):
         Add all `descriptors` to this FieldDataCache.
         """
         if self.user.is_authenticated():
-            self.scorable_locations.update(desc.location for desc in descriptors if desc.has_score)
-            for scope, fields in self._fields_to_cache(descriptors).items():
-                if scope not in self.cache:
-                    continue
+            self._add_prefetch_plan_to_cache(self._create_prefetch_plan(descriptors))
 
-                self.cache[scope].cache_fields(fields, descriptors, self.asides)
+    def _add_prefetch_plan_to_cache(self, plan):
+        """
+        Add the fields of the blocks in the :class:`PrefetchPlan` `plan` to this FieldDataCache.
+        """
+        self.scorable_locations.update(plan.scorable_locations)
+        for scope, field_names in plan.field_names.items():
+            if scope not in self.cache:
+                continue
+
+            self.cache[scope].cache_fields(field_names, plan.usage_keys, plan.block_types)
 
-    def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
+    def _create_prefetch_plan(self, descriptors):
+        """
+        Returns the :class:`PrefetchPlan` for `descriptors` and the asides of this FieldDataCache.
+        """
+        return PrefetchPlan(
+            field_names={
+                scope: frozenset(field.name for field in fields)
+                for scope, fields in self._fields_to_cache(descriptors).items()
+            },
+            usage_keys=frozenset(_all_usage_keys(descriptors, self.asides)),
+            block_types=frozenset(_all_block_types(descriptors, self.asides)),
+            scorable_locations=frozenset(desc.location for desc in descriptors if desc.has_score),
+        )
+
+    def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=_no_descriptor_filter):
         """
         Add all descendants of `descriptor` to this FieldDataCache.
 
@@ -771,14 +805,38 @@ class FieldDataCache(object):
 
             return descriptors
 
+        if not self.user.is_authenticated():
+            return
+
+        # The blocks below a descriptor, and thus the plan, only depend on the course
+        # version, unless a filter is given, or the descriptor is bound to a user
+        # and may have children that are specific to them.
+        course_version = getattr(descriptor, 'course_version', None)
+        if (
+                course_version is None or
+                descriptor_filter is not _no_descriptor_filter or
+                getattr(descriptor, 'xmodule_runtime', None) is not None or
+                not waffle().is_enabled(CACHE_PREFETCH_PLANS)
+        ):
+            plan_key = None
+        else:
+            plan_key = (unicode(course_version), unicode(descriptor.location), depth, tuple(self.asides))
+            plan = _prefetch_plans.get(plan_key)
+            if plan is not None:
+                self._add_prefetch_plan_to_cache(plan)
+                return
+
         with modulestore().bulk_operations(descriptor.location.course_key):
             descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
 
-        self.add_descriptors_to_cache(descriptors)
+        plan = self._create_prefetch_plan(descriptors)
+        if plan_key is not None:
+            _prefetch_plans.set(plan_key, plan, settings.COURSEWARE_PREFETCH_PLAN_CACHE['MAX_SIZE'])
+        self._add_prefetch_plan_to_cache(plan)
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
-                                         descriptor_filter=lambda descriptor: True,
+                                         descriptor_filter=_no_descriptor_filter,
                                          asides=None, read_only=False):
         """
         course_id: the course in the context of which we want StudentModules.
@@ -988,6 +1046,31 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create ScoresClients with pre-fetched data for the given users and
+        locations, using a single query for all of the users.
+
+        Returns a dict mapping each user id to its ScoresClient.
+        """
+        clients = {user_id: cls(course_id, user_id) for user_id in user_ids}
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=clients.keys(),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        for user_id, location, correct, total, created in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade', 'created'
+        ):
+            # See the note on run information in fetch_scores.
+            clients[user_id]._locations_to_scores[  # pylint: disable=protected-access
+                UsageKey.from_string(location).map_into_course(course_id)
+            ] = cls.Score(correct, total, created)
+        for client in clients.itervalues():
+            client._has_fetched = True  # pylint: disable=protected-access
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
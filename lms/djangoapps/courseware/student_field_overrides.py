@@ -4,9 +4,13 @@ by the individual due dates feature.
 """
 import json
 
-from .field_overrides import FieldOverrideProvider
+import request_cache
+
+from .field_overrides import FieldOverrideProvider, clear_override_index
 from .models import StudentFieldOverride
 
+PREFETCHED_OVERRIDES_CACHE_NAME = u'courseware.student_field_overrides.prefetched'
+
 
 class IndividualStudentOverrideProvider(FieldOverrideProvider):
     """
@@ -22,6 +26,20 @@ class IndividualStudentOverrideProvider(FieldOverrideProvider):
         """This simple override provider is always enabled"""
         return True
 
+    def prefetch(self, course_key):
+        """
+        Loads all of the user's overrides for the course at once.
+        """
+        prefetched = request_cache.get_cache(PREFETCHED_OVERRIDES_CACHE_NAME)
+        prefetch_key = (self.user.id, _serialize_key('course_id', course_key))
+        if prefetch_key not in prefetched:
+            overrides = {}
+            query = StudentFieldOverride.objects.filter(course_id=course_key, student_id=self.user.id)
+            for override in query:
+                location = _serialize_key('location', override.location)
+                overrides.setdefault(location, {})[override.field] = override.value
+            prefetched[prefetch_key] = overrides
+
 
 def get_override_for_user(user, block, name, default=None):
     """
@@ -43,19 +61,42 @@ def _get_overrides_for_user(user, block):
     Gets all of the individual student overrides for given user and block.
     Returns a dictionary of field override values keyed by field name.
     """
-    query = StudentFieldOverride.objects.filter(
-        course_id=block.runtime.course_id,
-        location=block.location,
-        student_id=user.id,
-    )
+    prefetch_key = (user.id, _serialize_key('course_id', block.runtime.course_id))
+    prefetched = request_cache.get_cache(PREFETCHED_OVERRIDES_CACHE_NAME).get(prefetch_key)
+    if prefetched is not None:
+        serialized_overrides = prefetched.get(_serialize_key('location', block.location), {})
+    else:
+        query = StudentFieldOverride.objects.filter(
+            course_id=block.runtime.course_id,
+            location=block.location,
+            student_id=user.id,
+        )
+        serialized_overrides = {override.field: override.value for override in query}
+
     overrides = {}
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    for field_name, serialized_value in serialized_overrides.iteritems():
+        field = block.fields[field_name]
+        value = field.from_json(json.loads(serialized_value))
+        overrides[field_name] = value
     return overrides
 
 
+def _serialize_key(field_name, key):
+    """
+    Returns the given key as it is stored in the StudentFieldOverride field
+    named `field_name`, which is how the queries above compare it.
+    """
+    return StudentFieldOverride._meta.get_field(field_name).get_prep_value(key)  # pylint: disable=protected-access
+
+
+def _clear_cached_overrides():
+    """
+    Clears the overrides that have been loaded during the current request.
+    """
+    request_cache.clear_cache(PREFETCHED_OVERRIDES_CACHE_NAME)
+    clear_override_index()
+
+
 def override_field_for_user(user, block, name, value):
     """
     Overrides a field for the `user`.  `block` and `name` specify the block
@@ -70,6 +111,7 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    _clear_cached_overrides()
 
 
 def clear_override_for_user(user, block, name):
@@ -87,3 +129,5 @@ def clear_override_for_user(user, block, name):
             field=name).delete()
     except StudentFieldOverride.DoesNotExist:
         pass
+    else:
+        _clear_cached_overrides()
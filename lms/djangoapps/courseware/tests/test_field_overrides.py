@@ -9,12 +9,15 @@ from nose.plugins.attrib import attr
 from xblock.field_data import DictFieldData
 
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
+from ..config.waffle import INDEX_FIELD_OVERRIDES, waffle
 from ..field_overrides import (
+    NOTSET,
     FieldOverrideProvider,
     OverrideFieldData,
     OverrideModulestoreFieldData,
+    clear_override_index,
     disable_overrides,
     resolve_dotted
 )
@@ -142,6 +145,93 @@ class OverrideModulestoreFieldDataTests(FieldOverrideTestMixin, OverrideFieldDat
         self.assertIsInstance(data, DictFieldData)
 
 
+class TestIndexedOverrideProvider(FieldOverrideProvider):
+    """
+    A `FieldOverrideProvider` that records the overrides it looks up and
+    the courses it prefetches.
+    """
+    overrides = {}
+    lookups = []
+    prefetched = []
+
+    def get(self, block, name, default):
+        self.lookups.append((block.location, name))
+        return self.overrides.get((block.location, name), default)
+
+    def prefetch(self, course_key):
+        self.prefetched.append(course_key)
+
+    @classmethod
+    def enabled_for(cls, course):
+        return True
+
+
+@attr(shard=1)
+@override_settings(FIELD_OVERRIDE_PROVIDERS=(
+    'courseware.tests.test_field_overrides.TestIndexedOverrideProvider',))
+class OverrideIndexTests(SharedModuleStoreTestCase):
+    """
+    Tests for indexing the overrides of `OverrideFieldData`.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(OverrideIndexTests, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        with cls.store.bulk_operations(cls.course.id):
+            cls.chapter = ItemFactory.create(parent=cls.course, category='chapter')
+            cls.sequential = ItemFactory.create(parent=cls.chapter, category='sequential')
+            cls.vertical = ItemFactory.create(parent=cls.sequential, category='vertical')
+
+    def setUp(self):
+        super(OverrideIndexTests, self).setUp()
+        OverrideFieldData.provider_classes = None
+        TestIndexedOverrideProvider.overrides = {(self.chapter.location, 'graded'): True}
+        TestIndexedOverrideProvider.lookups = []
+        TestIndexedOverrideProvider.prefetched = []
+        self.addCleanup(setattr, OverrideFieldData, 'provider_classes', None)
+        with waffle().override(INDEX_FIELD_OVERRIDES):
+            self.data = OverrideFieldData.wrap(TESTUSER, self.course, DictFieldData({}))
+
+    def test_inherited_override(self):
+        for block in (self.sequential, self.vertical):
+            self.assertFalse(self.data.has(block, 'graded'))
+            self.assertTrue(self.data.default(block, 'graded'))
+        self.assertTrue(self.data.get(self.chapter, 'graded'))
+        self.assertEqual(self.data.get_override(self.course, 'graded'), NOTSET)
+        self.assertEqual(TestIndexedOverrideProvider.prefetched, [self.course.id])
+
+    def test_lookups_indexed(self):
+        for _ in range(3):
+            self.data.default(self.vertical, 'graded')
+            self.data.has(self.sequential, 'graded')
+        self.assertEqual(
+            sorted(TestIndexedOverrideProvider.lookups),
+            sorted([
+                (self.chapter.location, 'graded'),
+                (self.sequential.location, 'graded'),
+            ]),
+        )
+
+    def test_index_shared_and_cleared(self):
+        self.data.default(self.vertical, 'graded')
+        with waffle().override(INDEX_FIELD_OVERRIDES):
+            other_data = OverrideFieldData.wrap(TESTUSER, self.course, DictFieldData({}))
+        other_data.default(self.vertical, 'graded')
+        self.assertEqual(len(TestIndexedOverrideProvider.lookups), 2)
+
+        TestIndexedOverrideProvider.overrides = {}
+        clear_override_index()
+        with self.assertRaises(KeyError):
+            other_data.default(self.vertical, 'graded')
+        self.assertEqual(len(TestIndexedOverrideProvider.lookups), 4)
+
+    def test_disabled_overrides_not_indexed(self):
+        with disable_overrides():
+            with self.assertRaises(KeyError):
+                self.data.default(self.vertical, 'graded')
+        self.assertTrue(self.data.default(self.vertical, 'graded'))
+
+
 @attr(shard=1)
 class ResolveDottedTests(unittest.TestCase):
     """
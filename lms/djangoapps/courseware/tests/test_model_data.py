@@ -12,6 +12,8 @@ from xblock.core import XBlock
 from xblock.exceptions import KeyValueMultiSaveError
 from xblock.fields import BlockScope, Scope, ScopeIds
 
+from courseware import model_data
+from courseware.config.waffle import CACHE_PREFETCH_PLANS, waffle
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError
 from courseware.models import (
     StudentModule,
@@ -28,6 +30,10 @@ from courseware.tests.factories import (
     location
 )
 from student.tests.factories import UserFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 
 def mock_field(scope, name):
@@ -434,3 +440,72 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+@attr(shard=1)
+class TestPrefetchPlanCache(SharedModuleStoreTestCase):
+    """
+    Tests for caching which blocks and fields FieldDataCache.cache_for_descriptor_descendents loads.
+    """
+    # Tell Django to clean out all databases, not just default
+    multi_db = True
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestPrefetchPlanCache, cls).setUpClass()
+        cls.course = CourseFactory.create(default_store=ModuleStoreEnum.Type.split)
+        with cls.store.bulk_operations(cls.course.id):
+            chapter = ItemFactory.create(parent=cls.course, category='chapter')
+            sequential = ItemFactory.create(parent=chapter, category='sequential')
+            cls.problem = ItemFactory.create(parent=sequential, category='problem')
+
+    def setUp(self):
+        super(TestPrefetchPlanCache, self).setUp()
+        model_data._prefetch_plans.clear()  # pylint: disable=protected-access
+        self.user = UserFactory.create()
+        cmfStudentModuleFactory.create(
+            student=self.user,
+            course_id=self.course.id,
+            module_state_key=self.problem.location,
+            state=json.dumps({'attempts': 2}),
+        )
+        self.attempts_key = DjangoKeyValueStore.Key(Scope.user_state, self.user.id, self.problem.location, 'attempts')
+
+    def cache_course(self):
+        """
+        Returns a FieldDataCache for all blocks of the course, and whether the blocks were walked.
+        """
+        with patch('courseware.model_data.modulestore', wraps=modulestore) as mock_modulestore:
+            field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+                self.course.id, self.user, self.store.get_course(self.course.id, depth=None),
+            )
+        return field_data_cache, mock_modulestore.called
+
+    def test_plan_cached(self):
+        with waffle().override(CACHE_PREFETCH_PLANS):
+            field_data_cache, walked = self.cache_course()
+            self.assertTrue(walked)
+            self.assertEqual(field_data_cache.get(self.attempts_key), 2)
+
+            field_data_cache, walked = self.cache_course()
+            self.assertFalse(walked)
+            self.assertEqual(field_data_cache.get(self.attempts_key), 2)
+            self.assertIn(self.problem.location, field_data_cache.scorable_locations)
+
+    def test_plan_not_cached_when_disabled(self):
+        with waffle().override(CACHE_PREFETCH_PLANS, active=False):
+            self.cache_course()
+            _, walked = self.cache_course()
+        self.assertTrue(walked)
+
+    def test_plan_not_cached_with_filter(self):
+        with waffle().override(CACHE_PREFETCH_PLANS):
+            for _ in range(2):
+                with patch('courseware.model_data.modulestore', wraps=modulestore) as mock_modulestore:
+                    FieldDataCache.cache_for_descriptor_descendents(
+                        self.course.id,
+                        self.user,
+                        self.store.get_course(self.course.id, depth=None),
+                        descriptor_filter=lambda descriptor: True,
+                    )
+                self.assertTrue(mock_modulestore.called)
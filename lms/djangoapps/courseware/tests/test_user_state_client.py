@@ -3,14 +3,20 @@ Black-box tests of the DjangoUserStateClient against the semantics
 defined in edx_user_state_client.
 """
 
+import json
 from collections import defaultdict
-from unittest import skip
 
 from django.test import TestCase
 from edx_user_state_client.tests import UserStateClientTestBase
+from mock import patch
+from opaque_keys.edx.keys import UsageKey
 
+from courseware import user_state_buffer
+from courseware.models import StudentModule
 from courseware.tests.factories import UserFactory
 from courseware.user_state_client import DjangoXBlockUserStateClient
+from coursewarehistoryextended.models import StudentModuleHistoryExtended
+from request_cache.middleware import RequestCache
 
 
 class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
@@ -34,36 +40,95 @@ class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
         self.client = DjangoXBlockUserStateClient()
         self.users = defaultdict(UserFactory.create)
 
-    # We're skipping these tests because the iter_all_by_block and iter_all_by_course
-    # are not implemented in the DjangoXBlockUserStateClient
-    @skip("Not supported by DjangoXBlockUserStateClient")
-    def test_iter_blocks_deleted_block(self):
-        pass
 
-    @skip("Not supported by DjangoXBlockUserStateClient")
-    def test_iter_blocks_empty(self):
-        pass
-
-    @skip("Not supported by DjangoXBlockUserStateClient")
-    def test_iter_blocks_many_users(self):
-        pass
-
-    @skip("Not supported by DjangoXBlockUserStateClient")
-    def test_iter_blocks_single_user(self):
-        pass
-
-    @skip("Not supported by DjangoXBlockUserStateClient")
-    def test_iter_course_deleted_block(self):
-        pass
-
-    @skip("Not supported by DjangoXBlockUserStateClient")
-    def test_iter_course_empty(self):
-        pass
-
-    @skip("Not supported by DjangoXBlockUserStateClient")
-    def test_iter_course_single_user(self):
-        pass
+class TestUserStateBuffer(TestCase):
+    """
+    Tests of the writes of the DjangoUserStateClient backend when they are
+    buffered.
+    """
+    # Tell Django to clean out all databases, not just default
+    multi_db = True
 
-    @skip("Not supported by DjangoXBlockUserStateClient")
-    def test_iter_course_many_users(self):
-        pass
+    def setUp(self):
+        super(TestUserStateBuffer, self).setUp()
+        self.user = UserFactory.create()
+        self.client = DjangoXBlockUserStateClient(self.user)
+        self.problem_key = UsageKey.from_string('block-v1:edX+Test+Run+type@problem+block@problem')
+        self.video_key = UsageKey.from_string('block-v1:edX+Test+Run+type@video+block@video')
+        user_state_buffer.start_buffering()
+        self.addCleanup(user_state_buffer.stop_buffering)
+
+    def _stored_state(self, usage_key):
+        """
+        Returns the stored state of the block, or None if it has no StudentModule.
+        """
+        student_module = StudentModule.objects.filter(student=self.user, module_state_key=usage_key).first()
+        return student_module and json.loads(student_module.state)
+
+    def test_writes_coalesced(self):
+        self.client.set(self.user.username, self.problem_key, {'attempts': 1})
+        self.client.set(self.user.username, self.problem_key, {'attempts': 2, 'done': True})
+        self.client.set(self.user.username, self.video_key, {'position': 10})
+        self.assertIsNone(self._stored_state(self.problem_key))
+
+        user_state_buffer.stop_buffering()
+        self.assertEqual(self._stored_state(self.problem_key), {'attempts': 2, 'done': True})
+        self.assertEqual(self._stored_state(self.video_key), {'position': 10})
+        self.assertEqual(StudentModuleHistoryExtended.objects.count(), 1)
+
+    def test_updates_coalesced(self):
+        self.client.set(self.user.username, self.problem_key, {'attempts': 1})
+        user_state_buffer.stop_buffering()
+        StudentModule.objects.filter(student=self.user).update(grade=1, max_grade=2)
+
+        user_state_buffer.start_buffering()
+        self.client.set(self.user.username, self.problem_key, {'attempts': 2})
+        self.client.set(self.user.username, self.problem_key, {'done': True})
+        with self.assertNumQueries(2), self.assertNumQueries(1, using='student_module_history'):
+            user_state_buffer.stop_buffering()
+
+        student_module = StudentModule.objects.get(student=self.user)
+        self.assertEqual(json.loads(student_module.state), {'attempts': 2, 'done': True})
+        self.assertEqual((student_module.grade, student_module.max_grade), (1, 2))
+        history_entry = StudentModuleHistoryExtended.objects.order_by('-id').first()
+        self.assertEqual(json.loads(history_entry.state), {'attempts': 2, 'done': True})
+        self.assertEqual(history_entry.grade, 1)
+        self.assertEqual(StudentModuleHistoryExtended.objects.count(), 2)
+
+    def test_read_your_writes(self):
+        self.client.set(self.user.username, self.problem_key, {'attempts': 1, 'done': False})
+        user_state_buffer.stop_buffering()
+
+        user_state_buffer.start_buffering()
+        self.client.set(self.user.username, self.problem_key, {'attempts': 2})
+        self.client.set(self.user.username, self.video_key, {'position': 10})
+        self.assertEqual(
+            self.client.get(self.user.username, self.problem_key).state,
+            {'attempts': 2, 'done': False},
+        )
+        self.assertEqual(
+            self.client.get(self.user.username, self.video_key, fields=['position']).state,
+            {'position': 10},
+        )
+
+    def test_request_cache_cleared(self):
+        self.client.set(self.user.username, self.problem_key, {'attempts': 1})
+        # As it is when an eager celery task completes during the request.
+        RequestCache.clear_request_cache()
+        self.assertEqual(self.client.get(self.user.username, self.problem_key).state, {'attempts': 1})
+
+        user_state_buffer.stop_buffering()
+        self.assertEqual(self._stored_state(self.problem_key), {'attempts': 1})
+
+    def test_delete_flushes(self):
+        self.client.set(self.user.username, self.problem_key, {'attempts': 1, 'done': True})
+        self.client.delete(self.user.username, self.problem_key, fields=['done'])
+        self.assertEqual(self._stored_state(self.problem_key), {'attempts': 1})
+
+    @patch('courseware.user_state_buffer.MAX_PENDING_BLOCKS', 2)
+    def test_flush_when_due(self):
+        self.client.set(self.user.username, self.problem_key, {'attempts': 1})
+        self.assertIsNone(self._stored_state(self.problem_key))
+        self.client.set(self.user.username, self.video_key, {'position': 10})
+        self.assertEqual(self._stored_state(self.problem_key), {'attempts': 1})
+        self.assertEqual(self._stored_state(self.video_key), {'position': 10})
@@ -0,0 +1,244 @@
+"""
+Write-behind buffering of the XBlock user state that
+DjangoXBlockUserStateClient stores in StudentModule.
+
+While writes are buffered for a request (see
+courseware.middleware.UserStateWriteBehindMiddleware), the state that is
+set for a block is kept in a thread-local buffer, and repeated sets for the
+same user and block are merged, instead of updating the StudentModule row
+and adding a history row every time.  The merged state is written when the
+request ends, or as soon as the oldest pending state is MAX_PENDING_AGE
+seconds old or MAX_PENDING_BLOCKS blocks are pending, with one UPDATE per
+block and a single INSERT for all of the history rows.
+
+DjangoXBlockUserStateClient reads the pending state over the stored state,
+so a request always sees its own writes, and other requests see them once
+it ends.  Code that reads StudentModule.state directly only sees the state
+once it is written.
+
+The buffer is not kept in the request cache, since that is cleared in the
+middle of requests, for instance when an eager celery task completes.
+"""
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from time import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from courseware.models import StudentModule, StudentModuleHistory
+from coursewarehistoryextended.models import StudentModuleHistoryExtended
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+
+log = logging.getLogger(__name__)
+
+_local = threading.local()  # pylint: disable=invalid-name
+
+# How long state can be pending before it is written, in seconds.
+MAX_PENDING_AGE = 5
+
+# How many blocks can have pending state before it is written.
+MAX_PENDING_BLOCKS = 100
+
+
+# The user that the state belongs to, the fields that were set, and when they were last set.
+PendingState = namedtuple('PendingState', ['user', 'state', 'modified'])
+
+
+def get_buffer():
+    """
+    Returns the UserStateBuffer of the current request, or None if writes
+    are not buffered.
+    """
+    return getattr(_local, 'buffer', None)
+
+
+def start_buffering():
+    """
+    Buffers the user state writes of the current request, until
+    stop_buffering is called.
+    """
+    _local.buffer = UserStateBuffer()
+
+
+def stop_buffering():
+    """
+    Writes the pending user state of the current request, and stops
+    buffering its writes.
+    """
+    write_buffer = get_buffer()
+    _local.buffer = None
+    if write_buffer is not None:
+        write_buffer.flush()
+
+
+class UserStateBuffer(object):
+    """
+    The pending user state of a request, by username and block.
+    """
+    def __init__(self):
+        self._pending = OrderedDict()
+        self._oldest_pending_time = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, user, block_keys_to_state):
+        """
+        Merges the given fields into the pending state of the user's blocks.
+
+        Arguments:
+            user (:class:`~User`): The user whose state is set.
+            block_keys_to_state (dict): A dict mapping UsageKeys to the dicts
+                of fields that are set.
+        """
+        modified = timezone.now()
+        for usage_key, state in block_keys_to_state.iteritems():
+            key = (user.username, usage_key)
+            pending_state = self._pending.pop(key, None)
+            merged_state = dict(pending_state.state) if pending_state else {}
+            merged_state.update(state)
+            self._pending[key] = PendingState(user, merged_state, modified)
+        if self._pending and self._oldest_pending_time is None:
+            self._oldest_pending_time = time()
+
+    def get_many(self, username, block_keys):
+        """
+        Returns a dict mapping the given UsageKeys that have pending state
+        for the user to their PendingStates.
+        """
+        return {
+            usage_key: self._pending[(username, usage_key)]
+            for usage_key in block_keys
+            if (username, usage_key) in self._pending
+        }
+
+    def is_due(self):
+        """
+        Returns whether the pending state should be written now.
+        """
+        return bool(self._pending) and (
+            len(self._pending) >= MAX_PENDING_BLOCKS or
+            time() - self._oldest_pending_time >= MAX_PENDING_AGE
+        )
+
+    def flush(self, username=None, block_keys=None):
+        """
+        Writes the pending state of the given user and blocks, or all of the
+        pending state if they are not given.
+        """
+        if username is None:
+            keys = list(self._pending)
+        else:
+            keys = [(username, usage_key) for usage_key in block_keys if (username, usage_key) in self._pending]
+        if not keys:
+            return
+
+        by_user = OrderedDict()
+        for key in keys:
+            pending_state = self._pending.pop(key)
+            by_user.setdefault(pending_state.user, {})[key[1]] = pending_state
+        if not self._pending:
+            self._oldest_pending_time = None
+
+        history_entries = []
+        for user, pending_states in by_user.iteritems():
+            history_entries.extend(_write_pending_states(user, pending_states))
+        if history_entries:
+            _history_model().objects.bulk_create(history_entries)
+
+
+def _write_pending_states(user, pending_states):
+    """
+    Merges the pending states into the user's StudentModules, and returns
+    the history entries to add for them.
+
+    Arguments:
+        user (:class:`~User`): The user whose state is written.
+        pending_states (dict): A dict mapping UsageKeys to PendingStates.
+    """
+    history_entries = []
+    pending_states = dict(pending_states)
+    usage_keys_by_course = {}
+    for usage_key in pending_states:
+        usage_keys_by_course.setdefault(usage_key.course_key, []).append(usage_key)
+
+    for course_key, usage_keys in usage_keys_by_course.iteritems():
+        student_modules = StudentModule.objects.chunked_filter(
+            'module_state_key__in',
+            usage_keys,
+            student=user,
+            course_id=course_key,
+        )
+        for student_module in student_modules:
+            usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
+            history_entry = _update_student_module(student_module, pending_states.pop(usage_key))
+            if history_entry is not None:
+                history_entries.append(history_entry)
+
+    # The blocks that have no StudentModule yet.
+    for usage_key, pending_state in pending_states.iteritems():
+        student_module, created = StudentModule.objects.get_or_create(
+            student=user,
+            course_id=usage_key.course_key,
+            module_state_key=usage_key,
+            defaults={
+                'state': json.dumps(pending_state.state),
+                'module_type': usage_key.block_type,
+            },
+        )
+        if not created:
+            history_entry = _update_student_module(student_module, pending_state)
+            if history_entry is not None:
+                history_entries.append(history_entry)
+
+    return history_entries
+
+
+def _update_student_module(student_module, pending_state):
+    """
+    Merges the pending state into the stored state of the StudentModule,
+    and returns the history entry to add for it, if its type has history.
+
+    The row is updated without saving the model, so that the post_save
+    handlers don't add the history entry themselves, and only its state
+    is updated, so that a score set by other code is not overwritten.
+    """
+    if student_module.state is None:
+        current_state = {}
+    else:
+        current_state = json.loads(student_module.state)
+    current_state.update(pending_state.state)
+    student_module.state = json.dumps(current_state)
+    student_module.modified = pending_state.modified
+    StudentModule.objects.filter(pk=student_module.pk).update(
+        state=student_module.state,
+        modified=student_module.modified,
+    )
+
+    history_model = _history_model()
+    if student_module.module_type not in history_model.HISTORY_SAVING_TYPES:
+        return None
+    return history_model(
+        student_module=student_module,
+        version=None,
+        created=student_module.modified,
+        state=student_module.state,
+        grade=student_module.grade,
+        max_grade=student_module.max_grade,
+    )
+
+
+def _history_model():
+    """
+    Returns the model that StudentModule history is saved in.
+    """
+    if settings.FEATURES.get('ENABLE_CSMH_EXTENDED'):
+        return StudentModuleHistoryExtended
+    return StudentModuleHistory
@@ -15,8 +15,10 @@ from edx_user_state_client.interface import XBlockUserState, XBlockUserStateClie
 from xblock.fields import Scope
 
 import dogstats_wrapper as dog_stats_api
+from courseware import user_state_buffer
 from courseware.models import BaseStudentModuleHistory, StudentModule
 from openedx.core.djangoapps import monitoring_utils
+from util.query import use_read_replica_if_available
 
 try:
     import simplejson as json
@@ -45,11 +47,19 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         XBlockUserStateClient (for instance, once all fields have been deleted from
         an XBlock for a user, the state will be listed as ``None`` by :meth:`get_history`,
         even though the actual stored state in the database will be ``"{}"``).
+
+    When writes are buffered for the current request (see :mod:`courseware.user_state_buffer`),
+    :meth:`set_many` only records the state, and the other methods read or write the stored
+    state together with the buffered state.
     """
 
     # Use this sample rate for DataDog events.
     API_DATADOG_SAMPLE_RATE = 0.1
 
+    # The default number of StudentModules that iter_all_for_block and
+    # iter_all_for_course fetch at once.
+    ITER_BATCH_SIZE = 1000
+
     class ServiceUnavailable(XBlockUserStateClient.ServiceUnavailable):
         """
         This error is raised if the service backing this client is currently unavailable.
@@ -196,19 +206,29 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         self._ddog_histogram(evt_time, 'get_many.blks_requested', len(block_keys))
         self._nr_stat_accumulate('get_many', 'blocks_requested', len(block_keys))
 
+        write_buffer = user_state_buffer.get_buffer()
+        pending_states = write_buffer.get_many(username, block_keys) if write_buffer is not None else {}
+
         modules = self._get_student_modules(username, block_keys)
         for module, usage_key in modules:
-            if module.state is None:
+            pending_state = pending_states.pop(usage_key, None)
+            if module.state is None and pending_state is None:
                 self._ddog_increment(evt_time, 'get_many.empty_state')
                 continue
 
-            state = json.loads(module.state)
-            state_length = len(module.state)
+            state = json.loads(module.state) if module.state is not None else {}
+            state_length = len(module.state or '')
+            modified = module.modified
 
             # record this metric before the check for empty state, so that we
             # have some visibility into empty blocks.
             self._ddog_histogram(evt_time, 'get_many.block_size', state_length)
 
+            # Read our own buffered writes.
+            if pending_state is not None:
+                state.update(pending_state.state)
+                modified = pending_state.modified
+
             # If the state is the empty dict, then it has been deleted, and so
             # conformant UserStateClients should treat it as if it doesn't exist.
             if state == {}:
@@ -219,14 +239,15 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             self._nr_block_stat_accumulate('get_many', usage_key.block_type, 'size', state_length)
             total_block_count += 1
 
-            # filter state on fields
-            if fields is not None:
-                state = {
-                    field: state[field]
-                    for field in fields
-                    if field in state
-                }
-            yield XBlockUserState(username, usage_key, state, module.modified, scope)
+            yield XBlockUserState(username, usage_key, self._filter_fields(state, fields), modified, scope)
+
+        # The blocks whose buffered state has not been stored yet.
+        for usage_key, pending_state in pending_states.iteritems():
+            if pending_state.state:
+                total_block_count += 1
+                yield XBlockUserState(
+                    username, usage_key, self._filter_fields(pending_state.state, fields), pending_state.modified, scope
+                )
 
         # The rest of this method exists only to report metrics.
         finish_time = time()
@@ -236,6 +257,19 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         self._ddog_histogram(evt_time, 'get_many.response_time', duration)
         self._nr_stat_accumulate('get_many', 'duration', duration)
 
+    @staticmethod
+    def _filter_fields(state, fields):
+        """
+        Returns the given fields of the state, or all of it if fields is None.
+        """
+        if fields is None:
+            return state
+        return {
+            field: state[field]
+            for field in fields
+            if field in state
+        }
+
     def set_many(self, username, block_keys_to_state, scope=Scope.user_state):
         """
         Set fields for a particular XBlock.
@@ -268,6 +302,15 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             # what we have.
             return
 
+        write_buffer = user_state_buffer.get_buffer()
+        if write_buffer is not None:
+            # The state is written when the request ends, or once enough of it is pending.
+            write_buffer.add(user, block_keys_to_state)
+            self._nr_stat_accumulate('set_many', 'blocks_buffered', len(block_keys_to_state))
+            if write_buffer.is_due():
+                write_buffer.flush()
+            return
+
         evt_time = time()
 
         for usage_key, state in block_keys_to_state.items():
@@ -358,6 +401,10 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         self._ddog_histogram(evt_time, 'delete_many.block_count', len(block_keys))
 
+        write_buffer = user_state_buffer.get_buffer()
+        if write_buffer is not None:
+            write_buffer.flush(username, block_keys)
+
         student_modules = self._get_student_modules(username, block_keys)
         for student_module, _ in student_modules:
             if fields is None:
@@ -396,6 +443,11 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
+
+        write_buffer = user_state_buffer.get_buffer()
+        if write_buffer is not None:
+            write_buffer.flush(username, [block_key])
+
         student_modules = list(
             student_module
             for student_module, usage_id
@@ -437,7 +489,12 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         """
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
-        raise NotImplementedError()
+        return self._iter_all(
+            scope,
+            batch_size,
+            course_id=block_key.course_key,
+            module_state_key=block_key,
+        )
 
     def iter_all_for_course(self, course_key, block_type=None, scope=Scope.user_state, batch_size=None):
         """
@@ -447,4 +504,35 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         """
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
-        raise NotImplementedError()
+        filters = {'course_id': course_key}
+        if block_type is not None:
+            filters['module_type'] = block_type
+        return self._iter_all(scope, batch_size, **filters)
+
+    def _iter_all(self, scope, batch_size, **filters):
+        """
+        Yields an XBlockUserState for each StudentModule that matches the
+        filters and has state.
+
+        The StudentModules are read from the read replica if there is one, in
+        order of their ids, batch_size (or ITER_BATCH_SIZE) at a time, so that
+        only one batch is held in memory however many there are.
+        """
+        batch_size = batch_size or self.ITER_BATCH_SIZE
+        query = use_read_replica_if_available(
+            StudentModule.objects.filter(state__isnull=False, **filters).select_related('student').order_by('id')
+        )
+
+        last_id = 0
+        while True:
+            student_modules = list(query.filter(id__gt=last_id)[:batch_size])
+            for student_module in student_modules:
+                state = json.loads(student_module.state)
+                # The empty dict means that the state has been deleted.
+                if state == {}:
+                    continue
+                block_key = student_module.module_state_key.map_into_course(student_module.course_id)
+                yield XBlockUserState(student_module.student.username, block_key, state, student_module.modified, scope)
+            if len(student_modules) < batch_size:
+                break
+            last_id = student_modules[-1].id
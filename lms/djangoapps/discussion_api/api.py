@@ -15,6 +15,7 @@ from opaque_keys.edx.locator import CourseKey
 from rest_framework.exceptions import PermissionDenied
 
 from courseware.courses import get_course_with_access
+from discussion_api.config.waffle import CONCURRENT_FORUM_REQUESTS, waffle
 from discussion_api.exceptions import CommentNotFoundError, DiscussionDisabledError, ThreadNotFoundError
 from discussion_api.forms import CommentActionsForm, ThreadActionsForm
 from discussion_api.permissions import (
@@ -41,7 +42,8 @@ from lms.djangoapps.courseware.exceptions import CourseAccessRedirect
 from lms.djangoapps.discussion_api.pagination import DiscussionAPIPagination
 from lms.lib.comment_client.comment import Comment
 from lms.lib.comment_client.thread import Thread
-from lms.lib.comment_client.utils import CommentClientRequestError
+from lms.lib.comment_client.user import User as CommentClientUser
+from lms.lib.comment_client.utils import CommentClientRequestError, perform_concurrently
 from openedx.core.djangoapps.user_api.accounts.views import AccountViewSet
 from openedx.core.lib.exceptions import CourseNotFoundError, DiscussionNotFoundError, PageNotFoundError
 
@@ -86,6 +88,17 @@ def _get_course(course_key, user):
     return course
 
 
+def _perform_forum_requests(*functions):
+    """
+    Calls the given functions, which make independent requests to the
+    comments service, and returns their results in order.  The requests are
+    made concurrently if the concurrent_forum_requests switch is enabled.
+    """
+    if waffle().is_enabled(CONCURRENT_FORUM_REQUESTS):
+        return perform_concurrently(*functions)
+    return [function() for function in functions]
+
+
 def _get_thread_and_context(request, thread_id, retrieve_kwargs=None):
     """
     Retrieve the given thread and build a serializer context for it, returning
@@ -536,7 +549,9 @@ def get_thread_list(
         })
 
     course = _get_course(course_key, request.user)
-    context = get_context(course, request)
+    # The requester is retrieved from the comments service along with the threads.
+    cc_requester = CommentClientUser.from_django_user(request.user)
+    context = get_context(course, request, cc_requester=cc_requester)
 
     query_params = {
         "user_id": unicode(request.user.id),
@@ -559,12 +574,17 @@ def get_thread_list(
             })
 
     if following:
-        paginated_results = context["cc_requester"].subscribed_threads(query_params)
+        # The requester must have been retrieved, which syncs them to the comments
+        # service if needed, before their subscriptions are.
+        cc_requester.retrieve()
+        cc_requester["course_id"] = course.id
+        paginated_results = cc_requester.subscribed_threads(query_params)
     else:
         query_params["course_id"] = unicode(course.id)
         query_params["commentable_ids"] = ",".join(topic_id_list) if topic_id_list else None
         query_params["text"] = text_search
-        paginated_results = Thread.search(query_params)
+        __, paginated_results = _perform_forum_requests(cc_requester.retrieve, lambda: Thread.search(query_params))
+        cc_requester["course_id"] = course.id
     # The comments service returns the last page of results if the requested
     # page is beyond the last page, but we want be consistent with DRF's general
     # behavior and return a PageNotFoundError in that case
@@ -0,0 +1,18 @@
+"""
+This module contains various configuration settings via
+waffle switches for the Discussion API app.
+"""
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+# Namespace
+WAFFLE_NAMESPACE = u'discussion_api'
+
+# Switches
+CONCURRENT_FORUM_REQUESTS = u'concurrent_forum_requests'
+
+
+def waffle():
+    """
+    Returns the namespaced, cached, audited Waffle class for the Discussion API.
+    """
+    return WaffleSwitchNamespace(name=WAFFLE_NAMESPACE, log_prefix=u'Discussion API: ')
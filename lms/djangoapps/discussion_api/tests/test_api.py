@@ -32,6 +32,7 @@ from discussion_api.api import (
     update_comment,
     update_thread
 )
+from discussion_api.config.waffle import CONCURRENT_FORUM_REQUESTS, waffle
 from discussion_api.exceptions import CommentNotFoundError, DiscussionDisabledError, ThreadNotFoundError
 from discussion_api.tests.utils import (
     CommentsServiceMockMixin,
@@ -661,6 +662,14 @@ class GetThreadListTest(ForumsEnableMixin, CommentsServiceMockMixin, UrlResetMix
             "per_page": ["14"],
         })
 
+    def test_concurrent_requests(self):
+        with waffle().override(CONCURRENT_FORUM_REQUESTS):
+            self.assertEqual(self.get_thread_list([], num_pages=0).data["results"], [])
+        self.assertEqual(
+            sorted(urlparse(request.path).path for request in httpretty.httpretty.latest_requests),
+            ["/api/v1/threads", "/api/v1/users/{}".format(self.user.id)]
+        )
+
     def test_thread_content(self):
         self.course.cohort_config = {"cohorted": True}
         modulestore().update_item(self.course, ModuleStoreEnum.UserID.test)
@@ -0,0 +1,18 @@
+"""
+This module contains various configuration settings via
+waffle switches for the Django Comment Client app.
+"""
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+# Namespace
+WAFFLE_NAMESPACE = u'django_comment_client'
+
+# Switches
+CACHE_DISCUSSION_INDEX = u'cache_discussion_index'
+
+
+def waffle():
+    """
+    Returns the namespaced, cached, audited Waffle class for the Django Comment Client.
+    """
+    return WaffleSwitchNamespace(name=WAFFLE_NAMESPACE, log_prefix=u'Django Comment Client: ')
@@ -16,6 +16,7 @@ from course_modes.models import CourseMode
 from course_modes.tests.factories import CourseModeFactory
 from courseware.tabs import get_course_tab_list
 from courseware.tests.factories import InstructorFactory
+from django_comment_client.config.waffle import CACHE_DISCUSSION_INDEX, waffle
 from django_comment_client.constants import TYPE_ENTRY, TYPE_SUBCATEGORY
 from django_comment_client.tests.factories import RoleFactory
 from django_comment_client.tests.unicode import UnicodeTestMixin
@@ -24,7 +25,7 @@ from django_comment_common.models import CourseDiscussionSettings, ForumsConfig
 from django_comment_common.utils import get_course_discussion_settings, set_course_discussion_settings
 from edxmako import add_lookup
 from lms.djangoapps.teams.tests.factories import CourseTeamFactory
-from lms.lib.comment_client.utils import CommentClientMaintenanceError, perform_request
+from lms.lib.comment_client.utils import CommentClientMaintenanceError, perform_concurrently, perform_request
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.course_groups import cohorts
 from openedx.core.djangoapps.course_groups.cohorts import set_course_cohorted
@@ -1216,6 +1217,101 @@ class ContentGroupCategoryMapTestCase(CategoryMapTestMixin, ContentGroupTestCase
         )
 
 
+class DiscussionIndexTestMixin(object):
+    """
+    Enables the cached discussion index for the tests.
+    """
+    def setUp(self):
+        super(DiscussionIndexTestMixin, self).setUp()
+        switch_override = waffle().override(CACHE_DISCUSSION_INDEX)
+        switch_override.__enter__()
+        self.addCleanup(switch_override.__exit__, None, None, None)
+
+
+@attr(shard=1)
+class CachedIndexCategoryMapTestCase(DiscussionIndexTestMixin, CategoryMapTestCase):
+    """
+    Tests `get_discussion_category_map` with the cached discussion index.
+    """
+    pass
+
+
+@attr(shard=1)
+class CachedIndexContentGroupCategoryMapTestCase(DiscussionIndexTestMixin, ContentGroupCategoryMapTestCase):
+    """
+    Tests `get_discussion_category_map` with the cached discussion index, on
+    discussion xblocks which are only visible to some content groups.
+    """
+    pass
+
+
+@attr(shard=1)
+class DiscussionIndexTestCase(DiscussionIndexTestMixin, ModuleStoreTestCase):
+    """
+    Tests the cached discussion index of a course.
+    """
+    def setUp(self):
+        super(DiscussionIndexTestCase, self).setUp()
+        self.course = CourseFactory.create(
+            default_store=ModuleStoreEnum.Type.split,
+            start=datetime.datetime(2012, 2, 3, tzinfo=UTC),
+        )
+        self.course.discussion_topics = {}
+        self.user = UserFactory.create()
+        self.instructor = InstructorFactory(course_key=self.course.id)
+
+    def create_discussion(self, discussion_id, **kwargs):
+        """
+        Creates a discussion xblock with the given discussion_id.
+        """
+        return ItemFactory.create(
+            parent_location=self.course.location,
+            category="discussion",
+            discussion_id=discussion_id,
+            discussion_category="Chapter",
+            discussion_target=discussion_id,
+            **kwargs
+        )
+
+    def test_cached_per_version(self):
+        self.create_discussion("discussion1")
+        build_index = utils._build_discussion_index  # pylint: disable=protected-access
+        with patch.object(utils, '_build_discussion_index', wraps=build_index) as mock_build_index:
+            self.assertEqual(utils.get_discussion_categories_ids(self.course, self.user), ["discussion1"])
+            self.assertEqual(utils.get_discussion_categories_ids(self.course, self.user), ["discussion1"])
+            self.assertEqual(mock_build_index.call_count, 1)
+
+            self.create_discussion("discussion2")
+            self.assertItemsEqual(
+                utils.get_discussion_categories_ids(self.course, self.user),
+                ["discussion1", "discussion2"]
+            )
+            self.assertEqual(mock_build_index.call_count, 2)
+
+    @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    def test_unstarted(self):
+        self.create_discussion("discussion1")
+        self.create_discussion("discussion2", start=datetime.datetime(datetime.MAXYEAR, 1, 1, tzinfo=UTC))
+        self.assertEqual(utils.get_discussion_categories_ids(self.course, self.user), ["discussion1"])
+        self.assertItemsEqual(
+            utils.get_discussion_categories_ids(self.course, self.instructor),
+            ["discussion1", "discussion2"]
+        )
+
+    def test_visible_to_staff_only(self):
+        self.create_discussion("discussion1")
+        self.create_discussion("discussion2", visible_to_staff_only=True)
+        self.assertEqual(utils.get_discussion_categories_ids(self.course, self.user), ["discussion1"])
+        self.assertItemsEqual(
+            utils.get_discussion_categories_ids(self.course, self.instructor),
+            ["discussion1", "discussion2"]
+        )
+        self.assertItemsEqual(
+            utils.get_discussion_categories_ids(self.course, None, include_all=True),
+            ["discussion1", "discussion2"]
+        )
+
+
 class JsonResponseTestCase(TestCase, UnicodeTestMixin):
     def _test_unicode_data(self, text):
         response = utils.JsonResponse(text)
@@ -1693,7 +1789,7 @@ class ClientConfigurationTestCase(TestCase):
         with self.assertRaises(CommentClientMaintenanceError):
             perform_request('GET', 'http://www.google.com')
 
-    @patch('requests.request')
+    @patch('lms.lib.comment_client.utils.SESSION.request')
     def test_enabled(self, mock_request):
         """Ensures that requests proceed normally when forums are enabled."""
         config = ForumsConfig.current()
@@ -1710,6 +1806,32 @@ class ClientConfigurationTestCase(TestCase):
         self.assertEqual(result, {})
 
 
+class PerformConcurrentlyTestCase(TestCase):
+    """Test cases for making requests to the comment service concurrently."""
+
+    def test_results_in_order(self):
+        """Ensures that the results of the functions are returned in order."""
+        self.assertEqual(perform_concurrently(lambda: 1, lambda: 2, lambda: 3), [1, 2, 3])
+
+    def test_error(self):
+        """Ensures that the exception of the first function that fails is raised."""
+        def fail(message):
+            """Raises a ValueError with the given message."""
+            raise ValueError(message)
+
+        with self.assertRaisesRegexp(ValueError, 'first'):
+            perform_concurrently(lambda: 1, lambda: fail('first'), lambda: fail('second'))
+
+    def test_disabled(self):
+        """Ensures that the requests are made with the configuration of the calling thread."""
+        config = ForumsConfig.current()
+        config.enabled = False
+        config.save()
+
+        with self.assertRaises(CommentClientMaintenanceError):
+            perform_concurrently(lambda: perform_request('GET', 'http://www.google.com'))
+
+
 def set_discussion_division_settings(
         course_key, enable_cohorts=False, always_divide_inline_discussions=False,
         divided_discussions=[], division_scheme=CourseDiscussionSettings.COHORT
@@ -1,11 +1,12 @@
 import json
 import logging
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from datetime import datetime
 
 import pytz
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import connection
 from django.http import HttpResponse
@@ -16,6 +17,8 @@ from opaque_keys.edx.locations import i4xEncoder
 import pystache_custom as pystache
 from courseware import courses
 from courseware.access import has_access
+from courseware.access_utils import in_preview_mode
+from django_comment_client.config.waffle import CACHE_DISCUSSION_INDEX, waffle
 from django_comment_client.constants import TYPE_ENTRY, TYPE_SUBCATEGORY
 from django_comment_client.permissions import check_permissions_by_view, get_team, has_permission
 from django_comment_client.settings import MAX_COMMENT_DEPTH
@@ -26,12 +29,23 @@ from openedx.core.djangoapps.content.course_structures.models import CourseStruc
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort_id, get_cohort_names, is_course_cohorted
 from request_cache.middleware import request_cached
 from student.roles import GlobalStaff
+from util import milestones_helpers
 from xmodule.modulestore.django import modulestore
 from xmodule.partitions.partitions import ENROLLMENT_TRACK_PARTITION_ID
 from xmodule.partitions.partitions_service import PartitionService
 
 log = logging.getLogger(__name__)
 
+# How long the discussion index of a course version is cached, in seconds.
+DISCUSSION_INDEX_CACHE_TIMEOUT = 24 * 60 * 60
+
+# The user-independent data of a discussion xblock, with the same attributes
+# as the xblock, and whether its access is restricted to some users.
+DiscussionIndexEntry = namedtuple(
+    'DiscussionIndexEntry',
+    ['location', 'discussion_id', 'discussion_category', 'discussion_target', 'sort_key', 'start', 'is_restricted'],
+)
+
 
 def extract(dic, keys):
     """
@@ -137,6 +151,95 @@ def get_accessible_discussion_xblocks(course, user, include_all=False):  # pylin
     ]
 
 
+def get_discussion_index(course_key):
+    """
+    Returns the DiscussionIndexEntries of all of the valid discussion xblocks
+    in this course.  The index is cached for each published version of the
+    course.
+    """
+    course_version = _get_course_version(course_key)
+    if course_version is None:
+        return _build_discussion_index(course_key)
+
+    cache_key = u'django_comment_client.discussion_index.{}.{}'.format(course_key, course_version)
+    index = cache.get(cache_key)
+    if index is None:
+        index = _build_discussion_index(course_key)
+        cache.set(cache_key, index, DISCUSSION_INDEX_CACHE_TIMEOUT)
+    return index
+
+
+def _get_course_version(course_key):
+    """
+    Returns a string that identifies the published version of the course, or
+    None if its modulestore does not version it.
+    """
+    course = modulestore().get_course(course_key, depth=0)
+    if course is None:
+        return None
+    if getattr(course, 'course_version', None):
+        return unicode(course.course_version)
+    subtree_edited_on = getattr(course, 'subtree_edited_on', None)
+    return subtree_edited_on.isoformat() if subtree_edited_on else None
+
+
+def _build_discussion_index(course_key):
+    """
+    Returns the DiscussionIndexEntries of all of the valid discussion xblocks
+    in this course, read from the modulestore.
+    """
+    all_xblocks = modulestore().get_items(course_key, qualifiers={'category': 'discussion'}, include_orphans=False)
+    return [
+        DiscussionIndexEntry(
+            location=xblock.location,
+            discussion_id=xblock.discussion_id,
+            discussion_category=xblock.discussion_category,
+            discussion_target=xblock.discussion_target,
+            sort_key=xblock.sort_key,
+            start=xblock.start,
+            is_restricted=bool(
+                xblock.visible_to_staff_only or
+                any(group_ids is not None for group_ids in xblock.merged_group_access.values())
+            ),
+        )
+        for xblock in all_xblocks
+        if has_required_keys(xblock)
+    ]
+
+
+def _get_accessible_discussion_entries(course, user, include_all=False):
+    """
+    Return a list of all valid discussion xblocks in this course that are
+    accessible to the given user, or of their DiscussionIndexEntries if the
+    discussion index is cached.
+
+    With the index, only the xblocks that may not be accessible to every
+    user, because they are restricted to some groups or to staff, have not
+    started yet or require milestones, are loaded to check the user's access.
+    """
+    if not waffle().is_enabled(CACHE_DISCUSSION_INDEX):
+        return get_accessible_discussion_xblocks(course, user, include_all=include_all)
+
+    entries = get_discussion_index(course.id)
+    if include_all:
+        return entries
+
+    now = datetime.now(UTC())
+    check_all = in_preview_mode()
+    accessible_entries = []
+    for entry in entries:
+        needs_access_check = (
+            check_all or
+            entry.is_restricted or
+            (entry.start is not None and entry.start >= now) or
+            milestones_helpers.get_course_content_milestones(course.id, unicode(entry.location), 'requires', user.id)
+        )
+        if needs_access_check and not has_access(user, 'load', modulestore().get_item(entry.location), course.id):
+            continue
+        accessible_entries.append(entry)
+    return accessible_entries
+
+
 def get_discussion_id_map_entry(xblock):
     """
     Returns a tuple of (discussion_id, metadata) suitable for inclusion in the results of get_discussion_id_map().
@@ -197,7 +300,7 @@ def get_discussion_id_map(course, user):
     Transform the list of this course's discussion xblocks (visible to a given user) into a dictionary of metadata keyed
     by discussion_id.
     """
-    return dict(map(get_discussion_id_map_entry, get_accessible_discussion_xblocks(course, user)))
+    return dict(map(get_discussion_id_map_entry, _get_accessible_discussion_entries(course, user)))
 
 
 def _filter_unstarted_categories(category_map, course):
@@ -306,7 +409,7 @@ def get_discussion_category_map(course, user, divided_only_if_explicit=False, ex
     """
     unexpanded_category_map = defaultdict(list)
 
-    xblocks = get_accessible_discussion_xblocks(course, user)
+    xblocks = _get_accessible_discussion_entries(course, user)
 
     discussion_settings = get_course_discussion_settings(course.id)
     discussion_division_enabled = course_discussion_division_enabled(discussion_settings)
@@ -428,7 +531,7 @@ def get_discussion_categories_ids(course, user, include_all=False):
 
     """
     accessible_discussion_ids = [
-        xblock.discussion_id for xblock in get_accessible_discussion_xblocks(course, user, include_all=include_all)
+        xblock.discussion_id for xblock in _get_accessible_discussion_entries(course, user, include_all=include_all)
     ]
     return course.top_level_discussion_topic_ids + accessible_discussion_ids
 
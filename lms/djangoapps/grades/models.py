@@ -14,7 +14,7 @@ from base64 import b64encode
 from collections import namedtuple
 from hashlib import sha1
 
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import now
 from lazy import lazy
 from model_utils.models import TimeStampedModel
@@ -466,6 +466,69 @@ class PersistentSubsectionGrade(DeleteGradesMixin, TimeStampedModel):
             cls._emit_grade_calculated_event(grade)
         return grades
 
+    @classmethod
+    def bulk_update_or_create_grades(cls, grade_params_iter, course_key):
+        """
+        Bulk creation or update of grades for any number of users in the
+        given course.  Existing grades are read in a single query, new
+        grades are created in bulk, and existing grades are only saved if
+        any of their values changed.
+        """
+        if not grade_params_iter:
+            return []
+
+        map(cls._prepare_params, grade_params_iter)
+        VisibleBlocks.bulk_get_or_create([params['visible_blocks'] for params in grade_params_iter], course_key)
+        map(cls._prepare_params_visible_blocks_id, grade_params_iter)
+
+        existing_grades = {
+            (grade.user_id, grade.full_usage_key): grade
+            for grade in cls.objects.filter(
+                course_id=course_key,
+                user_id__in={params['user_id'] for params in grade_params_iter},
+            )
+        }
+        grades, new_grades = [], []
+        with transaction.atomic():
+            for params in grade_params_iter:
+                grade = existing_grades.get((params['user_id'], params['usage_key']))
+                if grade is None:
+                    cls._prepare_first_attempted_for_create(params)
+                    grade = cls(**params)
+                    new_grades.append(grade)
+                elif cls._update_changed_fields(grade, params):
+                    grade.save()
+                grades.append(grade)
+            cls.objects.bulk_create(new_grades)
+
+        for grade in grades:
+            cls._emit_grade_calculated_event(grade)
+        return grades
+
+    @classmethod
+    def _update_changed_fields(cls, grade, params):
+        """
+        Updates the given existing grade with the values in params, as
+        update_or_create_grade would.  Returns whether any values changed.
+        """
+        first_attempted = params['first_attempted']
+        if first_attempted is not None and grade.first_attempted is None:
+            if not waffle.waffle().is_enabled(waffle.ESTIMATE_FIRST_ATTEMPTED):
+                first_attempted = now()
+        else:
+            first_attempted = grade.first_attempted
+
+        changed = False
+        for field_name, value in params.iteritems():
+            if field_name in ('user_id', 'usage_key', 'course_id'):
+                continue
+            if field_name == 'first_attempted':
+                value = first_attempted
+            if getattr(grade, field_name) != value:
+                setattr(grade, field_name, value)
+                changed = True
+        return changed
+
     @classmethod
     def _prepare_params_and_visible_blocks(cls, params):
         """
@@ -597,6 +660,13 @@ class PersistentCourseGrade(DeleteGradesMixin, TimeStampedModel):
             cls.objects.filter(user_id__in=[user.id for user in users], course_id=course_id)
         }
 
+    @classmethod
+    def clear_cache(cls, course_id):
+        """
+        Clears the prefetched grades for the given course.
+        """
+        get_cache(cls.CACHE_NAMESPACE).pop(cls._cache_key(course_id), None)
+
     @classmethod
     def read(cls, user_id, course_id):
         """
@@ -642,6 +712,60 @@ class PersistentCourseGrade(DeleteGradesMixin, TimeStampedModel):
         cls._emit_grade_calculated_event(grade)
         return grade
 
+    @classmethod
+    def bulk_update_or_create(cls, course_id, grade_params_iter):
+        """
+        Bulk creation or update of course grades for any number of users
+        in the given course.  Each item in grade_params_iter contains the
+        keyword arguments to update_or_create.  Existing
+        grades are read in a single query, new grades are created in bulk,
+        and existing grades are only saved if any of their values changed.
+        Returns the PersistentCourseGrade objects.
+        """
+        if not grade_params_iter:
+            return []
+
+        existing_grades = {
+            grade.user_id: grade
+            for grade in cls.objects.filter(
+                course_id=course_id,
+                user_id__in=[params['user_id'] for params in grade_params_iter],
+            )
+        }
+        grades, new_grades = [], []
+        with transaction.atomic():
+            for params in grade_params_iter:
+                params = dict(params)
+                user_id = params.pop('user_id')
+                passed = params.pop('passed')
+                params.pop('course_id', None)
+                if params.get('course_version', None) is None:
+                    params['course_version'] = ""
+
+                grade = existing_grades.get(user_id)
+                if grade is None:
+                    grade = cls(user_id=user_id, course_id=course_id, **params)
+                    if passed:
+                        grade.passed_timestamp = now()
+                    new_grades.append(grade)
+                else:
+                    changed = False
+                    for field_name, value in params.iteritems():
+                        if getattr(grade, field_name) != value:
+                            setattr(grade, field_name, value)
+                            changed = True
+                    if passed and not grade.passed_timestamp:
+                        grade.passed_timestamp = now()
+                        changed = True
+                    if changed:
+                        grade.save()
+                grades.append(grade)
+            cls.objects.bulk_create(new_grades)
+
+        for grade in grades:
+            cls._emit_grade_calculated_event(grade)
+        return grades
+
     @staticmethod
     def _emit_grade_calculated_event(grade):
         """
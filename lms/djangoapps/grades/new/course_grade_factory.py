@@ -8,9 +8,10 @@ from openedx.core.djangoapps.signals.signals import COURSE_GRADE_CHANGED, COURSE
 
 from ..config import assume_zero_if_absent, should_persist_grades
 from ..config.waffle import WRITE_ONLY_IF_ENGAGED, waffle
-from ..models import PersistentCourseGrade, VisibleBlocks
+from ..models import PersistentCourseGrade, PersistentSubsectionGrade, VisibleBlocks
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
+from .subsection_grade_factory import BulkScores, BulkSubsectionGradeFactory
 
 log = getLogger(__name__)
 
@@ -85,6 +86,91 @@ class CourseGradeFactory(object):
         course_data = CourseData(user, course, collected_block_structure, course_structure, course_key)
         return self._update(user, course_data, read_only=False, force_update_subsections=force_update_subsections)
 
+    def bulk_update(
+            self,
+            users,
+            course=None,
+            collected_block_structure=None,
+            course_key=None,
+    ):
+        """
+        Computes, updates, and returns the CourseGrades, including all
+        subsection grades, for the given users in the course, as a list
+        of GradeResults (see iter).
+
+        This is equivalent to calling update with force_update_subsections
+        for each user, but the scores of all of the users are read with a
+        constant number of queries, and their grades are computed in
+        memory and then saved in bulk.  It is intended for recomputing
+        the grades of a batch of users, such as after a change to the
+        course's grading policy.
+        """
+        course_data = CourseData(
+            user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
+        )
+        users = list(users)
+        stats_tags = [u'action:{}'.format(course_data.course_key)]
+        with self._course_transaction(course_data.course_key):
+            with dog_stats_api.timer('lms.grades.CourseGradeFactory.bulk_update', tags=stats_tags):
+                bulk_scores = BulkScores(course_data.course_key, users, course_data.collected_structure)
+                results = [self._bulk_grade_result(user, course_data, bulk_scores) for user in users]
+                graded_results = [result for result in results if result.error is None]
+                self._bulk_persist(course_data, graded_results)
+
+            for result in graded_results:
+                self._send_signals(result.student, result.course_grade)
+        return results
+
+    def _bulk_grade_result(self, user, course_data, bulk_scores):
+        """
+        Returns a GradeResult with the CourseGrade computed from the given
+        BulkScores for the given user, without saving it.
+        """
+        try:
+            user_course_data = CourseData(
+                user, course_data.course, course_data.collected_structure, course_key=course_data.course_key,
+            )
+            course_grade = CourseGrade(
+                user,
+                user_course_data,
+                force_update_subsections=True,
+                subsection_grade_factory=BulkSubsectionGradeFactory(user, user_course_data, bulk_scores),
+            )
+            course_grade.update()
+            return self.GradeResult(user, course_grade, None)
+        except Exception as exc:  # pylint: disable=broad-except
+            # Keep marching on even if this student couldn't be graded for
+            # some reason, but log it for future reference.
+            log.exception(
+                'Cannot grade student %s in course %s because of exception: %s',
+                user.id,
+                course_data.course_key,
+                exc.message
+            )
+            return self.GradeResult(user, None, exc)
+
+    @staticmethod
+    def _bulk_persist(course_data, grade_results):
+        """
+        Saves the subsection and course grades in the given GradeResults
+        in bulk.
+        """
+        subsection_grade_params = []
+        course_grade_params = []
+        for result in grade_results:
+            course_grade = result.course_grade
+            subsection_grade_params.extend(course_grade._subsection_grade_factory.persisted_model_params())
+            should_persist = CourseGradeFactory._should_persist(course_grade, read_only=False)
+            if should_persist:
+                course_grade_params.append(CourseGradeFactory._persisted_model_params(result.student, course_grade))
+            log.info(
+                u'Grades: BulkUpdate, %s, User: %s, %s, persisted: %s',
+                course_grade.course_data.full_string(), result.student.id, course_grade, should_persist,
+            )
+
+        PersistentSubsectionGrade.bulk_update_or_create_grades(subsection_grade_params, course_data.course_key)
+        PersistentCourseGrade.bulk_update_or_create(course_data.course_key, course_grade_params)
+
     @contextmanager
     def _course_transaction(self, course_key):
         """
@@ -189,24 +275,56 @@ class CourseGradeFactory(object):
         course_grade = CourseGrade(user, course_data, force_update_subsections=force_update_subsections)
         course_grade.update()
 
-        should_persist = (
+        should_persist = CourseGradeFactory._should_persist(course_grade, read_only)
+        if should_persist:
+            course_grade._subsection_grade_factory.bulk_create_unsaved()
+            PersistentCourseGrade.update_or_create(**CourseGradeFactory._persisted_model_params(user, course_grade))
+
+        CourseGradeFactory._send_signals(user, course_grade)
+
+        log.info(
+            u'Grades: Update, %s, User: %s, %s, persisted: %s',
+            course_data.full_string(), user.id, course_grade, should_persist,
+        )
+
+        return course_grade
+
+    @staticmethod
+    def _should_persist(course_grade, read_only):
+        """
+        Returns whether the given updated CourseGrade should be persisted.
+        """
+        return (
             (not read_only) and  # TODO(TNL-6786) Remove the read_only boolean once all grades are back-filled.
-            should_persist_grades(course_data.course_key) and
+            should_persist_grades(course_grade.course_data.course_key) and
             (not waffle().is_enabled(WRITE_ONLY_IF_ENGAGED) or course_grade.attempted)
         )
-        if should_persist:
-            course_grade._subsection_grade_factory.bulk_create_unsaved()
-            PersistentCourseGrade.update_or_create(
-                user_id=user.id,
-                course_id=course_data.course_key,
-                course_version=course_data.version,
-                course_edited_timestamp=course_data.edited_on,
-                grading_policy_hash=course_data.grading_policy_hash,
-                percent_grade=course_grade.percent,
-                letter_grade=course_grade.letter_grade or "",
-                passed=course_grade.passed,
-            )
 
+    @staticmethod
+    def _persisted_model_params(user, course_grade):
+        """
+        Returns the parameters for creating/updating the persisted
+        model for the given CourseGrade.
+        """
+        course_data = course_grade.course_data
+        return dict(
+            user_id=user.id,
+            course_id=course_data.course_key,
+            course_version=course_data.version,
+            course_edited_timestamp=course_data.edited_on,
+            grading_policy_hash=course_data.grading_policy_hash,
+            percent_grade=course_grade.percent,
+            letter_grade=course_grade.letter_grade or "",
+            passed=course_grade.passed,
+        )
+
+    @staticmethod
+    def _send_signals(user, course_grade):
+        """
+        Sends a COURSE_GRADE_CHANGED signal to listeners and a
+        COURSE_GRADE_NOW_PASSED if learner has passed course.
+        """
+        course_data = course_grade.course_data
         COURSE_GRADE_CHANGED.send_robust(
             sender=None,
             user=user,
@@ -220,10 +338,3 @@ class CourseGradeFactory(object):
                 user=user,
                 course_key=course_data.course_key,
             )
-
-        log.info(
-            u'Grades: Update, %s, User: %s, %s, persisted: %s',
-            course_data.full_string(), user.id, course_grade, should_persist,
-        )
-
-        return course_grade
@@ -10,6 +10,8 @@ from lms.djangoapps.grades.scores import possibly_scored
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
 from student.models import anonymous_id_for_user
 from submissions import api as submissions_api
+from submissions.models import ScoreSummary
+from submissions.serializers import UnannotatedScoreSerializer
 
 from .course_data import CourseData
 from .subsection_grade import SubsectionGrade, ZeroSubsectionGrade
@@ -163,3 +165,103 @@ class SubsectionGradeFactory(object):
             getattr(subsection, 'subtree_edited_on', None),
             self.student.id,
         ))
+
+
+class BulkScores(object):
+    """
+    Scores of a number of students in a course, read with a constant
+    number of queries, regardless of the number of students.
+    """
+    def __init__(self, course_key, students, course_structure):
+        """
+        Arguments:
+            course_key (CourseKey) - The course of the scores.
+
+            students ([User]) - The students whose scores are read.
+
+            course_structure (BlockStructure) - A block structure
+                containing all blocks that may be scored for any of the
+                students, such as the course's collected block structure.
+        """
+        scorable_locations = [block_key for block_key in course_structure if possibly_scored(block_key)]
+        self._csm_scores = ScoresClient.create_for_users(
+            course_key, [student.id for student in students], scorable_locations,
+        )
+        self._submissions_scores = self._read_submissions_scores(course_key, students)
+
+    def csm_scores(self, student):
+        """
+        Returns the ScoresClient for the given student.
+        """
+        return self._csm_scores[student.id]
+
+    def submissions_scores(self, student):
+        """
+        Returns the scores stored by the Submissions API for the given
+        student, in the format returned by submissions_api.get_scores.
+        """
+        return self._submissions_scores[student.id]
+
+    @staticmethod
+    def _read_submissions_scores(course_key, students):
+        """
+        Returns a dict mapping the id of each student to their scores,
+        as returned by submissions_api.get_scores, using a single query.
+        """
+        # Students with scores in the Submissions API already have a
+        # persisted anonymous id, so there is no need to save one here.
+        students_by_anonymous_id = {
+            anonymous_id_for_user(student, course_key, save=False): student for student in students
+        }
+        scores = {student.id: {} for student in students}
+        score_summaries = ScoreSummary.objects.filter(
+            student_item__course_id=str(course_key),
+            student_item__student_id__in=students_by_anonymous_id.keys(),
+        ).select_related('latest', 'latest__submission', 'student_item')
+        for summary in score_summaries:
+            if not summary.latest.is_hidden():
+                student = students_by_anonymous_id[summary.student_item.student_id]
+                scores[student.id][summary.student_item.item_id] = UnannotatedScoreSerializer(summary.latest).data
+        return scores
+
+
+class BulkSubsectionGradeFactory(SubsectionGradeFactory):
+    """
+    Factory for Subsection Grades that are computed from the given
+    BulkScores, for updating the grades of many students at once.
+
+    Updated grades are not saved by this factory, but are collected so
+    that the caller can save them for all of the students in bulk.
+    """
+    def __init__(self, student, course_data, bulk_scores):
+        super(BulkSubsectionGradeFactory, self).__init__(student, course_data=course_data)
+        self._csm_scores = bulk_scores.csm_scores(student)
+        self._submissions_scores = bulk_scores.submissions_scores(student)
+        self._updated_subsection_grades = OrderedDict()
+
+    def update(self, subsection, only_if_higher=None):
+        """
+        Computes and returns the SubsectionGrade object for the student
+        and subsection, without saving it.
+        """
+        if only_if_higher:
+            raise ValueError("BulkSubsectionGradeFactory does not support only_if_higher updates.")
+
+        calculated_grade = SubsectionGrade(subsection).init_from_structure(
+            self.student, self.course_data.structure, self._submissions_scores, self._csm_scores,
+        )
+        self._updated_subsection_grades[calculated_grade.location] = calculated_grade
+        return calculated_grade
+
+    def persisted_model_params(self):
+        """
+        Returns the parameters for creating or updating the persisted
+        models of all updated subsection grades that should be persisted.
+        """
+        if not should_persist_grades(self.course_data.course_key):
+            return []
+        return [
+            subsection_grade._persisted_model_params(self.student)  # pylint: disable=protected-access
+            for subsection_grade in self._updated_subsection_grades.itervalues()
+            if subsection_grade._should_persist_per_attempted  # pylint: disable=protected-access
+        ]
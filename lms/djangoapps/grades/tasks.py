@@ -26,7 +26,7 @@ from track.event_transaction_utils import set_event_transaction_id, set_event_tr
 from util.date_utils import from_timestamp
 from xmodule.modulestore.django import modulestore
 
-from .config.waffle import ESTIMATE_FIRST_ATTEMPTED, waffle
+from .config.waffle import BULK_REGRADE, ESTIMATE_FIRST_ATTEMPTED, waffle
 from .constants import ScoreDatabaseTableEnum
 from .exceptions import DatabaseNotReadyError
 from .new.course_grade_factory import CourseGradeFactory
@@ -115,9 +115,13 @@ def compute_grades_for_course(course_key, offset, batch_size, **kwargs):  # pyli
     """
 
     course = courses.get_course_by_id(CourseKey.from_string(course_key))
-    enrollments = CourseEnrollment.objects.filter(course_id=course.id).order_by('created')
+    enrollments = CourseEnrollment.objects.filter(course_id=course.id).select_related('user').order_by('created')
     student_iter = (enrollment.user for enrollment in enrollments[offset:offset + batch_size])
-    for result in CourseGradeFactory().iter(users=student_iter, course=course, force_update=True):
+    if waffle().is_enabled(BULK_REGRADE):
+        results = CourseGradeFactory().bulk_update(users=student_iter, course=course)
+    else:
+        results = CourseGradeFactory().iter(users=student_iter, course=course, force_update=True)
+    for result in results:
         if result.error is not None:
             raise result.error
 
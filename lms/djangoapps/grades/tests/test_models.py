@@ -296,6 +296,33 @@ class PersistentSubsectionGradeTest(GradesModelTestCase):
         self.assertIsInstance(grade.first_attempted, datetime)
         self.assertEqual(grade.earned_all, 6.0)
 
+    def test_bulk_update_or_create_grades(self):
+        created_grade = PersistentSubsectionGrade.create_grade(**self.params)
+        new_params = dict(self.params, user_id=54321, first_attempted=None)
+        self.params.update({"earned_all": 7.0, "first_attempted": now()})
+
+        with patch('lms.djangoapps.grades.models.tracker') as tracker_mock:
+            grades = PersistentSubsectionGrade.bulk_update_or_create_grades(
+                [dict(self.params), new_params], self.course_key,
+            )
+        self.assertEqual(tracker_mock.emit.call_count, 2)
+
+        updated_grade = PersistentSubsectionGrade.read_grade(self.params["user_id"], self.usage_key)
+        self.assertEqual(updated_grade.id, created_grade.id)
+        self.assertEqual(updated_grade.earned_all, 7.0)
+        self.assertEqual(updated_grade.first_attempted, created_grade.first_attempted)
+        self.assertEqual(updated_grade.visible_blocks.blocks, self.block_records)
+
+        new_grade = PersistentSubsectionGrade.read_grade(54321, self.usage_key)
+        self.assertEqual(new_grade.earned_all, 6.0)
+        self.assertIsNone(new_grade.first_attempted)
+        self.assertEqual(new_grade.visible_blocks_id, updated_grade.visible_blocks_id)
+        self.assertEqual([grade.user_id for grade in grades], [self.params["user_id"], 54321])
+
+    def test_bulk_update_or_create_no_grades(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(PersistentSubsectionGrade.bulk_update_or_create_grades([], self.course_key), [])
+
     def test_update_or_create_event(self):
         with patch('lms.djangoapps.grades.models.tracker') as tracker_mock:
             grade = PersistentSubsectionGrade.update_or_create_grade(**self.params)
@@ -407,6 +434,25 @@ class PersistentCourseGradesTest(GradesModelTestCase):
         self.assertEqual(grade.letter_grade, u'')
         self.assertEqual(grade.passed_timestamp, passed_timestamp)
 
+    def test_bulk_update_or_create(self):
+        created_grade = PersistentCourseGrade.update_or_create(**dict(self.params, passed=False))
+        new_params = dict(self.params, user_id=54321, passed=False)
+        self.params.update({"percent_grade": 88.8, "letter_grade": "Better job"})
+
+        with freeze_time(now()):
+            grades = PersistentCourseGrade.bulk_update_or_create(self.course_key, [self.params, new_params])
+            self.assertEqual([grade.user_id for grade in grades], [12345, 54321])
+
+            updated_grade = PersistentCourseGrade.read(12345, self.course_key)
+            self.assertEqual(updated_grade.id, created_grade.id)
+            self.assertEqual(updated_grade.percent_grade, 88.8)
+            self.assertEqual(updated_grade.letter_grade, "Better job")
+            self.assertEqual(updated_grade.passed_timestamp, now())
+
+        new_grade = PersistentCourseGrade.read(54321, self.course_key)
+        self.assertEqual(new_grade.percent_grade, 77.7)
+        self.assertIsNone(new_grade.passed_timestamp)
+
     def test_passed_timestamp_is_now(self):
         with freeze_time(now()):
             grade = PersistentCourseGrade.update_or_create(**self.params)
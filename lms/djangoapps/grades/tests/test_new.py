@@ -260,6 +260,43 @@ class TestCourseGradeFactory(GradeTestBase):
         self.assertTrue(desired_call.called)
         self.assertFalse(undesired_call.called)
 
+    def test_bulk_update(self):
+        users = [self.request.user, UserFactory()]
+        CourseEnrollment.enroll(users[1], self.course.id)
+        with mock_get_score(1, 2):
+            results = CourseGradeFactory().bulk_update(users, course=self.course)
+
+        self.assertEqual([result.student for result in results], users)
+        for result in results:
+            self.assertIsNone(result.error)
+            self.assertEqual(result.course_grade.letter_grade, u'Pass')
+            self.assertEqual(result.course_grade.percent, 0.5)
+
+            read_grade = CourseGradeFactory().read(result.student, self.course)
+            self.assertEqual(read_grade.percent, 0.5)
+            self.assertEqual(
+                {grade.full_usage_key for grade in PersistentSubsectionGrade.bulk_read_grades(
+                    result.student.id, self.course.id,
+                )},
+                {self.sequence.location, self.sequence2.location},
+            )
+
+    def test_bulk_update_matches_update(self):
+        with mock_get_score(1, 2):
+            updated_grade = CourseGradeFactory().update(self.request.user, self.course, force_update_subsections=True)
+        with mock_get_score(1, 2):
+            [result] = CourseGradeFactory().bulk_update([self.request.user], course=self.course)
+
+        self.assertEqual(result.course_grade.percent, updated_grade.percent)
+        self.assertEqual(result.course_grade.letter_grade, updated_grade.letter_grade)
+        for location, subsection_grade in updated_grade.subsection_grades.iteritems():
+            bulk_subsection_grade = result.course_grade.subsection_grades[location]
+            for total in ('graded_total', 'all_total'):
+                self.assertEqual(
+                    (getattr(bulk_subsection_grade, total).earned, getattr(bulk_subsection_grade, total).possible),
+                    (getattr(subsection_grade, total).earned, getattr(subsection_grade, total).possible),
+                )
+
 
 @ddt.ddt
 class TestSubsectionGradeFactory(ProblemSubmissionTestMixin, GradeTestBase):
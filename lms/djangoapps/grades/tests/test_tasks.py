@@ -15,6 +15,7 @@ from django.db.utils import IntegrityError
 from mock import MagicMock, patch
 
 from lms.djangoapps.grades.config.models import PersistentGradesEnabledFlag
+from lms.djangoapps.grades.config.waffle import BULK_REGRADE, waffle
 from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
 from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGrade
 from lms.djangoapps.grades.signals.signals import PROBLEM_WEIGHTED_SCORE_CHANGED
@@ -389,13 +390,15 @@ class ComputeGradesForCourseTest(HasCourseWithProblemsMixin, ModuleStoreTestCase
         for user in self.users:
             CourseEnrollment.enroll(user, self.course.id)
 
-    @ddt.data(*xrange(0, 12, 3))
-    def test_behavior(self, batch_size):
-        result = compute_grades_for_course_v2.delay(
-            course_key=six.text_type(self.course.id),
-            batch_size=batch_size,
-            offset=4,
-        )
+    @ddt.data(*itertools.product(xrange(0, 12, 3), (True, False)))
+    @ddt.unpack
+    def test_behavior(self, batch_size, bulk_regrade):
+        with waffle().override(BULK_REGRADE, active=bulk_regrade):
+            result = compute_grades_for_course_v2.delay(
+                course_key=six.text_type(self.course.id),
+                batch_size=batch_size,
+                offset=4,
+            )
         self.assertTrue(result.successful)
         self.assertEqual(
             PersistentCourseGrade.objects.filter(course_id=self.course.id).count(),
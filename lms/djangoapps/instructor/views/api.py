@@ -951,7 +951,11 @@ def list_course_role_members(request, course_id):
 def get_problem_responses(request, course_id):
     """
     Initiate generation of a CSV file containing all student answers
-    to a given problem.
+    to a given problem, or to the blocks within a given section,
+    subsection, unit or course.
+
+    The optional `problem_types_filter` parameters limit the report to
+    the blocks of the given types.
 
     Responds with JSON
         {"status": "... status message ..."}
@@ -962,6 +966,7 @@ def get_problem_responses(request, course_id):
     """
     course_key = CourseKey.from_string(course_id)
     problem_location = request.POST.get('problem_location', '')
+    problem_types_filter = request.POST.getlist('problem_types_filter')
 
     try:
         problem_key = UsageKey.from_string(problem_location)
@@ -975,7 +980,9 @@ def get_problem_responses(request, course_id):
         return JsonResponseBadRequest(_("Could not find problem with this location."))
 
     try:
-        lms.djangoapps.instructor_task.api.submit_calculate_problem_responses_csv(request, course_key, problem_location)
+        lms.djangoapps.instructor_task.api.submit_calculate_problem_responses_csv(
+            request, course_key, problem_location, problem_types_filter
+        )
         success_status = _(
             "The problem responses report is being created."
             " To view the status of the report, see Pending Tasks below."
@@ -297,16 +297,22 @@ def submit_bulk_course_email(request, course_key, email_id):
     return submit_task(request, task_type, task_class, course_key, task_input, task_key)
 
 
-def submit_calculate_problem_responses_csv(request, course_key, problem_location):  # pylint: disable=invalid-name
+def submit_calculate_problem_responses_csv(  # pylint: disable=invalid-name
+        request, course_key, problem_location, problem_types_filter=None
+):
     """
     Submits a task to generate a CSV file containing all student
-    answers to a given problem.
+    answers to a given problem, or to the blocks within a given section,
+    subsection, unit or course, optionally only those of the block types
+    in problem_types_filter.
 
     Raises AlreadyRunningError if said file is already being updated.
     """
     task_type = 'problem_responses_csv'
     task_class = calculate_problem_responses_csv
     task_input = {'problem_location': problem_location}
+    if problem_types_filter:
+        task_input['problem_types_filter'] = problem_types_filter
     task_key = ""
 
     return submit_task(request, task_type, task_class, course_key, task_input, task_key)
@@ -16,3 +16,8 @@ class UpdateProblemModuleStateError(Exception):
 class DuplicateTaskException(Exception):
     """Exception indicating that a task already exists or has already completed."""
     pass
+
+
+class GradeReportShardsMissingError(Exception):
+    """Exception indicating that shards of a sharded grade report failed or are missing."""
+    pass
@@ -16,11 +16,14 @@ import csv
 import hashlib
 import json
 import os.path
+import shutil
+import tempfile
+from contextlib import contextmanager
 from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import models, transaction
 
 from openedx.core.djangoapps.xmodule_django.models import CourseKeyField
@@ -293,6 +296,60 @@ class DjangoStorageReportStore(ReportStore):
         output_buffer.seek(0)
         self.store(course_id, filename, output_buffer)
 
+    @contextmanager
+    def rows_writer(self, course_id, filename):
+        """
+        Context manager that yields a function accepting an iterable of
+        rows.  Rows passed to the function are written in csv format to a
+        local temporary file, which is handed to the storage backend on exit.
+        This lets callers produce a report batch by batch without holding
+        every row in memory.
+        """
+        with tempfile.TemporaryFile() as temp_file:
+            csvwriter = csv.writer(temp_file)
+            yield lambda rows: csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            temp_file.seek(0)
+            self.store(course_id, filename, File(temp_file))
+
+    def store_concatenated(self, course_id, filename, header_rows, source_filenames):
+        """
+        Write `header_rows` in csv format followed by the raw contents of
+        each of `source_filenames` (which must already be csv files without
+        headers) into a single file named `filename`.  Sources that do not
+        exist are skipped.  Contents are copied chunk by chunk, so the sources
+        are never loaded into memory as a whole.
+
+        Returns the list of source filenames that were missing.
+        """
+        missing_filenames = []
+        with tempfile.TemporaryFile() as temp_file:
+            csvwriter = csv.writer(temp_file)
+            csvwriter.writerows(self._get_utf8_encoded_rows(header_rows))
+            for source_filename in source_filenames:
+                source_path = self.path_to(course_id, source_filename)
+                if not self.storage.exists(source_path):
+                    missing_filenames.append(source_filename)
+                    continue
+                with self.storage.open(source_path) as source_file:
+                    shutil.copyfileobj(source_file, temp_file)
+            temp_file.seek(0)
+            self.store(course_id, filename, File(temp_file))
+        return missing_filenames
+
+    def exists(self, course_id, filename):
+        """
+        Return whether the file named `filename` exists for the given course.
+        """
+        return self.storage.exists(self.path_to(course_id, filename))
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file named `filename` for the given course, if it exists.
+        """
+        path = self.path_to(course_id, filename)
+        if self.storage.exists(path):
+            self.storage.delete(path)
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples.
@@ -138,6 +138,8 @@ class SubtaskStatus(object):
       'retried_withmax' : number of times the subtask has been retried for conditions that
           should have a maximum count applied
       'state' : celery state of the subtask (e.g. QUEUING, PROGRESS, RETRY, FAILURE, SUCCESS)
+      'metrics' : dict of performance measurements of the subtask (e.g. time spent), which are
+          added up across retries
 
     Object is not JSON-serializable, so to_dict and from_dict methods are provided so that
     it can be passed as a serializable argument to tasks (and be reconstituted within such tasks).
@@ -147,7 +149,7 @@ class SubtaskStatus(object):
     Also, we should count up "not attempted" separately from attempted/failed.
     """
 
-    def __init__(self, task_id, attempted=None, succeeded=0, failed=0, skipped=0, retried_nomax=0, retried_withmax=0, state=None):
+    def __init__(self, task_id, attempted=None, succeeded=0, failed=0, skipped=0, retried_nomax=0, retried_withmax=0, state=None, metrics=None):
         """Construct a SubtaskStatus object."""
         self.task_id = task_id
         if attempted is not None:
@@ -160,6 +162,7 @@ class SubtaskStatus(object):
         self.retried_nomax = retried_nomax
         self.retried_withmax = retried_withmax
         self.state = state if state is not None else QUEUING
+        self.metrics = metrics if metrics is not None else {}
 
     @classmethod
     def from_dict(cls, d):
@@ -198,6 +201,13 @@ class SubtaskStatus(object):
         if state is not None:
             self.state = state
 
+    def add_metrics(self, **metrics):
+        """
+        Add the given values to the metrics of the subtask.
+        """
+        for name, value in metrics.iteritems():
+            self.metrics[name] = self.metrics.get(name, 0) + value
+
     def get_retry_count(self):
         """Returns the number of retries of any kind."""
         return self.retried_nomax + self.retried_withmax
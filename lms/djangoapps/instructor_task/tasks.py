@@ -173,6 +173,18 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_shard(entry_id, xmodule_instance_args, shard, subtask_status_dict):
+    """
+    Grade one shard of the learners in a course for a sharded grade report.
+
+    `shard` identifies the range of learners to grade, and `subtask_status_dict`
+    is the initial SubtaskStatus of this subtask.  Progress is recorded on the
+    parent InstructorTask, and the last shard to complete merges the report.
+    """
+    return CourseGradeReport.generate_shard(xmodule_instance_args, entry_id, shard, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
@@ -6,13 +6,16 @@ from time import time
 from django.contrib.auth.models import User
 from django.db.models import Q
 
-from certificates.api import generate_user_certificates
+from certificates.api import bulk_generate_user_certificates
 from certificates.models import CertificateStatuses, GeneratedCertificate
 from student.models import CourseEnrollment
 from xmodule.modulestore.django import modulestore
 
 from .runner import TaskProgress
 
+# How many students certificates are generated for at once.
+STUDENT_BATCH_SIZE = 100
+
 
 def generate_students_certificates(
         _xmodule_instance_args, _entry_id, course_id, task_input, action_name):
@@ -71,19 +74,22 @@ def generate_students_certificates(
     task_progress.update_task_state(extra_meta=current_step)
 
     course = modulestore().get_course(course_id, depth=0)
-    # Generate certificate for each student
-    for student in students_require_certs:
-        task_progress.attempted += 1
-        status = generate_user_certificates(
-            student,
+    # Generate certificates for the students, a batch at a time
+    students_require_certs = list(students_require_certs)
+    for start in xrange(0, len(students_require_certs), STUDENT_BATCH_SIZE):
+        students = students_require_certs[start:start + STUDENT_BATCH_SIZE]
+        statuses = bulk_generate_user_certificates(
+            students,
             course_id,
             course=course
         )
 
-        if CertificateStatuses.is_passing_status(status):
-            task_progress.succeeded += 1
-        else:
-            task_progress.failed += 1
+        for student in students:
+            task_progress.attempted += 1
+            if CertificateStatuses.is_passing_status(statuses[student.id]):
+                task_progress.succeeded += 1
+            else:
+                task_progress.failed += 1
 
     return task_progress.update_task_state(extra_meta=current_step)
 
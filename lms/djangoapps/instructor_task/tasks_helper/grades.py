@@ -1,20 +1,34 @@
 """
 Functionality for generating grade reports.
 """
+import json
 import logging
 import re
+import traceback
 from collections import OrderedDict
 from datetime import datetime
-from itertools import chain, izip, izip_longest
+from itertools import chain, count, izip, izip_longest
 from time import time
 
+from celery.states import FAILURE, SUCCESS
+from django.conf import settings
+from django.core.cache import cache
 from lazy import lazy
+from opaque_keys.edx.keys import UsageKey
 from pytz import UTC
 
 from certificates.models import CertificateWhitelist, GeneratedCertificate, certificate_info_for_user
 from courseware.courses import get_course_by_id
-from instructor_analytics.basic import list_problem_responses
-from instructor_analytics.csvs import format_dictlist
+from courseware.user_state_client import DjangoXBlockUserStateClient
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting
+from lms.djangoapps.instructor_task.exceptions import GradeReportShardsMissingError
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status
+)
 from lms.djangoapps.grades.context import grading_context, grading_context_for_course
 from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.new.course_grade_factory import CourseGradeFactory
@@ -26,11 +40,12 @@ from openedx.core.djangoapps.user_api.course_tag.api import BulkCourseTags
 from student.models import CourseEnrollment
 from student.roles import BulkRoleCache
 from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import report_store_rows_writer, upload_csv_to_report_store, upload_merged_csv_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -38,6 +53,11 @@ ENROLLED_IN_COURSE = 'enrolled'
 
 NOT_ENROLLED_IN_COURSE = 'unenrolled'
 
+# Once all shards of a sharded grade report are complete, only one of them
+# may merge the partial files.  The lock is kept after a merge so that
+# requeued shards cannot trigger a second one, and released if it fails.
+GRADE_REPORT_MERGE_LOCK_EXPIRE = 60 * 60 * 24
+
 
 def _user_enrollment_status(user, course_id):
     """
@@ -195,11 +215,61 @@ class CourseGradeReport(object):
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
         Public method to generate a grade report.
+
+        When the GradeReportSetting configuration is enabled, the learners
+        are split into shards of `batch_size` learners which are graded by
+        separate subtasks; see `generate_shard`.
         """
+        if _entry_id is not None:
+            grade_report_setting = GradeReportSetting.current()
+            if grade_report_setting.enabled:
+                context = _CourseGradeReportContext(
+                    _xmodule_instance_args, _entry_id, course_id, _task_input, action_name
+                )
+                return CourseGradeReport()._queue_shards(
+                    context, _xmodule_instance_args, _entry_id, grade_report_setting.batch_size
+                )
+
         with modulestore().bulk_operations(course_id):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
             return CourseGradeReport()._generate(context)
 
+    @classmethod
+    def generate_shard(cls, _xmodule_instance_args, entry_id, shard, subtask_status_dict):
+        """
+        Public method to generate one shard of a sharded grade report.
+
+        `shard` is a dict with the 'index' of the shard and the
+        'first_user_id' and 'last_user_id' bounding the learners it grades.
+        The shard's rows are streamed to partial files in the ReportStore.
+        Whichever shard completes last merges all partial files into the
+        final report, or marks the task failed if any shard failed.
+        """
+        subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+        current_task_id = subtask_status.task_id
+        check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+        entry = InstructorTask.objects.get(pk=entry_id)
+        action_name = json.loads(entry.task_output)['action_name']
+        context = _CourseGradeReportContext(
+            _xmodule_instance_args, entry_id, entry.course_id, json.loads(entry.task_input), action_name
+        )
+        try:
+            with modulestore().bulk_operations(entry.course_id):
+                num_succeeded, num_failed = CourseGradeReport()._generate_shard(context, entry, shard)
+        except Exception:
+            TASK_LOG.exception(u'%s, Grade report shard %s failed unexpectedly', context.task_info_string, shard)
+            subtask_status.increment(state=FAILURE)
+            update_subtask_status(entry_id, current_task_id, subtask_status)
+            # If this was the last shard, no other will mark the report failed.
+            CourseGradeReport()._merge_shards_if_complete(context, entry_id)
+            raise
+
+        subtask_status.increment(succeeded=num_succeeded, failed=num_failed, state=SUCCESS)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        CourseGradeReport()._merge_shards_if_complete(context, entry_id)
+        return subtask_status.to_dict()
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
@@ -217,6 +287,170 @@ class CourseGradeReport(object):
 
         return context.update_status(u'Completed grades')
 
+    def _queue_shards(self, context, xmodule_instance_args, entry_id, users_per_shard):
+        """
+        Internal method that queues one subtask per shard of learners for
+        the given context.  Shards cover contiguous ranges of user ids.
+        """
+        # The shard subtask is defined with the other instructor tasks,
+        # which import this module.
+        from lms.djangoapps.instructor_task.tasks import calculate_grades_csv_shard
+
+        entry = InstructorTask.objects.get(pk=entry_id)
+        if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+            # The parent task was requeued after its shards were queued.
+            TASK_LOG.warning(u'%s, Grade report shards have already been queued', context.task_info_string)
+            return json.loads(entry.task_output)
+
+        users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True).order_by('id')
+        total_num_users = users.count()
+        if total_num_users == 0:
+            # Subtasks cannot complete an empty set of items, so grade serially.
+            with modulestore().bulk_operations(context.course_id):
+                return self._generate(context)
+
+        shard_indices = count()
+
+        def _create_shard_subtask(user_items, initial_subtask_status):
+            """Creates a subtask to grade the given learners."""
+            user_ids = [user_item['pk'] for user_item in user_items]
+            shard = {
+                'index': next(shard_indices),
+                'first_user_id': min(user_ids),
+                'last_user_id': max(user_ids),
+            }
+            return calculate_grades_csv_shard.subtask(
+                (entry_id, xmodule_instance_args, shard, initial_subtask_status.to_dict()),
+                task_id=initial_subtask_status.task_id,
+                routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+            )
+
+        context.update_status(u'Queuing grade shards')
+        return queue_subtasks_for_query(
+            entry,
+            context.action_name,
+            _create_shard_subtask,
+            [users],
+            [],
+            users_per_shard,
+            total_num_users,
+        )
+
+    def _generate_shard(self, context, entry, shard):
+        """
+        Internal method that grades the learners in the given shard,
+        streaming the success and error rows into partial files.
+        Returns the number of succeeded and failed rows.
+        """
+        TASK_LOG.info(u'%s, Starting grade shard %s', context.task_info_string, shard)
+        num_succeeded, num_failed = 0, 0
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        success_filename = self._shard_filename(entry, 'grade_report', shard['index'])
+        error_filename = self._shard_filename(entry, 'grade_report_err', shard['index'])
+        with report_store.rows_writer(context.course_id, success_filename) as write_success_rows:
+            with report_store.rows_writer(context.course_id, error_filename) as write_error_rows:
+                for success_rows, error_rows in self._batched_rows(context, shard):
+                    write_success_rows(success_rows)
+                    write_error_rows(error_rows)
+                    num_succeeded += len(success_rows)
+                    num_failed += len(error_rows)
+        TASK_LOG.info(
+            u'%s, Completed grade shard %s: %s succeeded, %s failed',
+            context.task_info_string, shard, num_succeeded, num_failed,
+        )
+        return num_succeeded, num_failed
+
+    def _merge_shards_if_complete(self, context, entry_id):
+        """
+        Internal method that concatenates the partial files of all shards
+        into the final reports, once every shard has completed.
+        """
+        entry = InstructorTask.objects.get(pk=entry_id)
+        subtask_dict = json.loads(entry.subtasks)
+        if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+            return
+        lock_key = 'grade-report-merge-{}'.format(entry.task_id)
+        if not cache.add(lock_key, 'true', GRADE_REPORT_MERGE_LOCK_EXPIRE):
+            return
+
+        try:
+            self._merge_shards(context, entry, subtask_dict)
+        except Exception as exception:
+            # The task was marked SUCCESS when its last shard completed, but
+            # there is no report.
+            TASK_LOG.exception(u'%s, Merging grade shards failed', context.task_info_string)
+            entry.task_state = FAILURE
+            entry.task_output = InstructorTask.create_output_for_failure(exception, traceback.format_exc())
+            entry.save_now()
+            # Let the merge be retried, for instance by a requeued shard.
+            cache.delete(lock_key)
+            raise
+
+    def _merge_shards(self, context, entry, subtask_dict):
+        """
+        Internal method that concatenates the partial files of all shards
+        into the final reports, or marks the task as failed without
+        publishing any report if shards failed or their files are missing.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        shard_range = range(subtask_dict['total'])
+        success_filenames = [self._shard_filename(entry, 'grade_report', index) for index in shard_range]
+        error_filenames = [self._shard_filename(entry, 'grade_report_err', index) for index in shard_range]
+
+        missing_parts = [
+            filename for filename in success_filenames
+            if not report_store.exists(context.course_id, filename)
+        ]
+        if subtask_dict['failed'] or missing_parts:
+            # A partial report would silently lack the learners of those
+            # shards, so none is published.
+            error = GradeReportShardsMissingError(
+                u'{} of {} grade report shards failed; missing shard files: {}'.format(
+                    subtask_dict['failed'], subtask_dict['total'], missing_parts,
+                )
+            )
+            TASK_LOG.error(u'%s, %s', context.task_info_string, error.message)
+            for filename in success_filenames + error_filenames:
+                report_store.delete(context.course_id, filename)
+            entry.task_state = FAILURE
+            entry.task_output = InstructorTask.create_output_for_failure(error, None)
+            entry.save_now()
+            return
+
+        TASK_LOG.info(u'%s, Merging %s grade shards', context.task_info_string, subtask_dict['total'])
+        date = datetime.now(UTC)
+        upload_merged_csv_to_report_store(
+            [self._success_headers(context)],
+            success_filenames,
+            'grade_report',
+            context.course_id,
+            date,
+        )
+        if json.loads(entry.task_output)['failed'] > 0:
+            upload_merged_csv_to_report_store(
+                [self._error_headers()],
+                error_filenames,
+                'grade_report_err',
+                context.course_id,
+                date,
+            )
+        else:
+            for filename in error_filenames:
+                report_store.delete(context.course_id, filename)
+        TASK_LOG.info(u'%s, Merged grade shards', context.task_info_string)
+
+    def _shard_filename(self, entry, csv_name, shard_index):
+        """
+        Returns the ReportStore filename of a shard's partial file.  Partial
+        files live in a per-task directory so they are not listed as
+        downloadable reports.
+        """
+        return u'{task_id}/{csv_name}_{shard_index:05d}.csv'.format(
+            task_id=entry.task_id,
+            csv_name=csv_name,
+            shard_index=shard_index,
+        )
+
     def _success_headers(self, context):
         """
         Returns a list of all applicable column headers for this grade report.
@@ -238,11 +472,11 @@ class CourseGradeReport(object):
         """
         return ["Student ID", "Username", "Error"]
 
-    def _batched_rows(self, context):
+    def _batched_rows(self, context, shard=None):
         """
         A generator of batches of (success_rows, error_rows) for this report.
         """
-        for users in self._batch_users(context):
+        for users in self._batch_users(context, shard):
             users = filter(lambda u: u is not None, users)
             yield self._rows_for_users(context, users)
 
@@ -285,15 +519,18 @@ class CourseGradeReport(object):
             grades_header.append(assignment_info['average_header'])
         return grades_header
 
-    def _batch_users(self, context):
+    def _batch_users(self, context, shard=None):
         """
-        Returns a generator of batches of users.
+        Returns a generator of batches of users, limited to the users of
+        the given shard if one is specified.
         """
         def grouper(iterable, chunk_size=self.USER_BATCH_SIZE, fillvalue=None):
             args = [iter(iterable)] * chunk_size
             return izip_longest(*args, fillvalue=fillvalue)
 
         users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True)
+        if shard is not None:
+            users = users.filter(id__range=(shard['first_user_id'], shard['last_user_id'])).order_by('id')
         users = users.select_related('profile__allow_certificate')
         return grouper(users)
 
@@ -522,11 +759,73 @@ class ProblemGradeReport(object):
 
 
 class ProblemResponses(object):
+    """
+    Generates a CSV report of the responses of learners to a problem, or to
+    the blocks within a section, subsection, unit or the whole course.
+    """
+    @classmethod
+    def _get_usage_key(cls, course_key, problem_location):
+        """
+        Returns the usage key of the given problem_location.
+        """
+        usage_key = UsageKey.from_string(problem_location)
+        # Are we dealing with an "old-style" problem location?
+        if not usage_key.run:
+            usage_key = course_key.make_usage_key_from_deprecated_string(problem_location)
+        return usage_key
+
+    @classmethod
+    def _iter_block_keys(cls, usage_key, block_types):
+        """
+        Yields the keys of the given block and of its descendants, in course
+        order, that are of one of the given block types, or of any type if
+        none are given.
+        """
+        try:
+            stack = [modulestore().get_item(usage_key, depth=None)]
+        except ItemNotFoundError:
+            # The block may have been deleted since learners responded to it.
+            if not block_types or usage_key.block_type in block_types:
+                yield usage_key
+            return
+
+        while stack:
+            block = stack.pop()
+            if not block_types or block.location.block_type in block_types:
+                yield block.location
+            if block.has_children:
+                stack.extend(reversed(block.get_children()))
+
+    @classmethod
+    def _iter_user_states(cls, course_key, usage_key, block_types):
+        """
+        Yields the XBlockUserStates of all learners for the given block and
+        its descendants that are of one of the given block types, streaming
+        them from the database in batches.
+        """
+        if usage_key.course_key != course_key:
+            return
+
+        user_state_client = DjangoXBlockUserStateClient()
+        if usage_key.block_type == 'course':
+            for block_type in block_types or [None]:
+                for user_state in user_state_client.iter_all_for_course(course_key, block_type):
+                    yield user_state
+        else:
+            for block_key in cls._iter_block_keys(usage_key, block_types):
+                for user_state in user_state_client.iter_all_for_block(block_key):
+                    yield user_state
+
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, task_input, action_name):
         """
-        For a given `course_id`, generate a CSV file containing
-        all student answers to a given problem, and store using a `ReportStore`.
+        For a given `course_id`, generate a CSV file containing all student
+        answers to a given problem, or to the blocks within a given block,
+        optionally only those of the types in `problem_types_filter`, and
+        store using a `ReportStore`.
+
+        The rows are written to the report as they are read, so that the
+        report is generated in constant memory.
         """
         start_time = time()
         start_date = datetime.now(UTC)
@@ -535,23 +834,22 @@ class ProblemResponses(object):
         current_step = {'step': 'Calculating students answers to problem'}
         task_progress.update_task_state(extra_meta=current_step)
 
-        # Compute result table and format it
         problem_location = task_input.get('problem_location')
-        student_data = list_problem_responses(course_id, problem_location)
-        features = ['username', 'state']
-        header, rows = format_dictlist(student_data, features)
-
-        task_progress.attempted = task_progress.succeeded = len(rows)
-        task_progress.skipped = task_progress.total - task_progress.attempted
-
-        rows.insert(0, header)
-
-        current_step = {'step': 'Uploading CSV'}
-        task_progress.update_task_state(extra_meta=current_step)
+        usage_key = cls._get_usage_key(course_id, problem_location)
+        block_types = task_input.get('problem_types_filter')
 
-        # Perform the upload
         problem_location = re.sub(r'[:/]', '_', problem_location)
         csv_name = 'student_state_from_{}'.format(problem_location)
-        upload_csv_to_report_store(rows, csv_name, course_id, start_date)
+        num_rows = 0
+        with report_store_rows_writer(csv_name, course_id, start_date) as write_rows:
+            write_rows([['username', 'location', 'state']])
+            for user_state in cls._iter_user_states(course_id, usage_key, block_types):
+                write_rows([[user_state.username, unicode(user_state.block_key), json.dumps(user_state.state)]])
+                num_rows += 1
+
+            current_step = {'step': 'Uploading CSV'}
+            task_progress.attempted = task_progress.succeeded = num_rows
+            task_progress.skipped = task_progress.total - task_progress.attempted
+            task_progress.update_task_state(extra_meta=current_step)
 
         return task_progress.update_task_state(extra_meta=current_step)
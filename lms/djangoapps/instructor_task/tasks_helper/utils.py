@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+
 from eventtracking import tracker
 from lms.djangoapps.instructor_task.models import ReportStore
 from util.file import course_filename_prefix_generator
@@ -13,6 +15,18 @@ UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
 
+def report_filename(csv_name, course_id, timestamp):
+    """
+    Returns the name under which a CSV report called `csv_name` for the
+    given course and timestamp is stored in the ReportStore.
+    """
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+    )
+
+
 def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
     """
     Upload data as a CSV using ReportStore.
@@ -30,16 +44,56 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
     report_store = ReportStore.from_config(config_name)
     report_store.store_rows(
         course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
+        report_filename(csv_name, course_id, timestamp),
         rows
     )
     tracker_emit(csv_name)
 
 
+@contextmanager
+def report_store_rows_writer(csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
+    """
+    Context manager that yields a function accepting an iterable of CSV
+    rows, which are uploaded as a CSV using ReportStore on exit, so that a
+    report can be written batch by batch (see ReportStore.rows_writer).
+
+    Arguments:
+        csv_name: Name of the resulting CSV
+        course_id: ID of the course
+    """
+    report_store = ReportStore.from_config(config_name)
+    with report_store.rows_writer(course_id, report_filename(csv_name, course_id, timestamp)) as write_rows:
+        yield write_rows
+    tracker_emit(csv_name)
+
+
+def upload_merged_csv_to_report_store(header_rows, part_filenames, csv_name, course_id, timestamp,
+                                      config_name='GRADES_DOWNLOAD'):
+    """
+    Concatenate previously stored CSV parts into a single report using
+    ReportStore, then delete the parts.
+
+    Arguments:
+        header_rows: rows to write at the top of the resulting CSV
+        part_filenames: names of the header-less CSV parts, in order
+        csv_name: Name of the resulting CSV
+        course_id: ID of the course
+
+    Returns the list of part filenames that could not be found.
+    """
+    report_store = ReportStore.from_config(config_name)
+    missing_filenames = report_store.store_concatenated(
+        course_id,
+        report_filename(csv_name, course_id, timestamp),
+        header_rows,
+        part_filenames,
+    )
+    for part_filename in part_filenames:
+        report_store.delete(course_id, part_filename)
+    tracker_emit(csv_name)
+    return missing_filenames
+
+
 def tracker_emit(report_name):
     """
     Emits a 'report.requested' event for the given report.
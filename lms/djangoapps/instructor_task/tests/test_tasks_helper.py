@@ -8,11 +8,13 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 
 """
 
+import json
 import os
 import shutil
 import tempfile
 import urllib
 from datetime import datetime
+from uuid import uuid4
 
 import ddt
 import unicodecsv
@@ -29,10 +31,14 @@ from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.models import CertificateStatuses, GeneratedCertificate
 from certificates.tests.factories import CertificateWhitelistFactory, GeneratedCertificateFactory
 from course_modes.models import CourseMode
+from courseware.models import StudentModule
 from courseware.tests.factories import InstructorFactory
+from courseware.user_state_client import DjangoXBlockUserStateClient
 from instructor_analytics.basic import UNAVAILABLE
 from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting
+from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
     upload_enrollment_report,
@@ -42,6 +48,7 @@ from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
 )
 from lms.djangoapps.instructor_task.tasks_helper.grades import (
     ENROLLED_IN_COURSE,
+    GRADE_REPORT_MERGE_LOCK_EXPIRE,
     NOT_ENROLLED_IN_COURSE,
     CourseGradeReport,
     ProblemGradeReport,
@@ -57,6 +64,7 @@ from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskModuleTestCase,
     TestReportMixin
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.teams.tests.factories import CourseTeamFactory, CourseTeamMembershipFactory
 from lms.djangoapps.verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from openedx.core.djangoapps.course_groups.models import CohortMembership, CourseUserGroupPartitionGroup
@@ -460,30 +468,171 @@ class TestTeamGradeReport(InstructorGradeReportTestCase):
         self._verify_cell_data_for_user(self.student2.username, self.course.id, 'Team Name', team2.name)
 
 
+class TestShardedGradeReport(InstructorGradeReportTestCase):
+    """
+    Test that grade reports are split across subtasks when sharding is enabled.
+    """
+    def setUp(self):
+        super(TestShardedGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [self.create_student('student{}'.format(index)) for index in range(5)]
+        GradeReportSetting.objects.create(enabled=True, batch_size=2)
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_type='grade_course',
+            task_id=str(uuid4()),
+        )
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_sharded_report(self, _mock_current_task):
+        CourseGradeReport.generate({}, self.entry.id, self.course.id, {}, 'graded')
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, 'SUCCESS')
+        self.assertEqual(json.loads(entry.subtasks)['total'], 3)
+        self.assertDictContainsSubset(
+            {'attempted': 5, 'succeeded': 5, 'failed': 0, 'total': 5}, json.loads(entry.task_output)
+        )
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        self.assertIn('grade_report', links[0][0])
+        with report_store.storage.open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            usernames = [row['Username'] for row in unicodecsv.DictReader(csv_file)]
+        self.assertEqual(usernames, [student.username for student in self.students])
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_failed_shard(self, _mock_current_task):
+        generate_shard = CourseGradeReport._generate_shard
+
+        def _fail_second_shard(report, context, entry, shard):
+            """
+            Fails the second shard and generates the others.
+            """
+            if shard['index'] == 1:
+                raise Exception('Shard failed')
+            return generate_shard(report, context, entry, shard)
+
+        with patch.object(CourseGradeReport, '_generate_shard', autospec=True, side_effect=_fail_second_shard):
+            CourseGradeReport.generate({}, self.entry.id, self.course.id, {}, 'graded')
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, 'FAILURE')
+        self.assertEqual(json.loads(entry.task_output)['exception'], 'GradeReportShardsMissingError')
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(report_store.links_for(self.course.id), [])
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    @patch('lms.djangoapps.instructor_task.tasks_helper.grades.upload_merged_csv_to_report_store')
+    @patch('lms.djangoapps.instructor_task.tasks_helper.grades.cache')
+    def test_merge_error(self, mock_cache, mock_upload, _mock_current_task):
+        mock_cache.add.return_value = True
+        mock_upload.side_effect = IOError('Storage unavailable')
+        CourseGradeReport.generate({}, self.entry.id, self.course.id, {}, 'graded')
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, 'FAILURE')
+        self.assertEqual(json.loads(entry.task_output)['exception'], 'IOError')
+
+        lock_key = 'grade-report-merge-{}'.format(self.entry.task_id)
+        mock_cache.add.assert_called_once_with(lock_key, 'true', GRADE_REPORT_MERGE_LOCK_EXPIRE)
+        mock_cache.delete.assert_called_once_with(lock_key)
+
+
+@ddt.ddt
 class TestProblemResponsesReport(TestReportMixin, InstructorTaskCourseTestCase):
     """
     Tests that generation of CSV files listing student answers to a
-    given problem works.
+    given problem, or to the blocks within a given block, works.
     """
     def setUp(self):
         super(TestProblemResponsesReport, self).setUp()
-        self.course = CourseFactory.create()
+        self.initialize_course()
+        self.problem = ItemFactory.create(parent_location=self.problem_section.location, category='problem')
+        self.html = ItemFactory.create(parent_location=self.problem_section.location, category='html')
+        self.students = [self.create_student(u'student{}'.format(index)) for index in range(3)]
+        for index, student in enumerate(self.students):
+            StudentModule.objects.create(
+                student=student,
+                course_id=self.course.id,
+                module_state_key=self.problem.location,
+                module_type='problem',
+                state=json.dumps({'attempts': index}),
+            )
+        StudentModule.objects.create(
+            student=self.students[0],
+            course_id=self.course.id,
+            module_state_key=self.html.location,
+            module_type='html',
+            state=json.dumps({'seen': True}),
+        )
+        # Learners who never interacted with a block, and deleted state, are not reported.
+        StudentModule.objects.create(
+            student=self.students[1],
+            course_id=self.course.id,
+            module_state_key=self.html.location,
+            module_type='html',
+            state='{}',
+        )
 
-    def test_success(self):
-        task_input = {'problem_location': ''}
+    def _generate(self, location, problem_types_filter=None):
+        """
+        Generates the report of the responses to the blocks at location,
+        and returns the result of the task.
+        """
+        task_input = {'problem_location': unicode(location)}
+        if problem_types_filter:
+            task_input['problem_types_filter'] = problem_types_filter
         with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
-            with patch('lms.djangoapps.instructor_task.tasks_helper.grades.list_problem_responses') as patched_data_source:
-                patched_data_source.return_value = [
-                    {'username': 'user0', 'state': u'state0'},
-                    {'username': 'user1', 'state': u'state1'},
-                    {'username': 'user2', 'state': u'state2'},
-                ]
-                result = ProblemResponses.generate(None, None, self.course.id, task_input, 'calculated')
-        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
-        links = report_store.links_for(self.course.id)
+            return ProblemResponses.generate(None, None, self.course.id, task_input, 'calculated')
 
-        self.assertEquals(len(links), 1)
+    def _problem_rows(self):
+        """
+        Returns the rows expected for the responses to the problem.
+        """
+        return [
+            {
+                'username': student.username,
+                'location': unicode(self.problem.location),
+                'state': json.dumps({'attempts': index}),
+            }
+            for index, student in enumerate(self.students)
+        ]
+
+    def test_problem(self):
+        result = self._generate(self.problem.location)
         self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, result)
+        self.verify_rows_in_csv(self._problem_rows(), verify_order=False)
+
+    def test_subsection(self):
+        result = self._generate(self.problem_section.location)
+        self.assertDictContainsSubset({'attempted': 4, 'succeeded': 4, 'failed': 0}, result)
+        html_row = {
+            'username': self.students[0].username,
+            'location': unicode(self.html.location),
+            'state': json.dumps({'seen': True}),
+        }
+        self.verify_rows_in_csv(self._problem_rows() + [html_row], verify_order=False)
+
+    @ddt.data(
+        lambda self: self.course.location,
+        lambda self: self.chapter.location,
+    )
+    def test_problem_types_filter(self, get_location):
+        result = self._generate(get_location(self), problem_types_filter=['problem'])
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, result)
+        self.verify_rows_in_csv(self._problem_rows(), verify_order=False)
+
+    def test_batches(self):
+        with patch.object(DjangoXBlockUserStateClient, 'ITER_BATCH_SIZE', 2):
+            result = self._generate(self.course.location)
+        self.assertDictContainsSubset({'attempted': 4, 'succeeded': 4, 'failed': 0}, result)
+
+    def test_other_course(self):
+        other_course = CourseFactory.create()
+        result = self._generate(other_course.location)
+        self.assertDictContainsSubset({'attempted': 0, 'succeeded': 0, 'failed': 0}, result)
 
 
 @ddt.ddt
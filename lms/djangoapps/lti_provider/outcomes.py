@@ -4,18 +4,30 @@ in LTI v1.1.
 """
 
 import logging
+import os
+import threading
+import time
 import uuid
+from multiprocessing.pool import ThreadPool
 
 import requests
 import requests_oauthlib
+from django.conf import settings
 from lxml import etree
 from lxml.builder import ElementMaker
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 from requests.exceptions import RequestException
 
 from lti_provider.models import GradedAssignment, OutcomeService
 
 log = logging.getLogger("edx.lti_provider")
 
+# The session that outcomes are sent over, so that the connections to the LTI
+# consumers are reused, and the id of the process it was created in.
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
 
 def store_outcome_parameters(request_params, user, lti_consumer):
     """
@@ -123,17 +135,28 @@ def send_score_update(assignment, score):
     """
     Create and send the XML message to the campus LMS system to update the grade
     for a single graded assignment.
+
+    Sending the message is retried up to LTI_OUTCOME_SEND_RETRIES times if the
+    LTI consumer cannot be reached or fails with a server error, waiting
+    LTI_OUTCOME_SEND_BACKOFF seconds before the first retry and twice as long
+    before each of the next ones. Replacing a result is idempotent, so a
+    message that is sent twice does no harm.
     """
     xml = generate_replace_result_xml(
         assignment.lis_result_sourcedid, score
     )
-    try:
-        response = sign_and_send_replace_result(assignment, xml)
-    except RequestException:
-        # failed to send result. 'response' is None, so more detail will be
-        # logged at the end of the method.
-        response = None
-        log.exception("Outcome Service: Error when sending result.")
+    for attempt in xrange(settings.LTI_OUTCOME_SEND_RETRIES + 1):
+        if attempt:
+            time.sleep(settings.LTI_OUTCOME_SEND_BACKOFF * 2 ** (attempt - 1))
+        try:
+            response = sign_and_send_replace_result(assignment, xml)
+        except RequestException:
+            # failed to send result. 'response' is None, so more detail will be
+            # logged at the end of the method.
+            response = None
+            log.exception("Outcome Service: Error when sending result.")
+        if response is not None and response.status_code < 500:
+            break
 
     # If something went wrong, make sure that we have a complete log record.
     # That way we can manually fix things up on the campus system later if
@@ -151,6 +174,37 @@ def send_score_update(assignment, score):
         )
 
 
+def send_score_updates(assignments_and_scores):
+    """
+    Send the score updates of a list of (GradedAssignment, score) pairs, up to
+    LTI_OUTCOME_SEND_CONCURRENCY at a time.
+
+    The messages are sent from other threads, so the outcome services, LTI
+    consumers and users of the assignments should be fetched beforehand, with
+    select_related, so that the threads don't query the database.
+    """
+    concurrency = min(settings.LTI_OUTCOME_SEND_CONCURRENCY, len(assignments_and_scores))
+    if concurrency <= 1:
+        for assignment, score in assignments_and_scores:
+            send_score_update(assignment, score)
+        return
+
+    pool = ThreadPool(concurrency)
+    try:
+        pool.map(_send_score_update, assignments_and_scores)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _send_score_update(assignment_and_score):
+    """
+    Send the score update of a (GradedAssignment, score) pair.
+    """
+    assignment, score = assignment_and_score
+    send_score_update(assignment, score)
+
+
 def sign_and_send_replace_result(assignment, xml):
     """
     Take the XML document generated in generate_replace_result_xml, and sign it
@@ -171,7 +225,7 @@ def sign_and_send_replace_result(assignment, xml):
     )
 
     headers = {'content-type': 'application/xml'}
-    response = requests.post(
+    response = _get_session().post(
         assignment.outcome_service.lis_outcome_service_url,
         data=xml,
         auth=oauth,
@@ -181,6 +235,27 @@ def sign_and_send_replace_result(assignment, xml):
     return response
 
 
+def _get_session():
+    """
+    Return the session that outcomes are sent over in the current process,
+    with a connection pool large enough for LTI_OUTCOME_SEND_CONCURRENCY
+    messages to be sent to the same LTI consumer at once.
+    """
+    global _session, _session_pid  # pylint: disable=global-statement
+    if _session_pid != os.getpid():
+        with _session_lock:
+            if _session_pid != os.getpid():
+                # The connections of a parent process are not usable after
+                # a fork.
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=max(settings.LTI_OUTCOME_SEND_CONCURRENCY, DEFAULT_POOLSIZE))
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+                _session_pid = os.getpid()
+    return _session
+
+
 def check_replace_result_response(response):
     """
     Parse the response sent by the LTI consumer after an score update message
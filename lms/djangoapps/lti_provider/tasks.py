@@ -35,16 +35,19 @@ def score_changed_handler(sender, **kwargs):  # pylint: disable=unused-argument
     if None not in (points_earned, points_possible, user_id, course_id):
         course_key, usage_key = parse_course_and_usage_keys(course_id, usage_id)
         assignments = increment_assignment_versions(course_key, usage_key, user_id)
+        composite_assignment_versions = []
         for assignment in assignments:
             if assignment.usage_key == usage_key:
                 send_leaf_outcome.delay(
                     assignment.id, points_earned, points_possible
                 )
             else:
-                send_composite_outcome.apply_async(
-                    (user_id, course_id, assignment.id, assignment.version_number),
-                    countdown=settings.LTI_AGGREGATE_SCORE_PASSBACK_DELAY
-                )
+                composite_assignment_versions.append((assignment.id, assignment.version_number))
+        if composite_assignment_versions:
+            send_composite_outcomes.apply_async(
+                (user_id, course_id, composite_assignment_versions),
+                countdown=settings.LTI_AGGREGATE_SCORE_PASSBACK_DELAY
+            )
     else:
         log.error(
             "Outcome Service: Required signal parameter is None. "
@@ -99,27 +102,73 @@ def send_composite_outcome(user_id, course_id, assignment_id, version):
     scores for a single assignment, and may potentially update the campus LMS
     in the wrong order.
     """
-    assignment = GradedAssignment.objects.get(id=assignment_id)
-    if version != assignment.version_number:
-        log.info(
-            "Score passback for GradedAssignment %s skipped. More recent score available.",
-            assignment.id
-        )
+    _send_composite_outcomes(user_id, course_id, [(assignment_id, version)])
+
+
+@CELERY_APP.task(name='lti_provider.tasks.send_composite_outcomes')
+def send_composite_outcomes(user_id, course_id, assignment_versions):
+    """
+    Calculate and transmit the scores of the composite modules of several
+    graded assignments of a user in a course, given as a list of
+    (assignment id, version) pairs.
+
+    This works as send_composite_outcome does for each of the assignments,
+    but the course grade is only calculated once for all of them, and their
+    scores are sent at the same time. A score change schedules a single task
+    for all of the composite assignments that it affects, and the version
+    numbers collapse the score changes of each assignment within the
+    LTI_AGGREGATE_SCORE_PASSBACK_DELAY into the last one.
+    """
+    _send_composite_outcomes(user_id, course_id, assignment_versions)
+
+
+def _send_composite_outcomes(user_id, course_id, assignment_versions):
+    """
+    Calculate and transmit the scores of the given graded assignments of the
+    user that are still at the given versions.
+    """
+    assignments = _get_current_assignments(assignment_versions)
+    if not assignments:
         return
     course_key = CourseKey.from_string(course_id)
-    mapped_usage_key = assignment.usage_key.map_into_course(course_key)
     user = User.objects.get(id=user_id)
     course = modulestore().get_course(course_key, depth=0)
     course_grade = CourseGradeFactory().create(user, course)
-    earned, possible = course_grade.score_for_module(mapped_usage_key)
-    if possible == 0:
-        weighted_score = 0
-    else:
-        weighted_score = float(earned) / float(possible)
 
-    assignment = GradedAssignment.objects.get(id=assignment_id)
-    if assignment.version_number == version:
-        outcomes.send_score_update(assignment, weighted_score)
+    weighted_scores = {}
+    for assignment in assignments:
+        mapped_usage_key = assignment.usage_key.map_into_course(course_key)
+        earned, possible = course_grade.score_for_module(mapped_usage_key)
+        if possible == 0:
+            weighted_scores[assignment.id] = 0
+        else:
+            weighted_scores[assignment.id] = float(earned) / float(possible)
+
+    outcomes.send_score_updates([
+        (assignment, weighted_scores[assignment.id])
+        for assignment in _get_current_assignments(assignment_versions)
+    ])
+
+
+def _get_current_assignments(assignment_versions):
+    """
+    Return the graded assignments of a list of (assignment id, version) pairs
+    that are still at the given versions, with the outcome services, LTI
+    consumers and users that their scores are sent with.
+    """
+    versions = dict(assignment_versions)
+    assignments = []
+    for assignment in GradedAssignment.objects.filter(id__in=versions).select_related(
+            'user', 'outcome_service__lti_consumer'
+    ):
+        if assignment.version_number == versions[assignment.id]:
+            assignments.append(assignment)
+        else:
+            log.info(
+                "Score passback for GradedAssignment %s skipped. More recent score available.",
+                assignment.id
+            )
+    return assignments
 
 
 @CELERY_APP.task
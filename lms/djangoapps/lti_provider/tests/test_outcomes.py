@@ -6,6 +6,7 @@ import unittest
 import requests
 import requests_oauthlib
 from django.test import TestCase
+from django.test.utils import override_settings
 from lxml import etree
 from mock import ANY, MagicMock, patch
 from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
@@ -169,7 +170,7 @@ class SignAndSendReplaceResultTest(TestCase):
         )
         self.assignment.save()
 
-    @patch('requests.post', return_value='response')
+    @patch('requests.Session.post', return_value='response')
     def test_sign_and_send_replace_result(self, post_mock):
         response = outcomes.sign_and_send_replace_result(self.assignment, 'xml')
         post_mock.assert_called_with(
@@ -181,6 +182,51 @@ class SignAndSendReplaceResultTest(TestCase):
         self.assertEqual(response, 'response')
 
 
+@override_settings(LTI_OUTCOME_SEND_RETRIES=2, LTI_OUTCOME_SEND_BACKOFF=1)
+@patch('time.sleep')
+class SendScoreUpdateTest(TestCase):
+    """
+    Tests for the retries of the send_score_update method in outcomes.py
+    """
+    def setUp(self):
+        super(SendScoreUpdateTest, self).setUp()
+        self.assignment = MagicMock(lis_result_sourcedid='sourcedid')
+
+    def _response(self, status_code):
+        """
+        Returns a mock response with the given status code.
+        """
+        return MagicMock(status_code=status_code)
+
+    def test_no_retry_on_success(self, sleep_mock):
+        with patch('lti_provider.outcomes.sign_and_send_replace_result') as send_mock:
+            send_mock.return_value = self._response(200)
+            outcomes.send_score_update(self.assignment, 0.5)
+        self.assertEqual(send_mock.call_count, 1)
+        self.assertFalse(sleep_mock.called)
+
+    def test_no_retry_on_client_error(self, sleep_mock):
+        with patch('lti_provider.outcomes.sign_and_send_replace_result') as send_mock:
+            send_mock.return_value = self._response(400)
+            outcomes.send_score_update(self.assignment, 0.5)
+        self.assertEqual(send_mock.call_count, 1)
+        self.assertFalse(sleep_mock.called)
+
+    def test_retry_with_backoff(self, sleep_mock):
+        with patch('lti_provider.outcomes.sign_and_send_replace_result') as send_mock:
+            send_mock.side_effect = [requests.exceptions.ConnectionError(), self._response(503), self._response(200)]
+            outcomes.send_score_update(self.assignment, 0.5)
+        self.assertEqual(send_mock.call_count, 3)
+        self.assertEqual([args[0] for args, __ in sleep_mock.call_args_list], [1, 2])
+
+    def test_retries_exhausted(self, sleep_mock):
+        with patch('lti_provider.outcomes.sign_and_send_replace_result') as send_mock:
+            send_mock.return_value = self._response(500)
+            outcomes.send_score_update(self.assignment, 0.5)
+        self.assertEqual(send_mock.call_count, 3)
+        self.assertEqual(sleep_mock.call_count, 2)
+
+
 class XmlHandlingTest(TestCase):
     """
     Tests for the generate_replace_result_xml and check_replace_result_response
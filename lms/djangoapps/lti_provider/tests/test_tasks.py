@@ -130,3 +130,84 @@ class SendCompositeOutcomeTest(BaseOutcomeTest):
             self.user.id, unicode(self.course_key), self.assignment.id, 1
         )
         self.assertEqual(self.course_grade_mock.call_count, 0)
+
+    def test_outcomes_with_one_course_grade(self):
+        vertical_assignment = GradedAssignment.objects.create(
+            user=self.user,
+            course_key=self.course_key,
+            usage_key=BlockUsageLocator(course_key=self.course_key, block_type='vertical', block_id='vertical'),
+            outcome_service=self.assignment.outcome_service,
+            lis_result_sourcedid='vertical_sourcedid',
+            version_number=3,
+        )
+        self.course_grade.score_for_module = MagicMock(return_value=(1, 2))
+        tasks.send_composite_outcomes(
+            self.user.id, unicode(self.course_key), [(self.assignment.id, 1), (vertical_assignment.id, 3)]
+        )
+        self.assertEqual(self.course_grade_mock.call_count, 1)
+        self.assertItemsEqual(
+            self.send_score_update_mock.call_args_list,
+            [((self.assignment, 0.5),), ((vertical_assignment, 0.5),)]
+        )
+
+    def test_outcomes_with_deleted_assignment(self):
+        self.course_grade.score_for_module = MagicMock(return_value=(1, 2))
+        tasks.send_composite_outcomes(
+            self.user.id, unicode(self.course_key), [(self.assignment.id, 1), (self.assignment.id + 1, 1)]
+        )
+        self.send_score_update_mock.assert_called_once_with(self.assignment, 0.5)
+
+    def test_outcomes_with_outdated_versions(self):
+        tasks.send_composite_outcomes(
+            self.user.id, unicode(self.course_key), [(self.assignment.id, 0)]
+        )
+        self.assertEqual(self.course_grade_mock.call_count, 0)
+        self.assertEqual(self.send_score_update_mock.call_count, 0)
+
+
+class ScoreChangedHandlerTest(BaseOutcomeTest):
+    """
+    Tests for the score_changed_handler method in tasks.py
+    """
+    def setUp(self):
+        super(ScoreChangedHandlerTest, self).setUp()
+        self.vertical_assignment = GradedAssignment.objects.create(
+            user=self.user,
+            course_key=self.course_key,
+            usage_key=BlockUsageLocator(course_key=self.course_key, block_type='vertical', block_id='vertical'),
+            outcome_service=self.assignment.outcome_service,
+            lis_result_sourcedid='vertical_sourcedid',
+            version_number=1,
+        )
+        self.sequential_assignment = GradedAssignment.objects.create(
+            user=self.user,
+            course_key=self.course_key,
+            usage_key=BlockUsageLocator(course_key=self.course_key, block_type='sequential', block_id='sequential'),
+            outcome_service=self.assignment.outcome_service,
+            lis_result_sourcedid='sequential_sourcedid',
+            version_number=5,
+        )
+        self.setup_patch(
+            'lti_provider.tasks.increment_assignment_versions',
+            [self.assignment, self.vertical_assignment, self.sequential_assignment]
+        )
+        self.leaf_task_mock = self.setup_patch('lti_provider.tasks.send_leaf_outcome.delay', None)
+        self.composite_task_mock = self.setup_patch('lti_provider.tasks.send_composite_outcomes.apply_async', None)
+
+    def test_one_composite_task(self):
+        tasks.score_changed_handler(
+            None,
+            weighted_possible=2,
+            weighted_earned=1,
+            user_id=self.user.id,
+            course_id=unicode(self.course_key),
+            usage_id=unicode(self.usage_key),
+        )
+        self.leaf_task_mock.assert_called_once_with(self.assignment.id, 1, 2)
+        self.assertEqual(self.composite_task_mock.call_count, 1)
+        (user_id, course_id, assignment_versions), = self.composite_task_mock.call_args[0]
+        self.assertEqual((user_id, course_id), (self.user.id, unicode(self.course_key)))
+        self.assertItemsEqual(
+            assignment_versions,
+            [(self.vertical_assignment.id, 1), (self.sequential_assignment.id, 5)]
+        )
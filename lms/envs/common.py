@@ -57,6 +57,12 @@ DISCUSSION_SETTINGS = {
     'MAX_COMMENT_DEPTH': 2,
 }
 
+# The pool of keep-alive connections to the comments service, see lms.lib.comment_client.utils.
+COMMENTS_SERVICE_HTTP_POOL = {
+    'POOL_SIZE': 10,
+    'MAX_RETRIES': 0,
+}
+
 LMS_ROOT_URL = "http://localhost:8000"
 
 # Features
@@ -839,6 +845,17 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Optional pool of persistent sandboxed Python interpreters, with the
+    # standard sandbox packages already imported.
+    'pool': {
+        # How many interpreters to keep running in each process?  0 disables the pool.
+        'size': 0,
+        # After how many executions is an interpreter replaced?
+        'max_runs': 100,
+        # Above how many bytes of resident memory is an interpreter replaced?
+        'max_memory': 512 * 1024 * 1024,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1241,6 +1258,9 @@ MIDDLEWARE_CLASSES = (
     # to redirected unenrolled students to the course info page
     'courseware.middleware.RedirectMiddleware',
 
+    # Buffers the XBlock user state written during a request.
+    'courseware.middleware.UserStateWriteBehindMiddleware',
+
     'course_wiki.middleware.WikiAccessMiddleware',
 
     'openedx.core.djangoapps.theming.middleware.CurrentSiteThemeMiddleware',
@@ -1890,6 +1910,26 @@ BLOCK_STRUCTURES_SETTINGS = dict(
     # DIRECTORY_PREFIX='/modeltest/',
 )
 
+# Settings for the per-process cache of transformed course block
+# structures, enabled with the course_blocks.cache_transformed_structures
+# waffle switch.
+COURSE_BLOCKS_TRANSFORMED_CACHE = dict(
+    # Maximum number of transformed block structures cached per process.
+    MAX_SIZE=200,
+
+    # Maximum time, in seconds, for which a cached transformed block
+    # structure is used before start and due dates are reevaluated.
+    TIME_BUCKET_SECONDS=300,
+)
+
+# Settings for the per-process cache of the blocks and fields that courseware
+# pages prefetch user data for, enabled with the courseware.cache_prefetch_plans
+# waffle switch.
+COURSEWARE_PREFETCH_PLAN_CACHE = dict(
+    # Maximum number of prefetch plans cached per process.
+    MAX_SIZE=500,
+)
+
 ################################ Bulk Email ###################################
 
 # Suffix used to construct 'from' email address for bulk emails.
@@ -1934,6 +1974,12 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# How many open connections to the email backend each worker process keeps
+# between bulk email subtasks, to reuse rather than connecting for every
+# subtask, and how long in seconds a connection can be idle and still be reused.
+BULK_EMAIL_CONNECTION_POOL_SIZE = 0
+BULK_EMAIL_CONNECTION_MAX_IDLE = 30
+
 ############################# Persistent Grades ####################################
 
 # Queue to use for updating persistent grades
@@ -2158,7 +2204,7 @@ INSTALLED_APPS = (
     'openedx.core.djangoapps.content.course_overviews',
     'openedx.core.djangoapps.content.course_structures.apps.CourseStructuresConfig',
     'openedx.core.djangoapps.content.block_structure.apps.BlockStructureConfig',
-    'lms.djangoapps.course_blocks',
+    'lms.djangoapps.course_blocks.apps.CourseBlocksConfig',
 
     # Coursegraph
     'openedx.core.djangoapps.coursegraph.apps.CoursegraphConfig',
@@ -3039,6 +3085,14 @@ LTI_USER_EMAIL_DOMAIN = 'lti.example.com'
 # The time value is in seconds.
 LTI_AGGREGATE_SCORE_PASSBACK_DELAY = 15 * 60
 
+# How many scores a task sends to the LTI consumers at once, how many times
+# sending a score is retried when the consumer cannot be reached or fails with
+# a server error, and how long to wait before the first retry, in seconds. The
+# wait doubles with each retry.
+LTI_OUTCOME_SEND_CONCURRENCY = 4
+LTI_OUTCOME_SEND_RETRIES = 2
+LTI_OUTCOME_SEND_BACKOFF = 1
+
 
 # For help generating a key pair import and run `openedx.core.lib.rsa_key_utils.generate_rsa_key_pair()`
 JWT_PRIVATE_SIGNING_KEY = None
@@ -3122,6 +3176,10 @@ STUDENTMODULEHISTORYEXTENDED_OFFSET = 10000
 
 AUDIT_CERT_CUTOFF_DATE = None
 
+# How many certificate generation tasks are sent to the XQueue at once when
+# certificates are generated for many learners.
+CERTIFICATE_GENERATION_XQUEUE_CONCURRENCY = 4
+
 ################################ Settings for Credentials Service ################################
 
 CREDENTIALS_SERVICE_USERNAME = 'credentials_service_user'
@@ -1,17 +1,77 @@
 """" Common utilities for comment client wrapper """
 import logging
+import os
+import sys
+import threading
 from contextlib import contextmanager
+from cookielib import DefaultCookiePolicy
 from time import time
 from uuid import uuid4
 
 import requests
+import six
 from django.conf import settings
+from django.db import connections
+from django.utils import translation
 from django.utils.translation import get_language
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
 
 import dogstats_wrapper as dog_stats_api
 
 log = logging.getLogger(__name__)
 
+# The default settings of the connection pool, see COMMENTS_SERVICE_HTTP_POOL.
+DEFAULT_HTTP_POOL_SETTINGS = {
+    # The largest number of connections kept alive to the comments service.
+    'POOL_SIZE': 10,
+    # How many times to retry failing to connect to the comments service.
+    'MAX_RETRIES': 0,
+}
+
+
+class ForumsSession(requests.Session):
+    """
+    The requests Session that keeps the connections of the process to the
+    comments service alive, in a pool configured by the
+    COMMENTS_SERVICE_HTTP_POOL setting.
+
+    The pool is created on the first request in each process, since the
+    connections of a parent process cannot be shared after a fork.  Cookies
+    are never stored, so that nothing is shared between the requests of
+    different users.
+    """
+    def __init__(self):
+        super(ForumsSession, self).__init__()
+        self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def request(self, method, url, **kwargs):  # pylint: disable=arguments-differ
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._mount_adapters()
+        return super(ForumsSession, self).request(method, url, **kwargs)
+
+    def _mount_adapters(self):
+        """
+        Mounts new pooled adapters for http and https URLs.
+        """
+        pool_settings = dict(DEFAULT_HTTP_POOL_SETTINGS, **getattr(settings, 'COMMENTS_SERVICE_HTTP_POOL', {}))
+        for prefix in ('http://', 'https://'):
+            self.mount(prefix, HTTPAdapter(
+                pool_maxsize=pool_settings['POOL_SIZE'],
+                max_retries=Retry(total=pool_settings['MAX_RETRIES'], read=False),
+            ))
+        self._pid = os.getpid()
+
+
+SESSION = ForumsSession()
+
+# The forums configuration of the threads started by perform_concurrently.
+_thread_context = threading.local()
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -53,11 +113,70 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+def _get_forums_config():
+    """
+    Returns the current ForumsConfig.
+    """
+    config = getattr(_thread_context, 'config', None)
+    if config is None:
+        # To avoid dependency conflict
+        from django_comment_common.models import ForumsConfig
+        config = ForumsConfig.current()
+    return config
+
+
+def perform_concurrently(*functions):
+    """
+    Calls the given functions, which make independent requests to the
+    comments service, each in its own thread, and returns their results in
+    order.  If any of them raises an exception, the exception of the first
+    one is raised once all of them are done.
+
+    The functions must not do anything but requests to the comments service
+    (through perform_request), which are made with the forums configuration
+    and language of the calling thread.
+    """
+    config = _get_forums_config()
+    language = get_language()
+    results = [None] * len(functions)
+    errors = [None] * len(functions)
+
+    def call(index, function):
+        """
+        Calls the function in the current thread.
+        """
+        _thread_context.config = config
+        if language:
+            translation.activate(language)
+        try:
+            results[index] = function()
+        except Exception:  # pylint: disable=broad-except
+            errors[index] = sys.exc_info()
+        finally:
+            _thread_context.config = None
+            translation.deactivate()
+            # Close any database connection that the thread opened.
+            for connection in connections.all():
+                connection.close()
+
+    threads = [
+        threading.Thread(target=call, args=(index, function), name='perform_concurrently')
+        for index, function in enumerate(functions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for error in errors:
+        if error is not None:
+            six.reraise(*error)
+    return results
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
                     metric_action=None, metric_tags=None, paged_results=False):
-    # To avoid dependency conflict
-    from django_comment_common.models import ForumsConfig
-    config = ForumsConfig.current()
+    config = _get_forums_config()
 
     if not config.enabled:
         raise CommentClientMaintenanceError('service disabled')
@@ -85,7 +204,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = SESSION.request(
             method,
             url,
             data=data,
@@ -19,6 +19,7 @@ from openedx.core.djangoapps.monkey_patch import django_db_models_options
 
 import xmodule.x_module
 import lms_xblock.runtime
+from capa.safe_exec import configure_sandbox_pool
 
 from startup_configurations.validate_config import validate_lms_config
 from openedx.core.djangoapps.theming.core import enable_theming
@@ -89,6 +90,9 @@ def run():
     # validate configurations on startup
     validate_lms_config(settings)
 
+    # Configure the optional pool of sandboxed interpreters used by capa.
+    configure_sandbox_pool(**settings.CODE_JAIL.get('pool', {}))
+
 
 def add_mimetypes():
     """
@@ -0,0 +1,902 @@
+"""
+Module for a compact in-memory representation of block structures.
+
+CompactBlockStructureBlockData provides the same interface as
+BlockStructureBlockData, but rather than keeping Python objects for each
+block's relations and data, it stores:
+
+    * Each block's usage key once, in a list indexed by the block's integer
+      index.
+    * Parent and child relations as CSR-style integer arrays: the relations
+      of block i are the entries between offsets[i] and offsets[i + 1].
+      Relations that are changed after creation are kept in small per-block
+      override lists instead.
+    * Collected xBlock fields as one column per field name, and transformer
+      block data as one set of columns per transformer, where each column is
+      a list indexed by block index.
+
+Traversals run over the block indices and return usage keys only when they
+are yielded.  BlockData and TransformerData objects are replaced with
+lightweight views over the columns, which are created on access.
+"""
+# pylint: disable=protected-access
+from array import array
+from copy import deepcopy
+from itertools import izip
+
+from .block_structure import BlockStructureBlockData, TransformerDataMap
+
+
+# Typecode of the integer arrays used for block indices.
+_INDEX_TYPECODE = 'i'
+
+# Traversal states of a block.
+_UNVISITED = 0
+_VISITED = 1
+_YIELDED = 2
+
+
+class _Missing(object):
+    """
+    Type of the value stored in a column for blocks without a value.  Its
+    single instance is kept across copies and pickling.
+    """
+    def __repr__(self):
+        return '_MISSING'
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return '_MISSING'
+
+_MISSING = _Missing()
+
+
+def _transformer_name(key):
+    """
+    Returns the name of the given transformer class, or the given key if
+    it is already a transformer name.
+    """
+    try:
+        return key.name()
+    except AttributeError:
+        return key
+
+
+class _FieldColumns(object):
+    """
+    A set of per-field columns, each being a list of values indexed by
+    block index.
+
+    Columns can be given in their serialized form, in which case they are
+    only loaded when first accessed.
+    """
+    def __init__(self, serialized_columns=None, load_column=None, cleared_indices=None):
+        # dict {field name: list [value or _MISSING]}
+        self._columns = {}
+
+        # dict {field name: serialized column}, with columns that have not
+        # been loaded yet.
+        self._serialized_columns = dict(serialized_columns or {})
+
+        # Function that returns a dict {block index: value} for a
+        # serialized column.
+        self._load_column = load_column
+
+        # Set of indices of blocks whose data was removed, and which are
+        # therefore skipped when loading serialized columns.
+        self._cleared_indices = cleared_indices if cleared_indices is not None else set()
+
+    def __deepcopy__(self, memo):
+        copied = _FieldColumns(self._serialized_columns, self._load_column, deepcopy(self._cleared_indices, memo))
+        copied._columns = deepcopy(self._columns, memo)
+        return copied
+
+    def field_names(self):
+        """
+        Returns the names of all fields with a column.
+        """
+        return self._columns.keys() + self._serialized_columns.keys()
+
+    def get(self, field_name, index):
+        """
+        Returns the value of the given field for the given block.
+
+        Raises KeyError if there is no such value.
+        """
+        column = self._get_column(field_name)
+        if column is None or index >= len(column) or column[index] is _MISSING:
+            raise KeyError(field_name)
+        return column[index]
+
+    def has_any(self, index):
+        """
+        Returns whether any field has a value for the given block.
+        """
+        for field_name in self.field_names():
+            try:
+                self.get(field_name, index)
+            except KeyError:
+                continue
+            return True
+        return False
+
+    def items(self, index):
+        """
+        Returns a dict of all field values of the given block.
+        """
+        values = {}
+        for field_name in self.field_names():
+            try:
+                values[field_name] = self.get(field_name, index)
+            except KeyError:
+                pass
+        return values
+
+    def set(self, field_name, index, value):
+        """
+        Sets the value of the given field for the given block.
+        """
+        column = self._get_column(field_name)
+        if column is None:
+            column = self._columns[field_name] = []
+        if index >= len(column):
+            column.extend([_MISSING] * (index + 1 - len(column)))
+        column[index] = value
+
+    def delete(self, field_name, index):
+        """
+        Deletes the value of the given field for the given block.
+
+        Raises KeyError if there is no such value.
+        """
+        self.get(field_name, index)
+        self._columns[field_name][index] = _MISSING
+
+    def clear(self, index):
+        """
+        Deletes all field values of the given block.
+        """
+        self._cleared_indices.add(index)
+        for column in self._columns.itervalues():
+            if index < len(column):
+                column[index] = _MISSING
+
+    def _get_column(self, field_name):
+        """
+        Returns the column for the given field, loading it if needed, or
+        None if there is no such column.
+        """
+        try:
+            return self._columns[field_name]
+        except KeyError:
+            pass
+        try:
+            serialized_column = self._serialized_columns.pop(field_name)
+        except KeyError:
+            return None
+
+        values = self._load_column(serialized_column)
+        column = [_MISSING] * (max(values) + 1 if values else 0)
+        for index, value in values.iteritems():
+            if index not in self._cleared_indices:
+                column[index] = value
+        self._columns[field_name] = column
+        return column
+
+
+class _CompactFieldData(object):
+    """
+    A view of a single block's values in a set of field columns, with the
+    same attribute interface as FieldData.
+    """
+    __slots__ = ('_columns', '_index')
+
+    def __init__(self, columns, index):
+        object.__setattr__(self, '_columns', columns)
+        object.__setattr__(self, '_index', index)
+
+    @property
+    def fields(self):
+        """
+        Returns a new dict of this block's field values.
+        """
+        return self._columns.items(self._index)
+
+    def __getattr__(self, field_name):
+        if field_name in _CompactFieldData.__slots__:
+            raise AttributeError(field_name)
+        try:
+            return self._columns.get(field_name, self._index)
+        except KeyError:
+            raise AttributeError("Field {0} does not exist".format(field_name))
+
+    def __setattr__(self, field_name, field_value):
+        self._columns.set(field_name, self._index, field_value)
+
+    def __delattr__(self, field_name):
+        try:
+            self._columns.delete(field_name, self._index)
+        except KeyError:
+            raise AttributeError("Field {0} does not exist".format(field_name))
+
+
+class _CompactTransformerDataMap(object):
+    """
+    A view of a single block's transformer data, with the same interface
+    as TransformerDataMap.
+    """
+    __slots__ = ('_block_structure', '_index')
+
+    def __init__(self, block_structure, index):
+        self._block_structure = block_structure
+        self._index = index
+
+    def __getitem__(self, key):
+        columns = self._block_structure._get_transformer_columns(_transformer_name(key))
+        if columns is None or not columns.has_any(self._index):
+            raise KeyError(key)
+        return _CompactFieldData(columns, self._index)
+
+    def __setitem__(self, key, value):
+        self._delete(key)
+        columns = self._block_structure._get_or_create_transformer_columns(_transformer_name(key))
+        for field_name, field_value in value.fields.iteritems():
+            columns.set(field_name, self._index, field_value)
+
+    def __delitem__(self, key):
+        self[key]
+        self._delete(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        """
+        Returns the TransformerData for the given key, or default if
+        not found.
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_or_create(self, key):
+        """
+        Returns the TransformerData associated with the given key,
+        creating it if needed.
+        """
+        columns = self._block_structure._get_or_create_transformer_columns(_transformer_name(key))
+        return _CompactFieldData(columns, self._index)
+
+    def keys(self):
+        """
+        Returns the names of all transformers with data for this block.
+        """
+        return [transformer_name for transformer_name, __ in self.iteritems()]
+
+    def iteritems(self):
+        """
+        Returns iterator of (transformer name, TransformerData) pairs.
+        """
+        for transformer_name in self._block_structure._transformer_names():
+            transformer_data = self.get(transformer_name)
+            if transformer_data is not None:
+                yield transformer_name, transformer_data
+
+    def _delete(self, key):
+        """
+        Deletes the given transformer's data for this block, if any.
+        """
+        columns = self._block_structure._get_transformer_columns(_transformer_name(key))
+        if columns is not None:
+            for field_name in columns.field_names():
+                try:
+                    columns.delete(field_name, self._index)
+                except KeyError:
+                    pass
+
+
+class _CompactBlockData(_CompactFieldData):
+    """
+    A view of a single block's data, with the same interface as BlockData.
+    """
+    __slots__ = ('_block_structure',)
+
+    def __init__(self, block_structure, index):
+        super(_CompactBlockData, self).__init__(block_structure._xblock_fields, index)
+        object.__setattr__(self, '_block_structure', block_structure)
+
+    @property
+    def location(self):
+        """
+        The usage key of the block.
+        """
+        return self._block_structure._block_keys[self._index]
+
+    @property
+    def transformer_data(self):
+        """
+        The map of transformer name to its block-specific data.
+        """
+        return _CompactTransformerDataMap(self._block_structure, self._index)
+
+    def __getattr__(self, field_name):
+        if field_name == '_block_structure':
+            raise AttributeError(field_name)
+        return super(_CompactBlockData, self).__getattr__(field_name)
+
+
+class CompactBlockStructureBlockData(BlockStructureBlockData):
+    """
+    Subclass of BlockStructureBlockData that keeps its relations and data
+    in integer-indexed arrays and columns rather than in per-block objects.
+    """
+    def __init__(self, root_block_usage_key):  # pylint: disable=super-init-not-called
+        # The usage key of the root block for this structure.
+        self.root_block_usage_key = root_block_usage_key
+
+        # Map of a transformer's name to its non-block-specific data.
+        self.transformer_data = TransformerDataMap()
+
+        # Usage keys of all known blocks, indexed by block index, and the
+        # map back to their indices.
+        # list [UsageKey], dict {UsageKey: int}
+        self._block_keys = []
+        self._block_indices = {}
+
+        # Whether each block is in the structure, and whether it has data.
+        self._is_present = bytearray()
+        self._has_data = bytearray()
+        self._num_blocks = 0
+
+        # CSR arrays of the relations of the first _num_csr_blocks blocks.
+        self._num_csr_blocks = 0
+        self._parent_offsets = array(_INDEX_TYPECODE, [0])
+        self._parent_indices = array(_INDEX_TYPECODE)
+        self._child_offsets = array(_INDEX_TYPECODE, [0])
+        self._child_indices = array(_INDEX_TYPECODE)
+
+        # Relations of blocks that changed since the CSR arrays were built.
+        # dict {int: list [int]}
+        self._parent_overrides = {}
+        self._child_overrides = {}
+
+        # Indices of blocks whose data was removed.
+        self._cleared_indices = set()
+
+        # Columns of the collected xBlock fields.
+        self._xblock_fields = _FieldColumns(cleared_indices=self._cleared_indices)
+
+        # Columns of the transformers' block data.
+        # dict {transformer name: _FieldColumns}
+        self._transformer_block_data = {}
+
+        # Serialized columns of transformers that have not been loaded yet.
+        # dict {transformer name: serialized dict {field name: serialized column}}
+        self._serialized_transformer_block_data = {}
+
+        # Functions for loading serialized columns, if any.
+        self._load_column = None
+        self._load_transformer_columns = None
+
+        self._add_block_index(root_block_usage_key)
+
+    @classmethod
+    def from_block_structure(cls, block_structure):
+        """
+        Returns a new compact block structure with the relations and data
+        of the given block structure.  The values of the given structure's
+        data are not copied.
+        """
+        compact = cls(block_structure.root_block_usage_key)
+        for block_key in block_structure.get_block_keys():
+            compact._add_block_index(block_key)
+        compact._set_csr_relations(
+            [
+                [compact._block_indices[parent] for parent in block_structure.get_parents(block_key)]
+                for block_key in compact._block_keys
+            ],
+            [
+                [compact._block_indices[child] for child in block_structure.get_children(block_key)]
+                for block_key in compact._block_keys
+            ],
+        )
+
+        for block_key, block_data in block_structure.iteritems():
+            compact_block_data = compact._get_or_create_block(block_key)
+            for field_name, value in block_data.fields.iteritems():
+                setattr(compact_block_data, field_name, value)
+            for transformer_name, transformer_block_data in block_data.transformer_data.iteritems():
+                compact_block_data.transformer_data[transformer_name] = transformer_block_data
+
+        compact.transformer_data = block_structure.transformer_data
+        return compact
+
+    @classmethod
+    def _create_from_columns(
+            cls,
+            root_block_usage_key,
+            block_keys,
+            num_related_blocks,
+            parents,
+            children,
+            blocks_with_data,
+            transformer_data,
+            serialized_xblock_fields,
+            serialized_transformer_block_data,
+            load_column,
+            load_transformer_columns,
+    ):
+        """
+        Returns a new compact block structure for the given deserialized
+        CSR arrays and serialized columns.
+
+        Arguments:
+            block_keys (list [UsageKey]) - The keys of all blocks, where
+                the first num_related_blocks are in the structure.
+
+            parents, children ((array, array)) - (offsets, indices) CSR
+                arrays of the relations of the blocks in the structure.
+
+            blocks_with_data (iterable [int]) - The indices of the blocks
+                that have data.
+
+            load_column (function) - Returns a dict {block index: value}
+                for a serialized column.
+
+            load_transformer_columns (function) - Returns a dict
+                {field name: serialized column} for a transformer's
+                serialized block data.
+        """
+        block_structure = cls(root_block_usage_key)
+        block_structure._block_keys = block_keys
+        block_structure._block_indices = {block_key: index for index, block_key in enumerate(block_keys)}
+        block_structure._is_present = bytearray([1]) * num_related_blocks + bytearray(len(block_keys) - num_related_blocks)
+        block_structure._num_blocks = num_related_blocks
+        block_structure._num_csr_blocks = num_related_blocks
+        block_structure._parent_offsets, block_structure._parent_indices = parents
+        block_structure._child_offsets, block_structure._child_indices = children
+
+        block_structure._has_data = bytearray(len(block_keys))
+        for index in blocks_with_data:
+            block_structure._has_data[index] = 1
+
+        block_structure.transformer_data = transformer_data
+        block_structure._xblock_fields = _FieldColumns(
+            serialized_xblock_fields,
+            load_column,
+            block_structure._cleared_indices,
+        )
+        block_structure._serialized_transformer_block_data = dict(serialized_transformer_block_data)
+        block_structure._load_column = load_column
+        block_structure._load_transformer_columns = load_transformer_columns
+        return block_structure
+
+    def copy(self):
+        """
+        Returns a new instance of CompactBlockStructureBlockData with a
+        deep-copy of this instance's contents.
+        """
+        copied = self.__class__.__new__(self.__class__)
+        # The CSR arrays are replaced rather than changed in place, so they
+        # can be shared with the copy.
+        copied.__dict__.update(self.__dict__)
+        copied._block_keys = list(self._block_keys)
+        copied._block_indices = dict(self._block_indices)
+        copied._is_present = bytearray(self._is_present)
+        copied._has_data = bytearray(self._has_data)
+        copied._parent_overrides = deepcopy(self._parent_overrides)
+        copied._child_overrides = deepcopy(self._child_overrides)
+        copied._cleared_indices = set(self._cleared_indices)
+        copied.transformer_data = deepcopy(self.transformer_data)
+        copied._xblock_fields = self._copy_columns(self._xblock_fields, copied._cleared_indices)
+        copied._transformer_block_data = {
+            transformer_name: self._copy_columns(columns, copied._cleared_indices)
+            for transformer_name, columns in self._transformer_block_data.iteritems()
+        }
+        copied._serialized_transformer_block_data = dict(self._serialized_transformer_block_data)
+        return copied
+
+    #--- Block structure relation methods ---#
+
+    def __len__(self):
+        return self._num_blocks
+
+    def get_parents(self, usage_key):
+        index = self._get_present_index(usage_key)
+        if index is None:
+            return []
+        return [self._block_keys[parent] for parent in self._get_parent_indices(index)]
+
+    def get_children(self, usage_key):
+        index = self._get_present_index(usage_key)
+        if index is None:
+            return []
+        return [self._block_keys[child] for child in self._get_child_indices(index)]
+
+    def set_root_block(self, usage_key):
+        index = self._block_indices[usage_key]
+        self.root_block_usage_key = usage_key
+        self._parent_overrides[index] = []
+
+    def __contains__(self, usage_key):
+        return self._get_present_index(usage_key) is not None
+
+    def get_block_keys(self):
+        return (
+            block_key
+            for block_key, is_present in izip(self._block_keys, self._is_present)
+            if is_present
+        )
+
+    #--- Block structure traversal methods ---#
+
+    def topological_traversal(
+            self,
+            filter_func=None,
+            yield_descendants_of_unyielded=False,
+            start_node=None,
+    ):
+        start_node = start_node or self.root_block_usage_key
+        if start_node not in self._block_indices:
+            return super(CompactBlockStructureBlockData, self).topological_traversal(
+                filter_func, yield_descendants_of_unyielded, start_node,
+            )
+        return self._traverse_topologically(
+            self._block_indices[start_node],
+            filter_func or (lambda __: True),
+            yield_descendants_of_unyielded,
+        )
+
+    def post_order_traversal(
+            self,
+            filter_func=None,
+            start_node=None,
+    ):
+        start_node = start_node or self.root_block_usage_key
+        if start_node not in self._block_indices:
+            return super(CompactBlockStructureBlockData, self).post_order_traversal(filter_func, start_node)
+        return self._traverse_post_order(
+            self._block_indices[start_node],
+            filter_func or (lambda __: True),
+        )
+
+    def _traverse_topologically(self, start_index, filter_func, yield_descendants_of_unyielded):
+        """
+        Generator for the topological traversal of the blocks starting at
+        the given index, with the same semantics as
+        openedx.core.lib.graph_traversals.traverse_topologically.
+        """
+        block_keys = self._block_keys
+        states = bytearray(len(block_keys))
+        stack = [start_index]
+
+        while stack:
+            index = stack.pop()
+
+            # Make sure all of the block's parents have been visited, and
+            # that any of them was yielded unless specified otherwise.
+            if index != start_index:
+                parents = self._get_parent_indices(index)
+                if not all(states[parent] for parent in parents):
+                    continue
+                elif not yield_descendants_of_unyielded and not any(states[parent] == _YIELDED for parent in parents):
+                    continue
+
+            if states[index] == _UNVISITED:
+                # Add the children before calling filter_func, which may
+                # remove the block from the structure.
+                stack.extend(reversed(self._get_child_indices(index)))
+
+                block_key = block_keys[index]
+                if filter_func(block_key):
+                    states[index] = _YIELDED
+                    yield block_key
+                else:
+                    states[index] = _VISITED
+
+    def _traverse_post_order(self, start_index, filter_func):
+        """
+        Generator for the post-order traversal of the blocks starting at
+        the given index, with the same semantics as
+        openedx.core.lib.graph_traversals.traverse_post_order.
+        """
+        block_keys = self._block_keys
+        visited = bytearray(len(block_keys))
+
+        # Stacks of the blocks being visited and the position of their
+        # next child to visit, or None if the block is yet to be filtered.
+        stack = [start_index]
+        positions = [None]
+
+        while stack:
+            index = stack[-1]
+            position = positions[-1]
+
+            if visited[index] or (position is None and not filter_func(block_keys[index])):
+                stack.pop()
+                positions.pop()
+                continue
+
+            children = self._get_child_indices(index)
+            position = position or 0
+            if position < len(children):
+                positions[-1] = position + 1
+                stack.append(children[position])
+                positions.append(None)
+            else:
+                visited[index] = 1
+                stack.pop()
+                positions.pop()
+                yield block_keys[index]
+
+    #--- Block data methods ---#
+
+    def iteritems(self):
+        return (
+            (self._block_keys[index], _CompactBlockData(self, index))
+            for index in self._data_indices()
+        )
+
+    def itervalues(self):
+        return (_CompactBlockData(self, index) for index in self._data_indices())
+
+    def __getitem__(self, usage_key):
+        index = self._block_indices[usage_key]
+        if not self._has_data[index]:
+            raise KeyError(usage_key)
+        return _CompactBlockData(self, index)
+
+    def get_xblock_field(self, usage_key, field_name, default=None):
+        index = self._block_indices.get(usage_key)
+        if index is None or not self._has_data[index]:
+            return default
+        try:
+            return self._xblock_fields.get(field_name, index)
+        except KeyError:
+            return default
+
+    def get_transformer_block_data(self, usage_key, transformer):
+        return self[usage_key].transformer_data[transformer]
+
+    def get_transformer_block_field(self, usage_key, transformer, key, default=None):
+        index = self._block_indices.get(usage_key)
+        if index is None or not self._has_data[index]:
+            return default
+        columns = self._get_transformer_columns(_transformer_name(transformer))
+        if columns is None:
+            return default
+        try:
+            return columns.get(key, index)
+        except KeyError:
+            return default
+
+    def remove_block(self, usage_key, keep_descendants):
+        index = self._get_present_index(usage_key)
+        if index is None:
+            raise KeyError(usage_key)
+        children = list(self._get_child_indices(index))
+        parents = list(self._get_parent_indices(index))
+
+        # Remove block from its children.
+        for child in children:
+            child_parents = list(self._get_parent_indices(child))
+            child_parents.remove(index)
+            self._parent_overrides[child] = child_parents
+
+        # Remove block from its parents.
+        for parent in parents:
+            parent_children = list(self._get_child_indices(parent))
+            parent_children.remove(index)
+            self._child_overrides[parent] = parent_children
+
+        # Remove block.
+        self._is_present[index] = 0
+        self._num_blocks -= 1
+        self._parent_overrides[index] = []
+        self._child_overrides[index] = []
+        self._clear_block_data(index)
+
+        # Recreate the graph connections if descendants are to be kept.
+        if keep_descendants:
+            for child in children:
+                for parent in parents:
+                    self._add_index_relation(parent, child)
+
+    #--- Internal methods ---#
+
+    def _prune_unreachable(self):
+        """
+        Mutates this block structure by removing any unreachable blocks,
+        and rebuilds its CSR relation arrays.
+        """
+        reachable = bytearray(len(self._block_keys))
+        for block_key in self.post_order_traversal():
+            reachable[self._block_indices[block_key]] = 1
+
+        num_blocks = 0
+        children = []
+        parents = [[] for __ in self._block_keys]
+        for index in xrange(len(self._block_keys)):
+            block_children = []
+            if reachable[index] and self._is_present[index]:
+                num_blocks += 1
+                for child in self._get_child_indices(index):
+                    if reachable[child] and self._is_present[child]:
+                        block_children.append(child)
+                        parents[child].append(index)
+            else:
+                reachable[index] = 0
+            children.append(block_children)
+
+        self._is_present = reachable
+        self._num_blocks = num_blocks
+        self._set_csr_relations(parents, children)
+
+    def _add_relation(self, parent_key, child_key):
+        self._add_index_relation(self._add_block_index(parent_key), self._add_block_index(child_key))
+
+    def _get_or_create_block(self, usage_key):
+        index = self._block_indices.get(usage_key)
+        if index is None:
+            index = self._add_key(usage_key)
+        self._has_data[index] = 1
+        return _CompactBlockData(self, index)
+
+    def _add_key(self, usage_key):
+        """
+        Adds the given usage key to the known blocks, without adding it to
+        the structure, and returns its index.
+        """
+        index = len(self._block_keys)
+        self._block_keys.append(usage_key)
+        self._block_indices[usage_key] = index
+        self._is_present.append(0)
+        self._has_data.append(0)
+        return index
+
+    def _add_block_index(self, usage_key):
+        """
+        Adds the given usage key to the structure, if not already present,
+        and returns its index.
+        """
+        index = self._block_indices.get(usage_key)
+        if index is None:
+            index = self._add_key(usage_key)
+        if not self._is_present[index]:
+            self._is_present[index] = 1
+            self._num_blocks += 1
+        return index
+
+    def _add_index_relation(self, parent, child):
+        """
+        Adds a parent to child relationship between the given indices.
+        """
+        self._parent_overrides[child] = list(self._get_parent_indices(child)) + [parent]
+        self._child_overrides[parent] = list(self._get_child_indices(parent)) + [child]
+
+    def _get_present_index(self, usage_key):
+        """
+        Returns the index of the given block if it is in the structure,
+        else None.
+        """
+        index = self._block_indices.get(usage_key)
+        if index is None or not self._is_present[index]:
+            return None
+        return index
+
+    def _get_parent_indices(self, index):
+        """
+        Returns the indices of the given block's parents.
+        """
+        try:
+            return self._parent_overrides[index]
+        except KeyError:
+            pass
+        if index < self._num_csr_blocks:
+            return self._parent_indices[self._parent_offsets[index]:self._parent_offsets[index + 1]]
+        return ()
+
+    def _get_child_indices(self, index):
+        """
+        Returns the indices of the given block's children.
+        """
+        try:
+            return self._child_overrides[index]
+        except KeyError:
+            pass
+        if index < self._num_csr_blocks:
+            return self._child_indices[self._child_offsets[index]:self._child_offsets[index + 1]]
+        return ()
+
+    def _set_csr_relations(self, parents, children):
+        """
+        Replaces the relations of all blocks with CSR arrays built from the
+        given lists of parent and child indices of each block.
+        """
+        self._parent_offsets, self._parent_indices = self._build_csr(parents)
+        self._child_offsets, self._child_indices = self._build_csr(children)
+        self._num_csr_blocks = len(parents)
+        self._parent_overrides = {}
+        self._child_overrides = {}
+
+    @staticmethod
+    def _build_csr(relations):
+        """
+        Returns the (offsets, indices) CSR arrays for the given list of
+        relation lists.
+        """
+        offsets = array(_INDEX_TYPECODE, [0])
+        indices = array(_INDEX_TYPECODE)
+        for related in relations:
+            indices.extend(related)
+            offsets.append(len(indices))
+        return offsets, indices
+
+    def _data_indices(self):
+        """
+        Returns iterator of the indices of the blocks with data.
+        """
+        return (index for index, has_data in enumerate(self._has_data) if has_data)
+
+    def _clear_block_data(self, index):
+        """
+        Removes all of the given block's data.
+        """
+        # Columns that are loaded later skip the block's values, since its
+        # index is added to the shared set of cleared indices.
+        self._has_data[index] = 0
+        self._xblock_fields.clear(index)
+        for columns in self._transformer_block_data.itervalues():
+            columns.clear(index)
+
+    def _transformer_names(self):
+        """
+        Returns the names of all transformers with block data.
+        """
+        return self._transformer_block_data.keys() + self._serialized_transformer_block_data.keys()
+
+    def _get_transformer_columns(self, transformer_name):
+        """
+        Returns the block data columns of the given transformer, or None
+        if it has none.
+        """
+        try:
+            return self._transformer_block_data[transformer_name]
+        except KeyError:
+            pass
+        try:
+            serialized = self._serialized_transformer_block_data.pop(transformer_name)
+        except KeyError:
+            return None
+
+        columns = _FieldColumns(self._load_transformer_columns(serialized), self._load_column, self._cleared_indices)
+        self._transformer_block_data[transformer_name] = columns
+        return columns
+
+    def _get_or_create_transformer_columns(self, transformer_name):
+        """
+        Returns the block data columns of the given transformer, creating
+        them if needed.
+        """
+        columns = self._get_transformer_columns(transformer_name)
+        if columns is None:
+            columns = _FieldColumns(cleared_indices=self._cleared_indices)
+            self._transformer_block_data[transformer_name] = columns
+        return columns
+
+    @staticmethod
+    def _copy_columns(columns, cleared_indices):
+        """
+        Returns a deep copy of the given columns, sharing the given set of
+        cleared indices.
+        """
+        copied = deepcopy(columns)
+        copied._cleared_indices = cleared_indices
+        return copied
@@ -0,0 +1,427 @@
+"""
+Module for the columnar serialization format of BlockStructure objects.
+
+Rather than pickling the block structure's objects as they are, the
+collected data is laid out as follows:
+
+    * Each block's usage key is stored once and referred to by its integer
+      index everywhere else.  Keys belonging to the root block's course
+      are reduced to their block type and block id, with each distinct
+      block type stored only once.
+    * Parent and child relations are stored as CSR-style integer arrays:
+      the relations of block i are the entries between offsets[i] and
+      offsets[i + 1].
+    * Collected xBlock fields are stored as one column per field name, and
+      transformer block data as one set of columns per transformer.  Each
+      column is pickled separately and only unpickled when a block's value
+      for it is first read, so a request only pays for the data that its
+      transformers actually use.
+
+The serialized data starts with a magic prefix that includes the format
+version, which lets readers tell it apart from the legacy pickled format.
+"""
+# pylint: disable=protected-access
+from array import array
+import cPickle as pickle
+import zlib
+
+from opaque_keys.edx.keys import UsageKey
+
+from .block_structure import (
+    BlockData,
+    BlockStructureBlockData,
+    TransformerData,
+    TransformerDataMap,
+    _BlockRelations,
+)
+from .compact import CompactBlockStructureBlockData
+
+
+# The latest version of the serialization format.  Incrementally update
+# this value whenever the layout changes.
+FORMAT_VERSION = 1
+
+_MAGIC_PREFIX = 'BSCOL'
+_HEADER = '{}{:03d}'.format(_MAGIC_PREFIX, FORMAT_VERSION)
+
+# Typecode of the integer arrays used for block indices.
+_INDEX_TYPECODE = 'i'
+
+
+def is_columnar(serialized_data):
+    """
+    Returns whether the given serialized data uses the columnar format,
+    of any version.
+    """
+    return serialized_data.startswith(_MAGIC_PREFIX)
+
+
+def serialize(block_structure):
+    """
+    Returns the columnar serialization of the given block structure.
+
+    Arguments:
+        block_structure (BlockStructureBlockData) - The block structure
+            whose relations and collected data are to be serialized.
+    """
+    # Index every block, starting with those in the structure.
+    block_keys = list(block_structure.get_block_keys())
+    num_related_blocks = len(block_keys)
+    block_keys.extend(block_key for block_key, __ in block_structure.iteritems() if block_key not in block_structure)
+    block_indices = {block_key: index for index, block_key in enumerate(block_keys)}
+
+    xblock_field_columns = {}
+    transformer_field_columns = {}
+    blocks_with_data = array(_INDEX_TYPECODE)
+    for block_key, block_data in block_structure.iteritems():
+        block_index = block_indices[block_key]
+        blocks_with_data.append(block_index)
+        if isinstance(block_data, _LazyBlockData):
+            block_data._materialize_all()
+        for field_name, value in block_data.fields.iteritems():
+            _append_to_column(xblock_field_columns.setdefault(field_name, ([], [])), block_index, value)
+        for transformer_name, transformer_block_data in block_data.transformer_data.iteritems():
+            columns = transformer_field_columns.setdefault(transformer_name, {})
+            for field_name, value in transformer_block_data.fields.iteritems():
+                _append_to_column(columns.setdefault(field_name, ([], [])), block_index, value)
+
+    payload = {
+        'keys': _encode_block_keys(block_keys, block_structure.root_block_usage_key),
+        'num_related_blocks': num_related_blocks,
+        'parents': _encode_relations(block_keys[:num_related_blocks], block_structure.get_parents, block_indices),
+        'children': _encode_relations(block_keys[:num_related_blocks], block_structure.get_children, block_indices),
+        'blocks_with_data': blocks_with_data.tostring(),
+        'transformer_data': pickle.dumps(block_structure.transformer_data, pickle.HIGHEST_PROTOCOL),
+        'xblock_fields': {
+            field_name: _dump_column(column)
+            for field_name, column in xblock_field_columns.iteritems()
+        },
+        'transformer_block_data': {
+            transformer_name: pickle.dumps(
+                {field_name: _dump_column(column) for field_name, column in columns.iteritems()},
+                pickle.HIGHEST_PROTOCOL,
+            )
+            for transformer_name, columns in transformer_field_columns.iteritems()
+        },
+    }
+    return _HEADER + zlib.compress(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+
+
+def deserialize(serialized_data, root_block_usage_key, compact=False):
+    """
+    Returns the block structure for the given columnar serialization.
+
+    Block relations are restored right away, while the collected fields
+    are only unpickled as they are accessed.
+
+    Arguments:
+        serialized_data (str) - Data previously returned by serialize.
+
+        root_block_usage_key (UsageKey) - The usage key of the root of
+            the serialized block structure.
+
+        compact (bool) - Whether to return a CompactBlockStructureBlockData,
+            which keeps the relations and columns as they are serialized,
+            rather than a BlockStructureBlockData.
+
+    Raises:
+        ValueError if the data is not in a supported version of the
+            columnar format.
+    """
+    if not serialized_data.startswith(_HEADER):
+        raise ValueError('Unsupported block structure serialization format: {!r}'.format(serialized_data[:8]))
+
+    payload = pickle.loads(zlib.decompress(serialized_data[len(_HEADER):]))
+    block_keys = _decode_block_keys(payload['keys'], root_block_usage_key)
+    num_related_blocks = payload['num_related_blocks']
+
+    if compact:
+        return CompactBlockStructureBlockData._create_from_columns(
+            root_block_usage_key,
+            block_keys,
+            num_related_blocks,
+            parents=tuple(_load_indices(serialized) for serialized in payload['parents']),
+            children=tuple(_load_indices(serialized) for serialized in payload['children']),
+            blocks_with_data=_load_indices(payload['blocks_with_data']),
+            transformer_data=pickle.loads(payload['transformer_data']),
+            serialized_xblock_fields=payload['xblock_fields'],
+            serialized_transformer_block_data=payload['transformer_block_data'],
+            load_column=_load_column,
+            load_transformer_columns=pickle.loads,
+        )
+
+    block_relations = {}
+    related_keys = block_keys[:num_related_blocks]
+    parents = _decode_relations(payload['parents'], related_keys, block_keys)
+    children = _decode_relations(payload['children'], related_keys, block_keys)
+    for block_key, block_parents, block_children in zip(related_keys, parents, children):
+        relations = _BlockRelations()
+        relations.parents = block_parents
+        relations.children = block_children
+        block_relations[block_key] = relations
+
+    columns = _LazyColumns(payload['xblock_fields'], payload['transformer_block_data'])
+    block_data_map = {}
+    for block_index in _load_indices(payload['blocks_with_data']):
+        block_key = block_keys[block_index]
+        block_data_map[block_key] = _LazyBlockData(block_key, block_index, columns)
+
+    block_structure = BlockStructureBlockData(root_block_usage_key)
+    block_structure._block_relations = block_relations
+    block_structure.transformer_data = pickle.loads(payload['transformer_data'])
+    block_structure._block_data_map = block_data_map
+    return block_structure
+
+
+def _append_to_column(column, block_index, value):
+    """
+    Appends the given block's value to the given (indices, values) column.
+    """
+    indices, values = column
+    indices.append(block_index)
+    values.append(value)
+
+
+def _dump_column(column):
+    """
+    Returns the serialization of the given (indices, values) column.
+    """
+    indices, values = column
+    return pickle.dumps((array(_INDEX_TYPECODE, indices).tostring(), values), pickle.HIGHEST_PROTOCOL)
+
+
+def _load_column(serialized_column):
+    """
+    Returns a map of block index to value for the given serialized column.
+    """
+    serialized_indices, values = pickle.loads(serialized_column)
+    return dict(zip(_load_indices(serialized_indices), values))
+
+
+def _load_indices(serialized_indices):
+    """
+    Returns the integer array serialized in the given string.
+    """
+    indices = array(_INDEX_TYPECODE)
+    indices.fromstring(serialized_indices)
+    return indices
+
+
+def _encode_block_keys(block_keys, root_block_usage_key):
+    """
+    Returns the compact representation of the given usage keys.
+    """
+    course_key = getattr(root_block_usage_key, 'course_key', None)
+    block_types = []
+    block_type_indices = {}
+    encoded_keys = []
+    for block_key in block_keys:
+        if course_key is not None and _is_course_usage_key(block_key, course_key):
+            block_type = block_key.block_type
+            if block_type not in block_type_indices:
+                block_type_indices[block_type] = len(block_types)
+                block_types.append(block_type)
+            encoded_keys.append((block_type_indices[block_type], block_key.block_id))
+        elif isinstance(block_key, UsageKey):
+            encoded_keys.append(unicode(block_key))
+        else:
+            # Keys that are not usage keys, such as those used in tests,
+            # are left to be pickled as they are.
+            encoded_keys.append(block_key)
+    return block_types, encoded_keys
+
+
+def _is_course_usage_key(block_key, course_key):
+    """
+    Returns whether the given usage key can be recreated from the given
+    course key and its own block type and block id.
+    """
+    return (
+        getattr(block_key, 'course_key', None) == course_key and
+        course_key.make_usage_key(block_key.block_type, block_key.block_id) == block_key
+    )
+
+
+def _decode_block_keys(encoded, root_block_usage_key):
+    """
+    Returns the usage keys for the given result of _encode_block_keys.
+    """
+    block_types, encoded_keys = encoded
+    decoded_keys = []
+    for encoded_key in encoded_keys:
+        if isinstance(encoded_key, tuple):
+            block_type_index, block_id = encoded_key
+            decoded_keys.append(
+                root_block_usage_key.course_key.make_usage_key(block_types[block_type_index], block_id)
+            )
+        elif isinstance(encoded_key, basestring):
+            decoded_keys.append(UsageKey.from_string(encoded_key))
+        else:
+            decoded_keys.append(encoded_key)
+    return decoded_keys
+
+
+def _encode_relations(block_keys, get_related, block_indices):
+    """
+    Returns the (offsets, indices) CSR arrays of the relation returned by
+    get_related for the given blocks, as strings.
+    """
+    offsets = array(_INDEX_TYPECODE, [0])
+    indices = array(_INDEX_TYPECODE)
+    for block_key in block_keys:
+        indices.extend(block_indices[related_key] for related_key in get_related(block_key))
+        offsets.append(len(indices))
+    return offsets.tostring(), indices.tostring()
+
+
+def _decode_relations(encoded, block_keys, all_block_keys):
+    """
+    Returns a list with the related usage keys of each of the given blocks,
+    for the given result of _encode_relations.
+    """
+    offsets, indices = (_load_indices(serialized) for serialized in encoded)
+    return [
+        [all_block_keys[index] for index in indices[offsets[position]:offsets[position + 1]]]
+        for position in xrange(len(block_keys))
+    ]
+
+
+class _LazyColumns(object):
+    """
+    The collected field columns of a deserialized block structure.  Each
+    column stays serialized until a value is first read from it.
+
+    Deep copies share the serialized columns but not the unpickled ones, so
+    values read from a copy are never shared with the original.
+    """
+    def __init__(self, serialized_xblock_fields, serialized_transformer_block_data):
+        # dict {field name: serialized column}
+        self._serialized_xblock_fields = serialized_xblock_fields
+
+        # dict {transformer name: serialized dict {field name: serialized column}}
+        self._serialized_transformer_block_data = serialized_transformer_block_data
+
+        # dict {field name: dict {block index: value}}
+        self._xblock_fields = {}
+
+        # dict {transformer name: dict {field name: dict {block index: value}}}
+        self._transformer_block_data = {}
+
+    def __deepcopy__(self, memo):
+        return _LazyColumns(self._serialized_xblock_fields, self._serialized_transformer_block_data)
+
+    def xblock_field_names(self):
+        """
+        Returns the names of all collected xBlock fields.
+        """
+        return self._serialized_xblock_fields.keys()
+
+    def transformer_names(self):
+        """
+        Returns the names of all transformers with block data.
+        """
+        return self._serialized_transformer_block_data.keys()
+
+    def get_xblock_field(self, block_index, field_name):
+        """
+        Returns the value of the given xBlock field for the given block.
+
+        Raises KeyError if there is no such value.
+        """
+        try:
+            column = self._xblock_fields[field_name]
+        except KeyError:
+            column = _load_column(self._serialized_xblock_fields[field_name])
+            self._xblock_fields[field_name] = column
+        return column[block_index]
+
+    def get_transformer_block_fields(self, block_index, transformer_name):
+        """
+        Returns a new dict of all of the given transformer's fields for
+        the given block.
+
+        Raises KeyError if the transformer has no data for the block.
+        """
+        try:
+            columns = self._transformer_block_data[transformer_name]
+        except KeyError:
+            columns = {
+                field_name: _load_column(serialized_column)
+                for field_name, serialized_column in pickle.loads(
+                    self._serialized_transformer_block_data[transformer_name]
+                ).iteritems()
+            }
+            self._transformer_block_data[transformer_name] = columns
+
+        fields = {
+            field_name: column[block_index]
+            for field_name, column in columns.iteritems()
+            if block_index in column
+        }
+        if not fields:
+            raise KeyError(transformer_name)
+        return fields
+
+
+class _LazyTransformerDataMap(TransformerDataMap):
+    """
+    A TransformerDataMap of a deserialized block, which creates each
+    transformer's TransformerData from the columns on first access.
+    """
+    def __init__(self, block_index, columns):
+        super(_LazyTransformerDataMap, self).__init__()
+        self._block_index = block_index
+        self._columns = columns
+
+    def __missing__(self, transformer_name):
+        transformer_data = TransformerData()
+        transformer_data.fields = self._columns.get_transformer_block_fields(self._block_index, transformer_name)
+        dict.__setitem__(self, transformer_name, transformer_data)
+        return transformer_data
+
+    def _materialize_all(self):
+        """
+        Creates the TransformerData of every transformer with data for
+        this block.
+        """
+        for transformer_name in self._columns.transformer_names():
+            try:
+                self[transformer_name]
+            except KeyError:
+                pass
+
+
+class _LazyBlockData(BlockData):
+    """
+    A BlockData of a deserialized block, which reads each xBlock field from
+    the columns on first access.
+    """
+    def class_field_names(self):
+        return super(_LazyBlockData, self).class_field_names() + ['_block_index', '_columns']
+
+    def __init__(self, usage_key, block_index, columns):
+        super(_LazyBlockData, self).__init__(usage_key)
+        self._block_index = block_index
+        self._columns = columns
+        self.transformer_data = _LazyTransformerDataMap(block_index, columns)
+
+    def __getattr__(self, field_name):
+        try:
+            return super(_LazyBlockData, self).__getattr__(field_name)
+        except AttributeError:
+            if self._is_own_field(field_name):
+                raise
+        try:
+            value = self._columns.get_xblock_field(self._block_index, field_name)
+        except KeyError:
+            raise AttributeError("Field {0} does not exist".format(field_name))
+        self.fields[field_name] = value
+        return value
+
+    def _materialize_all(self):
+        """
+        Reads all of this block's fields and transformer data from the columns.
+        """
+        for field_name in self._columns.xblock_field_names():
+            getattr(self, field_name, None)
+        self.transformer_data._materialize_all()
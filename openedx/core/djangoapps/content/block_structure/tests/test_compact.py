@@ -0,0 +1,184 @@
+"""
+Tests for block_structure/compact.py
+"""
+# pylint: disable=protected-access
+import itertools
+
+import ddt
+from nose.plugins.attrib import attr
+from unittest import TestCase
+
+from .. import serialization
+from ..block_structure import BlockStructureBlockData
+from ..compact import CompactBlockStructureBlockData
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+CHILDREN_MAPS = [
+    ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+    ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+    ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+]
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestCompactBlockStructure(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for CompactBlockStructureBlockData, verifying that it behaves
+    the same as BlockStructureBlockData.
+    """
+    def create_block_structure_with_data(self, children_map):
+        """
+        Returns a block structure for the given children_map, with
+        xBlock fields and transformer data on each block.
+        """
+        block_structure = self.create_block_structure(children_map)
+        block_structure._add_transformer(MockTransformer)
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            block_structure._get_or_create_block(block_key).display_name = u'Block {}'.format(block_id)
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'ids', [block_id])
+        return block_structure
+
+    def create_compact_block_structures(self, children_map):
+        """
+        Returns compact block structures for the given children_map,
+        converted and deserialized from a BlockStructureBlockData.
+        """
+        block_structure = self.create_block_structure_with_data(children_map)
+        return [
+            CompactBlockStructureBlockData.from_block_structure(self.create_block_structure_with_data(children_map)),
+            serialization.deserialize(
+                serialization.serialize(block_structure),
+                block_structure.root_block_usage_key,
+                compact=True,
+            ),
+        ]
+
+    def assert_data(self, block_structure, block_ids):
+        """
+        Verifies the data set by create_block_structure_with_data for the
+        given blocks.
+        """
+        for block_id in block_ids:
+            block_key = self.block_key_factory(block_id)
+            self.assertEquals(block_structure[block_key].display_name, u'Block {}'.format(block_id))
+            self.assertEquals(block_structure.get_xblock_field(block_key, 'display_name'), u'Block {}'.format(block_id))
+            self.assertEquals(block_structure.get_transformer_block_field(block_key, MockTransformer, 'ids'), [block_id])
+            self.assertEquals(block_structure[block_key].transformer_data[MockTransformer].ids, [block_id])
+
+    @ddt.data(*CHILDREN_MAPS)
+    def test_relations_and_data(self, children_map):
+        for block_structure in self.create_compact_block_structures(children_map):
+            self.assertIsInstance(block_structure, CompactBlockStructureBlockData)
+            self.assertEquals(len(block_structure), len(children_map))
+            self.assert_block_structure(block_structure, children_map)
+            self.assert_data(block_structure, range(len(children_map)))
+            self.assertIsNone(block_structure.get_xblock_field(self.block_key_factory(0), 'unknown'))
+            with self.assertRaises(KeyError):
+                block_structure.get_transformer_block_data(self.block_key_factory(0), 'unknown')
+
+    @ddt.data(*itertools.product(CHILDREN_MAPS, [True, False]))
+    @ddt.unpack
+    def test_traversals(self, children_map, yield_descendants_of_unyielded):
+        expected_structure = self.create_block_structure_with_data(children_map)
+        filter_func = lambda block_key: block_key != self.block_key_factory(1)
+
+        for block_structure in self.create_compact_block_structures(children_map):
+            self.assertEquals(
+                list(block_structure.topological_traversal()),
+                list(expected_structure.topological_traversal()),
+            )
+            self.assertEquals(
+                list(block_structure.topological_traversal(
+                    filter_func=filter_func,
+                    yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+                )),
+                list(expected_structure.topological_traversal(
+                    filter_func=filter_func,
+                    yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+                )),
+            )
+            self.assertEquals(
+                list(block_structure.post_order_traversal(filter_func=filter_func)),
+                list(expected_structure.post_order_traversal(filter_func=filter_func)),
+            )
+
+    @ddt.data(*itertools.product(CHILDREN_MAPS, [True, False], range(1, 7)))
+    @ddt.unpack
+    def test_remove_block(self, children_map, keep_descendants, block_to_remove):
+        if block_to_remove >= len(children_map):
+            return
+
+        expected_structure = self.create_block_structure_with_data(children_map)
+        expected_structure.remove_block(self.block_key_factory(block_to_remove), keep_descendants)
+        expected_structure._prune_unreachable()
+        expected_blocks = set(expected_structure.get_block_keys())
+
+        for block_structure in self.create_compact_block_structures(children_map):
+            block_structure.remove_block(self.block_key_factory(block_to_remove), keep_descendants)
+            block_structure._prune_unreachable()
+
+            self.assertEquals(set(block_structure.get_block_keys()), expected_blocks)
+            for block_key in expected_blocks:
+                self.assertEquals(
+                    set(block_structure.get_children(block_key)),
+                    set(expected_structure.get_children(block_key)),
+                )
+                self.assertEquals(
+                    set(block_structure.get_parents(block_key)),
+                    set(expected_structure.get_parents(block_key)),
+                )
+            self.assertNotIn(self.block_key_factory(block_to_remove), block_structure)
+            with self.assertRaises(KeyError):
+                block_structure[self.block_key_factory(block_to_remove)]
+
+    def test_remove_block_traversal(self):
+        for block_structure in self.create_compact_block_structures(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP):
+            block_structure.remove_block_traversal(lambda block_key: block_key == self.block_key_factory(2))
+            self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2])
+
+    def test_copy(self):
+        children_map = ChildrenMapTestMixin.LINEAR_CHILDREN_MAP
+        for block_structure in self.create_compact_block_structures(children_map):
+            new_copy = block_structure.copy()
+            self.assert_block_structure(new_copy, children_map)
+            self.assert_data(new_copy, range(len(children_map)))
+
+            # verify edits to the copy do not affect the original
+            new_copy.remove_block(self.block_key_factory(2), keep_descendants=True)
+            new_copy.get_transformer_block_field(self.block_key_factory(1), MockTransformer, 'ids').append(10)
+            new_copy.set_transformer_block_field(self.block_key_factory(3), MockTransformer, 'ids', [])
+            new_copy[self.block_key_factory(0)].display_name = u'Changed'
+
+            self.assert_block_structure(new_copy, [[1], [3], [], []], missing_blocks=[2])
+            self.assert_block_structure(block_structure, children_map)
+            self.assert_data(block_structure, range(len(children_map)))
+
+    def test_recreate_removed_block_data(self):
+        for block_structure in self.create_compact_block_structures(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP):
+            block_key = self.block_key_factory(3)
+            block_structure.remove_block(block_key, keep_descendants=False)
+            self.assertIsNone(block_structure.get_xblock_field(block_key, 'display_name'))
+
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'other', True)
+            self.assertIsNone(block_structure.get_xblock_field(block_key, 'display_name'))
+            self.assertIsNone(block_structure.get_transformer_block_field(block_key, MockTransformer, 'ids'))
+            self.assertEquals(
+                block_structure.get_transformer_block_data(block_key, MockTransformer).fields,
+                {'other': True},
+            )
+
+    def test_serialize(self):
+        children_map = ChildrenMapTestMixin.DAG_CHILDREN_MAP
+        for block_structure in self.create_compact_block_structures(children_map):
+            for compact in (True, False):
+                deserialized = serialization.deserialize(
+                    serialization.serialize(block_structure),
+                    block_structure.root_block_usage_key,
+                    compact=compact,
+                )
+                self.assertIsInstance(deserialized, BlockStructureBlockData)
+                self.assert_block_structure(deserialized, children_map)
+                self.assert_data(deserialized, range(len(children_map)))
@@ -0,0 +1,126 @@
+"""
+Tests for block_structure/serialization.py
+"""
+# pylint: disable=protected-access
+import ddt
+from nose.plugins.attrib import attr
+from unittest import TestCase
+
+from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
+
+from openedx.core.lib.cache_utils import zpickle
+
+from .. import serialization
+from ..store import BlockStructureStore
+from .helpers import ChildrenMapTestMixin, MockCache, MockTransformer, UsageKeyFactoryMixin
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestColumnarSerialization(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the columnar serialization of block structures.
+    """
+    def create_collected_block_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map, with
+        collected xBlock fields and transformer data.
+        """
+        block_structure = self.create_block_structure(children_map)
+        block_structure._add_transformer(MockTransformer)
+        block_structure.set_transformer_data(MockTransformer, 'version', 3)
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            block_data = block_structure._get_or_create_block(block_key)
+            block_data.display_name = u'Block {}'.format(block_id)
+            if block_id % 2:
+                block_data.graded = True
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'ids', [block_id])
+        return block_structure
+
+    def assert_collected_data(self, block_structure, children_map):
+        """
+        Verifies the data set by create_collected_block_structure.
+        """
+        self.assert_block_structure(block_structure, children_map)
+        self.assertEquals(block_structure.get_transformer_data(MockTransformer, 'version'), 3)
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            self.assertEquals(block_structure.get_xblock_field(block_key, 'display_name'), u'Block {}'.format(block_id))
+            self.assertEquals(block_structure.get_xblock_field(block_key, 'graded'), True if block_id % 2 else None)
+            self.assertEquals(block_structure.get_transformer_block_field(block_key, MockTransformer, 'ids'), [block_id])
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_round_trip(self, children_map):
+        block_structure = self.create_collected_block_structure(children_map)
+        serialized = serialization.serialize(block_structure)
+        self.assertTrue(serialization.is_columnar(serialized))
+
+        deserialized = serialization.deserialize(serialized, block_structure.root_block_usage_key)
+        self.assert_collected_data(deserialized, children_map)
+
+        # serializing lazily loaded blocks results in the same structure
+        reserialized = serialization.deserialize(
+            serialization.serialize(deserialized),
+            block_structure.root_block_usage_key,
+        )
+        self.assert_collected_data(reserialized, children_map)
+
+    def test_keys_outside_course(self):
+        children_map = self.SIMPLE_CHILDREN_MAP
+        block_structure = self.create_collected_block_structure(children_map)
+        other_key = BlockUsageLocator(CourseLocator('other', 'course', 'run'), 'html', 'external')
+        block_structure._add_relation(self.block_key_factory(2), other_key)
+        block_structure.set_transformer_block_field(other_key, MockTransformer, 'ids', [])
+
+        deserialized = serialization.deserialize(
+            serialization.serialize(block_structure),
+            block_structure.root_block_usage_key,
+        )
+        self.assertEquals(deserialized.get_children(self.block_key_factory(2)), [other_key])
+        self.assertEquals(deserialized.get_transformer_block_field(other_key, MockTransformer, 'ids'), [])
+
+    def test_copies_are_independent(self):
+        children_map = self.SIMPLE_CHILDREN_MAP
+        block_structure = serialization.deserialize(
+            serialization.serialize(self.create_collected_block_structure(children_map)),
+            self.block_key_factory(0),
+        )
+        block_key = self.block_key_factory(1)
+        copied = block_structure.copy()
+        copied.get_transformer_block_field(block_key, MockTransformer, 'ids').append(10)
+        copied[block_key].display_name = u'Changed'
+
+        self.assertEquals(copied.get_transformer_block_field(block_key, MockTransformer, 'ids'), [1, 10])
+        self.assertEquals(block_structure.get_transformer_block_field(block_key, MockTransformer, 'ids'), [1])
+        self.assertEquals(block_structure.get_xblock_field(block_key, 'display_name'), u'Block 1')
+
+    def test_missing_field(self):
+        block_structure = serialization.deserialize(
+            serialization.serialize(self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)),
+            self.block_key_factory(0),
+        )
+        self.assertIsNone(block_structure.get_xblock_field(self.block_key_factory(0), 'unknown'))
+        self.assertEquals(block_structure.get_xblock_field(self.block_key_factory(0), 'unknown', 'default'), 'default')
+
+    def test_unsupported_version(self):
+        with self.assertRaises(ValueError):
+            serialization.deserialize('BSCOL999', self.block_key_factory(0))
+
+    def test_legacy_format(self):
+        children_map = self.SIMPLE_CHILDREN_MAP
+        block_structure = self.create_collected_block_structure(children_map)
+        legacy_data = zpickle((
+            block_structure._block_relations,
+            block_structure.transformer_data,
+            block_structure._block_data_map,
+        ))
+        self.assertFalse(serialization.is_columnar(legacy_data))
+
+        store = BlockStructureStore(MockCache())
+        deserialized = store._deserialize(legacy_data, block_structure.root_block_usage_key)
+        self.assert_collected_data(deserialized, children_map)
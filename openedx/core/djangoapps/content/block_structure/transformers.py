@@ -70,6 +70,21 @@ class BlockStructureTransformers(object):
                 self._transformers['no_filter'].append(transformer)
         return self
 
+    def filtering_transformers(self):
+        """
+        Returns the list of transformers in the collection that support
+        filters, in the order that they were added.  These are run before
+        all other transformers.
+        """
+        return list(self._transformers['supports_filter'])
+
+    def non_filtering_transformers(self):
+        """
+        Returns the list of transformers in the collection that do not
+        support filters, in the order that they were added.
+        """
+        return list(self._transformers['no_filter'])
+
     @classmethod
     def collect(cls, block_structure):
         """
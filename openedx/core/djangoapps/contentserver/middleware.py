@@ -4,6 +4,7 @@ Middleware to serve assets.
 
 import logging
 import datetime
+import uuid
 log = logging.getLogger(__name__)
 try:
     import newrelic.agent
@@ -11,11 +12,13 @@ except ImportError:
     newrelic = None  # pylint: disable=invalid-name
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
-    HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect)
+    HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect,
+    StreamingHttpResponse)
+from django.utils.http import parse_etags, quote_etag
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
@@ -31,6 +34,12 @@ from .models import CourseAssetCacheTtlConfig, CdnUserAgentsConfig
 
 HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
 
+# How many bytes of an asset to read from the contentstore at once, the size of GridFS chunks.
+STREAM_CHUNK_SIZE = 255 * 1024
+
+# The largest number of ranges to send in a multipart/byteranges response.
+MAX_BYTE_RANGES = 20
+
 
 class StaticContentServer(object):
     """
@@ -108,24 +117,26 @@ class StaticContentServer(object):
 
             # Figure out if the client sent us a conditional request, and let them know
             # if this asset has changed since then.
-            last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            if self.is_not_modified(request, content):
+                return HttpResponseNotModified()
+
+            # Only now is the asset itself needed: stream it from the contentstore, unless
+            # it was already opened to load its metadata.
+            if not isinstance(content, StaticContentStream):
+                try:
+                    content = AssetManager.find(loc, as_stream=True)
+                except (ItemNotFoundError, NotFoundError):
+                    return HttpResponseNotFound()
 
-            # *** File streaming within a byte range ***
+            # *** File streaming within byte ranges ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
-            # Request -> Range attribute structure: "Range: bytes=first-[last]"
-            # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
-            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
+            # Request -> Range attribute structure: "Range: bytes=first-[last][, first-[last]]..."
+            # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength",
+            # in a multipart/byteranges message if there are several ranges.
+            # https://tools.ietf.org/html/rfc7233
             response = None
             if request.META.get('HTTP_RANGE'):
-                # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -138,37 +149,43 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif len(ranges) > MAX_BYTE_RANGES:
+                        # So many ranges are more likely an attack than a real client, send back the full content.
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            u"Too many ranges in Range header: %s for content: %s", header_value, unicode(loc)
                         )
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            response = HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Range'] = 'bytes */{length}'.format(length=content.length)
+                            return response
+
+                        if len(ranges) == 1:
+                            first, last = ranges[0]
+                            response = StreamingHttpResponse(
+                                content.stream_data_in_range(first, last, STREAM_CHUNK_SIZE)
+                            )
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
-
-                            if newrelic:
-                                newrelic.agent.add_custom_parameter('contentserver.ranged', True)
+                            response['Content-Type'] = content.content_type
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response = byteranges_response(content, ranges)
+                        response.status_code = 206  # Partial Content
+
+                        if newrelic:
+                            newrelic.agent.add_custom_parameter('contentserver.ranged', True)
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                response = StreamingHttpResponse(content.stream_data(STREAM_CHUNK_SIZE))
                 response['Content-Length'] = content.length
+                response['Content-Type'] = content.content_type
 
             if newrelic:
                 newrelic.agent.add_custom_parameter('contentserver.content_len', content.length)
@@ -176,7 +193,6 @@ class StaticContentServer(object):
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
             # middleware we have in place, there's no easy way to use the built-in Django
@@ -212,12 +228,28 @@ class StaticContentServer(object):
             response['Cache-Control'] = "private, no-cache, no-store"
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+        if content.content_digest:
+            response['ETag'] = quote_etag(content.content_digest)
 
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
         # caches a version of the response without CORS headers, in turn breaking XHR requests.
         force_header_for_response(response, 'Vary', 'Origin')
 
+    @staticmethod
+    def is_not_modified(request, content):
+        """
+        Determines whether the client sent a conditional request for the version of the
+        asset that it already has.  If-None-Match is checked against the asset digest in
+        preference to If-Modified-Since.
+        """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and content.content_digest:
+            return if_none_match.strip() == '*' or content.content_digest in parse_etags(if_none_match)
+
+        if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+        return if_modified_since == content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+
     @staticmethod
     def is_cdn_request(request):
         """
@@ -267,8 +299,12 @@ class StaticContentServer(object):
 
     def load_asset_from_location(self, location):
         """
-        Loads an asset based on its location, either retrieving it from a cache
+        Loads an asset based on its location, either retrieving its metadata from a cache,
         or loading it directly from the contentstore.
+
+        Only the metadata of assets is cached, as a StaticContent without data, whatever
+        their size.  When the asset is loaded from the contentstore, the StaticContentStream
+        of its data is returned.
         """
 
         # See if we can load this item from cache.
@@ -280,16 +316,49 @@ class StaticContentServer(object):
             except (ItemNotFoundError, NotFoundError):
                 raise
 
-            # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
-            # because it's the default for memcached and also we don't want to do too much
-            # buffering in memory when we're serving an actual request.
-            if content.length is not None and content.length < 1048576:
-                content = content.copy_to_in_mem()
-                set_cached_content(content)
+            # Now that we fetched it, let's go ahead and cache its metadata.
+            set_cached_content(content.copy_metadata())
 
         return content
 
 
+def byteranges_response(content, ranges):
+    """
+    Returns a multipart/byteranges response streaming the given (first, last) byte ranges
+    of the content, each in a part with its own Content-Range.
+    """
+    boundary = uuid.uuid4().hex
+    part_headers = []
+    for first, last in ranges:
+        part_header = '--{boundary}\r\n'.format(boundary=boundary)
+        if content.content_type:
+            part_header += 'Content-Type: {content_type}\r\n'.format(content_type=content.content_type)
+        part_header += 'Content-Range: bytes {first}-{last}/{length}\r\n\r\n'.format(
+            first=first, last=last, length=content.length
+        )
+        part_headers.append(part_header)
+    closing = '--{boundary}--\r\n'.format(boundary=boundary)
+
+    def stream_parts():
+        """
+        Yields the parts of the message, streaming the data of each range.
+        """
+        for part_header, (first, last) in zip(part_headers, ranges):
+            yield part_header
+            for chunk in content.stream_data_in_range(first, last, STREAM_CHUNK_SIZE):
+                yield chunk
+            yield '\r\n'
+        yield closing
+
+    response = StreamingHttpResponse(stream_parts())
+    response['Content-Type'] = 'multipart/byteranges; boundary={boundary}'.format(boundary=boundary)
+    response['Content-Length'] = str(
+        sum(len(part_header) + last - first + 1 + 2 for part_header, (first, last) in zip(part_headers, ranges)) +
+        len(closing)
+    )
+    return response
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
@@ -3,6 +3,7 @@ Helpers for accessing comprehensive theming related variables.
 """
 import os
 import re
+from collections import namedtuple
 from logging import getLogger
 
 from django.conf import ImproperlyConfigured, settings
@@ -15,6 +16,14 @@ from request_cache.middleware import RequestCache
 
 logger = getLogger(__name__)  # pylint: disable=invalid-name
 
+# The templates in the templates directory of a theme: the set of their paths
+# relative to the directory, and the modification times of the directory and
+# its subdirectories when the set was built.
+ThemeTemplateIndex = namedtuple('ThemeTemplateIndex', ['template_names', 'directory_mtimes'])
+
+# The ThemeTemplateIndex of each theme, by the path of its templates directory.
+_theme_template_indexes = {}
+
 
 def get_template_path(relative_path, **kwargs):
     """
@@ -71,14 +80,67 @@ def get_template_path_with_theme(relative_path):
     # strip `/` if present at the start of relative_path
     template_name = re.sub(r'^/+', '', relative_path)
 
-    template_path = theme.template_path / template_name
-    absolute_path = theme.path / "templates" / template_name
-    if absolute_path.exists():
-        return str(template_path)
+    if template_name in get_theme_template_index(theme).template_names:
+        return str(theme.template_path / template_name)
     else:
         return relative_path
 
 
+def get_theme_template_index(theme):
+    """
+    Returns the ThemeTemplateIndex of the templates that the given theme overrides.
+
+    The index of a theme is built the first time it is needed, and kept for the
+    lifetime of the process, so that checking whether a theme overrides a template
+    does not touch the filesystem.  When DEBUG is set, the index is rebuilt if any
+    of the theme's template directories have been modified since it was built, so
+    that templates added to a theme during development are picked up.
+
+    Parameters:
+        theme (Theme): the theme to get the index for
+
+    Returns:
+        (ThemeTemplateIndex): the index of the theme's templates
+    """
+    templates_dir = str(theme.path / "templates")
+    index = _theme_template_indexes.get(templates_dir)
+    if index is None or (settings.DEBUG and _is_theme_template_index_stale(index)):
+        index = _build_theme_template_index(templates_dir)
+        _theme_template_indexes[templates_dir] = index
+    return index
+
+
+def _build_theme_template_index(templates_dir):
+    """
+    Returns a ThemeTemplateIndex of the templates in the given directory.
+    """
+    template_names = set()
+    directory_mtimes = {templates_dir: _get_mtime(templates_dir)}
+    for dir_path, __, file_names in os.walk(templates_dir, followlinks=True):
+        directory_mtimes[dir_path] = _get_mtime(dir_path)
+        relative_dir = os.path.relpath(dir_path, templates_dir)
+        template_names.update(os.path.normpath(os.path.join(relative_dir, file_name)) for file_name in file_names)
+    return ThemeTemplateIndex(frozenset(template_names), directory_mtimes)
+
+
+def _is_theme_template_index_stale(index):
+    """
+    Returns whether any of the directories of the ThemeTemplateIndex have been
+    modified (or created or removed) since it was built.
+    """
+    return any(_get_mtime(path) != mtime for path, mtime in index.directory_mtimes.iteritems())
+
+
+def _get_mtime(path):
+    """
+    Returns the modification time of the path, or None if it does not exist.
+    """
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
 def get_all_theme_template_dirs():
     """
     Returns template directories for all the themes.
@@ -1,7 +1,10 @@
 """
 Test helpers for Comprehensive Theming.
 """
+import os
+
 from mock import patch, Mock
+from path import Path
 
 from django.test import TestCase, override_settings
 from django.conf import settings
@@ -10,8 +13,9 @@ from openedx.core.djangoapps.theming.tests.test_util import with_comprehensive_t
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
 from openedx.core.djangoapps.theming import helpers as theming_helpers
 from openedx.core.djangoapps.theming.helpers import get_template_path_with_theme, strip_site_theme_templates_path, \
-    get_themes, Theme, get_theme_base_dir
+    get_themes, Theme, get_theme_base_dir, get_theme_template_index
 from openedx.core.djangolib.testing.utils import skip_unless_cms, skip_unless_lms
+from openedx.core.lib.tempdir import mkdtemp_clean
 
 
 class TestHelpers(TestCase):
@@ -285,3 +289,51 @@ class TestHelpersCMS(TestCase):
         """
         template_path = strip_site_theme_templates_path('/red-theme/cms/templates/login.html')
         self.assertEqual(template_path, '/red-theme/cms/templates/login.html')
+
+
+class TestThemeTemplateIndex(TestCase):
+    """Test the index of the templates that a theme overrides."""
+
+    def setUp(self):
+        super(TestThemeTemplateIndex, self).setUp()
+        self.theme = Theme('index-theme', 'index-theme', Path(mkdtemp_clean()))
+        self.templates_dir = self.theme.path / 'templates'
+        (self.templates_dir / 'dashboard').makedirs()
+        (self.templates_dir / 'header.html').write_text(u'header')
+        (self.templates_dir / 'dashboard' / '_sidebar.html').write_text(u'sidebar')
+
+    def _add_template(self):
+        """
+        Adds a template to the theme, and makes sure that the modification time of its directory changes.
+        """
+        (self.templates_dir / 'dashboard' / 'new.html').write_text(u'new')
+        mtime = os.stat(self.templates_dir / 'dashboard').st_mtime + 10
+        os.utime(self.templates_dir / 'dashboard', (mtime, mtime))
+
+    def test_index(self):
+        self.assertEqual(
+            get_theme_template_index(self.theme).template_names,
+            {'header.html', os.path.join('dashboard', '_sidebar.html')},
+        )
+
+    def test_index_kept(self):
+        index = get_theme_template_index(self.theme)
+        self._add_template()
+        with patch('os.walk') as mock_walk:
+            self.assertIs(get_theme_template_index(self.theme), index)
+        self.assertFalse(mock_walk.called)
+
+    @override_settings(DEBUG=True)
+    def test_index_rebuilt_when_modified(self):
+        index = get_theme_template_index(self.theme)
+        self.assertIs(get_theme_template_index(self.theme), index)
+        self._add_template()
+        self.assertIn(os.path.join('dashboard', 'new.html'), get_theme_template_index(self.theme).template_names)
+
+    def test_template_path(self):
+        with patch('openedx.core.djangoapps.theming.helpers.get_current_theme', Mock(return_value=self.theme)):
+            self.assertEqual(
+                get_template_path_with_theme('/dashboard/_sidebar.html'),
+                str(self.theme.template_path / 'dashboard/_sidebar.html'),
+            )
+            self.assertEqual(get_template_path_with_theme('footer.html'), 'footer.html')
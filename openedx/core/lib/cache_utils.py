@@ -5,6 +5,7 @@ import collections
 import cPickle as pickle
 import functools
 import zlib
+from threading import Lock
 
 from xblock.core import XBlock
 
@@ -84,6 +85,44 @@ class memoized(object):  # pylint: disable=invalid-name
         return functools.partial(self.__call__, obj)
 
 
+class LRUCache(object):
+    """
+    A thread-safe map of bounded size that evicts its least recently used
+    entries.
+    """
+    def __init__(self):
+        self._entries = collections.OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """
+        Returns the value for the given key, or None if not found.
+        """
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._entries[key] = value
+            return value
+
+    def set(self, key, value, max_size):
+        """
+        Sets the value for the given key, evicting the least recently used
+        entries beyond max_size.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
 def hashvalue(arg):
     """
     If arg is an xblock, use its location. otherwise just turn it into a string
@@ -6,7 +6,7 @@ from unittest import TestCase
 import ddt
 from mock import MagicMock
 
-from openedx.core.lib.cache_utils import memoize_in_request_cache
+from openedx.core.lib.cache_utils import LRUCache, memoize_in_request_cache
 
 
 @ddt.ddt
@@ -63,3 +63,18 @@ class TestMemoizeInRequestCache(TestCase):
                 func_to_memoize(*arg_list2)
 
             self.assertEquals(self.func_to_count.call_count, 2)
+
+
+class TestLRUCache(TestCase):
+    """
+    Test the LRUCache class.
+    """
+    def test_lru_eviction(self):
+        lru_cache = LRUCache()
+        lru_cache.set('a', 1, max_size=2)
+        lru_cache.set('b', 2, max_size=2)
+        self.assertEquals(lru_cache.get('a'), 1)
+        lru_cache.set('c', 3, max_size=2)
+        self.assertIsNone(lru_cache.get('b'))
+        self.assertEquals(lru_cache.get('a'), 1)
+        self.assertEquals(lru_cache.get('c'), 3)